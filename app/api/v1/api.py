@@ -29,3 +29,19 @@ api_router.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboar
 # Admin routes - Pricing Population
 from app.api.v1.endpoints import populate_pricing
 api_router.include_router(populate_pricing.router, prefix="/populate-pricing", tags=["Pricing Population"])
+
+# Admin routes - Diagnostics
+from app.api.v1.endpoints import diagnostics
+api_router.include_router(diagnostics.router, prefix="/admin/diagnostics", tags=["Diagnostics"])
+
+# Admin routes - Background report jobs
+from app.api.v1.endpoints import reports
+api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
+
+# Admin routes - Lesson analytics (trends, utilization, growth)
+from app.api.v1.endpoints import analytics
+api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+
+# Admin routes - Archive of old lessons and payments
+from app.api.v1.endpoints import archive
+api_router.include_router(archive.router, prefix="/admin/archive", tags=["Archive"])
@@ -18,6 +18,7 @@ from app.core.pricing import (
 )
 from app.api.deps import get_current_admin
 from app.db import mongo_db
+from app.core import archive
 from datetime import datetime
 from bson import ObjectId
 from collections import defaultdict
@@ -337,7 +338,7 @@ def get_teacher_earnings(
         query["scheduled_date"] = date_query
     
     # Get all lessons for this teacher
-    lessons = list(mongo_db.lessons_collection.find(query))
+    lessons = archive.find(mongo_db.lessons_collection, query)
     
     # Group by subject AND lesson_type
     subject_data = defaultdict(lambda: {"hours": 0.0, "count": 0})
@@ -0,0 +1,296 @@
+"""
+Lesson Analytics Endpoints
+Weekly/monthly trends, teacher utilization and growth curves, read from the
+daily (teacher, day) lesson buckets instead of raw lessons, plus columnar
+group-by/pivot reports and Parquet/Arrow exports of lessons and payments
+"""
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from app.api.deps import get_current_admin
+from app.db import analytics, mongo_db
+from app.core import columnar, lesson_timeseries
+from app.core.config import config
+from app.core.pricing import PricingHistory, PricingTable
+from app.worker import backfill_daily_buckets
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+GRANULARITY_PATTERN = "^(week|month)$"
+EXPORT_FORMAT_PATTERN = "^(parquet|arrow)$"
+
+
+def _date_range(from_date: Optional[date], to_date: Optional[date], default_days: int) -> Tuple[datetime, datetime]:
+    """[start, end) datetimes for an inclusive from/to date range"""
+    end_day = to_date or datetime.utcnow().date()
+    start_day = from_date or end_day - timedelta(days=default_days - 1)
+    if start_day > end_day:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'",
+        )
+    start = datetime(start_day.year, start_day.month, start_day.day)
+    return start, datetime(end_day.year, end_day.month, end_day.day) + timedelta(days=1)
+
+
+@router.get("/trends")
+def get_lesson_trends(
+    current_admin: Dict = Depends(get_current_admin),
+    granularity: str = Query("week", pattern=GRANULARITY_PATTERN, description="week or month"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: a year before 'to')"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    teacher_id: Optional[str] = Query(None, description="Only this teacher")
+):
+    """
+    Admin gets lessons, hours (individual/group), students and active
+    teachers per week or month. Pending, approved and completed lessons count.
+    """
+    start, end = _date_range(from_date, to_date, 365)
+    buckets = lesson_timeseries.read_buckets(analytics(mongo_db.lessons_collection), start, end, teacher_id)
+    return {
+        "granularity": granularity,
+        "from": start.date(),
+        "to": (end - timedelta(days=1)).date(),
+        "teacher_id": teacher_id,
+        "series": lesson_timeseries.trend_series(buckets, start, end, granularity),
+    }
+
+
+@router.get("/growth")
+def get_lesson_growth(
+    current_admin: Dict = Depends(get_current_admin),
+    granularity: str = Query("month", pattern=GRANULARITY_PATTERN, description="week or month"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: a year before 'to')"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)")
+):
+    """
+    Admin gets the teaching-hours growth curve: hours per period, cumulative
+    hours and period-over-period growth (%)
+    """
+    start, end = _date_range(from_date, to_date, 365)
+    buckets = lesson_timeseries.read_buckets(analytics(mongo_db.lessons_collection), start, end)
+    series = lesson_timeseries.trend_series(buckets, start, end, granularity)
+    return {
+        "granularity": granularity,
+        "from": start.date(),
+        "to": (end - timedelta(days=1)).date(),
+        "series": lesson_timeseries.growth_curve(series),
+    }
+
+
+@router.get("/utilization")
+def get_teacher_utilization(
+    current_admin: Dict = Depends(get_current_admin),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: 4 weeks before 'to')"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    capacity_hours_per_week: Optional[float] = Query(
+        None, gt=0, description="Available hours per teacher per week (default: UTILIZATION_CAPACITY_HOURS_PER_WEEK)"
+    )
+):
+    """
+    Admin gets each active teacher's hours taught against their capacity
+    over the range, busiest first
+    """
+    start, end = _date_range(from_date, to_date, 28)
+    capacity = capacity_hours_per_week or config.UTILIZATION_CAPACITY_HOURS_PER_WEEK
+    buckets = lesson_timeseries.read_buckets(analytics(mongo_db.lessons_collection), start, end)
+    by_teacher = lesson_timeseries.teacher_utilization(buckets, start, end, capacity)
+    
+    teachers = analytics(mongo_db.users_collection).find(
+        {"role": "teacher", "$or": [{"status": "active"}, {"_id": {"$in": list(by_teacher)}}]},
+        {"first_name": 1, "last_name": 1, "username": 1}
+    )
+    rows = []
+    for teacher in teachers:
+        row = by_teacher.get(teacher["_id"]) or lesson_timeseries.idle_utilization(start, end, capacity)
+        full_name = f"{teacher.get('first_name') or ''} {teacher.get('last_name') or ''}".strip()
+        rows.append({"teacher_id": teacher["_id"], "teacher_name": full_name or teacher.get("username", ""), **row})
+    rows.sort(key=lambda row: (-row["hours"], row["teacher_name"].lower()))
+    
+    total_hours = sum(row["hours"] for row in rows)
+    total_capacity = sum(row["capacity_hours"] for row in rows)
+    return {
+        "from": start.date(),
+        "to": (end - timedelta(days=1)).date(),
+        "capacity_hours_per_week": capacity,
+        "overall_utilization_pct": round(total_hours / total_capacity * 100, 2) if total_capacity else None,
+        "teachers": rows,
+    }
+
+
+@router.post("/backfill", status_code=status.HTTP_202_ACCEPTED)
+def backfill_lesson_buckets(
+    current_admin: Dict = Depends(get_current_admin),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: all history)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: all history)")
+):
+    """
+    Admin rebuilds the daily lesson buckets from the lessons (in the
+    background). Needed once for lessons written before the buckets existed.
+    """
+    start = datetime(from_date.year, from_date.month, from_date.day) if from_date else None
+    end = datetime(to_date.year, to_date.month, to_date.day) + timedelta(days=1) if to_date else None
+    try:
+        backfill_daily_buckets.delay(start.isoformat() if start else None, end.isoformat() if end else None)
+    except Exception as e:
+        logger.error(f"❌ Could not enqueue lesson bucket backfill: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue the backfill, try again later",
+        )
+    return {"message": "Backfill queued", "from": from_date, "to": to_date}
+
+
+# ===== Columnar reports =====
+
+def _dataset_collection(dataset: str):
+    if dataset == "lessons":
+        return analytics(mongo_db.lessons_collection)
+    return analytics(mongo_db.payments_collection)
+
+
+def _report_range(from_date: Optional[date], to_date: Optional[date]) -> Tuple[datetime, datetime]:
+    """_date_range() defaulting to the last year, capped at COLUMNAR_MAX_DAYS"""
+    start, end = _date_range(from_date, to_date, 365)
+    if (end - start).days > config.COLUMNAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {config.COLUMNAR_MAX_DAYS} days",
+        )
+    return start, end
+
+
+def _split_list(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def _check_dimensions(dataset: columnar.Dataset, names: List[str]):
+    allowed = columnar.dimensions(dataset)
+    unknown = [name for name in names if name not in allowed]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Group by one or more of: {', '.join(allowed)}",
+        )
+
+
+def _load_report(dataset_name: str, from_date: Optional[date], to_date: Optional[date], lesson_status: Optional[str]):
+    """(dataset, columns, start, end) for a report request"""
+    dataset = columnar.DATASETS[dataset_name]
+    start, end = _report_range(from_date, to_date)
+    match = None
+    if dataset is columnar.LESSONS:
+        match = {"status": {"$in": _split_list(lesson_status) or list(lesson_timeseries.COUNTED_STATUSES)}}
+    columns = columnar.load_columns(_dataset_collection(dataset_name), dataset, start, end, match)
+    return dataset, columns, start, end
+
+
+def _measures(dataset: columnar.Dataset, columns, names: List[str]):
+    unknown = [name for name in names if name not in dataset.measures]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Measures for {dataset.name}: {', '.join(dataset.measures)}",
+        )
+    pricing_table = pricing_history = None
+    if "cost" in names:
+        pricing_table = PricingTable.load(mongo_db.pricing_collection)
+        pricing_history = PricingHistory.load(mongo_db.pricing_collection)
+    return {name: columnar.measure(columns, dataset, name, pricing_table, pricing_history) for name in names}
+
+
+@router.get("/report/{dataset}")
+def get_columnar_report(
+    dataset: str,
+    current_admin: Dict = Depends(get_current_admin),
+    group_by: str = Query(..., description="Comma-separated dimensions, e.g. teacher_name,subject"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: a year before 'to')"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    lesson_status: Optional[str] = Query(None, alias="status", description="Lessons only: comma-separated statuses (default: pending,approved,completed)")
+):
+    """
+    Admin gets every measure of lessons (lessons, hours, cost) or payments
+    (payments, amount) summed per combination of the group_by dimensions
+    """
+    if dataset not in columnar.DATASETS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown dataset '{dataset}'")
+    keys = _split_list(group_by)
+    _check_dimensions(columnar.DATASETS[dataset], keys)
+    dataset_info, columns, start, end = _load_report(dataset, from_date, to_date, lesson_status)
+    measures = _measures(dataset_info, columns, list(dataset_info.measures))
+    return {
+        "dataset": dataset,
+        "from": start.date(),
+        "to": (end - timedelta(days=1)).date(),
+        "group_by": keys,
+        "rows": columnar.group_by(columns, dataset_info, keys, measures),
+    }
+
+
+@router.get("/pivot/{dataset}")
+def get_columnar_pivot(
+    dataset: str,
+    current_admin: Dict = Depends(get_current_admin),
+    rows: str = Query(..., description="Comma-separated row dimensions, e.g. teacher_name,subject,education_level"),
+    columns: str = Query(..., description="Column dimension, e.g. lesson_type"),
+    value: str = Query(..., description="Measure: lessons, hours or cost (lessons); payments or amount (payments)"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: a year before 'to')"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    lesson_status: Optional[str] = Query(None, alias="status", description="Lessons only: comma-separated statuses (default: pending,approved,completed)")
+):
+    """
+    Admin gets a pivot table of one measure: a row per combination of the
+    row dimensions, a column per value of the column dimension, with totals
+    """
+    if dataset not in columnar.DATASETS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown dataset '{dataset}'")
+    row_keys = _split_list(rows)
+    _check_dimensions(columnar.DATASETS[dataset], row_keys + [columns])
+    dataset_info, loaded, start, end = _load_report(dataset, from_date, to_date, lesson_status)
+    values = _measures(dataset_info, loaded, [value])[value]
+    return {
+        "dataset": dataset,
+        "from": start.date(),
+        "to": (end - timedelta(days=1)).date(),
+        "rows_by": row_keys,
+        "columns_by": columns,
+        "value": value,
+        **columnar.pivot(loaded, dataset_info, row_keys, columns, values),
+    }
+
+
+@router.get("/export/{dataset}")
+def export_columnar(
+    dataset: str,
+    current_admin: Dict = Depends(get_current_admin),
+    export_format: str = Query("parquet", alias="format", pattern=EXPORT_FORMAT_PATTERN, description="parquet or arrow (IPC file)"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: a year before 'to')"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    lesson_status: Optional[str] = Query(None, alias="status", description="Lessons only: comma-separated statuses (default: pending,approved,completed)")
+):
+    """
+    Admin downloads lessons (with hours and cost per lesson) or payments for
+    the range as a Parquet or Arrow IPC file
+    """
+    if dataset not in columnar.DATASETS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown dataset '{dataset}'")
+    dataset_info, columns, start, end = _load_report(dataset, from_date, to_date, lesson_status)
+    if dataset_info is columnar.LESSONS:
+        columns.update(_measures(dataset_info, columns, ["hours", "cost"]))
+    try:
+        content = columnar.export_bytes(columns, export_format)
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet/Arrow export needs pyarrow installed on the server",
+        )
+    media_type, extension = columnar.EXPORT_FORMATS[export_format]
+    filename = f"{dataset}_{start:%Y-%m-%d}_{(end - timedelta(days=1)):%Y-%m-%d}.{extension}"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,47 @@
+"""
+Archive Endpoints
+Status of the lessons/payments archive and a trigger for the archive job
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict
+from app.api.deps import get_current_admin
+from app.db import mongo_db
+from app.core import archive
+from app.core.config import config
+from app.worker import run_archive
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("")
+def get_archive_status(current_admin: Dict = Depends(get_current_admin)):
+    """
+    Admin gets, per collection, the archive boundary (archived_before) and
+    every archived month with its document count and export file
+    """
+    return {
+        "archive_after_months": config.ARCHIVE_AFTER_MONTHS,
+        "next_horizon": archive.archive_horizon(),
+        "collections": archive.archive_status(mongo_db.db),
+    }
+
+
+@router.post("/run", status_code=status.HTTP_202_ACCEPTED)
+def run_archive_job(current_admin: Dict = Depends(get_current_admin)):
+    """
+    Admin moves lessons and payments older than ARCHIVE_AFTER_MONTHS to the
+    archive collections (in the background). Each month's payroll snapshot
+    and daily buckets are finalized before it moves.
+    """
+    try:
+        run_archive.delay()
+    except Exception as e:
+        logger.error(f"❌ Could not enqueue archive job: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue the archive job, try again later",
+        )
+    return {"message": "Archive job queued", "horizon": archive.archive_horizon()}
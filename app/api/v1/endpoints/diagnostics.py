@@ -0,0 +1,111 @@
+"""
+Diagnostics Endpoints
+Performance troubleshooting tools for admins
+"""
+from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Optional
+from app.api.deps import get_current_admin
+from app.core.config import config
+from app.core.profiler import ProfilerBusy, render_collapsed, sampling_profiler
+from app.core.slow_queries import slow_query_log
+from app.db.monitoring import pool_health
+
+router = APIRouter()
+
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    current_admin: Dict = Depends(get_current_admin),
+    collection: Optional[str] = Query(None, description="Only queries on this collection"),
+    collscan_only: bool = Query(False, description="Only queries whose captured plan is a collection scan")
+):
+    """
+    Admin views recent slow MongoDB queries (this worker process only)
+    
+    One entry per query shape (values redacted) with count, avg/max duration,
+    calling routes and, when captured, a summary of explain("executionStats").
+    """
+    entries = slow_query_log.entries()
+    if collection:
+        entries = [entry for entry in entries if entry["collection"] == collection]
+    if collscan_only:
+        entries = [entry for entry in entries if entry["explain"] and entry["explain"]["collection_scan"]]
+    
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "sample_rate": slow_query_log.sample_rate,
+        "total": len(entries),
+        "queries": entries
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(current_admin: Dict = Depends(get_current_admin)):
+    """
+    Admin clears the slow query log
+    """
+    slow_query_log.clear()
+
+
+@router.get("/pool")
+def get_pool_health(current_admin: Dict = Depends(get_current_admin)):
+    """
+    Admin views MongoDB connection pool health (this worker process only)
+    
+    Configured limits next to live open/in-use/waiting connections, checkout
+    wait, exhaustion (checkout timeouts) and connection churn, for the main
+    client and (under "analytics") the analytics client. Multiply each
+    max_pool_size by the number of worker processes to get the server-side
+    connection budget.
+    """
+    return pool_health()
+
+
+@router.get("/profile")
+def profile(
+    current_admin: Dict = Depends(get_current_admin),
+    seconds: int = Query(10, ge=1, description="How long to sample (capped by PROFILER_MAX_SECONDS)"),
+    interval_ms: int = Query(5, ge=1, le=100, description="Sampling interval in milliseconds"),
+    include_idle: bool = Query(False, description="Include threads parked waiting for work"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$", description="collapsed (flamegraph input) or json")
+):
+    """
+    Admin samples every thread of this worker process for N seconds
+    
+    Opt-in: requires PROFILER_ENABLED=True. Returns collapsed stacks
+    ("thread;module:function;... count" per line) for flamegraph.pl,
+    speedscope or inferno, or the top stacks as JSON.
+    """
+    if not config.PROFILER_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiler is disabled (set PROFILER_ENABLED=True)"
+        )
+    if seconds > config.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be at most {config.PROFILER_MAX_SECONDS}"
+        )
+    
+    try:
+        result = sampling_profiler.profile(seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running in this worker"
+        )
+    
+    if format == "collapsed":
+        return PlainTextResponse(render_collapsed(result["stacks"]))
+    
+    return {
+        "duration_seconds": result["duration_seconds"],
+        "interval_ms": interval_ms,
+        "samples": result["samples"],
+        "threads": result["threads"],
+        "stacks": [
+            {"stack": stack, "count": count}
+            for stack, count in result["stacks"].most_common(200)
+        ]
+    }
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from app.schemas.lesson import (
     LessonCreate,
     LessonResponse,
@@ -14,9 +14,19 @@ from app.models.lesson import Lesson
 from app.models.user import User
 from app.api.deps import get_current_user, get_current_admin, get_current_teacher
 from app.db import mongo_db
+from app.core import archive
+from app.core.lesson_costs import price_lesson
+from app.core.lesson_summary import summary_rows
+from app.utils.helpers import build_projection, project_document
+from app.worker import recompute_lesson_costs
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
 
 # ==================== TEACHER ENDPOINTS ====================
 
@@ -77,11 +87,15 @@ def get_my_lessons(
     year: Optional[int] = Query(None, ge=2000, le=2100, description="Filter by year"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    count_only: bool = Query(False, description="Only return totals and the individual/group breakdown"),
+    fields: Optional[str] = Query(None, description="Comma-separated lesson fields to return, e.g. id,subject,scheduled_date"),
 ):
     """
     Teacher gets their own lessons with filters and statistics
     - Filter by: type (individual/group), status, student name, month, year
     - Returns: lessons + total_lessons + total_hours + individual/group breakdown
+    - count_only=true: totals only, computed in the database over all matching lessons (skip/limit ignored)
+    - fields=...: only the listed fields per lesson
     """
     query = {"teacher_id": str(current_user["_id"])}
     
@@ -111,8 +125,70 @@ def get_my_lessons(
                 date_query["$lt"] = datetime(year + 1, 1, 1)
         query["scheduled_date"] = date_query
     
-    # Get lessons
-    lessons_docs = list(mongo_db.lessons_collection.find(query).skip(skip).limit(limit).sort("scheduled_date", -1))
+    if count_only:
+        # Count and sum per lesson type in the database (whole filter, no paging)
+        pipeline = [
+            {"$match": query},
+            {"$group": {
+                "_id": "$lesson_type",
+                "lessons": {"$sum": 1},
+                "total_minutes": {"$sum": "$duration_minutes"}
+            }}
+        ]
+        individual_lessons = individual_minutes = group_lessons = group_minutes = 0
+        results = archive.merge_grouped(archive.aggregate(mongo_db.lessons_collection, pipeline),
+                                        sums=("lessons", "total_minutes"))
+        for result in results:
+            if result["_id"] == "individual":
+                individual_lessons += result["lessons"]
+                individual_minutes += result["total_minutes"]
+            else:
+                group_lessons += result["lessons"]
+                group_minutes += result["total_minutes"]
+        
+        return {
+            "total_lessons": individual_lessons + group_lessons,
+            "total_hours": round((individual_minutes + group_minutes) / 60, 2),
+            "individual": {
+                "lessons": individual_lessons,
+                "hours": round(individual_minutes / 60, 2)
+            },
+            "group": {
+                "lessons": group_lessons,
+                "hours": round(group_minutes / 60, 2)
+            }
+        }
+    
+    # Duration and type are always fetched for the breakdown, and the date for
+    # ordering archived lessons, even if not requested
+    projection, requested_fields = build_projection(
+        fields, LessonResponse.model_fields, required_fields=("duration_minutes", "lesson_type", "scheduled_date")
+    )
+    
+    # Get lessons (archived months included)
+    lessons_docs = archive.find_newest(mongo_db.lessons_collection, query, projection, skip=skip, limit=limit)
+    
+    if projection:
+        # Breakdown straight from the projected documents
+        individual_minutes = sum(d.get("duration_minutes") or 0 for d in lessons_docs if d.get("lesson_type") == "individual")
+        group_minutes = sum(d.get("duration_minutes") or 0 for d in lessons_docs if d.get("lesson_type") != "individual")
+        individual_count = sum(1 for d in lessons_docs if d.get("lesson_type") == "individual")
+        group_count = len(lessons_docs) - individual_count
+        
+        return {
+            "total_lessons": len(lessons_docs),
+            "total_hours": round((individual_minutes + group_minutes) / 60, 2),
+            "individual": {
+                "lessons": individual_count,
+                "hours": round(individual_minutes / 60, 2)
+            },
+            "group": {
+                "lessons": group_count,
+                "hours": round(group_minutes / 60, 2)
+            },
+            "lessons": [project_document(doc, requested_fields) for doc in lessons_docs]
+        }
+    
     lessons = [Lesson.from_dict(doc) for doc in lessons_docs]
     
     # Calculate total hours using model method
@@ -174,48 +250,32 @@ def get_my_lessons(
 
 @router.get("/summary", response_model=Dict)
 def get_lessons_summary(
-    current_user: Dict = Depends(get_current_teacher)
+    current_user: Dict = Depends(get_current_teacher),
+    from_month: Optional[str] = Query(None, alias="from", pattern=MONTH_PATTERN, description="First month (YYYY-MM)"),
+    to_month: Optional[str] = Query(None, alias="to", pattern=MONTH_PATTERN, description="Last month, inclusive (YYYY-MM)")
 ):
     """
     Get detailed summary of lessons grouped by subject and type
+    Optional range: from/to months (YYYY-MM, inclusive)
     Returns breakdown like:
     - Mathematics individual: X lessons, Y hours
     - Mathematics group: X lessons, Y hours
     - Physics individual: X lessons, Y hours
     - etc.
+    
+    Past months come from per-month summary buckets; only the current
+    month onwards is aggregated from the lessons themselves.
     """
     teacher_id = str(current_user["_id"])
+    from_period = _month_period(from_month)
+    to_period = _month_period(to_month)
+    if from_period and to_period and from_period > to_period:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'",
+        )
     
-    # MongoDB aggregation pipeline
-    pipeline = [
-        # Match teacher's lessons
-        {"$match": {"teacher_id": teacher_id}},
-        
-        # Group by subject and type
-        {"$group": {
-            "_id": {
-                "subject": "$subject",
-                "lesson_type": "$lesson_type"
-            },
-            "total_lessons": {"$sum": 1},
-            "total_minutes": {"$sum": "$duration_minutes"},
-            "total_students": {"$sum": {"$size": "$students"}},
-            "pending_count": {
-                "$sum": {"$cond": [{"$eq": ["$status", "pending"]}, 1, 0]}
-            },
-            "completed_count": {
-                "$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}
-            },
-            "cancelled_count": {
-                "$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}
-            }
-        }},
-        
-        # Sort by subject and type
-        {"$sort": {"_id.subject": 1, "_id.lesson_type": 1}}
-    ]
-    
-    results = list(mongo_db.lessons_collection.aggregate(pipeline))
+    results = summary_rows(mongo_db.lessons_collection, teacher_id, from_period, to_period)
     
     # Format results
     summary_by_subject = {}
@@ -229,10 +289,10 @@ def get_lessons_summary(
     }
     
     for result in results:
-        subject = result["_id"]["subject"]
-        lesson_type = result["_id"]["lesson_type"]
-        total_lessons = result["total_lessons"]
-        total_hours = result["total_minutes"] / 60.0
+        subject = result["subject"]
+        lesson_type = result["lesson_type"]
+        total_lessons = result["lessons"]
+        total_hours = result["minutes"] / 60.0
         
         # Initialize subject if not exists
         if subject not in summary_by_subject:
@@ -265,10 +325,10 @@ def get_lessons_summary(
         type_key = "individual" if lesson_type == "individual" else "group"
         summary_by_subject[subject][type_key]["lessons"] = total_lessons
         summary_by_subject[subject][type_key]["hours"] = total_hours
-        summary_by_subject[subject][type_key]["students"] = result["total_students"]
-        summary_by_subject[subject][type_key]["pending"] = result["pending_count"]
-        summary_by_subject[subject][type_key]["completed"] = result["completed_count"]
-        summary_by_subject[subject][type_key]["cancelled"] = result["cancelled_count"]
+        summary_by_subject[subject][type_key]["students"] = result["students"]
+        summary_by_subject[subject][type_key]["pending"] = result["status"]["pending"]
+        summary_by_subject[subject][type_key]["completed"] = result["status"]["completed"]
+        summary_by_subject[subject][type_key]["cancelled"] = result["status"]["cancelled"]
         
         # Update overall stats
         overall_stats["total_lessons"] += total_lessons
@@ -281,10 +341,21 @@ def get_lessons_summary(
             overall_stats["group_lessons"] += total_lessons
             overall_stats["group_hours"] += total_hours
     
-    return {
+    response = {
         "overall": overall_stats,
         "by_subject": summary_by_subject
     }
+    if from_month or to_month:
+        response["range"] = {"from": from_month, "to": to_month}
+    return response
+
+
+def _month_period(month: Optional[str]) -> Optional[int]:
+    """'2025-03' -> 202503"""
+    if not month:
+        return None
+    year, month_number = month.split("-")
+    return int(year) * 100 + int(month_number)
 
 
 @router.put("/update-lesson/{lesson_id}", response_model=LessonResponse)
@@ -330,9 +401,10 @@ def update_lesson(
         update_data["lesson_type"] = update_data["lesson_type"].value
     
     if "status" in update_data:
-        # If marking as completed, set completed_at
+        # If marking as completed, set completed_at and store the lesson's cost
         if update_data["status"] == LessonStatus.COMPLETED:
             update_data["completed_at"] = datetime.utcnow()
+            update_data.update(price_lesson({**lesson.to_dict(), **update_data}, mongo_db.pricing_collection))
         update_data["status"] = update_data["status"].value
     
     # Update using model method
@@ -487,8 +559,8 @@ def get_all_lessons_admin(
                 date_query["$lt"] = datetime(year + 1, 1, 1)
         query["scheduled_date"] = date_query
     
-    # Get lessons
-    lessons_docs = list(mongo_db.lessons_collection.find(query).skip(skip).limit(limit).sort("scheduled_date", -1))
+    # Get lessons (archived months included)
+    lessons_docs = archive.find_newest(mongo_db.lessons_collection, query, skip=skip, limit=limit)
     lessons = [Lesson.from_dict(doc) for doc in lessons_docs]
     
     # Calculate total hours
@@ -544,11 +616,12 @@ def approve_lesson(
             detail=f"Cannot approve {lesson.status.value} lesson. Only pending lessons can be approved.",
         )
     
-    # Approve lesson
+    # Approve lesson, storing its cost as priced on its scheduled date
     lesson.approve()
     lesson.update_in_db(mongo_db.lessons_collection, {
         "status": lesson.status.value,
-        "updated_at": lesson.updated_at
+        "updated_at": lesson.updated_at,
+        **price_lesson(lesson.to_dict(), mongo_db.pricing_collection)
     })
     
     # Get updated lesson
@@ -620,3 +693,40 @@ def reject_lesson(
         updated_at=updated_lesson.updated_at,
         completed_at=updated_lesson.completed_at,
     )
+
+
+@router.post("/admin/recompute-costs", status_code=status.HTTP_202_ACCEPTED)
+def recompute_costs(
+    current_admin: Dict = Depends(get_current_admin),
+    from_date: Optional[date] = Query(None, alias="from", description="First scheduled day (default: no lower bound)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last scheduled day, inclusive (default: no upper bound)"),
+    pricing_id: Optional[str] = Query(None, description="Only lessons priced with this pricing entry"),
+    unpriced_only: bool = Query(False, description="Only lessons priced with the default prices")
+):
+    """
+    Admin reprices the cost stored on approved/completed lessons (in the
+    background), e.g. after correcting a price. Lessons are priced as of
+    their scheduled date; archived lessons keep their costs.
+    """
+    start = datetime.combine(from_date, datetime.min.time()) if from_date else None
+    end = datetime.combine(to_date + timedelta(days=1), datetime.min.time()) if to_date else None
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'",
+        )
+    
+    try:
+        recompute_lesson_costs.delay(
+            start.isoformat() if start else None,
+            end.isoformat() if end else None,
+            pricing_id,
+            unpriced_only,
+        )
+    except Exception as e:
+        logger.error(f"❌ Could not enqueue lesson cost recomputation: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue the recomputation, try again later",
+        )
+    return {"message": "Lesson cost recomputation queued", "from": start, "to": end, "pricing_id": pricing_id}
@@ -6,7 +6,10 @@ from app.schemas.payment import PaymentCreate, PaymentResponse, MonthlyPaymentsR
 from app.models.payment import Payment
 from app.api.deps import get_current_admin
 from app.db import mongo_db
-from app.core.pricing import get_subject_price
+from app.core import archive
+from app.core.lesson_costs import cost_totals
+from app.core.search import build_search_filter
+from app.utils.helpers import build_projection, project_document
 
 router = APIRouter()
 
@@ -52,6 +55,8 @@ def get_payments(
     month: Optional[int] = Query(None, ge=1, le=12, description="Filter by month (1-12)"),
     year: Optional[int] = Query(None, ge=2000, le=2100, description="Filter by year"),
     student_name: Optional[str] = Query(None, description="Filter by student name"),
+    count_only: bool = Query(False, description="Only return payment count and total amount"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,student_name,amount"),
 ):
     """
     Admin gets student payments with flexible filtering
@@ -67,6 +72,10 @@ def get_payments(
     
     Both filters:
     - If month + year + student_name: Show payments for that student in that month
+    
+    Response shaping:
+    - count_only=true: Only total_payments and total_amount (computed in the database)
+    - fields=...: Only the listed fields per payment
     """
     # Validate: if month is provided, year must also be provided
     if month is not None and year is None:
@@ -89,41 +98,60 @@ def get_payments(
     
     # Filter by student name if provided
     if student_name:
-        query["student_name"] = {"$regex": student_name, "$options": "i"}
-    
-    # Get payments from database
-    if query:
-        payment_docs = mongo_db.payments_collection.find(query).sort("payment_date", -1)
+        query.update(build_search_filter(student_name, Payment.SEARCH_FIELDS))
+    
+    if count_only:
+        # Count and sum in the database, no documents transferred
+        pipeline = [
+            {"$match": query},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "total": {"$sum": "$amount"}}}
+        ]
+        result = archive.merge_grouped(
+            archive.aggregate(mongo_db.payments_collection, pipeline), sums=("count", "total")
+        )
+        response = {
+            "total_payments": result[0]["count"] if result else 0,
+            "total_amount": round(result[0]["total"], 2) if result else 0
+        }
     else:
-        # No filters - get all payments
-        payment_docs = mongo_db.payments_collection.find({}).sort("payment_date", -1)
-    
-    payments = [Payment.from_dict(doc) for doc in payment_docs]
-    
-    # Calculate total amount
-    total_amount = Payment.calculate_total(payments)
-    
-    # Convert to response
-    payment_responses = [
-        PaymentResponse(
-            id=payment._id,
-            student_name=payment.student_name,
-            student_email=payment.student_email,
-            amount=payment.amount,
-            payment_date=payment.payment_date,
-            lesson_id=payment.lesson_id,
-            notes=payment.notes,
-            created_at=payment.created_at,
+        # Always fetch amount for the total and the date to sort by, even if not requested
+        projection, requested_fields = build_projection(
+            fields, PaymentResponse.model_fields, required_fields=("amount", "payment_date")
         )
-        for payment in payments
-    ]
-    
-    # Build response
-    response = {
-        "total_payments": len(payments),
-        "total_amount": total_amount,
-        "payments": payment_responses
-    }
+        
+        # Get payments from database
+        payment_docs = archive.find(mongo_db.payments_collection, query, projection)
+        payment_docs.sort(key=lambda doc: doc.get("payment_date") or datetime.min, reverse=True)
+        
+        # Calculate total amount
+        total_amount = round(sum(doc.get("amount") or 0 for doc in payment_docs), 2)
+        
+        if projection:
+            payment_responses = [project_document(doc, requested_fields) for doc in payment_docs]
+        else:
+            payments = [Payment.from_dict(doc) for doc in payment_docs]
+            
+            # Convert to response
+            payment_responses = [
+                PaymentResponse(
+                    id=payment._id,
+                    student_name=payment.student_name,
+                    student_email=payment.student_email,
+                    amount=payment.amount,
+                    payment_date=payment.payment_date,
+                    lesson_id=payment.lesson_id,
+                    notes=payment.notes,
+                    created_at=payment.created_at,
+                )
+                for payment in payments
+            ]
+        
+        # Build response
+        response = {
+            "total_payments": len(payment_docs),
+            "total_amount": total_amount,
+            "payments": payment_responses
+        }
     
     # Add filter info if filters were applied
     if month and year:
@@ -244,45 +272,17 @@ def get_student_cost_summary(
             end_date = datetime(year, month + 1, 1)
         lesson_query["scheduled_date"] = {"$gte": start_date, "$lt": end_date}
     
-    # Get all lessons for this student
-    lessons = list(mongo_db.lessons_collection.find(lesson_query))
-    
-    # Calculate total lesson cost
-    total_cost = 0.0
-    missing_subjects = []
-    for lesson in lessons:
-        subject = lesson.get("subject", "")
-        education_level = lesson.get("education_level", "elementary")
-        lesson_type = lesson.get("lesson_type", "individual")
-        duration_minutes = lesson.get("duration_minutes", 0)
-        hours = duration_minutes / 60
-        
-        # Get price per hour from pricing system
-        from app.models.pricing import Pricing
-        pricing = Pricing.find_by_subject_and_level(subject, education_level, mongo_db.pricing_collection)
-        
-        if pricing:
-            price_per_hour = pricing.get_price(lesson_type)
-        else:
-            # Subject not found, use default
-            from app.core.pricing import DEFAULT_INDIVIDUAL_PRICE, DEFAULT_GROUP_PRICE
-            price_per_hour = DEFAULT_INDIVIDUAL_PRICE if lesson_type.lower() == "individual" else DEFAULT_GROUP_PRICE
-            missing_subjects.append({
-                "subject": subject,
-                "education_level": education_level,
-                "lesson_type": lesson_type,
-                "used_default_price": price_per_hour
-            })
-        
-        lesson_cost = hours * price_per_hour
-        total_cost += lesson_cost
+    # Sum the costs stored at approval/completion (lessons without one are priced here)
+    totals = cost_totals(mongo_db.lessons_collection, lesson_query, mongo_db.pricing_collection)
+    total_cost = totals["total_cost"]
+    missing_subjects = totals["unpriced"]
     
     # Get total paid
     payment_query = {"student_name": {"$regex": student_name, "$options": "i"}}
     if month and year:
         payment_query["payment_date"] = {"$gte": start_date, "$lt": end_date}
     
-    payments = list(mongo_db.payments_collection.find(payment_query))
+    payments = archive.find(mongo_db.payments_collection, payment_query)
     total_paid = sum(p.get("amount", 0) for p in payments)
     
     # Calculate outstanding balance
@@ -293,7 +293,7 @@ def get_student_cost_summary(
         "total_lessons_cost": round(total_cost, 2),
         "total_paid": round(total_paid, 2),
         "outstanding_balance": outstanding_balance,
-        "lessons_count": len(lessons),
+        "lessons_count": totals["lessons_count"],
         "payments_count": len(payments),
         "currency": "USD"
     }
@@ -7,20 +7,35 @@ Teachers and public can query pricing.
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List, Dict, Optional
+from datetime import datetime
 from app.schemas.pricing import (
     PricingCreate,
     PricingUpdate,
     PricingResponse,
     PricingListResponse,
-    PricingLookupResponse
+    PricingLookupResponse,
+    PricingHistoryResponse,
+    PricingVersionResponse
 )
-from app.models.pricing import Pricing
+from app.models.pricing import EARLIEST_EFFECTIVE_FROM, Pricing
 from app.api.deps import get_current_admin, get_current_user, get_optional_user
 from app.db import mongo_db
+from app.worker import recompute_lesson_costs
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _queue_cost_recomputation(**filters):
+    """Reprice stored lesson costs a pricing write affects; never fails the write"""
+    try:
+        recompute_lesson_costs.delay(**filters)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not queue lesson cost recomputation ({filters}), run it from /lessons/admin/recompute-costs: {str(e)}")
+
+
 # ===== Admin Endpoints (CRUD) =====
 
 @router.post("/", response_model=PricingResponse, status_code=status.HTTP_201_CREATED)
@@ -53,6 +68,8 @@ def create_pricing(
     )
     
     new_pricing.save(mongo_db.pricing_collection)
+    # Lessons of this subject were costed at the default prices
+    _queue_cost_recomputation(unpriced_only=True)
     
     return PricingResponse(
         id=new_pricing._id,
@@ -112,7 +129,9 @@ def get_pricing_by_id(
         subject=pricing.subject,
         education_level=pricing.education_level,
         individual_price=pricing.individual_price,
-        group_price=pricing.group_price
+        group_price=pricing.group_price,
+        version=pricing.version,
+        effective_from=pricing.effective_from
     )
 
 
@@ -126,6 +145,8 @@ def update_pricing(
     Admin updates pricing
     - Can update prices or education level
     - Cannot change to existing subject + education_level combination
+    - A price change is a new version effective from `effective_from`
+      (default: today); lessons scheduled earlier keep the old prices
     """
     pricing = Pricing.find_by_id(pricing_id, mongo_db.pricing_collection)
     
@@ -140,8 +161,9 @@ def update_pricing(
     new_level = pricing_update.education_level.value if pricing_update.education_level else pricing.education_level.value
     
     # Only check if subject or education_level is being changed
-    if (pricing_update.subject and pricing_update.subject != pricing.subject) or \
-       (pricing_update.education_level and pricing_update.education_level != pricing.education_level):
+    renamed = (pricing_update.subject and pricing_update.subject != pricing.subject) or \
+              (pricing_update.education_level and pricing_update.education_level != pricing.education_level)
+    if renamed:
         if Pricing.subject_and_level_exists(new_subject, new_level, mongo_db.pricing_collection, exclude_id=pricing_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -150,19 +172,73 @@ def update_pricing(
     
     # Update fields
     update_data = pricing_update.model_dump(exclude_unset=True)
+    effective_from = update_data.pop("effective_from", None)
+    
+    # Versions are appended in date order and never take effect in the future
+    if effective_from is not None:
+        if effective_from > datetime.utcnow():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="effective_from cannot be in the future"
+            )
+        if pricing.effective_from > EARLIEST_EFFECTIVE_FROM and effective_from.date() < pricing.effective_from.date():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"effective_from cannot be before the current prices took effect ({pricing.effective_from.date()})"
+            )
     
     for field, value in update_data.items():
         if hasattr(pricing, field):
             setattr(pricing, field, value)
     
-    pricing.update_in_db(mongo_db.pricing_collection)
+    previous_version = pricing.version
+    pricing.update_in_db(mongo_db.pricing_collection, effective_from)
+    if renamed:
+        # Lessons costed with this entry under its old name, and lessons of the
+        # new name that were costed at the default prices
+        _queue_cost_recomputation(pricing_id=pricing._id)
+        _queue_cost_recomputation(unpriced_only=True)
+    elif pricing.version != previous_version:
+        # Lessons already costed on or after the new version's date
+        _queue_cost_recomputation(pricing_id=pricing._id, start=pricing.effective_from.isoformat())
     
     return PricingResponse(
         id=pricing._id,
         subject=pricing.subject,
         education_level=pricing.education_level,
         individual_price=pricing.individual_price,
-        group_price=pricing.group_price
+        group_price=pricing.group_price,
+        version=pricing.version,
+        effective_from=pricing.effective_from
+    )
+
+
+@router.get("/{pricing_id}/history", response_model=PricingHistoryResponse)
+def get_pricing_history(
+    pricing_id: str,
+    current_user: Dict = Depends(get_current_admin)
+):
+    """
+    Admin gets every price version of a pricing entry, oldest first
+    """
+    pricing = Pricing.find_by_id(pricing_id, mongo_db.pricing_collection)
+    
+    if not pricing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pricing not found"
+        )
+    
+    versions = Pricing.get_history(pricing_id, mongo_db.pricing_collection)
+    if not versions:
+        # Not changed since before pricing history existed
+        versions = [pricing.version_document()]
+    
+    return PricingHistoryResponse(
+        pricing_id=pricing._id,
+        subject=pricing.subject,
+        education_level=pricing.education_level.value if hasattr(pricing.education_level, 'value') else pricing.education_level,
+        versions=[PricingVersionResponse(**{field: doc[field] for field in PricingVersionResponse.model_fields}) for doc in versions]
     )
 
 
@@ -183,6 +259,8 @@ def delete_pricing(
         )
     
     Pricing.delete(pricing_id, mongo_db.pricing_collection)
+    # Lessons costed with this entry fall back to another level's or the default prices
+    _queue_cost_recomputation(pricing_id=pricing_id)
     return None
 
 
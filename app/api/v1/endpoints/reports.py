@@ -0,0 +1,120 @@
+"""
+Report Job Endpoints
+Heavy reports built in the background (Celery), polled by job id
+"""
+from fastapi import APIRouter, Depends, Query, Request, HTTPException, status
+from fastapi.responses import Response
+from typing import Dict, Optional
+from app.api.deps import get_current_admin
+from app.core import reports
+from app.worker import run_report
+import gzip
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/{kind}", status_code=status.HTTP_202_ACCEPTED)
+def enqueue_report(
+    kind: str,
+    current_admin: Dict = Depends(get_current_admin),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Filter by month (1-12)"),
+    year: Optional[int] = Query(None, ge=2000, le=2100, description="Filter by year"),
+    status_filter: Optional[str] = Query(None, alias="status", description="teachers-detailed: teacher status"),
+    lesson_status: Optional[str] = Query(None, description="teachers-detailed: lesson status to count"),
+    education_level: Optional[str] = Query(None, description="students-detailed: education level"),
+    is_active: Optional[bool] = Query(None, description="students-detailed: active students only")
+):
+    """
+    Admin queues a report job
+    
+    Kinds: students-payment-status, teacher-earnings, teachers-detailed,
+    students-detailed. Returns the job (202); poll GET /reports/{job_id}.
+    An identical job that is still queued or running is returned instead
+    of starting another one.
+    """
+    if kind not in reports.REPORT_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown report kind. Available: {', '.join(reports.REPORT_KINDS)}"
+        )
+    
+    _, accepted = reports.REPORT_KINDS[kind]
+    given = {
+        "month": month,
+        "year": year,
+        "status": status_filter,
+        "lesson_status": lesson_status,
+        "education_level": education_level,
+        "is_active": is_active,
+    }
+    params = {key: value for key, value in given.items() if key in accepted}
+    
+    job, created = reports.create_job(kind, params, current_admin)
+    if created:
+        try:
+            run_report.delay(job["_id"])
+        except Exception as e:
+            logger.error(f"❌ Could not enqueue report job {job['_id']}: {str(e)}")
+            reports.mark_failed(job["_id"], "Could not enqueue job")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Report queue is unavailable"
+            )
+        # Eager mode has already run the job
+        job = reports.get_job(job["_id"]) or job
+    
+    return reports.job_summary(job)
+
+
+@router.get("/{job_id}")
+def get_report_job(
+    job_id: str,
+    current_admin: Dict = Depends(get_current_admin)
+):
+    """
+    Admin polls a report job (status, timings, sizes and result_url once done)
+    """
+    job = reports.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found or expired"
+        )
+    return reports.job_summary(job)
+
+
+@router.get("/{job_id}/result")
+def get_report_result(
+    job_id: str,
+    request: Request,
+    current_admin: Dict = Depends(get_current_admin)
+):
+    """
+    Admin downloads a finished report as JSON
+    
+    The stored gzip blob is sent as-is (Content-Encoding: gzip) to clients
+    that accept gzip, and decompressed otherwise.
+    """
+    job = reports.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found or expired"
+        )
+    if job["status"] != reports.JOB_SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report job is {job['status']}"
+        )
+    
+    blob = bytes(job["result"])
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=blob,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    return Response(content=gzip.decompress(blob), media_type="application/json")
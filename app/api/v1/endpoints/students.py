@@ -2,16 +2,23 @@
 Student Management Endpoints
 """
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from app.schemas.student import (
     StudentCreate,
     StudentUpdate,
     StudentResponse,
-    StudentListResponse
+    StudentListResponse,
+    StudentFieldsListResponse,
+    StudentCountResponse,
+    StudentSuggestion,
+    StudentAutocompleteResponse
 )
 from app.models.student import Student
 from app.api.deps import get_current_admin, get_current_user, get_current_admin_or_teacher
 from app.db import mongo_db
+from app.core.search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from app.core.autocomplete import student_name_index
+from app.utils.helpers import build_projection, project_document
 
 router = APIRouter()
 
@@ -42,6 +49,7 @@ def create_student(
     )
     
     new_student.save(mongo_db.students_collection)
+    student_name_index.add(new_student, mongo_db.students_collection)
     
     return StudentResponse(
         id=new_student._id,
@@ -55,16 +63,36 @@ def create_student(
     )
 
 
-@router.get("/", response_model=StudentListResponse)
+# Unset fields are left out, so a sparse list never gains the fields it didn't ask for
+@router.get(
+    "/",
+    response_model=Union[StudentListResponse, StudentFieldsListResponse, StudentCountResponse],
+    response_model_exclude_unset=True,
+)
 def get_all_students(
     include_inactive: bool = False,
+    count_only: bool = Query(False, description="Only return the number of students"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,full_name"),
     current_user: Dict = Depends(get_current_user)
 ):
     """
     Get all students
     - Teachers and admins can view
     - Optional: include inactive students
+    - Optional: count_only=true returns just the total
+    - Optional: fields=id,full_name returns only those fields (e.g. for dropdowns)
     """
+    query = {} if include_inactive else {"is_active": True}
+    
+    if count_only:
+        return StudentCountResponse(total=mongo_db.students_collection.count_documents(query))
+    
+    projection, requested_fields = build_projection(fields, StudentResponse.model_fields)
+    if projection:
+        student_docs = mongo_db.students_collection.find(query, projection).sort("full_name", 1)
+        students = [project_document(doc, requested_fields) for doc in student_docs]
+        return StudentFieldsListResponse(total=len(students), students=students)
+    
     if include_inactive:
         students = Student.get_all(mongo_db.students_collection)
     else:
@@ -93,14 +121,16 @@ def get_all_students(
 @router.get("/search", response_model=StudentListResponse)
 def search_students(
     name: str = Query(..., min_length=1, description="Search by student name"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT, description="Maximum number of results"),
     current_user: Dict = Depends(get_current_user)
 ):
     """
     Search students by name
     - Teachers and admins can search
-    - Case-insensitive, partial match
+    - Case-insensitive, matches the start of any word in the name
+    - Ranked: exact matches first, then names starting with the query
     """
-    students = Student.find_by_name(name, mongo_db.students_collection)
+    students = Student.find_by_name(name, mongo_db.students_collection, limit=limit)
     
     student_responses = [
         StudentResponse(
@@ -122,6 +152,25 @@ def search_students(
     )
 
 
+@router.get("/autocomplete", response_model=StudentAutocompleteResponse)
+def autocomplete_students(
+    q: str = Query(..., min_length=1, description="Beginning of any word in the student name"),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT, description="Maximum number of suggestions"),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Autocomplete active student names (typeahead)
+    - Teachers and admins can use it
+    - Served from an in-memory index, no database query per keystroke
+    """
+    suggestions = student_name_index.search(q, mongo_db.students_collection, limit=limit)
+    
+    return StudentAutocompleteResponse(
+        total=len(suggestions),
+        students=[StudentSuggestion(**s) for s in suggestions]
+    )
+
+
 @router.get("/{student_id}", response_model=StudentResponse)
 def get_student_by_id(
     student_id: str,
@@ -184,6 +233,7 @@ def update_student(
             setattr(student, field, value)
     
     student.update_in_db(mongo_db.students_collection, update_data)
+    student_name_index.update(student, mongo_db.students_collection)
     
     return StudentResponse(
         id=student._id,
@@ -214,5 +264,6 @@ def delete_student(
         )
     
     student.delete(mongo_db.students_collection)
+    student_name_index.remove(student_id, mongo_db.students_collection)
     return None
 
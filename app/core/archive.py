@@ -0,0 +1,320 @@
+"""
+Archive tier for old lessons and payments.
+
+Months older than ARCHIVE_AFTER_MONTHS are moved, oldest first, from
+'lessons'/'payments' to 'lessons_archive'/'payments_archive' and exported
+to compressed files (gzipped NDJSON, or Parquet when pyarrow is installed)
+under ARCHIVE_EXPORT_DIR. Before a lessons month moves, its rollups are
+finalized: the daily buckets are rebuilt and the payroll snapshot is built
+if it doesn't exist yet.
+
+'archive_state' keeps one document per collection with archived_before,
+the end of the last archived month. Every archived document is older
+than that, so readers use sources() to decide which collections to read:
+the hot one always, and the archive only when the query's date range
+starts before archived_before. Archived months are read-only.
+"""
+
+import gzip
+import logging
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import ReplaceOne
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_STATE_COLLECTION = "archive_state"
+
+# hot collection -> (archive collection, date field)
+ARCHIVES: Dict[str, Tuple[str, str]] = {
+    "lessons": ("lessons_archive", "scheduled_date"),
+    "payments": ("payments_archive", "payment_date"),
+}
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+
+
+# ===== Reading =====
+
+def archived_before(collection) -> Optional[datetime]:
+    """End of the last archived month for a hot collection, or None"""
+    if collection is None or getattr(collection, "name", None) not in ARCHIVES:
+        return None
+    state = collection.database[ARCHIVE_STATE_COLLECTION].find_one({"_id": collection.name})
+    value = state.get("archived_before") if isinstance(state, dict) else None
+    return value if isinstance(value, datetime) else None
+
+
+def _range_start(match: Optional[Dict[str, Any]], field: str) -> Optional[datetime]:
+    """Lower bound a filter puts on the date field (None if unbounded)"""
+    condition = (match or {}).get(field)
+    if isinstance(condition, datetime):
+        return condition
+    if isinstance(condition, dict):
+        bound = condition.get("$gte", condition.get("$gt"))
+        if isinstance(bound, datetime):
+            return bound
+    return None
+
+
+def sources(collection, match: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Collections to read for a filter: the hot collection, plus its archive
+    when the filter's date range reaches before archived_before
+    """
+    boundary = archived_before(collection)
+    if boundary is None:
+        return [collection]
+    archive_name, field = ARCHIVES[collection.name]
+    start = _range_start(match, field)
+    if start is not None and start >= boundary:
+        return [collection]
+    return [collection, collection.database[archive_name]]
+
+
+def find(collection, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """find() over the hot collection and, if reached, its archive"""
+    documents = []
+    for source in sources(collection, query):
+        documents.extend(source.find(query, projection))
+    return documents
+
+
+def find_newest(
+    collection,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    find() newest first by the date field, paged over the hot collection
+    and, if reached, its archive
+
+    Each source returns at most skip + limit documents; the page is cut
+    after merging them (the projection must keep the date field).
+    """
+    field = ARCHIVES[collection.name][1]
+    collections = sources(collection, query)
+    documents = []
+    for source in collections:
+        cursor = source.find(query, projection).sort(field, -1)
+        if len(collections) == 1:
+            cursor = cursor.skip(skip)
+            return list(cursor.limit(limit) if limit else cursor)
+        documents.extend(cursor.limit(skip + limit) if limit else cursor)
+    documents.sort(key=lambda doc: doc.get(field) or datetime.min, reverse=True)
+    return documents[skip:skip + limit] if limit else documents[skip:]
+
+
+def aggregate(collection, pipeline: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Run a pipeline (starting with its $match) on every source
+
+    Returns:
+        One result list per source, for the caller to combine
+    """
+    match = pipeline[0].get("$match") if pipeline else None
+    return [list(source.aggregate(pipeline)) for source in sources(collection, match)]
+
+
+def _group_key(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _group_key(item)) for key, item in value.items()))
+    return value
+
+
+def merge_grouped(
+    results: Iterable[List[Dict[str, Any]]],
+    sums: Iterable[str] = (),
+    maxes: Iterable[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Combine per-source $group results with the same _id: add `sums`
+    (dotted paths allowed one level deep), keep the largest of `maxes`
+    """
+    sums, maxes = tuple(sums), tuple(maxes)
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for rows in results:
+        for row in rows:
+            key = _group_key(row["_id"])
+            total = merged.get(key)
+            if total is None:
+                merged[key] = {name: dict(value) if isinstance(value, dict) else value for name, value in row.items()}
+                continue
+            for name in sums:
+                if "." in name:
+                    outer, inner = name.split(".", 1)
+                    total[outer][inner] = (total[outer].get(inner) or 0) + (row[outer].get(inner) or 0)
+                else:
+                    total[name] = (total.get(name) or 0) + (row.get(name) or 0)
+            for name in maxes:
+                if row.get(name) is not None and (total.get(name) is None or row[name] > total[name]):
+                    total[name] = row[name]
+    return list(merged.values())
+
+
+# ===== Export =====
+
+def _export_path(collection_name: str, year: int, month: int, export_format: str) -> str:
+    extension = "parquet" if export_format == "parquet" else "ndjson.gz"
+    return os.path.join(config.ARCHIVE_EXPORT_DIR, collection_name, f"{year:04d}-{month:02d}.{extension}")
+
+
+def export_documents(documents: List[Dict[str, Any]], collection_name: str, year: int, month: int,
+                     export_format: Optional[str] = None) -> str:
+    """
+    Write one month of documents to ARCHIVE_EXPORT_DIR/<collection>/YYYY-MM.*
+
+    Parquet (zstd) needs pyarrow; without it, or for documents Arrow can't
+    type, the month is written as gzipped NDJSON (MongoDB extended JSON).
+
+    Returns:
+        Path of the written file
+    """
+    export_format = export_format or config.ARCHIVE_EXPORT_FORMAT
+    if export_format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            path = _export_path(collection_name, year, month, "parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(pa.Table.from_pylist(documents), path, compression="zstd")
+            return path
+        except ImportError:
+            logger.warning("⚠️ pyarrow is not installed, exporting archive as NDJSON")
+        except (ValueError, TypeError, NotImplementedError) as e:
+            logger.warning(f"⚠️ {collection_name} {year}-{month:02d} can't be written as Parquet, using NDJSON: {str(e)}")
+
+    path = _export_path(collection_name, year, month, "ndjson")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        for document in documents:
+            handle.write(json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS))
+            handle.write("\n")
+    return path
+
+
+# ===== Archiving =====
+
+def _month_after(moment: datetime) -> datetime:
+    return datetime(moment.year + 1, 1, 1) if moment.month == 12 else datetime(moment.year, moment.month + 1, 1)
+
+
+def archive_horizon(now: Optional[datetime] = None, months: Optional[int] = None) -> datetime:
+    """First day of the oldest month that stays hot"""
+    now = now or datetime.utcnow()
+    months = config.ARCHIVE_AFTER_MONTHS if months is None else months
+    index = now.year * 12 + (now.month - 1) - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def archive_collection(
+    collection,
+    horizon: datetime,
+    finalize_month: Optional[Callable[[int, int], None]] = None,
+    export_format: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Move every month before `horizon` from a hot collection to its archive,
+    oldest first.
+
+    Each month is copied (idempotent upserts), exported, recorded in
+    archive_state and then deleted from the hot collection, so an
+    interrupted run is simply resumed by the next one.
+
+    Args:
+        collection: Hot collection ('lessons' or 'payments')
+        horizon: Months starting before this are archived
+        finalize_month: Called with (year, month) before a month moves
+
+    Returns:
+        One entry per archived month: year, month, documents, export path
+    """
+    archive_name, field = ARCHIVES[collection.name]
+    archive = collection.database[archive_name]
+    state = collection.database[ARCHIVE_STATE_COLLECTION]
+    archived = []
+
+    while True:
+        oldest = collection.find_one({field: {"$type": "date", "$lt": horizon}}, {field: 1}, sort=[(field, 1)])
+        if oldest is None:
+            break
+        start = datetime(oldest[field].year, oldest[field].month, 1)
+        end = _month_after(start)
+        if finalize_month:
+            finalize_month(start.year, start.month)
+
+        month_query = {field: {"$gte": start, "$lt": end}}
+        documents = list(collection.find(month_query))
+        for offset in range(0, len(documents), config.ARCHIVE_BATCH_SIZE):
+            batch = documents[offset:offset + config.ARCHIVE_BATCH_SIZE]
+            archive.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch], ordered=False)
+        path = export_documents(documents, collection.name, start.year, start.month, export_format)
+
+        state.update_one(
+            {"_id": collection.name},
+            {
+                "$max": {"archived_before": end},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$push": {"months": {
+                    "year": start.year, "month": start.month, "documents": len(documents),
+                    "export_path": path, "archived_at": datetime.utcnow(),
+                }},
+            },
+            upsert=True,
+        )
+        collection.delete_many({"_id": {"$in": [doc["_id"] for doc in documents]}})
+        archived.append({"year": start.year, "month": start.month, "documents": len(documents), "export_path": path})
+        logger.info(f"🗄️ Archived {len(documents)} {collection.name} from {start:%Y-%m} to {path}")
+
+    return archived
+
+
+def archive_status(database) -> Dict[str, Any]:
+    """archive_state for every archived collection"""
+    states = {doc["_id"]: doc for doc in database[ARCHIVE_STATE_COLLECTION].find({})}
+    result = {}
+    for name, (archive_name, _) in ARCHIVES.items():
+        state = states.get(name) or {}
+        result[name] = {
+            "archive_collection": archive_name,
+            "archived_before": state.get("archived_before"),
+            "months": state.get("months", []),
+        }
+    return result
+
+
+def run_archive(db, now: Optional[datetime] = None, export_format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Archive lessons and payments older than ARCHIVE_AFTER_MONTHS.
+
+    A lessons month is finalized first: its daily buckets are rebuilt and
+    its payroll snapshot is built unless a current one exists. The monthly
+    summary buckets keep counting archived lessons as they are.
+
+    Args:
+        db: The connected MongoDatabase (mongo_db)
+    """
+    # Imported here: both modules read through this one
+    from app.core import lesson_timeseries, payroll
+
+    def finalize_lessons_month(year: int, month: int):
+        start, end = payroll.month_range(year, month)
+        lesson_timeseries.backfill_daily_buckets(db.lessons_collection, start, end)
+        payroll.get_payroll_snapshot(
+            db.payroll_snapshots_collection, db.lessons_collection, db.users_collection,
+            db.pricing_collection, year, month, generated_by="archive",
+        )
+
+    horizon = archive_horizon(now)
+    return {
+        "horizon": horizon,
+        "lessons": archive_collection(db.lessons_collection, horizon, finalize_lessons_month, export_format),
+        "payments": archive_collection(db.payments_collection, horizon, export_format=export_format),
+    }
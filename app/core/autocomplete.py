@@ -0,0 +1,233 @@
+"""
+In-memory student name autocomplete.
+
+Active student names are kept in a process-local sorted array of
+normalized keys (one key per word suffix of the name, so "ali" finds both
+"Ali Hassan" and "Mohammed Ali"). Prefix lookups are a bisect plus a short
+scan and never touch MongoDB.
+
+The index is built lazily on first use and updated incrementally by the
+student endpoints. Changes made by other workers arrive from the
+invalidation bus (per student with change streams) or show up as a moved
+'students' version counter (checked at most every
+AUTOCOMPLETE_REFRESH_SECONDS).
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional
+
+from app.core.config import config
+from app.core.cache_versions import get_version
+from app.core.invalidation import LOCAL, RESET, InvalidationEvent, invalidation_bus
+from app.core.metrics import record_cache_lookup
+from app.core.search import normalize_text, score_match
+from app.models.student import Student
+
+
+# Upper bound on keys scanned per lookup before ranking
+MAX_SCAN_RESULTS = 500
+
+# Name reported in cache_hit_ratio (a rebuild counts as a miss)
+CACHE_NAME = "student_autocomplete"
+
+
+def _name_keys(full_name: Optional[str]) -> List[str]:
+    """Build one key per word suffix of the normalized name"""
+    tokens = normalize_text(full_name).split(" ")
+    return [" ".join(tokens[i:]) for i in range(len(tokens)) if tokens[i]]
+
+
+def _education_level_value(student: Student) -> Optional[str]:
+    level = student.education_level
+    return level.value if hasattr(level, "value") else level
+
+
+class StudentNameIndex:
+    """
+    Sorted array of (name key, student_id) pairs with bisect prefix lookups
+    """
+
+    def __init__(self, refresh_interval_seconds: Optional[float] = None):
+        self.refresh_interval_seconds = (
+            config.AUTOCOMPLETE_REFRESH_SECONDS
+            if refresh_interval_seconds is None
+            else refresh_interval_seconds
+        )
+        self._lock = threading.RLock()
+        self._keys: List[tuple] = []
+        self._students: Dict[str, Dict[str, Any]] = {}
+        self._collection = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    # ===== Lookup =====
+
+    def search(self, query: str, db_collection, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Return active students whose name has a word starting with the query.
+
+        Args:
+            query: Raw user input
+            db_collection: Students collection (used only to build/refresh)
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of {"id", "full_name", "education_level"} dicts, best match first
+        """
+        prefix = normalize_text(query)
+        if not prefix:
+            return []
+
+        with self._lock:
+            self._ensure_fresh(db_collection)
+
+            matched_ids = []
+            seen = set()
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(matched_ids) < MAX_SCAN_RESULTS:
+                key, student_id = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if student_id not in seen:
+                    seen.add(student_id)
+                    matched_ids.append(student_id)
+                position += 1
+
+            matches = [self._students[student_id] for student_id in matched_ids]
+
+        matches.sort(key=lambda entry: score_match(query, entry["full_name"]))
+        return matches[:limit]
+
+    # ===== Incremental updates =====
+
+    def add(self, student: Student, db_collection):
+        """Index a newly created student"""
+        with self._lock:
+            if self._is_built_for(db_collection) and student.is_active:
+                self._insert(student)
+            self._track_own_write(db_collection)
+
+    def update(self, student: Student, db_collection):
+        """Re-index a student after its name or active flag changed"""
+        with self._lock:
+            if self._is_built_for(db_collection):
+                self._delete(student._id)
+                if student.is_active:
+                    self._insert(student)
+            self._track_own_write(db_collection)
+
+    def remove(self, student_id: str, db_collection):
+        """Drop a (soft) deleted student from the index"""
+        with self._lock:
+            if self._is_built_for(db_collection):
+                self._delete(student_id)
+            self._track_own_write(db_collection)
+
+    def invalidate(self):
+        """Forget everything; the next lookup rebuilds from MongoDB"""
+        with self._lock:
+            self._keys = []
+            self._students = {}
+            self._collection = None
+            self._version = None
+            self._checked_at = 0.0
+
+    def handle_invalidation(self, event: InvalidationEvent):
+        """Invalidation bus callback for the students collection"""
+        if event.source == LOCAL:
+            # This worker's writes are applied by add/update/remove
+            return
+        with self._lock:
+            if self._collection is None:
+                return
+            if event.operation == RESET:
+                self.invalidate()
+            elif event.document_id is None:
+                # Collection-wide change: compare versions on the next lookup
+                self._checked_at = 0.0
+            else:
+                doc = self._collection.find_one({"_id": event.document_id})
+                self._delete(event.document_id)
+                if doc and doc.get("is_active", True):
+                    self._insert(Student.from_dict(doc))
+
+    # ===== Internals =====
+
+    def _is_built_for(self, db_collection) -> bool:
+        return self._collection is not None and self._collection is db_collection
+
+    def _ensure_fresh(self, db_collection):
+        """Build on first use, rebuild when another worker changed students"""
+        if not self._is_built_for(db_collection):
+            self._rebuild(db_collection)
+            record_cache_lookup(CACHE_NAME, hit=False)
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval_seconds:
+            record_cache_lookup(CACHE_NAME, hit=True)
+            return
+        self._checked_at = now
+        if get_version(db_collection) != self._version:
+            self._rebuild(db_collection)
+            record_cache_lookup(CACHE_NAME, hit=False)
+        else:
+            record_cache_lookup(CACHE_NAME, hit=True)
+
+    def _rebuild(self, db_collection):
+        version = get_version(db_collection)
+        students = Student.get_all_active(db_collection)
+
+        self._students = {}
+        keys = []
+        for student in students:
+            self._students[student._id] = self._entry(student)
+            keys.extend((key, student._id) for key in _name_keys(student.full_name))
+        keys.sort()
+
+        self._keys = keys
+        self._collection = db_collection
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _track_own_write(self, db_collection):
+        """
+        Catch up with the version bump made by the Student write. If nobody
+        else wrote in between, the local incremental update is already
+        current and no rebuild is needed.
+        """
+        version = get_version(db_collection)
+        if self._is_built_for(db_collection):
+            if self._version is not None and version in (self._version, self._version + 1):
+                self._version = version
+            else:
+                self._checked_at = 0.0
+
+    def _insert(self, student: Student):
+        self._students[student._id] = self._entry(student)
+        for key in _name_keys(student.full_name):
+            insort(self._keys, (key, student._id))
+
+    def _delete(self, student_id: str):
+        entry = self._students.pop(student_id, None)
+        if not entry:
+            return
+        for key in _name_keys(entry["full_name"]):
+            position = bisect_left(self._keys, (key, student_id))
+            if position < len(self._keys) and self._keys[position] == (key, student_id):
+                del self._keys[position]
+
+    @staticmethod
+    def _entry(student: Student) -> Dict[str, Any]:
+        return {
+            "id": student._id,
+            "full_name": student.full_name,
+            "education_level": _education_level_value(student),
+        }
+
+
+# Global index instance (one per worker process)
+student_name_index = StudentNameIndex()
+invalidation_bus.subscribe("students", student_name_index.handle_invalidation)
@@ -0,0 +1,400 @@
+"""
+Two-tier application cache.
+
+L1 is a small process-local LRU with per-entry expiry. L2 is an optional
+Redis shared by every worker (CACHE_REDIS_URL); without it the cache is
+L1 only. Values go to L2 through a pluggable serializer (CACHE_SERIALIZER:
+"json", using orjson when installed, or "msgpack"), with datetimes tagged
+so they round-trip.
+
+get_or_compute() coalesces concurrent misses for the same key into one
+computation per worker (single-flight) and can cache "not found" (None)
+for a shorter negative TTL. Caches subscribe to the invalidation bus:
+writes made by this worker clear L1 and bump the cache's generation in
+L2, writes seen from other workers clear L1 (the writer bumped L2). The
+generation is part of every L2 key, so entries written before the bump -
+including fills that started before it and finish after - are never read
+again and just expire. Redis errors are logged and the tier is skipped for
+a while; they never fail a request.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import config
+from app.core.invalidation import LOCAL, InvalidationEvent, invalidation_bus
+from app.core.metrics import record_cache_lookup
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() when a key is not cached (None is a cached "not found")
+MISSING = object()
+
+KEY_PREFIX = "cache"
+
+# How long to skip L2 after a Redis error
+L2_RETRY_SECONDS = 30.0
+
+_DATE_TAG = "$date"
+
+
+# ===== Serializers =====
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATE_TAG: value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _decode_object(document: Dict[str, Any]) -> Any:
+    if len(document) == 1 and _DATE_TAG in document:
+        return datetime.fromisoformat(document[_DATE_TAG])
+    return document
+
+
+def _restore(value: Any) -> Any:
+    """Undo the datetime tagging on a decoded value (for decoders without an object hook)"""
+    if isinstance(value, dict):
+        return _decode_object({key: _restore(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_restore(item) for item in value]
+    return value
+
+
+class JsonSerializer:
+    """JSON via orjson when installed, the standard library otherwise"""
+    name = "json"
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        self._orjson = orjson
+
+    def dumps(self, value: Any) -> bytes:
+        if self._orjson is not None:
+            return self._orjson.dumps(
+                value, default=_encode_default, option=self._orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        return json.dumps(value, default=_encode_default, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        if self._orjson is not None:
+            return _restore(self._orjson.loads(data))
+        return json.loads(data, object_hook=_decode_object)
+
+
+class MsgpackSerializer:
+    """MessagePack (smaller and faster to decode than JSON; needs msgpack)"""
+    name = "msgpack"
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, default=_encode_default, datetime=False)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, object_hook=_decode_object, raw=False, strict_map_key=False)
+
+
+SERIALIZERS = {
+    JsonSerializer.name: JsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+def get_serializer(name: str):
+    """
+    Build a serializer by name.
+
+    Falls back to JSON (with a warning) when msgpack is not installed.
+
+    Raises:
+        ValueError for an unknown name
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown cache serializer '{name}'. Choose from: {', '.join(SERIALIZERS)}")
+    try:
+        return SERIALIZERS[name]()
+    except ImportError:
+        logger.warning(f"⚠️ Cache serializer '{name}' is not installed, using json")
+        return JsonSerializer()
+
+
+# ===== L1 =====
+
+class LRUCache:
+    """Thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Cached value, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# ===== L2 =====
+
+_shared_l2 = None
+_shared_l2_lock = threading.Lock()
+
+
+def shared_l2():
+    """The Redis client for CACHE_REDIS_URL (created once), or None when not configured"""
+    global _shared_l2
+    if not config.CACHE_REDIS_URL:
+        return None
+    with _shared_l2_lock:
+        if _shared_l2 is None:
+            import redis
+            _shared_l2 = redis.Redis.from_url(
+                config.CACHE_REDIS_URL,
+                socket_timeout=config.CACHE_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=config.CACHE_REDIS_TIMEOUT_SECONDS,
+            )
+        return _shared_l2
+
+
+# ===== Two-tier cache =====
+
+# Every cache built in this process, for clear_all_caches()
+_caches: List["TwoTierCache"] = []
+
+
+class TwoTierCache:
+    """L1 LRU in front of an optional shared L2, with single-flight fills"""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: Optional[float] = None,
+        negative_ttl_seconds: Optional[float] = None,
+        l1_max_entries: Optional[int] = None,
+        l2=MISSING,
+        serializer=None,
+    ):
+        """
+        Args:
+            name: Cache name (Redis key namespace and cache_hit_ratio label)
+            ttl_seconds: Lifetime of cached values (default CACHE_DEFAULT_TTL_SECONDS)
+            negative_ttl_seconds: Lifetime of cached misses (default CACHE_NEGATIVE_TTL_SECONDS)
+            l1_max_entries: L1 size (default CACHE_L1_MAX_ENTRIES)
+            l2: Redis-like client, None for L1 only (default: shared_l2())
+            serializer: L2 serializer (default: CACHE_SERIALIZER)
+        """
+        self.name = name
+        self.ttl_seconds = config.CACHE_DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.negative_ttl_seconds = (
+            config.CACHE_NEGATIVE_TTL_SECONDS if negative_ttl_seconds is None else negative_ttl_seconds
+        )
+        self.l1 = LRUCache(config.CACHE_L1_MAX_ENTRIES if l1_max_entries is None else l1_max_entries)
+        self._l2 = l2
+        self.serializer = serializer or get_serializer(config.CACHE_SERIALIZER)
+        self._l2_down_until = 0.0
+        self._flights = SingleFlight()
+        # Bumped by every clear(): fills that overlap one don't write L1
+        self._epoch = 0
+        _caches.append(self)
+
+    @property
+    def l2(self):
+        if self._l2 is MISSING:
+            self._l2 = shared_l2()
+        return self._l2
+
+    @l2.setter
+    def l2(self, client):
+        self._l2 = client
+        self._l2_down_until = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{KEY_PREFIX}:{self.name}:{key}"
+
+    def _l2_key(self, key: str, generation: int) -> str:
+        return f"{KEY_PREFIX}:{self.name}:{generation}:{key}"
+
+    def _generation_key(self) -> str:
+        return f"{KEY_PREFIX}:{self.name}:generation"
+
+    # ----- lookups -----
+
+    def get(self, key: str, record: bool = True) -> Any:
+        """Cached value (None for a cached miss), or MISSING"""
+        epoch = self._epoch
+        value = self.l1.get(self._key(key))
+        if value is MISSING:
+            value = self._lookup(key, epoch, self._l2_generation())
+        if record:
+            record_cache_lookup(self.name, value is not MISSING)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Cache a value in both tiers (None is cached for the negative TTL)"""
+        self._store(key, value, ttl_seconds, self._epoch, self._l2_generation())
+
+    def _lookup(self, key: str, epoch: int, generation: Optional[int]) -> Any:
+        value = self.l1.get(self._key(key))
+        if value is MISSING and generation is not None:
+            value = self._l2_get(key, epoch, generation)
+        return value
+
+    def _store(self, key: str, value: Any, ttl_seconds: Optional[float], epoch: int, generation: Optional[int]):
+        """Write both tiers as of `epoch` and `generation`; L1 is skipped if a clear() came since"""
+        if ttl_seconds is None:
+            ttl_seconds = self.negative_ttl_seconds if value is None else self.ttl_seconds
+        if self._epoch == epoch:
+            self.l1.set(self._key(key), value, ttl_seconds)
+        if generation is not None:
+            self._l2_call("set", self._l2_key(key, generation), self.serializer.dumps(value),
+                          px=max(1, int(ttl_seconds * 1000)))
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl_seconds: Optional[float] = None,
+        cache_none: bool = False,
+    ) -> Any:
+        """
+        Cached value, or compute() it once for all concurrent callers and cache it
+
+        Args:
+            key: Cache key (unique within this cache)
+            compute: Zero-argument function producing the value
+            ttl_seconds: Override the cache's TTL for this value
+            cache_none: Cache a None result for the negative TTL
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        def fill():
+            # Read before computing: an invalidation during compute() moves
+            # both on, and the result lands where nobody looks any more
+            epoch, generation = self._epoch, self._l2_generation()
+            # A previous leader may have filled the key while we waited to lead
+            value = self._lookup(key, epoch, generation)
+            if value is not MISSING:
+                return value
+            value = compute()
+            if value is not None or cache_none:
+                self._store(key, value, ttl_seconds if value is not None else None, epoch, generation)
+            return value
+
+        return self._flights.do(key, fill)
+
+    # ----- invalidation -----
+
+    def delete(self, key: str):
+        self.l1.delete(self._key(key))
+        generation = self._l2_generation()
+        if generation is not None:
+            self._l2_call("delete", self._l2_key(key, generation))
+
+    def clear(self, shared: bool = True):
+        """Drop every entry from L1 and, if `shared`, retire this cache's L2 generation"""
+        self._epoch += 1
+        self.l1.clear()
+        if shared:
+            self._l2_call("incr", self._generation_key())
+
+    def invalidate_on(self, *collections: str, bus=invalidation_bus):
+        """Clear the cache whenever one of `collections` changes"""
+        for collection in collections:
+            bus.subscribe(collection, self.handle_invalidation)
+
+    def handle_invalidation(self, event: InvalidationEvent):
+        # Only the writing worker clears the shared tier; the rest drop their L1
+        self.clear(shared=event.source == LOCAL)
+
+    # ----- L2 plumbing -----
+
+    def _l2_available(self) -> bool:
+        return self.l2 is not None and time.monotonic() >= self._l2_down_until
+
+    def _l2_failed(self, error: Exception):
+        self._l2_down_until = time.monotonic() + L2_RETRY_SECONDS
+        logger.warning(f"⚠️ Cache '{self.name}' L2 unavailable, using L1 only for {L2_RETRY_SECONDS:.0f}s: {str(error)}")
+
+    def _l2_call(self, method: str, *args, **kwargs):
+        if not self._l2_available():
+            return None
+        try:
+            return getattr(self.l2, method)(*args, **kwargs)
+        except Exception as e:
+            self._l2_failed(e)
+            return None
+
+    def _l2_generation(self) -> Optional[int]:
+        """Current L2 generation (0 before the first bump), None if L2 is unavailable"""
+        if not self._l2_available():
+            return None
+        try:
+            return int(self.l2.get(self._generation_key()) or 0)
+        except Exception as e:
+            self._l2_failed(e)
+            return None
+
+    def _l2_get(self, key: str, epoch: int, generation: int) -> Any:
+        data = self._l2_call("get", self._l2_key(key, generation))
+        if data is None:
+            return MISSING
+        try:
+            value = self.serializer.loads(data)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache '{self.name}' dropped an undecodable L2 entry: {str(e)}")
+            return MISSING
+        # Keep it in L1 for the rest of its (unknown) lifetime, bounded by our TTL
+        if self._epoch == epoch:
+            self.l1.set(self._key(key), value, self.negative_ttl_seconds if value is None else self.ttl_seconds)
+        return value
+
+
+def clear_all_caches(shared: bool = False):
+    """Empty every cache in this process (L1 only unless `shared`)"""
+    for cache in list(_caches):
+        cache.clear(shared=shared)
@@ -0,0 +1,51 @@
+"""
+Collection version counters for cross-worker cache coherence.
+
+Each uvicorn worker keeps its own in-memory caches. Writers bump a counter
+in the 'cache_versions' collection ({_id: <collection name>, version: n});
+caches poll that counter and rebuild when it moved, so every worker sees
+changes made by the others within the poll interval.
+"""
+
+from pymongo import ReturnDocument
+
+
+CACHE_VERSIONS_COLLECTION = "cache_versions"
+
+
+def _versions_collection(db_collection):
+    """Get the 'cache_versions' collection living next to db_collection"""
+    return db_collection.database[CACHE_VERSIONS_COLLECTION]
+
+
+def get_version(db_collection) -> int:
+    """
+    Get the current version counter for a collection.
+
+    Args:
+        db_collection: The collection whose version to read
+
+    Returns:
+        Version counter (0 if the collection was never bumped)
+    """
+    doc = _versions_collection(db_collection).find_one({"_id": db_collection.name})
+    return doc.get("version", 0) if doc else 0
+
+
+def bump_version(db_collection) -> int:
+    """
+    Increment the version counter for a collection after a write.
+
+    Args:
+        db_collection: The collection that was written to
+
+    Returns:
+        The new version counter
+    """
+    doc = _versions_collection(db_collection).find_one_and_update(
+        {"_id": db_collection.name},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
@@ -0,0 +1,289 @@
+"""
+Columnar lesson/payment reporting.
+
+load_columns() streams a date range from a collection (and its archive,
+when reached) through a batched cursor with a projection into one NumPy
+array per field. Group-bys, pivots and lesson costs then run vectorized
+over those arrays: every dimension is factorized into integer codes once,
+and sums are np.bincount / np.add.at over the codes instead of Python
+loops over documents.
+
+to_arrow() turns the columns into a pyarrow Table for Parquet or Arrow IPC
+downloads; pyarrow is optional and only needed for those.
+"""
+
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core import archive
+from app.core.config import config
+from app.core.pricing import PricingHistory, PricingTable
+from app.core.pricing_kernel import PriceKernel
+
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A collection exposed to columnar reports"""
+    name: str
+    date_field: str
+    # field -> (dtype, value for missing fields)
+    fields: Dict[str, Tuple[str, Any]]
+    # dimensions computed from the loaded columns, besides the string fields
+    derived: Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]]
+    measures: Tuple[str, ...]
+
+
+def month_labels(dates: np.ndarray) -> np.ndarray:
+    """'YYYY-MM' for every datetime64 value"""
+    return dates.astype("datetime64[M]").astype(str).astype(object)
+
+
+LESSONS = Dataset(
+    name="lessons",
+    date_field="scheduled_date",
+    fields={
+        # Same defaults as the payroll aggregation
+        "_id": ("object", ""),
+        "teacher_id": ("object", ""),
+        "teacher_name": ("object", ""),
+        "subject": ("object", "other"),
+        "education_level": ("object", "elementary"),
+        "lesson_type": ("object", "individual"),
+        "status": ("object", ""),
+        "scheduled_date": ("datetime64[ms]", None),
+        "duration_minutes": ("float64", 0.0),
+        # Stored at approval/completion; NaN until then
+        "cost": ("float64", np.nan),
+    },
+    derived={"month": lambda columns: month_labels(columns["scheduled_date"])},
+    measures=("lessons", "hours", "cost"),
+)
+
+PAYMENTS = Dataset(
+    name="payments",
+    date_field="payment_date",
+    fields={
+        "_id": ("object", ""),
+        "student_name": ("object", ""),
+        "lesson_id": ("object", ""),
+        "payment_date": ("datetime64[ms]", None),
+        "amount": ("float64", 0.0),
+    },
+    derived={"month": lambda columns: month_labels(columns["payment_date"])},
+    measures=("payments", "amount"),
+)
+
+DATASETS = {dataset.name: dataset for dataset in (LESSONS, PAYMENTS)}
+
+
+def dimensions(dataset: Dataset) -> List[str]:
+    """Fields a report may group or pivot by"""
+    fields = [name for name, (dtype, _) in dataset.fields.items() if dtype == "object" and name != "_id"]
+    return fields + list(dataset.derived)
+
+
+# ===== Loading =====
+
+def load_columns(
+    collection,
+    dataset: Dataset,
+    start: datetime,
+    end: datetime,
+    match: Optional[Dict[str, Any]] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Documents with dataset.date_field in [start, end) as one array per field
+
+    Args:
+        collection: Hot collection (its archive is read too when reached)
+        match: Extra filter (e.g. statuses)
+        batch_size: Cursor batch size (default COLUMNAR_BATCH_SIZE)
+    """
+    query = {**(match or {}), dataset.date_field: {"$gte": start, "$lt": end}}
+    projection = {name: 1 for name in dataset.fields}
+    batch_size = batch_size or config.COLUMNAR_BATCH_SIZE
+    values: Dict[str, List[Any]] = {name: [] for name in dataset.fields}
+    defaults = [(name, default, values[name].append) for name, (_, default) in dataset.fields.items()]
+
+    for source in archive.sources(collection, query):
+        for document in source.find(query, projection).batch_size(batch_size):
+            for name, default, append in defaults:
+                value = document.get(name)
+                append(default if value is None else value)
+
+    return {
+        name: np.array(values[name], dtype=dtype)
+        for name, (dtype, _) in dataset.fields.items()
+    }
+
+
+def row_count(columns: Dict[str, np.ndarray]) -> int:
+    return len(next(iter(columns.values()))) if columns else 0
+
+
+def column(columns: Dict[str, np.ndarray], dataset: Dataset, name: str) -> np.ndarray:
+    """A loaded field or a derived dimension"""
+    if name in dataset.derived:
+        return dataset.derived[name](columns)
+    return columns[name]
+
+
+# ===== Measures =====
+
+def lesson_costs(columns: Dict[str, np.ndarray], pricing_table: PricingTable,
+                 pricing_history: Optional[PricingHistory] = None) -> np.ndarray:
+    """
+    Cost of every lesson: the stored cost where there is one, otherwise
+    hours x price per hour as of its scheduled date (see pricing_kernel)
+    """
+    costs = np.array(columns["cost"], dtype="float64") if "cost" in columns else np.full(row_count(columns), np.nan)
+    missing = np.isnan(costs)
+    if missing.any():
+        costs[missing] = PriceKernel(pricing_table, pricing_history).compute(
+            columns["subject"][missing], columns["education_level"][missing], columns["lesson_type"][missing],
+            columns["duration_minutes"][missing], columns["scheduled_date"][missing],
+        ).cost
+    return costs
+
+
+def measure(columns: Dict[str, np.ndarray], dataset: Dataset, name: str,
+            pricing_table: Optional[PricingTable] = None,
+            pricing_history: Optional[PricingHistory] = None) -> np.ndarray:
+    """Per-row values summed by group-bys and pivots"""
+    if name in ("lessons", "payments"):
+        return np.ones(row_count(columns))
+    if name == "hours":
+        return columns["duration_minutes"] / 60
+    if name == "cost":
+        return lesson_costs(columns, pricing_table or PricingTable([]), pricing_history)
+    if name == "amount":
+        return columns["amount"]
+    raise ValueError(f"Unknown measure '{name}' for {dataset.name}. Choose from: {', '.join(dataset.measures)}")
+
+
+# ===== Group-by and pivot =====
+
+def factorize(keys: Sequence[np.ndarray]) -> Tuple[List[np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Integer codes for the distinct combinations of several key columns
+
+    Returns:
+        (distinct values per key, code of every group's key values per key
+        stacked as rows, group code of every row)
+    """
+    uniques, codes = [], []
+    for key in keys:
+        values, inverse = np.unique(key.astype(str), return_inverse=True)
+        uniques.append(values)
+        codes.append(inverse.reshape(-1))
+    combined = np.ravel_multi_index(codes, [len(values) for values in uniques])
+    groups, inverse = np.unique(combined, return_inverse=True)
+    group_keys = np.array(np.unravel_index(groups, [len(values) for values in uniques]))
+    return uniques, group_keys, inverse.reshape(-1)
+
+
+def group_by(
+    columns: Dict[str, np.ndarray],
+    dataset: Dataset,
+    keys: Sequence[str],
+    measures: Dict[str, np.ndarray],
+) -> List[Dict[str, Any]]:
+    """
+    Sum of every measure per distinct combination of `keys`, sorted by key
+    """
+    if row_count(columns) == 0:
+        return []
+    uniques, group_keys, inverse = factorize([column(columns, dataset, key) for key in keys])
+    sums = {name: np.bincount(inverse, weights=values, minlength=group_keys.shape[1])
+            for name, values in measures.items()}
+    rows = []
+    for index in range(group_keys.shape[1]):
+        row = {key: str(uniques[position][group_keys[position, index]]) for position, key in enumerate(keys)}
+        for name, totals in sums.items():
+            row[name] = round(float(totals[index]), 2)
+        rows.append(row)
+    return rows
+
+
+def pivot(
+    columns: Dict[str, np.ndarray],
+    dataset: Dataset,
+    rows: Sequence[str],
+    column_key: str,
+    values: np.ndarray,
+) -> Dict[str, Any]:
+    """
+    Sum of `values` with one row per combination of `rows` and one column per
+    value of `column_key`
+
+    Returns:
+        {"columns": [...], "rows": [{<row keys>, "values": [...], "total": x}],
+         "column_totals": [...], "total": x}
+    """
+    if row_count(columns) == 0:
+        return {"columns": [], "rows": [], "column_totals": [], "total": 0.0}
+    row_uniques, row_keys, row_codes = factorize([column(columns, dataset, key) for key in rows])
+    column_values, column_codes = np.unique(column(columns, dataset, column_key).astype(str), return_inverse=True)
+
+    matrix = np.zeros((row_keys.shape[1], len(column_values)))
+    np.add.at(matrix, (row_codes, column_codes.reshape(-1)), values)
+    matrix = np.round(matrix, 2)
+
+    table = []
+    for index in range(row_keys.shape[1]):
+        row = {key: str(row_uniques[position][row_keys[position, index]]) for position, key in enumerate(rows)}
+        row["values"] = matrix[index].tolist()
+        row["total"] = round(float(matrix[index].sum()), 2)
+        table.append(row)
+    return {
+        "columns": column_values.tolist(),
+        "rows": table,
+        "column_totals": np.round(matrix.sum(axis=0), 2).tolist(),
+        "total": round(float(matrix.sum()), 2),
+    }
+
+
+# ===== Arrow export =====
+
+def to_arrow(columns: Dict[str, np.ndarray]):
+    """
+    pyarrow Table of the columns (_id exported as "id")
+
+    Raises:
+        ImportError if pyarrow is not installed
+    """
+    import pyarrow as pa
+    return pa.table({("id" if name == "_id" else name): pa.array(values) for name, values in columns.items()})
+
+
+def export_bytes(columns: Dict[str, np.ndarray], export_format: str) -> bytes:
+    """
+    Columns as a Parquet (zstd) or Arrow IPC file
+
+    Raises:
+        ImportError if pyarrow is not installed
+        ValueError for an unknown format
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    import pyarrow as pa
+
+    table = to_arrow(columns)
+    sink = io.BytesIO()
+    if export_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
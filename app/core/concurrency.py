@@ -0,0 +1,68 @@
+"""
+Run independent blocking queries concurrently.
+
+PyMongo is synchronous and releases the GIL while waiting on the socket, so
+a small thread pool lets independent round-trips overlap: a handler that
+needs N unrelated queries costs roughly max() of their latencies instead of
+sum().
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from app.core.config import config
+
+
+# Shared, bounded pool. Tasks must not submit to it themselves (nested
+# fan-outs can exhaust the workers and deadlock).
+_executor = ThreadPoolExecutor(
+    max_workers=config.QUERY_FANOUT_WORKERS,
+    thread_name_prefix="query-fanout"
+)
+
+
+def _timed(func: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def fan_out(queries: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run independent zero-argument callables concurrently.
+
+    Args:
+        queries: Mapping of name -> callable (resolve collections before
+            building the callables so they run against the caller's objects)
+
+    Returns:
+        (results, timings_ms) keyed by the same names; timings_ms also has
+        "total" with the wall-clock time of the whole fan-out
+
+    Raises:
+        The first exception raised by any query (after all have finished)
+    """
+    started = time.perf_counter()
+    # Each task runs in a copy of the caller's context so per-request
+    # tracking (app.core.monitoring) still sees its queries
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, _timed, func)
+        for name, func in queries.items()
+    }
+
+    results = {}
+    timings_ms = {}
+    error = None
+    for name, future in futures.items():
+        try:
+            results[name], elapsed = future.result()
+            timings_ms[name] = round(elapsed, 2)
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+
+    timings_ms["total"] = round((time.perf_counter() - started) * 1000, 2)
+    return results, timings_ms
@@ -18,6 +18,21 @@ class Config:
     MONGO_CLUSTER_URL = os.getenv("MONGO_CLUSTER_URL")
     MONGO_DATABASE = os.getenv("MONGO_DATABASE", "institute_db")
     
+    # MongoDB Connection Pool Settings (per worker process)
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+    MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+    MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+    
+    # Analytics Read Settings (dashboard/report reads on a separate client)
+    ANALYTICS_CLIENT_ENABLED = os.getenv("ANALYTICS_CLIENT_ENABLED", "True") == "True"
+    ANALYTICS_READ_PREFERENCE = os.getenv("ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+    ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "120"))
+    ANALYTICS_COMPRESSORS = os.getenv("ANALYTICS_COMPRESSORS", "zstd,snappy,zlib")
+    ANALYTICS_MAX_POOL_SIZE = int(os.getenv("ANALYTICS_MAX_POOL_SIZE", "20"))
+    
     # JWT Security
     JWT_SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production-minimum-32-characters")
     ALGORITHM = os.getenv("ALGORITHM", "HS256")
@@ -30,6 +45,63 @@ class Config:
     EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
     EMAIL_SERVER = os.getenv("EMAIL_SERVER", "smtp.gmail.com")
     
+    # Query Settings
+    QUERY_FANOUT_WORKERS = int(os.getenv("QUERY_FANOUT_WORKERS", "8"))
+    
+    # Monitoring Settings
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+    REQUEST_QUERY_WARN_THRESHOLD = int(os.getenv("REQUEST_QUERY_WARN_THRESHOLD", "25"))
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "0.1"))
+    SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "100"))
+    SLOW_QUERY_EXPLAIN_TTL_SECONDS = float(os.getenv("SLOW_QUERY_EXPLAIN_TTL_SECONDS", "600"))
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False") == "True"
+    PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", "60"))
+    
+    # Cache Settings
+    AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "5"))
+    INVALIDATION_BUS_ENABLED = os.getenv("INVALIDATION_BUS_ENABLED", "True") == "True"
+    # "auto" uses change streams on replica sets and version polling elsewhere
+    INVALIDATION_MODE = os.getenv("INVALIDATION_MODE", "auto")
+    INVALIDATION_POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_SECONDS", "2"))
+    # Shared L2 cache; leave empty to keep caches in-process only
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+    CACHE_REDIS_TIMEOUT_SECONDS = float(os.getenv("CACHE_REDIS_TIMEOUT_SECONDS", "0.25"))
+    CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "json")  # json (orjson when installed) or msgpack
+    CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024"))
+    CACHE_DEFAULT_TTL_SECONDS = float(os.getenv("CACHE_DEFAULT_TTL_SECONDS", "30"))
+    CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "60"))
+    PRICING_CACHE_SECONDS = float(os.getenv("PRICING_CACHE_SECONDS", "300"))
+    DASHBOARD_STATS_CACHE_SECONDS = float(os.getenv("DASHBOARD_STATS_CACHE_SECONDS", "30"))
+    
+    # Background Jobs Settings
+    CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    # Run jobs in-process instead of on a worker (set True for tests and local dev without Redis)
+    CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+    REPORT_RESULT_TTL_SECONDS = int(os.getenv("REPORT_RESULT_TTL_SECONDS", "86400"))
+    # A report job running longer than this is taken over when its task is redelivered
+    REPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", "900"))
+    
+    # Analytics Settings
+    # Teaching hours a teacher is available per week (utilization denominator)
+    UTILIZATION_CAPACITY_HOURS_PER_WEEK = float(os.getenv("UTILIZATION_CAPACITY_HOURS_PER_WEEK", "20"))
+    # Documents per cursor batch when loading columnar reports
+    COLUMNAR_BATCH_SIZE = int(os.getenv("COLUMNAR_BATCH_SIZE", "5000"))
+    # Longest date range a columnar report or export may cover
+    COLUMNAR_MAX_DAYS = int(os.getenv("COLUMNAR_MAX_DAYS", "732"))
+    
+    # Archive Settings
+    # Lessons and payments older than this many months move to the archive collections
+    ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "24"))
+    ARCHIVE_EXPORT_DIR = os.getenv("ARCHIVE_EXPORT_DIR", "archive_exports")
+    # "ndjson" (gzipped) or "parquet" (needs pyarrow)
+    ARCHIVE_EXPORT_FORMAT = os.getenv("ARCHIVE_EXPORT_FORMAT", "ndjson")
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    
+    # Lesson Cost Settings
+    # Lessons repriced per bulk write when stored costs are recomputed
+    LESSON_COST_BATCH_SIZE = int(os.getenv("LESSON_COST_BATCH_SIZE", "1000"))
+    
     # CORS Settings
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173")
     
@@ -37,6 +109,42 @@ class Config:
     def get_allowed_origins_list(cls):
         """Convert ALLOWED_ORIGINS string to list"""
         return [origin.strip() for origin in cls.ALLOWED_ORIGINS.split(",")]
+    
+    @classmethod
+    def get_mongo_pool_options(cls):
+        """MongoClient keyword arguments for the connection pool settings"""
+        options = {
+            "maxPoolSize": cls.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": cls.MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": cls.MONGO_MAX_IDLE_TIME_MS or None,
+            "waitQueueTimeoutMS": cls.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+            "readPreference": cls.MONGO_READ_PREFERENCE,
+        }
+        compressors = cls._compressor_list(cls.MONGO_COMPRESSORS)
+        if compressors:
+            options["compressors"] = compressors
+        return options
+    
+    @classmethod
+    def get_analytics_client_options(cls):
+        """MongoClient keyword arguments for the read-only analytics client"""
+        options = {
+            "maxPoolSize": cls.ANALYTICS_MAX_POOL_SIZE,
+            "maxIdleTimeMS": cls.MONGO_MAX_IDLE_TIME_MS or None,
+            "waitQueueTimeoutMS": cls.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+            "readPreference": cls.ANALYTICS_READ_PREFERENCE,
+        }
+        # maxStalenessSeconds is only valid with a non-primary read preference
+        if cls.ANALYTICS_READ_PREFERENCE != "primary" and cls.ANALYTICS_MAX_STALENESS_SECONDS > 0:
+            options["maxStalenessSeconds"] = cls.ANALYTICS_MAX_STALENESS_SECONDS
+        compressors = cls._compressor_list(cls.ANALYTICS_COMPRESSORS)
+        if compressors:
+            options["compressors"] = compressors
+        return options
+    
+    @staticmethod
+    def _compressor_list(value):
+        return ",".join(name.strip() for name in value.split(",") if name.strip())
 
 
 config = Config()
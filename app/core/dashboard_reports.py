@@ -0,0 +1,511 @@
+"""
+Dashboard report builders.
+
+The month-end reports served by /dashboard (students' payment status,
+teacher earnings, detailed teacher and student statistics) are built
+here from the collections passed in, so the synchronous endpoints and
+the background report jobs (app.core.reports) produce the same result.
+Lessons and payments are read through app.core.archive, so archived
+months report like the rest. Invalid filters raise ValueError.
+"""
+
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core import archive
+from app.core.lesson_costs import stored_or_priced
+from app.core.pricing_kernel import load_price_kernel
+from app.core.search import build_search_filter
+from app.models.student import Student
+from app.models.user import User
+from app.schemas.earnings import (
+    EducationLevelHours, StudentDetailedStats, StudentsDetailedStatsResponse, SubjectEarnings,
+    TeacherDetailedStats, TeacherEarningsReport, TeachersDetailedStatsResponse,
+)
+
+
+def students_payment_status(
+    students_collection,
+    lessons_collection,
+    payments_collection,
+    pricing_collection,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Every active student's lessons cost, payments and outstanding balance
+
+    Raises:
+        ValueError: Only one of month and year given
+    """
+    if (month or year) and not (month and year):
+        raise ValueError("Both month and year are required for filtering")
+
+    # Get all active students
+    students = list(students_collection.find({"is_active": True}))
+
+    student_payment_status = []
+    missing_subjects = []
+    price_kernel = load_price_kernel(pricing_collection)
+
+    for student in students:
+        student_name = student["full_name"]
+        student_id = str(student["_id"])
+
+        # Build query for lessons (only approved/completed)
+        lesson_query = {
+            "$or": [
+                {"students.student_name": {"$regex": student_name, "$options": "i"}},
+                {"students.student_id": student_id}
+            ],
+            "status": {"$in": ["approved", "completed"]}
+        }
+
+        # Build payment query
+        payment_query = {"student_name": {"$regex": student_name, "$options": "i"}}
+
+        # Date filter if provided
+        if month and year:
+            start_date = datetime(year, month, 1)
+            if month == 12:
+                end_date = datetime(year + 1, 1, 1)
+            else:
+                end_date = datetime(year, month + 1, 1)
+            lesson_query["scheduled_date"] = {"$gte": start_date, "$lt": end_date}
+            payment_query["payment_date"] = {"$gte": start_date, "$lt": end_date}
+
+        # Get lessons for this student
+        lessons = archive.find(lessons_collection, lesson_query)
+
+        # Use the costs stored at approval/completion, pricing only lessons without one
+        costs = stored_or_priced(price_kernel, lessons)
+        total_cost = sum(lesson_cost["cost"] for lesson_cost in costs)
+        for lesson, lesson_cost in zip(lessons, costs):
+            if lesson_cost["pricing_version"] is None:
+                missing_subjects.append({
+                    "subject": lesson.get("subject", ""),
+                    "education_level": lesson.get("education_level", "elementary"),
+                    "lesson_type": lesson.get("lesson_type", "individual"),
+                    "used_default_price": float(lesson_cost["price_per_hour"])
+                })
+
+        # Get payments for this student
+        payments = archive.find(payments_collection, payment_query)
+        total_paid = sum(p.get("amount", 0) for p in payments)
+
+        # Calculate outstanding balance
+        outstanding_balance = round(total_cost - total_paid, 2)
+
+        student_payment_status.append({
+            "student_id": str(student["_id"]),
+            "student_name": student_name,
+            "phone": student.get("phone"),
+            "education_level": student.get("education_level"),
+            "total_lessons_cost": round(total_cost, 2),
+            "total_paid": round(total_paid, 2),
+            "outstanding_balance": outstanding_balance,
+            "has_debt": outstanding_balance > 0,
+            "lessons_count": len(lessons),
+            "payments_count": len(payments),
+            "currency": "USD"
+        })
+
+    # Sort by outstanding balance (debt first)
+    student_payment_status.sort(key=lambda x: x["outstanding_balance"], reverse=True)
+
+    # Calculate totals
+    total_students_with_debt = sum(1 for s in student_payment_status if s["has_debt"])
+    total_debt = sum(s["outstanding_balance"] for s in student_payment_status if s["has_debt"])
+
+    response = {
+        "total_students": len(student_payment_status),
+        "students_with_debt": total_students_with_debt,
+        "total_debt": round(total_debt, 2),
+        "students": student_payment_status
+    }
+
+    # Warn if any subjects were not found in pricing database
+    if missing_subjects:
+        # Get unique missing subjects
+        unique_missing = {}
+        for ms in missing_subjects:
+            key = f"{ms['subject']}_{ms['education_level']}_{ms['lesson_type']}"
+            if key not in unique_missing:
+                unique_missing[key] = ms
+
+        response["warning"] = {
+            "message": "Some subjects not found in pricing database, used default prices",
+            "missing_subjects": list(unique_missing.values())
+        }
+
+    # Add filter info if month/year provided
+    if month and year:
+        response["filter"] = {
+            "month": month,
+            "year": year,
+            "note": "Statistics filtered by month and year"
+        }
+
+    return response
+
+
+def teacher_earnings(
+    teacher: User,
+    lessons_collection,
+    pricing_collection,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+) -> TeacherEarningsReport:
+    """
+    A teacher's earnings broken down by subject, education level, lesson
+    type and price per hour (optionally for one month or year)
+    """
+    teacher_id = teacher._id
+
+    # Build query for lessons
+    query = {
+        "teacher_id": teacher_id,
+        "status": {"$in": ["pending", "completed"]}  # Don't count cancelled lessons
+    }
+
+    # Date filter
+    if month or year:
+        date_query = {}
+        if year:
+            date_query["$gte"] = datetime(year, month or 1, 1)
+            if month:
+                if month == 12:
+                    date_query["$lt"] = datetime(year + 1, 1, 1)
+                else:
+                    date_query["$lt"] = datetime(year, month + 1, 1)
+            else:
+                date_query["$lt"] = datetime(year + 1, 1, 1)
+        query["scheduled_date"] = date_query
+
+    # Get all lessons for this teacher
+    lessons = archive.find(lessons_collection, query)
+
+    # Lessons costed at approval/completion keep their stored price; the rest
+    # are priced as of their scheduled date in one vectorized pass
+    unpriced = [lesson for lesson in lessons if lesson.get("cost") is None]
+    unpriced_prices, _ = load_price_kernel(pricing_collection).prices(
+        [lesson.get("subject", "other") for lesson in unpriced],
+        [lesson.get("education_level", "elementary") for lesson in unpriced],  # default to elementary
+        [lesson.get("lesson_type", "individual") for lesson in unpriced],
+        [lesson.get("scheduled_date") for lesson in unpriced],
+    )
+    unpriced_prices = iter(unpriced_prices)
+    prices = [
+        next(unpriced_prices) if lesson.get("cost") is None else lesson["price_per_hour"]
+        for lesson in lessons
+    ]
+
+    # Group by subject, education_level, lesson_type AND price (a price change splits a group)
+    subject_data = defaultdict(lambda: {"hours": 0.0, "count": 0})
+
+    for lesson, price_per_hour in zip(lessons, prices):
+        subject = lesson.get("subject", "other")
+        education_level = lesson.get("education_level", "elementary")  # default to elementary
+        lesson_type = lesson.get("lesson_type", "individual")
+        duration_minutes = lesson.get("duration_minutes", 0)
+        hours = duration_minutes / 60
+
+        # Create unique key for subject + education_level + lesson_type + price
+        key = (subject, education_level, lesson_type, float(price_per_hour))
+        subject_data[key]["hours"] += hours
+        subject_data[key]["count"] += 1
+
+    subject_earnings_list = []
+    total_hours = 0.0
+    total_earnings = 0.0
+
+    for (subject, education_level, lesson_type, price_per_hour), data in subject_data.items():
+        hours = round(data["hours"], 2)
+        earnings = round(hours * price_per_hour, 2)
+
+        subject_earnings_list.append(
+            SubjectEarnings(
+                subject=subject,
+                education_level=education_level,
+                lesson_type=lesson_type,
+                total_hours=hours,
+                price_per_hour=price_per_hour,
+                total_earnings=earnings,
+                lesson_count=data["count"]
+            )
+        )
+
+        total_hours += hours
+        total_earnings += earnings
+
+    # Sort by subject name, education level, lesson_type, then price
+    subject_earnings_list.sort(key=lambda x: (x.subject, x.education_level, x.lesson_type, x.price_per_hour))
+
+    return TeacherEarningsReport(
+        teacher_id=teacher_id,
+        teacher_name=teacher.get_full_name(),
+        month=month,
+        year=year,
+        total_hours=round(total_hours, 2),
+        total_earnings=round(total_earnings, 2),
+        by_subject=subject_earnings_list,
+        total_lessons=len(lessons)
+    )
+
+
+def teachers_detailed_stats(
+    users_collection,
+    lessons_collection,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    search: Optional[str] = None,
+    status: Optional[str] = "active",
+    lesson_status: Optional[str] = None,
+) -> TeachersDetailedStatsResponse:
+    """
+    Individual/group hours of every matching teacher, by education level
+
+    Only approved lessons are counted unless lesson_status says otherwise.
+    """
+    # Build teacher query
+    teacher_query = {"role": "teacher"}
+
+    # Add status filter
+    if status:
+        teacher_query["status"] = status
+
+    # Add search filter
+    if search:
+        # Search by username, first_name, or last_name (indexed prefix search)
+        teacher_query.update(build_search_filter(search, User.SEARCH_FIELDS))
+
+    # Get teachers matching the filters
+    teachers = list(users_collection.find(teacher_query))
+
+    # Build lesson query with optional month/year/status filter
+    lesson_query = {}
+    if year:
+        if month:
+            # Filter by specific month and year
+            start_date = datetime(year, month, 1)
+            if month == 12:
+                end_date = datetime(year + 1, 1, 1)
+            else:
+                end_date = datetime(year, month + 1, 1)
+            lesson_query["scheduled_date"] = {"$gte": start_date, "$lt": end_date}
+        else:
+            # Filter by entire year
+            start_date = datetime(year, 1, 1)
+            end_date = datetime(year + 1, 1, 1)
+            lesson_query["scheduled_date"] = {"$gte": start_date, "$lt": end_date}
+
+    # Lesson status filter (single value)
+    # Default to approved lessons if no status specified
+    if lesson_status:
+        # Accept only known statuses; ignore invalid input
+        allowed_statuses = {"pending", "approved", "rejected", "completed", "cancelled"}
+        if lesson_status in allowed_statuses:
+            lesson_query["status"] = lesson_status
+    else:
+        # Default to approved lessons only
+        lesson_query["status"] = "approved"
+
+    teacher_stats = []
+
+    for teacher in teachers:
+        teacher_id = teacher["_id"]
+        teacher_id_str = str(teacher_id)  # Convert ObjectId to string
+        teacher_name = f"{teacher.get('first_name', '')} {teacher.get('last_name', '')}".strip() or teacher["username"]
+
+        # Count lessons for this teacher with date/status filters applied
+        teacher_lesson_query = {**lesson_query, "teacher_id": teacher_id_str}
+        teacher_lessons = archive.find(lessons_collection, teacher_lesson_query)
+
+        # Initialize counters
+        total_individual_hours = 0.0
+        total_group_hours = 0.0
+
+        individual_hours_by_level = {
+            "elementary": 0.0,
+            "middle": 0.0,
+            "secondary": 0.0
+        }
+
+        group_hours_by_level = {
+            "elementary": 0.0,
+            "middle": 0.0,
+            "secondary": 0.0
+        }
+
+        # Process each lesson
+        for lesson in teacher_lessons:
+            duration_minutes = lesson.get("duration_minutes", 0)
+            hours = duration_minutes / 60
+            lesson_type = lesson.get("lesson_type", "individual")
+            education_level = lesson.get("education_level", "elementary")
+
+            # Normalize education level names
+            if education_level == "primary":
+                education_level = "elementary"
+            elif education_level == "preparatory":
+                education_level = "middle"
+
+            # Ensure education level is valid
+            if education_level not in ["elementary", "middle", "secondary"]:
+                education_level = "elementary"  # Default fallback
+
+            if lesson_type == "individual":
+                total_individual_hours += hours
+                individual_hours_by_level[education_level] += hours
+            else:  # group
+                total_group_hours += hours
+                group_hours_by_level[education_level] += hours
+
+        # Round hours to 2 decimal places
+        total_individual_hours = round(total_individual_hours, 2)
+        total_group_hours = round(total_group_hours, 2)
+
+        for level in individual_hours_by_level:
+            individual_hours_by_level[level] = round(individual_hours_by_level[level], 2)
+            group_hours_by_level[level] = round(group_hours_by_level[level], 2)
+
+        teacher_stats.append(TeacherDetailedStats(
+            teacher_id=teacher_id_str,
+            teacher_name=teacher_name,
+            total_individual_hours=total_individual_hours,
+            total_group_hours=total_group_hours,
+            individual_hours_by_level=EducationLevelHours(**individual_hours_by_level),
+            group_hours_by_level=EducationLevelHours(**group_hours_by_level)
+        ))
+
+    # Sort teachers by total hours (individual + group)
+    teacher_stats.sort(key=lambda x: x.total_individual_hours + x.total_group_hours, reverse=True)
+
+    return TeachersDetailedStatsResponse(
+        total_teachers=len(teacher_stats),
+        teachers=teacher_stats
+    )
+
+
+def students_detailed_stats(
+    students_collection,
+    lessons_collection,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    search: Optional[str] = None,
+    education_level: Optional[str] = None,
+    is_active: Optional[bool] = True,
+) -> StudentsDetailedStatsResponse:
+    """Individual/group hours of every matching student (approved or completed lessons)"""
+    # Build student query
+    student_query = {}
+
+    # Add active status filter
+    if is_active is not None:
+        student_query["is_active"] = is_active
+
+    # Add education level filter
+    if education_level:
+        # Normalize education level names
+        if education_level == "primary":
+            education_level = "elementary"
+        elif education_level == "preparatory":
+            education_level = "middle"
+
+        # Ensure education level is valid
+        if education_level in ["elementary", "middle", "secondary"]:
+            student_query["education_level"] = education_level
+
+    # Add search filter
+    if search:
+        # Search by full_name (indexed prefix search)
+        student_query.update(build_search_filter(search, Student.SEARCH_FIELDS))
+
+    # Get students matching the filters
+    students = list(students_collection.find(student_query))
+
+    # Build lesson query with optional month/year filter
+    lesson_query = {}
+    if year:
+        if month:
+            # Filter by specific month and year
+            start_date = datetime(year, month, 1)
+            if month == 12:
+                end_date = datetime(year + 1, 1, 1)
+            else:
+                end_date = datetime(year, month + 1, 1)
+            lesson_query["scheduled_date"] = {"$gte": start_date, "$lt": end_date}
+        else:
+            # Filter by entire year
+            start_date = datetime(year, 1, 1)
+            end_date = datetime(year + 1, 1, 1)
+            lesson_query["scheduled_date"] = {"$gte": start_date, "$lt": end_date}
+
+    student_stats = []
+
+    for student in students:
+        student_id = str(student["_id"])
+        student_name = student["full_name"]
+        student_education_level = student.get("education_level", "elementary")
+
+        # Normalize education level names
+        if student_education_level == "primary":
+            student_education_level = "elementary"
+        elif student_education_level == "preparatory":
+            student_education_level = "middle"
+
+        # Ensure education level is valid
+        if student_education_level not in ["elementary", "middle", "secondary"]:
+            student_education_level = "elementary"  # Default fallback
+
+        # Find lessons for this student
+        name_pattern = {"$regex": f"^{re.escape(student_name)}$", "$options": "i"}
+        student_lesson_query = {
+            **lesson_query,
+            "$or": [
+                {"students.student_id": student_id},
+                {"students.student_name": name_pattern}
+            ],
+            "status": {"$in": ["approved", "completed"]}  # Only count approved or completed lessons
+        }
+
+        student_lessons = archive.find(lessons_collection, student_lesson_query)
+
+        # Initialize counters
+        individual_hours = 0.0
+        group_hours = 0.0
+
+        # Process each lesson
+        for lesson in student_lessons:
+            duration_minutes = lesson.get("duration_minutes", 0)
+            hours = duration_minutes / 60
+            lesson_type = lesson.get("lesson_type", "individual")
+
+            if lesson_type == "individual":
+                individual_hours += hours
+            else:  # group
+                group_hours += hours
+
+        # Round hours to 2 decimal places
+        individual_hours = round(individual_hours, 2)
+        group_hours = round(group_hours, 2)
+        total_hours = round(individual_hours + group_hours, 2)
+
+        student_stats.append(StudentDetailedStats(
+            student_id=student_id,
+            student_name=student_name,
+            individual_hours=individual_hours,
+            group_hours=group_hours,
+            total_hours=total_hours,
+            education_level=student_education_level
+        ))
+
+    # Sort students by total hours in descending order
+    student_stats.sort(key=lambda x: x.total_hours, reverse=True)
+
+    return StudentsDetailedStatsResponse(
+        total_students=len(student_stats),
+        students=student_stats
+    )
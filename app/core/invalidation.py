@@ -0,0 +1,257 @@
+"""
+Cross-worker cache invalidation bus.
+
+Each uvicorn worker keeps process-local caches. The bus tells them when the
+data behind them changed in any worker:
+
+- On a replica set it tails one change stream over the watched collections
+  and publishes an event per changed document (resuming from the last
+  token after errors).
+- On a standalone mongod (no change streams) it polls the 'cache_versions'
+  counters every INVALIDATION_POLL_SECONDS and publishes a collection-wide
+  event when one moved. Writers keep those counters current through
+  note_write().
+
+Caches subscribe per collection and receive typed InvalidationEvents on
+the bus thread. Writes made by this process are also published locally as
+soon as note_write() runs, so a worker never waits on its own writes.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.cache_versions import CACHE_VERSIONS_COLLECTION, bump_version
+from app.core.config import config
+from app.core.metrics import invalidation_events_total
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ("users", "students", "pricing", "lessons", "payments")
+
+# Event operations
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+CHANGED = "changed"  # something in the collection changed (version poll)
+RESET = "reset"  # events may have been missed; drop everything
+
+# Event sources
+LOCAL = "local"
+CHANGE_STREAM = "change_stream"
+POLL = "poll"
+
+MODE_CHANGE_STREAM = "change_stream"
+MODE_POLLING = "polling"
+
+# Server error codes meaning "no change streams here" / "can't resume"
+_CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+_RESUME_FAILED = {260, 280, 286}
+
+_OPERATIONS = {"insert": INSERT, "update": UPDATE, "replace": UPDATE, "delete": DELETE}
+
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    """One change to a watched collection"""
+    collection: str
+    operation: str
+    document_id: Optional[str] = None
+    source: str = LOCAL
+
+
+class InvalidationBus:
+    """Dispatches invalidation events to subscribed caches"""
+
+    def __init__(
+        self,
+        collections: Iterable[str] = WATCHED_COLLECTIONS,
+        poll_interval_seconds: Optional[float] = None,
+    ):
+        self.collections = tuple(collections)
+        self.poll_interval_seconds = (
+            config.INVALIDATION_POLL_SECONDS if poll_interval_seconds is None else poll_interval_seconds
+        )
+        self._subscribers: Dict[str, List[Callable[[InvalidationEvent], None]]] = {}
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._db = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.mode: Optional[str] = None
+
+    # ===== Subscribing and publishing =====
+
+    def subscribe(self, collection: str, callback: Callable[[InvalidationEvent], None]):
+        """Call `callback(event)` for every event on `collection`"""
+        with self._lock:
+            self._subscribers.setdefault(collection, []).append(callback)
+
+    def unsubscribe(self, collection: str, callback: Callable[[InvalidationEvent], None]):
+        with self._lock:
+            callbacks = self._subscribers.get(collection, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, event: InvalidationEvent):
+        """Deliver an event to the collection's subscribers (errors are logged, not raised)"""
+        invalidation_events_total.inc((event.collection, event.source))
+        with self._lock:
+            callbacks = list(self._subscribers.get(event.collection, ()))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache invalidation handler failed for {event.collection}: {str(e)}")
+
+    def note_write(self, db_collection, document_id: Optional[str] = None, operation: str = UPDATE):
+        """
+        Record a write made by this process.
+
+        Publishes a local event straight away and, unless change streams
+        are carrying events to the other workers, bumps the collection's
+        version counter for their pollers. Never raises: a failed
+        notification must not fail the write that already happened.
+        """
+        collection = db_collection.name
+        if collection not in self.collections:
+            return
+        try:
+            if self.mode != MODE_CHANGE_STREAM:
+                version = bump_version(db_collection)
+                with self._lock:
+                    # Our own bump; don't report it back to ourselves as a foreign change
+                    if self._versions.get(collection) == version - 1:
+                        self._versions[collection] = version
+        except Exception as e:
+            logger.warning(f"⚠️ Could not bump {collection} version: {str(e)}")
+        self.publish(InvalidationEvent(collection, operation, document_id, LOCAL))
+
+    # ===== Background listener =====
+
+    def start(self, db, mode: Optional[str] = None):
+        """
+        Start listening on `db` in a daemon thread.
+
+        Args:
+            db: Database holding the watched collections
+            mode: "change_stream", "polling" or None to detect
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._db = db
+        self._stop.clear()
+        self.mode = mode or self._detect_mode(db)
+        target = self._run_change_stream if self.mode == MODE_CHANGE_STREAM else self._run_polling
+        if self.mode == MODE_POLLING:
+            self.poll_once()
+        self._thread = threading.Thread(target=target, name="cache-invalidation", daemon=True)
+        self._thread.start()
+        logger.info(f"🔔 Cache invalidation bus started ({self.mode})")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.mode = None
+
+    def _detect_mode(self, db) -> str:
+        try:
+            hello = db.client.admin.command("hello")
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Could not detect topology, polling for invalidations: {str(e)}")
+            return MODE_POLLING
+        # Replica set members report setName; mongos reports msg == "isdbgrid"
+        if hello.get("setName") or hello.get("msg") == "isdbgrid":
+            return MODE_CHANGE_STREAM
+        return MODE_POLLING
+
+    # ----- change streams -----
+
+    def _run_change_stream(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(self.collections)},
+            "operationType": {"$in": list(_OPERATIONS)},
+        }}]
+        resume_token = None
+        opened = False
+        while not self._stop.is_set():
+            try:
+                with self._db.watch(pipeline, resume_after=resume_token, max_await_time_ms=1000) as stream:
+                    if opened and resume_token is None:
+                        # Reopened without a token: changes in the gap were not seen
+                        self._publish_reset(CHANGE_STREAM)
+                    opened = True
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        resume_token = stream.resume_token
+                        self.publish(self._event_from_change(change))
+            except OperationFailure as e:
+                if e.code in _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("⚠️ Change streams unavailable, polling for invalidations")
+                    self.mode = MODE_POLLING
+                    self.poll_once()
+                    self._run_polling()
+                    return
+                if e.code in _RESUME_FAILED:
+                    # The oplog no longer holds our resume point
+                    resume_token = None
+                logger.warning(f"⚠️ Change stream error, reconnecting: {str(e)}")
+                self._stop.wait(1.0)
+            except PyMongoError as e:
+                logger.warning(f"⚠️ Change stream error, resuming: {str(e)}")
+                self._stop.wait(1.0)
+
+    @staticmethod
+    def _event_from_change(change) -> InvalidationEvent:
+        document_key = change.get("documentKey") or {}
+        document_id = document_key.get("_id")
+        return InvalidationEvent(
+            collection=change["ns"]["coll"],
+            operation=_OPERATIONS.get(change["operationType"], CHANGED),
+            document_id=str(document_id) if document_id is not None else None,
+            source=CHANGE_STREAM,
+        )
+
+    # ----- version polling -----
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval_seconds):
+            try:
+                self.poll_once()
+            except PyMongoError as e:
+                logger.warning(f"⚠️ Invalidation poll failed: {str(e)}")
+
+    def poll_once(self):
+        """Read the version counters once and publish events for the ones that moved"""
+        docs = self._db[CACHE_VERSIONS_COLLECTION].find({"_id": {"$in": list(self.collections)}})
+        current = {doc["_id"]: doc.get("version", 0) for doc in docs}
+        changed = []
+        with self._lock:
+            first_poll = not self._versions
+            for collection in self.collections:
+                version = current.get(collection, 0)
+                if not first_poll and self._versions.get(collection, 0) != version:
+                    changed.append(collection)
+                self._versions[collection] = version
+        for collection in changed:
+            self.publish(InvalidationEvent(collection, CHANGED, None, POLL))
+
+    def _publish_reset(self, source: str):
+        for collection in self.collections:
+            self.publish(InvalidationEvent(collection, RESET, None, source))
+
+
+# Global bus (one per worker process)
+invalidation_bus = InvalidationBus()
+
+
+def note_write(db_collection, document_id: Optional[str] = None, operation: str = UPDATE):
+    """Tell the invalidation bus this process wrote to `db_collection`"""
+    invalidation_bus.note_write(db_collection, document_id, operation)
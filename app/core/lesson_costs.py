@@ -0,0 +1,222 @@
+"""
+Lesson costs stored on the lesson.
+
+When a lesson is approved or marked completed its price per hour, cost
+(hours x price) and the pricing version used ("<pricing _id>@<version>",
+None for the default prices) are written to the lesson document, priced
+as of its scheduled date. Cost summaries then $sum the stored costs and
+only price lessons that don't have one yet (e.g. written before costs
+were stored).
+
+recompute_lesson_costs() reprices stored costs after a pricing
+correction: every lesson priced with one pricing entry from a date on,
+lessons priced with the defaults, or a date range. Archived lessons are
+read-only and keep their costs.
+"""
+
+import logging
+import re
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from app.core import archive
+from app.core.config import config
+from app.core.invalidation import note_write
+from app.core.pricing import PricingHistory, PricingTable
+from app.core.pricing_kernel import PriceKernel, load_price_kernel
+
+logger = logging.getLogger(__name__)
+
+# Statuses whose lessons carry a stored cost
+COSTED_STATUSES = ["approved", "completed"]
+
+COST_FIELDS = ("price_per_hour", "cost", "pricing_version")
+
+# Fields pricing needs
+PRICING_PROJECTION = {
+    "subject": 1, "education_level": 1, "lesson_type": 1, "duration_minutes": 1, "scheduled_date": 1,
+    "price_per_hour": 1, "cost": 1, "pricing_version": 1,
+}
+
+
+def cost_fields(kernel: PriceKernel, lessons: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """price_per_hour, cost and pricing_version for every lesson document"""
+    costs = kernel.price_lessons(lessons)
+    return [
+        {"price_per_hour": float(price), "cost": float(cost), "pricing_version": version}
+        for price, cost, version in zip(costs.price_per_hour, costs.cost, costs.pricing_version)
+    ]
+
+
+def fresh_kernel(pricing_collection) -> PriceKernel:
+    """
+    Kernel over pricing read now, not through the pricing cache
+
+    Used for every cost that gets stored: the cache may belong to a process
+    that hasn't heard about the latest pricing write yet.
+    """
+    return PriceKernel(PricingTable.load(pricing_collection), PricingHistory.load(pricing_collection))
+
+
+def price_lesson(lesson: Dict[str, Any], pricing_collection) -> Dict[str, Any]:
+    """
+    Fields to $set on a lesson being approved or completed
+
+    Args:
+        lesson: Lesson document (with any pending changes applied; enums allowed)
+        pricing_collection: Pricing collection (read fresh, see fresh_kernel)
+    """
+    lesson = {name: value.value if isinstance(value, Enum) else value for name, value in lesson.items()}
+    fields = cost_fields(fresh_kernel(pricing_collection), [lesson])[0]
+    fields["priced_at"] = datetime.utcnow()
+    return fields
+
+
+def pricing_version_filter(pricing_id: str) -> Dict[str, Any]:
+    """Lessons priced with any version of one pricing entry (anchored: uses the index)"""
+    return {"pricing_version": {"$regex": f"^{re.escape(pricing_id)}@"}}
+
+
+def recompute_query(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    pricing_id: Optional[str] = None,
+    unpriced_only: bool = False,
+) -> Dict[str, Any]:
+    """Filter for the costed lessons a recomputation covers"""
+    query: Dict[str, Any] = {"status": {"$in": COSTED_STATUSES}}
+    if start or end:
+        query["scheduled_date"] = {}
+        if start:
+            query["scheduled_date"]["$gte"] = start
+        if end:
+            query["scheduled_date"]["$lt"] = end
+    if pricing_id:
+        query.update(pricing_version_filter(pricing_id))
+    elif unpriced_only:
+        query["pricing_version"] = None
+    return query
+
+
+def recompute_lesson_costs(
+    lessons_collection,
+    pricing_collection,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    pricing_id: Optional[str] = None,
+    unpriced_only: bool = False,
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Reprice the stored cost of approved/completed lessons
+
+    Args:
+        start, end: Only lessons scheduled in [start, end)
+        pricing_id: Only lessons priced with this pricing entry
+        unpriced_only: Only lessons priced with the defaults (or not priced yet)
+        batch_size: Lessons per bulk write (default LESSON_COST_BATCH_SIZE)
+
+    Returns:
+        {"matched": lessons read, "updated": lessons whose cost changed}
+    """
+    # Runs right after pricing writes, often in another process
+    kernel = fresh_kernel(pricing_collection)
+    batch_size = batch_size or config.LESSON_COST_BATCH_SIZE
+    query = recompute_query(start, end, pricing_id, unpriced_only)
+    matched = updated = 0
+
+    batch: List[Dict[str, Any]] = []
+    cursor = lessons_collection.find(query, PRICING_PROJECTION).batch_size(batch_size)
+    for lesson in cursor:
+        batch.append(lesson)
+        if len(batch) >= batch_size:
+            updated += _write_costs(lessons_collection, kernel, batch)
+            matched += len(batch)
+            batch = []
+    if batch:
+        updated += _write_costs(lessons_collection, kernel, batch)
+        matched += len(batch)
+
+    if updated:
+        note_write(lessons_collection)
+    logger.info(f"💲 Recomputed lesson costs: {updated} of {matched} lesson(s) changed")
+    return {"matched": matched, "updated": updated}
+
+
+def _write_costs(lessons_collection, kernel: PriceKernel, lessons: List[Dict[str, Any]]) -> int:
+    """Store new costs where they differ from the stored ones; returns how many changed"""
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne({"_id": lesson["_id"]}, {"$set": {**fields, "priced_at": now}})
+        for lesson, fields in zip(lessons, cost_fields(kernel, lessons))
+        if any(lesson.get(name) != fields[name] for name in COST_FIELDS)
+    ]
+    if operations:
+        lessons_collection.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def cost_totals(lessons_collection, query: Dict[str, Any], pricing_collection) -> Dict[str, Any]:
+    """
+    Total cost of the lessons matching `query` (hot and archived)
+
+    Stored costs are summed in the database; lessons without one are priced
+    in one pass.
+
+    Returns:
+        {"total_cost", "lessons_count", "unpriced": [lessons priced with the
+        defaults, with subject, education_level, lesson_type, price_per_hour]}
+    """
+    stored_query = {**query, "cost": {"$ne": None}}
+    pipeline = [
+        {"$match": stored_query},
+        {"$group": {"_id": None, "cost": {"$sum": "$cost"}, "count": {"$sum": 1}}},
+    ]
+    rows = archive.merge_grouped(archive.aggregate(lessons_collection, pipeline), sums=("cost", "count"))
+    total_cost = float(rows[0]["cost"]) if rows else 0.0
+    lessons_count = rows[0]["count"] if rows else 0
+
+    unpriced = [
+        _unpriced_row(lesson, lesson.get("price_per_hour"))
+        for lesson in archive.find(lessons_collection, {**stored_query, "pricing_version": None}, PRICING_PROJECTION)
+    ]
+
+    missing = archive.find(lessons_collection, {**query, "cost": None}, PRICING_PROJECTION)
+    if missing:
+        # Only reported, never stored, so the cached pricing is fine here
+        costs = load_price_kernel(pricing_collection).price_lessons(missing)
+        total_cost += costs.total
+        lessons_count += len(missing)
+        unpriced.extend(
+            _unpriced_row(lesson, price)
+            for lesson, price, priced in zip(missing, costs.price_per_hour, costs.priced)
+            if not priced
+        )
+
+    return {"total_cost": total_cost, "lessons_count": lessons_count, "unpriced": unpriced}
+
+
+def stored_or_priced(kernel: PriceKernel, lessons: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    price_per_hour, cost and pricing_version of every lesson: the stored
+    values where present, priced by `kernel` otherwise
+    """
+    lessons = list(lessons)
+    missing = [lesson for lesson in lessons if lesson.get("cost") is None]
+    priced = iter(cost_fields(kernel, missing)) if missing else iter(())
+    return [
+        next(priced) if lesson.get("cost") is None else {name: lesson.get(name) for name in COST_FIELDS}
+        for lesson in lessons
+    ]
+
+
+def _unpriced_row(lesson: Dict[str, Any], price_per_hour: Any) -> Dict[str, Any]:
+    return {
+        "subject": lesson.get("subject", ""),
+        "education_level": lesson.get("education_level", "elementary"),
+        "lesson_type": lesson.get("lesson_type", "individual"),
+        "used_default_price": float(price_per_hour or 0),
+    }
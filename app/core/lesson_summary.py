@@ -0,0 +1,368 @@
+"""
+Per-teacher monthly lesson summary buckets.
+
+One document per (teacher, month, subject, lesson type) in
+'lesson_summary_buckets' holds lesson, minute and student counts plus a
+count per status. Lesson writes keep the buckets current with $inc deltas
+(old contribution out, new one in), so GET /lessons/summary composes
+closed months from a handful of small documents and aggregates only the
+open month (and anything scheduled after it) from the lessons collection.
+
+A teacher's buckets are built from their lessons on first use; a marker
+document records that. If a delta can't be applied the marker is dropped
+and the buckets are rebuilt on the next summary.
+
+The marker is also the rebuild lock: a rebuild inserts (or takes over)
+the marker before it aggregates and only sets built_at at the end. While
+a rebuild runs, summaries are aggregated live, and lesson writes flag the
+marker dirty; a rebuild that a write raced with drops its marker instead
+of finishing, so the next summary builds again.
+"""
+
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.core import archive
+
+logger = logging.getLogger(__name__)
+
+LESSON_SUMMARY_BUCKETS_COLLECTION = "lesson_summary_buckets"
+
+STATUSES = ("pending", "approved", "rejected", "completed", "cancelled")
+
+# How long a rebuild may hold a teacher's marker before another one takes over
+REBUILD_TIMEOUT_SECONDS = 300
+
+
+def buckets_collection(lessons_collection):
+    """The buckets collection living next to the lessons collection"""
+    return lessons_collection.database[LESSON_SUMMARY_BUCKETS_COLLECTION]
+
+
+def period_of(moment: datetime) -> int:
+    """Month as a sortable int: 2025-03 -> 202503"""
+    return moment.year * 100 + moment.month
+
+
+def period_start(period: int) -> datetime:
+    return datetime(period // 100, period % 100, 1)
+
+
+def next_period(period: int) -> int:
+    year, month = divmod(period, 100)
+    return (year + 1) * 100 + 1 if month == 12 else period + 1
+
+
+def _marker_id(teacher_id: str) -> str:
+    return f"{teacher_id}|built"
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _bucket(lesson: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any], Dict[str, int]]]:
+    """(bucket id, key fields, counters) a lesson document contributes, or None"""
+    teacher_id = lesson.get("teacher_id")
+    scheduled_date = lesson.get("scheduled_date")
+    if not teacher_id or not isinstance(scheduled_date, datetime):
+        return None
+    key = {
+        "teacher_id": teacher_id,
+        "period": period_of(scheduled_date),
+        "subject": lesson.get("subject"),
+        "lesson_type": _value(lesson.get("lesson_type")),
+    }
+    counters = {
+        "lessons": 1,
+        "minutes": lesson.get("duration_minutes") or 0,
+        "students": len(lesson.get("students") or []),
+    }
+    status = _value(lesson.get("status"))
+    if status in STATUSES:
+        counters[f"status.{status}"] = 1
+    bucket_id = f"{teacher_id}|{key['period']}|{key['subject']}|{key['lesson_type']}"
+    return bucket_id, key, counters
+
+
+def bucket_updates(bucket_fn: Callable, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """
+    Upserts moving a lesson's contribution from its old bucket to its new one
+
+    Args:
+        bucket_fn: lesson document -> (bucket id, key fields, counters), or
+            None if the lesson doesn't count
+        before: Lesson document before the write (None for an insert)
+        after: Lesson document after the write
+
+    Returns:
+        (UpdateOne operations, key fields of every bucket touched)
+    """
+    deltas: Dict[str, Tuple[Dict[str, Any], Dict[str, int]]] = {}
+    for document, sign in ((before, -1), (after, 1)):
+        bucket = bucket_fn(document) if document else None
+        if bucket is None:
+            continue
+        bucket_id, key, counters = bucket
+        _, inc = deltas.setdefault(bucket_id, (key, {}))
+        for name, amount in counters.items():
+            inc[name] = inc.get(name, 0) + sign * amount
+
+    operations = []
+    for bucket_id, (key, inc) in deltas.items():
+        inc = {name: amount for name, amount in inc.items() if amount}
+        if inc:
+            operations.append(UpdateOne({"_id": bucket_id}, {"$inc": inc, "$setOnInsert": key}, upsert=True))
+    return operations, [key for key, _ in deltas.values()]
+
+
+def apply_lesson_change(
+    lessons_collection,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+):
+    """
+    Move a lesson's contribution from its old bucket to its new one.
+
+    Args:
+        lessons_collection: Collection the lesson was written to
+        before: Lesson document before the write (None for an insert)
+        after: Lesson document after the write
+        changes: Instead of `after`, the fields $set on `before`
+
+    Never raises: on failure the affected teachers' buckets are marked for
+    a rebuild instead.
+    """
+    teachers = set()
+    try:
+        if changes is not None:
+            after = {**before, **changes}
+        operations, keys = bucket_updates(_bucket, before, after)
+        teachers = {key["teacher_id"] for key in keys}
+        if operations:
+            # A rebuild running now may or may not see this write: flag it
+            operations.extend(
+                UpdateOne({"_id": _marker_id(teacher), "built_at": {"$exists": False}}, {"$set": {"dirty": True}})
+                for teacher in teachers
+            )
+            buckets_collection(lessons_collection).bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Lesson summary buckets out of date for {len(teachers)} teacher(s): {str(e)}")
+        if teachers:
+            try:
+                buckets_collection(lessons_collection).delete_many(
+                    {"_id": {"$in": [_marker_id(teacher) for teacher in teachers]}}
+                )
+            except Exception:
+                pass
+
+
+def _group_stage(group_id: Dict[str, Any]) -> Dict[str, Any]:
+    stage = {
+        "_id": group_id,
+        "lessons": {"$sum": 1},
+        "minutes": {"$sum": "$duration_minutes"},
+        "students": {"$sum": {"$size": {"$ifNull": ["$students", []]}}},
+    }
+    for status in STATUSES:
+        stage[status] = {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+    return {"$group": stage}
+
+
+def _row(result: Dict[str, Any]) -> Dict[str, Any]:
+    row = {
+        "subject": result["_id"]["subject"],
+        "lesson_type": result["_id"]["lesson_type"],
+        "lessons": result["lessons"],
+        "minutes": result["minutes"],
+        "students": result["students"],
+    }
+    row["status"] = {status: result[status] for status in STATUSES}
+    return row
+
+
+def _claim_rebuild(buckets, teacher_id: str) -> Optional[str]:
+    """
+    Take the teacher's marker for a rebuild
+
+    Returns:
+        Token identifying this rebuild, or None if another rebuild holds it
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    claim = {"teacher_id": teacher_id, "building_since": now, "token": token, "dirty": False}
+    try:
+        buckets.insert_one({"_id": _marker_id(teacher_id), **claim})
+        return token
+    except DuplicateKeyError:
+        pass
+    # Built, or held by a rebuild that died
+    taken = buckets.find_one_and_update(
+        {"_id": _marker_id(teacher_id), "$or": [
+            {"built_at": {"$exists": True}},
+            {"building_since": {"$lt": now - timedelta(seconds=REBUILD_TIMEOUT_SECONDS)}},
+        ]},
+        {"$set": claim, "$unset": {"built_at": ""}},
+    )
+    return token if taken is not None else None
+
+
+def rebuild_teacher_buckets(lessons_collection, teacher_id: str) -> Optional[int]:
+    """
+    Recompute all of a teacher's buckets from their lessons.
+
+    Returns:
+        Number of buckets written, or None if the buckets aren't built:
+        another rebuild holds the teacher, or a lesson write raced this one
+    """
+    buckets = buckets_collection(lessons_collection)
+    token = _claim_rebuild(buckets, teacher_id)
+    if token is None:
+        return None
+
+    pipeline = [
+        {"$match": {"teacher_id": teacher_id, "scheduled_date": {"$type": "date"}}},
+        _group_stage({
+            "subject": "$subject",
+            "lesson_type": "$lesson_type",
+            "year": {"$year": "$scheduled_date"},
+            "month": {"$month": "$scheduled_date"},
+        }),
+    ]
+    # Archived months are included so the buckets keep covering them
+    results = archive.merge_grouped(
+        archive.aggregate(lessons_collection, pipeline),
+        sums=("lessons", "minutes", "students", *STATUSES),
+    )
+    documents = []
+    for result in results:
+        row = _row(result)
+        period = result["_id"]["year"] * 100 + result["_id"]["month"]
+        documents.append({
+            "_id": f"{teacher_id}|{period}|{row['subject']}|{row['lesson_type']}",
+            "teacher_id": teacher_id,
+            "period": period,
+            "subject": row["subject"],
+            "lesson_type": row["lesson_type"],
+            "lessons": row["lessons"],
+            "minutes": row["minutes"],
+            "students": row["students"],
+            "status": row["status"],
+        })
+
+    if documents:
+        buckets.bulk_write(
+            [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents], ordered=False
+        )
+    buckets.delete_many({
+        "teacher_id": teacher_id,
+        "_id": {"$nin": [_marker_id(teacher_id), *(document["_id"] for document in documents)]},
+    })
+
+    done = buckets.update_one(
+        {"_id": _marker_id(teacher_id), "token": token, "dirty": False},
+        {"$set": {"built_at": datetime.utcnow()}, "$unset": {"building_since": "", "token": "", "dirty": ""}},
+    )
+    if done.matched_count == 0:
+        buckets.delete_one({"_id": _marker_id(teacher_id), "token": token})
+        logger.info(f"🔁 Lesson summary rebuild for teacher {teacher_id} raced a lesson write; rebuilding next time")
+        return None
+    return len(documents)
+
+
+def _bucket_rows(buckets, teacher_id: str, from_period: Optional[int], before_period: int) -> List[Dict[str, Any]]:
+    period_filter: Dict[str, int] = {"$lt": before_period}
+    if from_period is not None:
+        period_filter["$gte"] = from_period
+    rows = []
+    for bucket in buckets.find({"teacher_id": teacher_id, "period": period_filter}):
+        status_counts = bucket.get("status") or {}
+        rows.append({
+            "subject": bucket["subject"],
+            "lesson_type": bucket["lesson_type"],
+            "lessons": bucket.get("lessons", 0),
+            "minutes": bucket.get("minutes", 0),
+            "students": bucket.get("students", 0),
+            "status": {status: status_counts.get(status, 0) for status in STATUSES},
+        })
+    return rows
+
+
+def _live_rows(
+    lessons_collection, teacher_id: str, start: Optional[datetime], end: Optional[datetime]
+) -> List[Dict[str, Any]]:
+    date_filter: Dict[str, Any] = {"$type": "date"}
+    if start is not None:
+        date_filter["$gte"] = start
+    if end is not None:
+        date_filter["$lt"] = end
+    pipeline = [
+        {"$match": {"teacher_id": teacher_id, "scheduled_date": date_filter}},
+        _group_stage({"subject": "$subject", "lesson_type": "$lesson_type"}),
+    ]
+    results = archive.merge_grouped(
+        archive.aggregate(lessons_collection, pipeline),
+        sums=("lessons", "minutes", "students", *STATUSES),
+    )
+    return [_row(result) for result in results]
+
+
+def summary_rows(
+    lessons_collection,
+    teacher_id: str,
+    from_period: Optional[int] = None,
+    to_period: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lesson totals per (subject, lesson type) for a teacher's months
+    [from_period, to_period] (both optional and inclusive).
+
+    Months before the current one come from buckets; the current month and
+    later are aggregated live. Everything is aggregated live while the
+    teacher's buckets are being rebuilt.
+    """
+    open_period = period_of(now or datetime.utcnow())
+    buckets = buckets_collection(lessons_collection)
+    end_period = next_period(to_period) if to_period is not None else None
+    marker = buckets.find_one({"_id": _marker_id(teacher_id)}, {"built_at": 1})
+    if marker is None or marker.get("built_at") is None:
+        if rebuild_teacher_buckets(lessons_collection, teacher_id) is None:
+            start = period_start(from_period) if from_period is not None else None
+            end = period_start(end_period) if end_period is not None else None
+            return merge_rows(_live_rows(lessons_collection, teacher_id, start, end))
+
+    rows = []
+    if from_period is None or from_period < open_period:
+        closed_end = open_period if end_period is None else min(open_period, end_period)
+        rows.extend(_bucket_rows(buckets, teacher_id, from_period, closed_end))
+    if end_period is None or end_period > open_period:
+        live_start = period_start(max(open_period, from_period or open_period))
+        live_end = period_start(end_period) if end_period is not None else None
+        rows.extend(_live_rows(lessons_collection, teacher_id, live_start, live_end))
+    return merge_rows(rows)
+
+
+def merge_rows(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add up rows with the same subject and lesson type, sorted like the old $sort"""
+    merged: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["subject"], row["lesson_type"])
+        total = merged.get(key)
+        if total is None:
+            merged[key] = {**row, "status": dict(row["status"])}
+            continue
+        for name in ("lessons", "minutes", "students"):
+            total[name] += row[name]
+        for status, count in row["status"].items():
+            total["status"][status] += count
+    return [
+        row for _, row in sorted(merged.items(), key=lambda item: (str(item[0][0]), str(item[0][1])))
+        if row["lessons"] > 0
+    ]
@@ -0,0 +1,269 @@
+"""
+Daily lesson activity buckets for trend analytics.
+
+One document per (teacher, day) in 'lesson_daily_buckets' holds the
+lessons, minutes (split individual/group) and students scheduled that day,
+counting pending, approved and completed lessons (cancelled and rejected
+ones drop out). Lesson writes keep them current with the same $inc deltas
+as the monthly summary buckets; backfill_daily_buckets() rebuilds a date
+range from the lessons (run once for existing data, or after fixes).
+
+Trend, utilization and growth reports read these compact buckets - at
+most one document per teacher per day - instead of scanning lessons.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core import archive
+from app.core.lesson_summary import bucket_updates
+
+logger = logging.getLogger(__name__)
+
+LESSON_DAILY_BUCKETS_COLLECTION = "lesson_daily_buckets"
+
+COUNTED_STATUSES = ("pending", "approved", "completed")
+
+_COUNTERS = ("lessons", "minutes", "individual_minutes", "group_minutes", "students")
+
+
+def daily_buckets_collection(lessons_collection):
+    """The daily buckets collection living next to the lessons collection"""
+    return lessons_collection.database[LESSON_DAILY_BUCKETS_COLLECTION]
+
+
+def day_of(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _daily_bucket(lesson: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any], Dict[str, int]]]:
+    """(bucket id, key fields, counters) a lesson document contributes, or None"""
+    teacher_id = lesson.get("teacher_id")
+    scheduled_date = lesson.get("scheduled_date")
+    if not teacher_id or not isinstance(scheduled_date, datetime):
+        return None
+    if _value(lesson.get("status")) not in COUNTED_STATUSES:
+        return None
+    day = day_of(scheduled_date)
+    minutes = lesson.get("duration_minutes") or 0
+    type_minutes = "group_minutes" if _value(lesson.get("lesson_type")) == "group" else "individual_minutes"
+    counters = {
+        "lessons": 1,
+        "minutes": minutes,
+        type_minutes: minutes,
+        "students": len(lesson.get("students") or []),
+    }
+    return f"{teacher_id}|{day:%Y-%m-%d}", {"teacher_id": teacher_id, "day": day}, counters
+
+
+def apply_daily_change(
+    lessons_collection,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+):
+    """
+    Move a lesson's contribution between daily buckets (see
+    lesson_summary.apply_lesson_change). Never raises; a missed delta is
+    repaired by the next backfill of that range.
+    """
+    try:
+        if changes is not None:
+            after = {**before, **changes}
+        operations, _ = bucket_updates(_daily_bucket, before, after)
+        if operations:
+            daily_buckets_collection(lessons_collection).bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Daily lesson buckets out of date, backfill to repair: {str(e)}")
+
+
+def backfill_daily_buckets(
+    lessons_collection,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> int:
+    """
+    Rebuild the daily buckets for days in [start, end) from the lessons.
+
+    Returns:
+        Number of buckets written
+    """
+    day_filter: Dict[str, datetime] = {}
+    if start is not None:
+        day_filter["$gte"] = day_of(start)
+    if end is not None:
+        day_filter["$lt"] = day_of(end)
+    match: Dict[str, Any] = {"status": {"$in": list(COUNTED_STATUSES)}}
+    match["scheduled_date"] = day_filter or {"$type": "date"}
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "teacher_id": "$teacher_id",
+                "year": {"$year": "$scheduled_date"},
+                "month": {"$month": "$scheduled_date"},
+                "day": {"$dayOfMonth": "$scheduled_date"},
+            },
+            "lessons": {"$sum": 1},
+            "minutes": {"$sum": "$duration_minutes"},
+            "group_minutes": {"$sum": {"$cond": [{"$eq": ["$lesson_type", "group"]}, "$duration_minutes", 0]}},
+            "students": {"$sum": {"$size": {"$ifNull": ["$students", []]}}},
+        }},
+    ]
+    results = archive.merge_grouped(
+        archive.aggregate(lessons_collection, pipeline),
+        sums=("lessons", "minutes", "group_minutes", "students"),
+    )
+    documents = []
+    for result in results:
+        key = result["_id"]
+        if not key.get("teacher_id"):
+            continue
+        day = datetime(key["year"], key["month"], key["day"])
+        documents.append({
+            "_id": f"{key['teacher_id']}|{day:%Y-%m-%d}",
+            "teacher_id": key["teacher_id"],
+            "day": day,
+            "lessons": result["lessons"],
+            "minutes": result["minutes"],
+            "individual_minutes": result["minutes"] - result["group_minutes"],
+            "group_minutes": result["group_minutes"],
+            "students": result["students"],
+        })
+
+    buckets = daily_buckets_collection(lessons_collection)
+    buckets.delete_many({"day": day_filter} if day_filter else {})
+    if documents:
+        buckets.insert_many(documents)
+    logger.info(f"📈 Backfilled {len(documents)} daily lesson buckets")
+    return len(documents)
+
+
+def read_buckets(
+    lessons_collection,
+    start: datetime,
+    end: datetime,
+    teacher_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Daily buckets for days in [start, end), optionally for one teacher"""
+    # Buckets emptied by deltas (lesson moved or cancelled) stay behind with zeros
+    query: Dict[str, Any] = {"day": {"$gte": start, "$lt": end}, "lessons": {"$gt": 0}}
+    if teacher_id:
+        query["teacher_id"] = teacher_id
+    projection = {"_id": 0, "teacher_id": 1, "day": 1, **{name: 1 for name in _COUNTERS}}
+    return list(daily_buckets_collection(lessons_collection).find(query, projection))
+
+
+# ===== Reports over buckets =====
+
+def period_start(day: datetime, granularity: str) -> datetime:
+    """Monday of the day's ISO week, or the first of its month"""
+    if granularity == "week":
+        return day_of(day) - timedelta(days=day.weekday())
+    return datetime(day.year, day.month, 1)
+
+
+def _next_period(start: datetime, granularity: str) -> datetime:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    return datetime(start.year + 1, 1, 1) if start.month == 12 else datetime(start.year, start.month + 1, 1)
+
+
+def trend_series(buckets: List[Dict[str, Any]], start: datetime, end: datetime, granularity: str) -> List[Dict[str, Any]]:
+    """
+    Totals per week or month over [start, end), empty periods included
+    """
+    totals: Dict[datetime, Dict[str, Any]] = {}
+    teachers: Dict[datetime, set] = defaultdict(set)
+    for bucket in buckets:
+        period = period_start(bucket["day"], granularity)
+        row = totals.setdefault(period, {name: 0 for name in _COUNTERS})
+        for name in _COUNTERS:
+            row[name] += bucket.get(name) or 0
+        teachers[period].add(bucket["teacher_id"])
+
+    series = []
+    period = period_start(start, granularity)
+    while period < end:
+        row = totals.get(period, {name: 0 for name in _COUNTERS})
+        series.append({
+            "period_start": period,
+            "lessons": row["lessons"],
+            "hours": round(row["minutes"] / 60, 2),
+            "individual_hours": round(row["individual_minutes"] / 60, 2),
+            "group_hours": round(row["group_minutes"] / 60, 2),
+            "students": row["students"],
+            "active_teachers": len(teachers.get(period, ())),
+        })
+        period = _next_period(period, granularity)
+    return series
+
+
+def growth_curve(series: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add cumulative hours and period-over-period growth (%) to a trend series"""
+    curve = []
+    cumulative = 0.0
+    previous = None
+    for row in series:
+        cumulative += row["hours"]
+        growth = None
+        if previous is not None and previous["hours"] > 0:
+            growth = round((row["hours"] - previous["hours"]) / previous["hours"] * 100, 2)
+        curve.append({**row, "cumulative_hours": round(cumulative, 2), "hours_growth_pct": growth})
+        previous = row
+    return curve
+
+
+def _capacity_hours(start: datetime, end: datetime, capacity_hours_per_week: float) -> float:
+    return capacity_hours_per_week * (end - start).days / 7
+
+
+def idle_utilization(start: datetime, end: datetime, capacity_hours_per_week: float) -> Dict[str, Any]:
+    """teacher_utilization() row for a teacher without lessons in the range"""
+    capacity_hours = _capacity_hours(start, end, capacity_hours_per_week)
+    return {
+        "hours": 0.0,
+        "lessons": 0,
+        "active_days": 0,
+        "capacity_hours": round(capacity_hours, 2),
+        "utilization_pct": 0.0 if capacity_hours else None,
+    }
+
+
+def teacher_utilization(
+    buckets: List[Dict[str, Any]],
+    start: datetime,
+    end: datetime,
+    capacity_hours_per_week: float,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Hours taught against capacity per teacher over [start, end)
+
+    Capacity is capacity_hours_per_week scaled to the range length.
+    """
+    capacity_hours = _capacity_hours(start, end, capacity_hours_per_week)
+    by_teacher: Dict[str, Dict[str, Any]] = {}
+    for bucket in buckets:
+        row = by_teacher.setdefault(bucket["teacher_id"], {"minutes": 0, "lessons": 0, "active_days": 0})
+        row["minutes"] += bucket.get("minutes") or 0
+        row["lessons"] += bucket.get("lessons") or 0
+        row["active_days"] += 1
+
+    result = {}
+    for teacher_id, row in by_teacher.items():
+        hours = row["minutes"] / 60
+        result[teacher_id] = {
+            "hours": round(hours, 2),
+            "lessons": row["lessons"],
+            "active_days": row["active_days"],
+            "capacity_hours": round(capacity_hours, 2),
+            "utilization_pct": round(hours / capacity_hours * 100, 2) if capacity_hours else None,
+        }
+    return result
@@ -0,0 +1,292 @@
+"""
+In-process metrics in Prometheus text exposition format.
+
+Hot paths only ever write to a dict owned by the current thread, so
+recording a sample takes no lock. The lock is only taken when a thread
+records its first sample (to register its shard) and when /metrics merges
+all shards. Shards of finished threads are folded into a retired total so
+short-lived threads don't accumulate.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; suits request, query and bcrypt latencies
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Key = Tuple[str, Tuple[str, ...]]
+
+
+def _merge_into(target: Dict[Key, object], values: Dict[Key, object]):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = target.get(key)
+            if current is None:
+                target[key] = list(value)
+            else:
+                for index, item in enumerate(value):
+                    current[index] += item
+        else:
+            target[key] = target.get(key, 0.0) + value
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Holds metric definitions and the per-thread sample shards"""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[Key, object]]] = []
+        self._retired: Dict[Key, object] = {}
+        self._lock = threading.Lock()
+        self._prune_at = 64
+
+    def shard(self) -> Dict[Key, object]:
+        """The calling thread's private sample dict"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict[Key, object] = {}
+            self._local.values = values
+            with self._lock:
+                # Thread churn without scrapes would otherwise grow the list forever
+                if len(self._shards) >= self._prune_at:
+                    self._retire_dead_shards()
+                    self._prune_at = max(64, 2 * len(self._shards))
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _retire_dead_shards(self):
+        """Fold shards of finished threads into the retired totals (lock held)"""
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                _merge_into(self._retired, values)
+        self._shards = alive
+
+    def register(self, metric: "_Metric") -> "_Metric":
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self) -> Dict[Key, object]:
+        """Merge every thread's samples into one snapshot"""
+        with self._lock:
+            self._retire_dead_shards()
+            merged: Dict[Key, object] = {}
+            for _, values in self._shards:
+                # dict.copy() is atomic under the GIL, so a concurrent
+                # insert by the owning thread can't break iteration
+                _merge_into(merged, values.copy())
+            _merge_into(merged, self._retired)
+        return merged
+
+    def render(self) -> str:
+        """Text exposition format (version 0.0.4)"""
+        samples = self.collect()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(samples))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all samples (tests)"""
+        with self._lock:
+            for _, values in self._shards:
+                values.clear()
+            self._retired = {}
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self._registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _own_samples(self, samples: Dict[Key, object]):
+        return sorted((labels, value) for (name, labels), value in samples.items() if name == self.name)
+
+    def value(self, labels: Tuple[str, ...] = ()):
+        """Current merged value for one label set (tests and derived metrics)"""
+        return self._registry.collect().get((self.name, tuple(labels)))
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    type = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0):
+        shard = self._registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def render(self, samples):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+            for labels, value in self._own_samples(samples)
+        ]
+
+
+class Gauge(Counter):
+    """Gauge kept as per-thread deltas (inc/dec may come from any thread)"""
+    type = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Bucketed histogram with _bucket/_sum/_count series"""
+    type = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        shard = self._registry.shard()
+        key = (self.name, labels)
+        data = shard.get(key)
+        if data is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            data = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def render(self, samples):
+        lines = []
+        for labels, data in self._own_samples(samples):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_number(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(data[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class DerivedGauge(_Metric):
+    """Gauge computed at scrape time from the merged samples of other metrics"""
+    type = "gauge"
+
+    def __init__(self, registry, name, help, labelnames, compute: Callable[[Dict[Key, object]], Dict[Tuple[str, ...], float]]):
+        super().__init__(registry, name, help, labelnames)
+        self._compute = compute
+
+    def render(self, samples):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+            for labels, value in sorted(self._compute(samples).items())
+        ]
+
+
+# ===== Application metrics =====
+
+registry = MetricsRegistry()
+
+http_requests_in_flight = Gauge(
+    registry, "http_requests_in_flight", "HTTP requests currently being served"
+)
+http_request_duration_seconds = Histogram(
+    registry, "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+mongodb_command_duration_seconds = Histogram(
+    registry, "mongodb_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command")
+)
+mongodb_pool_checkout_wait_seconds = Histogram(
+    registry, "mongodb_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool",
+    ("client", "outcome")
+)
+mongodb_pool_connections = Gauge(
+    registry, "mongodb_pool_connections", "Pooled connections by client (main, analytics) and state (open, in_use, waiting for checkout)",
+    ("client", "state")
+)
+mongodb_pool_connections_created_total = Counter(
+    registry, "mongodb_pool_connections_created_total", "Connections opened by the pool", ("client",)
+)
+mongodb_pool_connections_closed_total = Counter(
+    registry, "mongodb_pool_connections_closed_total", "Connections closed by the pool, by reason (idle/stale/error/poolClosed)",
+    ("client", "reason")
+)
+mongodb_pool_checkout_failures_total = Counter(
+    registry, "mongodb_pool_checkout_failures_total", "Failed checkouts by reason; timeout means the pool was exhausted",
+    ("client", "reason")
+)
+mongodb_pool_cleared_total = Counter(
+    registry, "mongodb_pool_cleared_total", "Times a pool was cleared after a server error", ("client",)
+)
+password_hash_duration_seconds = Histogram(
+    registry, "password_hash_duration_seconds", "bcrypt hashing/verification time",
+    ("operation",), buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+)
+invalidation_events_total = Counter(
+    registry, "invalidation_events_total", "Cache invalidation events by collection and source (local/change_stream/poll)",
+    ("collection", "source")
+)
+requests_coalesced_total = Counter(
+    registry, "requests_coalesced_total", "Requests that joined an identical in-flight request instead of running",
+    ("route",)
+)
+cache_requests_total = Counter(
+    registry, "cache_requests_total", "Cache lookups by cache and result (hit/miss)",
+    ("cache", "result")
+)
+
+
+def _cache_hit_ratios(samples: Dict[Key, object]) -> Dict[Tuple[str, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (name, labels), value in samples.items():
+        if name != cache_requests_total.name:
+            continue
+        cache, result = labels
+        counts = totals.setdefault(cache, [0.0, 0.0])
+        counts[0 if result == "hit" else 1] += value
+    return {
+        (cache,): round(hits / (hits + misses), 4)
+        for cache, (hits, misses) in totals.items()
+        if hits + misses
+    }
+
+
+cache_hit_ratio = DerivedGauge(
+    registry, "cache_hit_ratio", "Share of cache lookups served from cache", ("cache",), _cache_hit_ratios
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count one cache lookup for the cache_hit_ratio metric"""
+    cache_requests_total.inc((cache, "hit" if hit else "miss"))
+
+
+def route_label(route_path: Optional[str]) -> str:
+    """Route template for labels; never the raw path (unbounded cardinality)"""
+    return route_path or "unmatched"
@@ -0,0 +1,101 @@
+"""
+Per-request performance tracking.
+
+The timing middleware opens a RequestStats for each request and stores it
+in a context variable. Code running on behalf of that request (the
+endpoint's threadpool thread, fan_out workers, the Mongo command listener)
+records into it, so the middleware can report where the time went.
+"""
+
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import config
+
+
+class RequestStats:
+    """Counters for one request (wall time, Mongo commands)"""
+
+    __slots__ = ("method", "path", "scope", "started", "db_count", "db_seconds", "commands")
+
+    def __init__(self, method: str, path: str, scope: Optional[dict] = None):
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.commands: Dict[str, int] = {}
+
+    def record_command(self, command_name: str, seconds: float):
+        # Only touched by threads serving this request; int/float updates
+        # under the GIL are good enough for diagnostics
+        self.db_count += 1
+        self.db_seconds += seconds
+        self.commands[command_name] = self.commands.get(command_name, 0) + 1
+
+    @property
+    def route(self) -> Optional[str]:
+        """Matched route template (e.g. /api/v1/lessons/{lesson_id}), once routing ran"""
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_seconds * 1000
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header"""
+        return (
+            f'app;dur={self.elapsed_ms:.1f}, '
+            f'db;dur={self.db_ms:.1f};desc="{self.db_count} queries"'
+        )
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def start_request(method: str, path: str, scope: Optional[dict] = None) -> RequestStats:
+    """Begin tracking a request in the current context"""
+    stats = RequestStats(method, path, scope)
+    _current_request.set(stats)
+    return stats
+
+
+def current_request() -> Optional[RequestStats]:
+    """Stats of the request being served in this context, if any"""
+    return _current_request.get()
+
+
+request_logger = logging.getLogger("app.requests")
+
+
+def log_request(stats: RequestStats, status_code: int):
+    """
+    Emit one structured (JSON) log line for a finished request.
+
+    Requests issuing more than REQUEST_QUERY_WARN_THRESHOLD Mongo commands
+    are logged at WARNING with "too_many_queries": true - usually an N+1 loop.
+    """
+    record = {
+        "method": stats.method,
+        "path": stats.path,
+        "route": stats.route,
+        "status": status_code,
+        "duration_ms": round(stats.elapsed_ms, 2),
+        "db_queries": stats.db_count,
+        "db_ms": round(stats.db_ms, 2),
+        "db_commands": stats.commands,
+    }
+    if stats.db_count > config.REQUEST_QUERY_WARN_THRESHOLD:
+        record["too_many_queries"] = True
+        request_logger.warning(json.dumps(record))
+    else:
+        request_logger.info(json.dumps(record))
@@ -0,0 +1,262 @@
+"""
+Month-end payroll snapshots.
+
+Builds every teacher's TeacherEarningsReport for a month with one lesson
+aggregation grouped by (teacher, subject, education level, lesson type,
+day, stored price). Lessons costed at approval/completion keep their
+stored price; the rest are priced as of each day against an in-memory
+PricingTable and its PricingHistory. Days of a (subject, level, type) priced alike are merged
+back into one row, so a mid-month price change shows as two rows instead
+of one blended rate. The result is stored as an immutable snapshot
+document keyed by the month and a fingerprint of its inputs: the month's
+lesson count and latest created/updated/priced time, plus a hash of the pricing
+table and its versions. A snapshot is served until the fingerprint
+changes, then a new one is written next to it.
+"""
+
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core import archive
+from app.core.pricing import PricingHistory, PricingTable
+from app.core.pricing_kernel import PriceKernel
+from app.schemas.earnings import SubjectEarnings, TeacherEarningsReport
+
+# Same statuses as /dashboard/teacher-earnings/{teacher_id}
+PAYROLL_LESSON_STATUSES = ["pending", "completed"]
+
+# Snapshot fields returned with every page
+SNAPSHOT_FIELDS = (
+    "year", "month", "fingerprint", "generated_at", "generated_by",
+    "total_teachers", "total_hours", "total_earnings", "total_lessons",
+)
+
+
+def month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """[start, end) of a calendar month"""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def lessons_fingerprint(lessons_collection, year: int, month: int) -> Dict[str, Any]:
+    """
+    Count and latest change time of the month's lessons (any status).
+
+    Lesson writes always set updated_at (and inserts created_at), and
+    deletes are soft, so any change to the month moves one of these.
+    """
+    start, end = month_range(year, month)
+    pipeline = [
+        {"$match": {"scheduled_date": {"$gte": start, "$lt": end}}},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "last_modified": {"$max": {"$ifNull": ["$updated_at", "$created_at"]}},
+            "last_priced": {"$max": "$priced_at"},
+        }},
+    ]
+    rows = archive.merge_grouped(
+        archive.aggregate(lessons_collection, pipeline), sums=("count",), maxes=("last_modified", "last_priced")
+    )
+    if not rows:
+        return {"count": 0, "last_modified": None, "last_priced": None}
+    return {"count": rows[0]["count"], "last_modified": rows[0]["last_modified"], "last_priced": rows[0].get("last_priced")}
+
+
+def pricing_fingerprint(pricing_docs: List[Dict[str, Any]]) -> str:
+    """Stable hash of the prices that affect payroll"""
+    rows = sorted(
+        (str(doc.get("_id")), doc.get("subject"), doc.get("education_level"),
+         doc.get("individual_price"), doc.get("group_price"), doc.get("version") or 1)
+        for doc in pricing_docs
+    )
+    return hashlib.sha1(json.dumps(rows, default=str).encode("utf-8")).hexdigest()
+
+
+def fingerprint_key(lessons: Dict[str, Any], pricing_hash: str) -> str:
+    last_modified = lessons["last_modified"].isoformat() if lessons["last_modified"] else "-"
+    # Recomputed costs don't touch updated_at
+    last_priced = lessons.get("last_priced").isoformat() if lessons.get("last_priced") else "-"
+    return f"{lessons['count']}:{last_modified}:{last_priced}:{pricing_hash}"
+
+
+def earnings_buckets(lessons_collection, year: int, month: int) -> List[Dict[str, Any]]:
+    """
+    Minutes and lesson count per (teacher, subject, education level, lesson
+    type, day, stored price_per_hour; absent for lessons without a stored cost)
+    """
+    start, end = month_range(year, month)
+    pipeline = [
+        {"$match": {
+            "status": {"$in": PAYROLL_LESSON_STATUSES},
+            "scheduled_date": {"$gte": start, "$lt": end},
+        }},
+        {"$group": {
+            "_id": {
+                "teacher_id": "$teacher_id",
+                "subject": {"$ifNull": ["$subject", "other"]},
+                "education_level": {"$ifNull": ["$education_level", "elementary"]},
+                "lesson_type": {"$ifNull": ["$lesson_type", "individual"]},
+                "day": {"$dayOfMonth": "$scheduled_date"},
+                "price_per_hour": "$price_per_hour",
+            },
+            "minutes": {"$sum": "$duration_minutes"},
+            "count": {"$sum": 1},
+        }},
+    ]
+    return archive.merge_grouped(archive.aggregate(lessons_collection, pipeline), sums=("minutes", "count"))
+
+
+def build_payroll(
+    lessons_collection,
+    users_collection,
+    pricing_table: PricingTable,
+    year: int,
+    month: int,
+    pricing_history: Optional[PricingHistory] = None,
+) -> List[TeacherEarningsReport]:
+    """
+    Earnings reports for every active teacher and every teacher with lessons
+    in the month, sorted by teacher name
+    """
+    buckets = earnings_buckets(lessons_collection, year, month)
+    unpriced = [bucket for bucket in buckets if bucket["_id"].get("price_per_hour") is None]
+    unpriced_prices, _ = PriceKernel(pricing_table, pricing_history).prices(
+        [bucket["_id"]["subject"] for bucket in unpriced],
+        [bucket["_id"]["education_level"] for bucket in unpriced],
+        [bucket["_id"]["lesson_type"] for bucket in unpriced],
+        [datetime(year, month, bucket["_id"]["day"]) for bucket in unpriced],
+    )
+    unpriced_prices = iter(unpriced_prices)
+    prices = [
+        next(unpriced_prices) if bucket["_id"].get("price_per_hour") is None else bucket["_id"]["price_per_hour"]
+        for bucket in buckets
+    ]
+    # teacher -> (subject, level, type, price) -> {"minutes", "count"}
+    by_teacher: Dict[str, Dict[Tuple[str, str, str, float], Dict[str, Any]]] = {}
+    for bucket, price_per_hour in zip(buckets, prices):
+        key = bucket["_id"]
+        group = (key["subject"], key["education_level"], key["lesson_type"], float(price_per_hour))
+        totals = by_teacher.setdefault(key["teacher_id"], {}).setdefault(group, {"minutes": 0, "count": 0})
+        totals["minutes"] += bucket["minutes"]
+        totals["count"] += bucket["count"]
+
+    teachers = users_collection.find(
+        {"role": "teacher", "$or": [{"status": "active"}, {"_id": {"$in": list(by_teacher)}}]},
+        {"first_name": 1, "last_name": 1, "username": 1},
+    )
+
+    reports = []
+    for teacher in teachers:
+        by_subject = []
+        total_hours = 0.0
+        total_earnings = 0.0
+        total_lessons = 0
+        for (subject, education_level, lesson_type, price_per_hour), totals in by_teacher.get(teacher["_id"], {}).items():
+            hours = round(totals["minutes"] / 60, 2)
+            earnings = round(hours * price_per_hour, 2)
+            by_subject.append(SubjectEarnings(
+                subject=subject,
+                education_level=education_level,
+                lesson_type=lesson_type,
+                total_hours=hours,
+                price_per_hour=price_per_hour,
+                total_earnings=earnings,
+                lesson_count=totals["count"],
+            ))
+            total_hours += hours
+            total_earnings += earnings
+            total_lessons += totals["count"]
+
+        by_subject.sort(key=lambda item: (item.subject, item.education_level, item.lesson_type, item.price_per_hour))
+        reports.append(TeacherEarningsReport(
+            teacher_id=teacher["_id"],
+            teacher_name=_full_name(teacher),
+            month=month,
+            year=year,
+            total_hours=round(total_hours, 2),
+            total_earnings=round(total_earnings, 2),
+            by_subject=by_subject,
+            total_lessons=total_lessons,
+        ))
+
+    reports.sort(key=lambda report: (report.teacher_name.lower(), report.teacher_id))
+    return reports
+
+
+def _full_name(user: Dict[str, Any]) -> str:
+    """Same as User.get_full_name() without building the model"""
+    full_name = f"{user.get('first_name') or ''} {user.get('last_name') or ''}".strip()
+    return full_name if full_name else user.get("username", "")
+
+
+def get_payroll_snapshot(
+    snapshots_collection,
+    lessons_collection,
+    users_collection,
+    pricing_collection,
+    year: int,
+    month: int,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    generated_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Current payroll snapshot for a month, with `teachers` sliced to one page
+
+    Regenerates (inserting a new snapshot) only when the month's lessons or
+    the pricing table changed since the latest one.
+
+    Returns:
+        Snapshot document plus "regenerated": bool
+    """
+    pricing_docs = list(pricing_collection.find({}))
+    lessons = lessons_fingerprint(lessons_collection, year, month)
+    # Every price change bumps its entry's version, so the versions cover the history too
+    key = fingerprint_key(lessons, pricing_fingerprint(pricing_docs))
+    query = {"year": year, "month": month, "fingerprint": key}
+    page = {field: 1 for field in SNAPSHOT_FIELDS}
+    page["teachers"] = {"$slice": [skip, limit if limit is not None else 1_000_000]}
+
+    snapshot = snapshots_collection.find_one(query, page)
+    if snapshot is not None:
+        snapshot["regenerated"] = False
+        return snapshot
+
+    reports = build_payroll(
+        lessons_collection, users_collection, PricingTable(pricing_docs), year, month,
+        PricingHistory.load(pricing_collection),
+    )
+    document = {
+        "_id": str(uuid.uuid4()),
+        "year": year,
+        "month": month,
+        "fingerprint": key,
+        "lessons_count": lessons["count"],
+        "lessons_last_modified": lessons["last_modified"],
+        "generated_at": datetime.utcnow(),
+        "generated_by": generated_by,
+        "total_teachers": len(reports),
+        "total_hours": round(sum(report.total_hours for report in reports), 2),
+        "total_earnings": round(sum(report.total_earnings for report in reports), 2),
+        "total_lessons": sum(report.total_lessons for report in reports),
+        "teachers": [report.model_dump() for report in reports],
+    }
+    try:
+        snapshots_collection.insert_one(document)
+    except DuplicateKeyError:
+        # Another worker built the same snapshot first; serve theirs
+        snapshot = snapshots_collection.find_one(query, page)
+        snapshot["regenerated"] = False
+        return snapshot
+
+    end = skip + limit if limit is not None else None
+    document["teachers"] = document["teachers"][skip:end]
+    document["regenerated"] = True
+    return document
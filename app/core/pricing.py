@@ -6,15 +6,53 @@ Admins manage pricing through API endpoints.
 This module provides helper functions to fetch pricing from database.
 """
 
-from typing import Optional
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.core.cache import TwoTierCache
+from app.core.config import config
 from app.db import mongo_db
-from app.models.pricing import Pricing
+from app.models.pricing import EARLIEST_EFFECTIVE_FROM, Pricing
 
 
 # Default prices (fallback if subject not found in database)
 DEFAULT_INDIVIDUAL_PRICE = 45.0
 DEFAULT_GROUP_PRICE = 28.0
 
+# (subject, education level) -> prices; unpriced subjects are cached as None
+pricing_cache = TwoTierCache("pricing", ttl_seconds=config.PRICING_CACHE_SECONDS)
+pricing_cache.invalidate_on("pricing")
+
+
+def find_subject_prices(subject: str, education_level: str, db_collection) -> Optional[Dict[str, float]]:
+    """
+    Cached Pricing.find_by_subject_and_level.
+    
+    Args:
+        subject: Subject name (case-insensitive)
+        education_level: Education level
+        db_collection: Pricing collection to read on a miss
+    
+    Returns:
+        {"individual": price, "group": price}, or None if the subject has no
+        pricing (that answer is cached too, for CACHE_NEGATIVE_TTL_SECONDS)
+    """
+    def load():
+        pricing = Pricing.find_by_subject_and_level(subject, education_level, db_collection)
+        if pricing is None:
+            return None
+        return {"individual": pricing.individual_price, "group": pricing.group_price}
+    
+    key = f"{(subject or '').lower()}|{education_level}"
+    return pricing_cache.get_or_compute(key, load, cache_none=True)
+
+
+def price_for(prices: Optional[Dict[str, float]], lesson_type: str) -> Optional[float]:
+    """Price per hour from find_subject_prices() output, None if unpriced"""
+    if prices is None:
+        return None
+    return prices["group"] if lesson_type.lower() == "group" else prices["individual"]
+
 
 def get_subject_price(subject: str, education_level: str, lesson_type: str = "individual") -> float:
     """
@@ -28,11 +66,11 @@ def get_subject_price(subject: str, education_level: str, lesson_type: str = "in
     Returns:
         Price per hour for the subject, education level, and lesson type
     """
-    # Fetch from database
-    pricing = Pricing.find_by_subject_and_level(subject, education_level, mongo_db.pricing_collection)
+    # Fetch from database (cached)
+    price_per_hour = price_for(find_subject_prices(subject, education_level, mongo_db.pricing_collection), lesson_type)
     
-    if pricing:
-        return pricing.get_price(lesson_type)
+    if price_per_hour is not None:
+        return price_per_hour
     
     # Fallback to defaults if not found
     return DEFAULT_INDIVIDUAL_PRICE if lesson_type.lower() == "individual" else DEFAULT_GROUP_PRICE
@@ -77,3 +115,101 @@ def get_all_subject_prices() -> dict:
     
     return result
 
+
+
+class PricingTable:
+    """
+    In-memory copy of the pricing collection for bulk pricing.
+    
+    Resolves prices exactly like get_subject_price (case-insensitive
+    subject + education level, then any level of the subject, then the
+    defaults) without a query per lookup.
+    """
+    
+    def __init__(self, pricing_docs):
+        self._by_level = {}
+        self._by_subject = {}
+        for doc in pricing_docs:
+            subject = (doc.get("subject") or "").lower()
+            entry = (doc.get("_id"), doc.get("version") or 1, (doc.get("individual_price"), doc.get("group_price")))
+            self._by_level.setdefault((subject, doc.get("education_level")), entry)
+            # First document in natural order, as find_one() returns
+            self._by_subject.setdefault(subject, entry)
+    
+    @classmethod
+    def load(cls, db_collection) -> "PricingTable":
+        """Read the whole pricing collection once"""
+        return cls(db_collection.find(
+            {}, {"subject": 1, "education_level": 1, "individual_price": 1, "group_price": 1, "version": 1}
+        ))
+    
+    def _entry(self, subject: str, education_level: str) -> Optional[tuple]:
+        key = (subject or "").lower()
+        return self._by_level.get((key, education_level)) or self._by_subject.get(key)
+    
+    def current(self, subject: str, education_level: str) -> Optional[Tuple[str, int, tuple]]:
+        """(pricing _id, current version, (individual, group)), None if the subject is unpriced"""
+        return self._entry(subject, education_level)
+    
+    def prices(self, subject: str, education_level: str) -> Optional[tuple]:
+        """(individual, group) price for a subject and level, None if the subject is unpriced"""
+        entry = self._entry(subject, education_level)
+        return entry[2] if entry else None
+    
+    def price(self, subject: str, education_level: str, lesson_type: str = "individual") -> float:
+        """Price per hour for a subject, education level and lesson type"""
+        prices = self.prices(subject, education_level)
+        if prices:
+            return prices[1] if lesson_type.lower() == "group" else prices[0]
+        return DEFAULT_INDIVIDUAL_PRICE if lesson_type.lower() == "individual" else DEFAULT_GROUP_PRICE
+
+
+class PricingHistory:
+    """
+    Effective-dated versions of every pricing entry, for as-of lookups.
+    
+    Versions of each pricing _id are kept sorted by effective_from, so the
+    prices in effect on a date are one bisect over that entry's timestamps.
+    """
+    
+    def __init__(self, version_docs):
+        grouped: Dict[str, List[dict]] = {}
+        for doc in version_docs:
+            grouped.setdefault(doc.get("pricing_id"), []).append(doc)
+        self._stamps: Dict[str, List[datetime]] = {}
+        self._versions: Dict[str, List[Tuple[int, tuple]]] = {}
+        for pricing_id, docs in grouped.items():
+            docs.sort(key=lambda doc: (doc.get("effective_from") or EARLIEST_EFFECTIVE_FROM, doc.get("version") or 1))
+            self._stamps[pricing_id] = [doc.get("effective_from") or EARLIEST_EFFECTIVE_FROM for doc in docs]
+            self._versions[pricing_id] = [
+                (doc.get("version") or 1, (doc.get("individual_price"), doc.get("group_price"))) for doc in docs
+            ]
+    
+    @staticmethod
+    def load_documents(db_collection):
+        """Cursor over every version (db_collection is the pricing collection)"""
+        return Pricing.history_collection(db_collection).find(
+            {}, {"_id": 0, "pricing_id": 1, "version": 1, "effective_from": 1, "individual_price": 1, "group_price": 1}
+        )
+    
+    @classmethod
+    def load(cls, db_collection) -> "PricingHistory":
+        """Read every version once"""
+        return cls(cls.load_documents(db_collection))
+    
+    def versions(self, pricing_id: str) -> Tuple[List[datetime], List[Tuple[int, tuple]]]:
+        """(sorted effective_from stamps, (version, (individual, group)) per stamp); empty if no history"""
+        return self._stamps.get(pricing_id, []), self._versions.get(pricing_id, [])
+    
+    def at(self, pricing_id: str, when: Optional[datetime] = None) -> Optional[Tuple[int, tuple]]:
+        """
+        (version, (individual, group)) in effect at `when` (latest if None),
+        or None if the entry has no history
+        """
+        stamps, versions = self.versions(pricing_id)
+        if not versions:
+            return None
+        if when is None:
+            return versions[-1]
+        # Lessons before the first version are priced at it
+        return versions[max(bisect_right(stamps, when) - 1, 0)]
@@ -0,0 +1,230 @@
+"""
+Vectorized lesson pricing.
+
+PriceKernel prices many lessons at once. Each distinct (subject key,
+education level) is resolved once against the PricingTable to a row of a
+price matrix: row 0 holds the defaults for unpriced subjects, column 0/1
+the individual/group price. A lesson's price index is then
+row * 2 + is_group, and prices and costs for the whole batch are one
+NumPy gather and multiply. Without NumPy the same lookup runs as a plain
+Python loop with the same (memoized) rows.
+
+With a PricingHistory every version of a pricing entry gets its own row,
+and lessons given dates are priced as of that date: the entry's sorted
+effective_from stamps are searched (np.searchsorted / bisect) once per
+lesson, O(log versions). Lessons without a date get the current prices.
+
+load_price_kernel() builds a kernel from the pricing collection and its
+history, cached with the other pricing lookups and cleared on pricing
+writes.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+from app.core.pricing import DEFAULT_GROUP_PRICE, DEFAULT_INDIVIDUAL_PRICE, PricingHistory, PricingTable, pricing_cache
+from app.models.pricing import EARLIEST_EFFECTIVE_FROM
+
+# Row of the price matrix used for subjects without pricing
+UNPRICED_ROW = 0
+
+_KEY_SEPARATOR = "\x1f"
+
+
+@dataclass
+class LessonCosts:
+    """Per-lesson prices and costs (NumPy arrays, or lists without NumPy)"""
+    price_per_hour: Sequence[float]
+    cost: Sequence[float]
+    # False where the subject has no pricing and the default price was used
+    priced: Sequence[bool]
+    # "<pricing _id>@<version>" of the prices used, None where unpriced
+    pricing_version: Sequence[Optional[str]] = ()
+
+    @property
+    def total(self) -> float:
+        return float(sum(self.cost)) if np is None else float(np.sum(self.cost))
+
+
+class PriceKernel:
+    """Prices batches of lessons against one PricingTable (and its history)"""
+
+    def __init__(self, pricing_table: PricingTable, pricing_history: Optional[PricingHistory] = None,
+                 use_numpy: bool = True):
+        self.table = pricing_table
+        self.history = pricing_history
+        self.use_numpy = use_numpy and np is not None
+        # (subject key, level) -> (effective_from stamps, matrix row per stamp)
+        self._entries: Dict[Tuple[str, Any], Tuple[List[datetime], List[int]]] = {}
+        self._matrix: List[Tuple[float, float]] = [(DEFAULT_INDIVIDUAL_PRICE, DEFAULT_GROUP_PRICE)]
+        # (pricing _id, version) of every matrix row; None for UNPRICED_ROW
+        self.row_versions: List[Optional[Tuple[str, int]]] = [None]
+
+    def _add_row(self, pricing_id: str, version: int, prices: tuple) -> int:
+        self._matrix.append(prices)
+        self.row_versions.append((pricing_id, version))
+        return len(self._matrix) - 1
+
+    def _entry(self, subject: str, education_level: Any) -> Tuple[List[datetime], List[int]]:
+        key = ((subject or "").lower(), education_level)
+        entry = self._entries.get(key)
+        if entry is None:
+            current = self.table.current(*key)
+            stamps, versions = self.history.versions(current[0]) if current and self.history else ([], [])
+            if current is None:
+                entry = ([EARLIEST_EFFECTIVE_FROM], [UNPRICED_ROW])
+            elif not versions:
+                # Not versioned (yet): the current prices apply to every date
+                entry = ([EARLIEST_EFFECTIVE_FROM], [self._add_row(*current)])
+            else:
+                entry = (stamps, [self._add_row(current[0], version, prices) for version, prices in versions])
+            self._entries[key] = entry
+        return entry
+
+    def row(self, subject: str, education_level: Any, when: Optional[datetime] = None) -> int:
+        """
+        Price matrix row for a subject and level as of `when` (current prices
+        if None; UNPRICED_ROW if the subject is unpriced)
+        """
+        stamps, rows = self._entry(subject, education_level)
+        if not isinstance(when, datetime):
+            return rows[-1]
+        return rows[max(bisect_right(stamps, when) - 1, 0)]
+
+    def rows(
+        self,
+        subjects: Sequence[str],
+        levels: Sequence[Any],
+        dates: Optional[Sequence[Any]] = None,
+    ) -> Sequence[int]:
+        """Price matrix row of every (subject, level[, date])"""
+        if not self.use_numpy:
+            if dates is None:
+                return [self.row(subject, level) for subject, level in zip(subjects, levels)]
+            return [self.row(subject, level, when) for subject, level, when in zip(subjects, levels, dates)]
+
+        if len(subjects) == 0:
+            return np.zeros(0, dtype=np.int64)
+        keys = np.char.add(
+            np.char.add(np.char.lower(np.asarray(subjects, dtype=object).astype(str)), _KEY_SEPARATOR),
+            np.asarray(levels, dtype=object).astype(str),
+        )
+        distinct, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        entries = [self._entry(*key.split(_KEY_SEPARATOR, 1)) for key in distinct]
+        if dates is None or all(len(stamps) == 1 for stamps, _ in entries):
+            return np.array([entry_rows[-1] for _, entry_rows in entries])[inverse]
+
+        # Missing dates become NaT, which sorts after every stamp: current prices
+        when = np.asarray(dates, dtype="datetime64[ms]")
+        rows = np.empty(len(keys), dtype=np.int64)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(distinct) + 1))
+        for index, (stamps, entry_rows) in enumerate(entries):
+            members = order[bounds[index]:bounds[index + 1]]
+            if len(stamps) == 1:
+                rows[members] = entry_rows[0]
+                continue
+            positions = np.searchsorted(np.array(stamps, dtype="datetime64[ms]"), when[members], side="right") - 1
+            rows[members] = np.asarray(entry_rows)[np.maximum(positions, 0)]
+        return rows
+
+    def version_label(self, row: int) -> Optional[str]:
+        """"<pricing _id>@<version>" of a matrix row, None for UNPRICED_ROW"""
+        version = self.row_versions[row]
+        return f"{version[0]}@{version[1]}" if version else None
+
+    def prices(
+        self,
+        subjects: Sequence[str],
+        levels: Sequence[Any],
+        lesson_types: Sequence[str],
+        dates: Optional[Sequence[Any]] = None,
+    ) -> Tuple[Sequence[float], Sequence[bool]]:
+        """
+        (price per hour, priced flag) for every (subject, level, type), as of
+        `dates` when given
+        """
+        return self._gather(self.rows(subjects, levels, dates), lesson_types)
+
+    def _gather(self, rows: Sequence[int], lesson_types: Sequence[str]) -> Tuple[Sequence[float], Sequence[bool]]:
+        if not self.use_numpy:
+            prices = [
+                self._matrix[row][1 if str(lesson_type).lower() == "group" else 0]
+                for row, lesson_type in zip(rows, lesson_types)
+            ]
+            return prices, [row != UNPRICED_ROW for row in rows]
+
+        if len(rows) == 0:
+            return np.zeros(0), np.zeros(0, dtype=bool)
+        is_group = np.char.lower(np.asarray(lesson_types, dtype=object).astype(str)) == "group"
+        prices = np.asarray(self._matrix, dtype=np.float64).reshape(-1)[rows * 2 + is_group]
+        return prices, rows != UNPRICED_ROW
+
+    def compute(
+        self,
+        subjects: Sequence[str],
+        levels: Sequence[Any],
+        lesson_types: Sequence[str],
+        minutes: Sequence[float],
+        dates: Optional[Sequence[Any]] = None,
+    ) -> LessonCosts:
+        """
+        Price per hour, cost (minutes / 60 x price) and priced flag for every lesson
+
+        Args:
+            subjects, levels, lesson_types, minutes: One entry per lesson
+            dates: Scheduled dates to price as of (current prices if omitted)
+        """
+        rows = self.rows(subjects, levels, dates)
+        prices, priced = self._gather(rows, lesson_types)
+        labels = [self.version_label(row) for row in range(len(self.row_versions))]
+        if self.use_numpy:
+            versions = np.asarray(labels, dtype=object)[rows] if len(rows) else np.zeros(0, dtype=object)
+            return LessonCosts(prices, np.asarray(minutes, dtype=np.float64) / 60 * prices, priced, versions)
+        return LessonCosts(
+            prices, [lesson_minutes / 60 * price for lesson_minutes, price in zip(minutes, prices)], priced,
+            [labels[row] for row in rows],
+        )
+
+    def price_lessons(
+        self,
+        lessons: Iterable[Dict[str, Any]],
+        default_subject: str = "",
+        default_level: str = "elementary",
+    ) -> LessonCosts:
+        """
+        compute() for lesson documents, priced as of their scheduled_date
+        (missing fields get the usual defaults)
+        """
+        subjects, levels, lesson_types, minutes, dates = [], [], [], [], []
+        for lesson in lessons:
+            subjects.append(lesson.get("subject") or default_subject)
+            levels.append(lesson.get("education_level") or default_level)
+            lesson_types.append(lesson.get("lesson_type") or "individual")
+            minutes.append(lesson.get("duration_minutes") or 0)
+            dates.append(lesson.get("scheduled_date"))
+        return self.compute(subjects, levels, lesson_types, minutes, dates)
+
+
+def load_price_kernel(db_collection) -> PriceKernel:
+    """Kernel over the whole pricing collection and its history (the documents are cached)"""
+    def load_table():
+        return list(db_collection.find(
+            {}, {"subject": 1, "education_level": 1, "individual_price": 1, "group_price": 1, "version": 1}
+        ))
+
+    def load_history():
+        return list(PricingHistory.load_documents(db_collection))
+
+    return PriceKernel(
+        PricingTable(pricing_cache.get_or_compute("__table__", load_table)),
+        PricingHistory(pricing_cache.get_or_compute("__history__", load_history)),
+    )
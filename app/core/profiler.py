@@ -0,0 +1,125 @@
+"""
+In-process sampling profiler.
+
+Every interval the sampler reads sys._current_frames() - the current stack
+of every thread - and counts each stack in collapsed form
+("thread;module:function;module:function ..."), root first. The output
+feeds straight into flamegraph.pl, speedscope or inferno.
+
+It costs one stack walk per thread per interval and nothing while it isn't
+running, so it is safe to switch on briefly in production. Only one
+profile runs at a time per worker process.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Leaf frames that mean "this thread is parked waiting for work"
+IDLE_LEAVES = {
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"),
+    ("selectors", "select"),
+    ("concurrent.futures.thread", "_worker"),
+    ("anyio._backends._asyncio", "run"),
+    ("asyncio.base_events", "_run_once"),
+    ("socket", "accept"),
+    ("time", "sleep"),
+}
+
+MAX_STACK_DEPTH = 128
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is already running in this process"""
+
+
+def _frame_label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_LEAVES
+
+
+def collapse_stack(frame, thread_name: str) -> str:
+    """Collapsed stack for one thread, root first"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Samples all threads' stacks for a fixed duration"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval_seconds: float = 0.005, include_idle: bool = False) -> Dict:
+        """
+        Sample every thread except the caller for `seconds`.
+
+        Returns:
+            {"stacks": Counter(collapsed stack -> samples), "samples": n,
+             "duration_seconds": s, "threads": number of threads seen}
+
+        Raises:
+            ProfilerBusy if another profile is running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            return self._sample(seconds, interval_seconds, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval_seconds: float, include_idle: bool) -> Dict:
+        own_ident = threading.get_ident()
+        stacks: Counter = Counter()
+        threads_seen = set()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                threads_seen.add(ident)
+                stacks[collapse_stack(frame, names.get(ident, f"thread-{ident}"))] += 1
+            samples += 1
+
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval_seconds, deadline - now))
+
+        return {
+            "stacks": stacks,
+            "samples": samples,
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "threads": len(threads_seen),
+        }
+
+
+def render_collapsed(stacks: Counter, limit: Optional[int] = None) -> str:
+    """flamegraph.pl input: one "stack count" line per distinct stack"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common(limit))
+
+
+# Global profiler (one per worker process)
+sampling_profiler = SamplingProfiler()
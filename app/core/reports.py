@@ -0,0 +1,233 @@
+"""
+Background report jobs.
+
+Month-end reports are too slow to build inside an HTTP request. POST
+/reports/{kind} stores a job document and enqueues it on Celery; a worker
+runs the builder the synchronous dashboard endpoint uses
+(app.core.dashboard_reports) and stores the JSON result gzip-compressed on
+the job document, where GET /reports/{job_id}/result can serve it without
+recompressing. Job documents
+expire REPORT_RESULT_TTL_SECONDS after they finish (TTL index on
+expires_at).
+"""
+
+import gzip
+import json
+import logging
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bson import Binary
+from pymongo import ReturnDocument
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import config
+from app.core.dashboard_reports import (
+    students_detailed_stats, students_payment_status, teacher_earnings, teachers_detailed_stats,
+)
+from app.db import analytics, mongo_db
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# How long a queued/running job may take before it is considered lost
+STALE_JOB_SECONDS = 3600
+
+
+def _month_year(params: Dict[str, Any]):
+    return params.get("month"), params.get("year")
+
+
+def _students_payment_status(params: Dict[str, Any], admin: Dict) -> Any:
+    month, year = _month_year(params)
+    return students_payment_status(
+        analytics(mongo_db.students_collection),
+        analytics(mongo_db.lessons_collection),
+        analytics(mongo_db.payments_collection),
+        analytics(mongo_db.pricing_collection),
+        month=month,
+        year=year,
+    )
+
+
+def _teacher_earnings(params: Dict[str, Any], admin: Dict) -> Any:
+    """Earnings report for every active teacher"""
+    month, year = _month_year(params)
+    lessons = analytics(mongo_db.lessons_collection)
+    teachers = analytics(mongo_db.users_collection).find({"role": "teacher", "status": "active"})
+    reports = [
+        teacher_earnings(User.from_dict(teacher), lessons, mongo_db.pricing_collection, month=month, year=year)
+        for teacher in teachers
+    ]
+    return {
+        "month": month,
+        "year": year,
+        "total_teachers": len(reports),
+        "total_earnings": round(sum(report.total_earnings for report in reports), 2),
+        "teachers": reports,
+    }
+
+
+def _teachers_detailed(params: Dict[str, Any], admin: Dict) -> Any:
+    month, year = _month_year(params)
+    return teachers_detailed_stats(
+        analytics(mongo_db.users_collection), analytics(mongo_db.lessons_collection), month=month, year=year,
+        status=params.get("status", "active"), lesson_status=params.get("lesson_status"),
+    )
+
+
+def _students_detailed(params: Dict[str, Any], admin: Dict) -> Any:
+    month, year = _month_year(params)
+    return students_detailed_stats(
+        analytics(mongo_db.students_collection), analytics(mongo_db.lessons_collection), month=month, year=year,
+        education_level=params.get("education_level"), is_active=params.get("is_active", True),
+    )
+
+
+# kind -> (builder, accepted parameters)
+REPORT_KINDS: Dict[str, tuple] = {
+    "students-payment-status": (_students_payment_status, {"month", "year"}),
+    "teacher-earnings": (_teacher_earnings, {"month", "year"}),
+    "teachers-detailed": (_teachers_detailed, {"month", "year", "status", "lesson_status"}),
+    "students-detailed": (_students_detailed, {"month", "year", "education_level", "is_active"}),
+}
+
+
+def compress_result(result: Any):
+    """
+    JSON-encode and gzip a report result
+    
+    Returns:
+        (uncompressed size in bytes, gzip blob)
+    """
+    body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+    return len(body), gzip.compress(body, compresslevel=6)
+
+
+def decompress_result(blob: bytes) -> Any:
+    return json.loads(gzip.decompress(blob))
+
+
+def create_job(kind: str, params: Dict[str, Any], admin: Dict):
+    """
+    Store a queued job, or return the queued/running job with the same kind
+    and parameters so repeated clicks don't build the same report twice.
+    
+    Returns:
+        (job, created)
+    """
+    jobs = mongo_db.report_jobs_collection
+    params = {key: value for key, value in sorted(params.items()) if value is not None}
+    existing = jobs.find_one({
+        "kind": kind,
+        "params": params,
+        "status": {"$in": [JOB_QUEUED, JOB_RUNNING]},
+        "created_at": {"$gte": datetime.utcnow() - timedelta(seconds=STALE_JOB_SECONDS)},
+    })
+    if existing:
+        return existing, False
+
+    now = datetime.utcnow()
+    job = {
+        "_id": str(uuid.uuid4()),
+        "kind": kind,
+        "params": params,
+        "status": JOB_QUEUED,
+        "requested_by": admin.get("_id"),
+        "requested_by_username": admin.get("username"),
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "error": None,
+        "result": None,
+        "result_bytes": None,
+        "compressed_bytes": None,
+        # Queued jobs also expire, in case they are never picked up
+        "expires_at": now + timedelta(seconds=STALE_JOB_SECONDS + config.REPORT_RESULT_TTL_SECONDS),
+    }
+    jobs.insert_one(job)
+    return job, True
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """Job document, or None if unknown or expired"""
+    job = mongo_db.report_jobs_collection.find_one({"_id": job_id})
+    if job is None or (job.get("expires_at") and job["expires_at"] <= datetime.utcnow()):
+        return None
+    return job
+
+
+def mark_failed(job_id: str, error: str):
+    now = datetime.utcnow()
+    mongo_db.report_jobs_collection.update_one(
+        {"_id": job_id},
+        {"$set": {
+            "status": JOB_FAILED,
+            "error": error,
+            "finished_at": now,
+            "expires_at": now + timedelta(seconds=config.REPORT_RESULT_TTL_SECONDS),
+        }}
+    )
+
+
+def run_job(job_id: str):
+    """Build a queued report and store its compressed result (the Celery task body)"""
+    jobs = mongo_db.report_jobs_collection
+    now = datetime.utcnow()
+    # A job still "running" past REPORT_JOB_TIMEOUT_SECONDS lost its worker:
+    # the broker redelivers the task (acks_late) and this run takes it over
+    job = jobs.find_one_and_update(
+        {"_id": job_id, "$or": [
+            {"status": JOB_QUEUED},
+            {"status": JOB_RUNNING,
+             "started_at": {"$lt": now - timedelta(seconds=config.REPORT_JOB_TIMEOUT_SECONDS)}},
+        ]},
+        {"$set": {"status": JOB_RUNNING, "started_at": now}, "$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is None:
+        # Running on another worker, already finished, or gone
+        return
+
+    builder, _ = REPORT_KINDS[job["kind"]]
+    admin = {"_id": job["requested_by"], "username": job["requested_by_username"], "role": "admin"}
+    try:
+        result_bytes, blob = compress_result(builder(job["params"], admin))
+    except ValueError as e:
+        mark_failed(job_id, str(e))
+        return
+    except Exception as e:
+        logger.error(f"❌ Report job {job_id} ({job['kind']}) failed: {traceback.format_exc()}")
+        mark_failed(job_id, str(e))
+        return
+
+    now = datetime.utcnow()
+    # Only the latest attempt stores its result
+    jobs.update_one(
+        {"_id": job_id, "attempts": job["attempts"]},
+        {"$set": {
+            "status": JOB_SUCCEEDED,
+            "finished_at": now,
+            "result": Binary(blob),
+            "result_bytes": result_bytes,
+            "compressed_bytes": len(blob),
+            "expires_at": now + timedelta(seconds=config.REPORT_RESULT_TTL_SECONDS),
+        }}
+    )
+    logger.info(f"📄 Report job {job_id} ({job['kind']}) done: {result_bytes} bytes, {len(blob)} compressed")
+
+
+def job_summary(job: Dict) -> Dict:
+    """Job document without the result blob, for polling responses"""
+    summary = {key: value for key, value in job.items() if key not in ("_id", "result", "requested_by_username")}
+    summary["job_id"] = job["_id"]
+    if job["status"] == JOB_SUCCEEDED:
+        summary["result_url"] = f"/api/v1/reports/{job['_id']}/result"
+    return summary
@@ -0,0 +1,221 @@
+"""
+Prefix search for names (students, teachers, payments).
+
+Every searchable document carries a ``search_keys`` array holding all
+prefixes of every normalized token of its name fields. A multikey index
+on that array turns typeahead lookups into index seeks instead of
+unanchored, case-insensitive regex scans over the whole collection.
+
+Normalization case-folds and strips diacritics (including Arabic
+harakat and hamza marks), so "أحمد", "احمد" and "AHMED"/"ahmed" style
+inputs behave the same way they are typed in the admin search box.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from pymongo import UpdateOne
+
+
+SEARCH_KEYS_FIELD = "search_keys"
+
+# Longest prefix stored per token (longer query tokens are truncated)
+MAX_PREFIX_LENGTH = 20
+
+# Result limits for typeahead endpoints
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# Upper bound on candidates pulled from Mongo before ranking
+SEARCH_CANDIDATE_LIMIT = 500
+
+# Documents updated per bulk write when backfilling keys
+BACKFILL_BATCH_SIZE = 1000
+
+_TOKEN_SEPARATOR = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """
+    Normalize a name for searching: case-fold, strip diacritics and
+    collapse punctuation/whitespace into single spaces.
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(value))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(token for token in _TOKEN_SEPARATOR.split(stripped.casefold()) if token)
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Split a value into normalized search tokens"""
+    normalized = normalize_text(value)
+    return normalized.split(" ") if normalized else []
+
+
+def build_search_keys(*values: Optional[str]) -> List[str]:
+    """
+    Build the ``search_keys`` array for a document.
+
+    Args:
+        values: Name fields of the document (e.g. username, first_name, last_name)
+
+    Returns:
+        Sorted list of unique token prefixes
+    """
+    keys = set()
+    for value in values:
+        for token in tokenize(value):
+            for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                keys.add(token[:length])
+    return sorted(keys)
+
+
+def build_search_filter(query: str, fallback_fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Build a MongoDB filter matching documents whose name tokens start with
+    every token of the query.
+
+    Documents written before ``search_keys`` existed (or inserted by scripts
+    that bypass the models) are still matched through a regex fallback that
+    only considers documents without the field, so the multikey index keeps
+    serving the common path.
+
+    Args:
+        query: Raw user input
+        fallback_fields: Raw fields to regex-match for documents without keys
+
+    Returns:
+        MongoDB filter (matches nothing if the query has no searchable tokens)
+    """
+    tokens = [token[:MAX_PREFIX_LENGTH] for token in tokenize(query)]
+    raw_tokens = (query or "").split()
+    if not tokens or not raw_tokens:
+        return {SEARCH_KEYS_FIELD: {"$in": []}}
+
+    if len(tokens) == 1:
+        indexed_clause = {SEARCH_KEYS_FIELD: tokens[0]}
+    else:
+        indexed_clause = {SEARCH_KEYS_FIELD: {"$all": tokens}}
+
+    fallback_clause = {
+        SEARCH_KEYS_FIELD: {"$exists": False},
+        "$and": [
+            {"$or": [
+                {field: {"$regex": re.escape(raw_token), "$options": "i"}}
+                for field in fallback_fields
+            ]}
+            for raw_token in raw_tokens
+        ],
+    }
+
+    return {"$or": [indexed_clause, fallback_clause]}
+
+
+def score_match(query: str, *values: Optional[str]) -> tuple:
+    """
+    Rank a candidate against the query (lower is better).
+
+    Order: exact name match, name starts with the query, any single field
+    starts with the query, any other match. Shorter names win ties.
+    """
+    normalized_query = normalize_text(query)
+    normalized_values = [normalize_text(value) for value in values if value]
+    full_text = " ".join(normalized_values)
+
+    if full_text == normalized_query or normalized_query in normalized_values:
+        tier = 0
+    elif full_text.startswith(normalized_query):
+        tier = 1
+    elif any(value.startswith(normalized_query) for value in normalized_values):
+        tier = 2
+    else:
+        tier = 3
+    return (tier, len(full_text), full_text)
+
+
+def rank_documents(
+    documents: Iterable[Dict[str, Any]],
+    query: str,
+    name_fields: Sequence[str],
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Sort documents by relevance to the query and apply the limit"""
+    ranked = sorted(
+        documents,
+        key=lambda doc: score_match(query, *(doc.get(field) for field in name_fields)),
+    )
+    return ranked[:limit] if limit else ranked
+
+
+def search_documents(
+    db_collection,
+    query: str,
+    name_fields: Sequence[str],
+    extra_filter: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_SEARCH_LIMIT,
+    projection: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run a ranked prefix search against a collection.
+
+    Args:
+        db_collection: Collection to search
+        query: Raw user input
+        name_fields: Fields used for the regex fallback and for ranking
+        extra_filter: Additional filter (e.g. {"is_active": True})
+        limit: Maximum number of ranked results (None for all matches)
+        projection: Optional projection (name fields are always included)
+
+    Returns:
+        Matching documents, best match first
+    """
+    search_filter = {**(extra_filter or {}), **build_search_filter(query, name_fields)}
+
+    if projection is not None:
+        projection = {**projection, **{field: 1 for field in name_fields}}
+
+    if not limit:
+        return rank_documents(db_collection.find(search_filter, projection), query, name_fields)
+
+    # Candidates are capped, so exact name matches are fetched first and the
+    # rest in _id order: the best matches can't be cut by the cap, and the
+    # same query always ranks the same candidates
+    candidate_limit = max(limit, SEARCH_CANDIDATE_LIMIT)
+    exact_clause = {"$or": [
+        {field: {"$regex": f"^{re.escape((query or '').strip())}$", "$options": "i"}}
+        for field in name_fields
+    ]}
+    candidates = list(
+        db_collection.find({"$and": [search_filter, exact_clause]}, projection).sort("_id", 1).limit(candidate_limit)
+    )
+    if len(candidates) < candidate_limit:
+        seen = [doc["_id"] for doc in candidates]
+        candidates.extend(
+            db_collection.find({"$and": [search_filter, {"_id": {"$nin": seen}}]}, projection)
+            .sort("_id", 1).limit(candidate_limit - len(candidates))
+        )
+    return rank_documents(candidates, query, name_fields, limit)
+
+
+def backfill_search_keys(db_collection, name_fields: Sequence[str]) -> int:
+    """
+    Populate ``search_keys`` on documents that don't have it yet.
+
+    Returns:
+        Number of documents updated
+    """
+    updated = 0
+    batch = []
+    projection = {field: 1 for field in name_fields}
+    for doc in db_collection.find({SEARCH_KEYS_FIELD: {"$exists": False}}, projection):
+        keys = build_search_keys(*(doc.get(field) for field in name_fields))
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {SEARCH_KEYS_FIELD: keys}}))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            db_collection.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        db_collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    return updated
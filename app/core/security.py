@@ -3,6 +3,8 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import config
+from app.core.metrics import password_hash_duration_seconds
+import time
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -12,14 +14,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        password_hash_duration_seconds.observe(time.perf_counter() - started, ("verify",))
 
 
 def get_password_hash(password: str) -> str:
     """
     Hash a password
     """
-    return pwd_context.hash(password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hash_duration_seconds.observe(time.perf_counter() - started, ("hash",))
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,158 @@
+"""
+Single-flight call coalescing.
+
+When several callers ask for the same key at once, only the first (the
+leader) runs the computation; the others wait for it and receive the same
+result or exception. Nothing is remembered once the call finishes - caching
+the result is the caller's business.
+
+Each call is a concurrent.futures.Future, so threads (sync handlers on the
+threadpool) wait on it with result() and coroutines (async handlers) await
+it without blocking the event loop - and both can join the same call.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+
+from pydantic.fields import FieldInfo
+
+from app.core.metrics import requests_coalesced_total
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """(the key's in-flight call, whether we are its leader)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = Future()
+            return call, True
+
+    def _finish(self, key: Hashable, call: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def do(self, key: Hashable, func: Callable[[], Any], on_wait: Callable[[], None] = None) -> Any:
+        """
+        Run `func()` unless a call with the same key is already running, in
+        which case wait for that call and return its result.
+
+        Args:
+            key: Identifies identical calls
+            func: Zero-argument function to run
+            on_wait: Called when this call joins one already in flight
+
+        Raises:
+            Whatever `func` raised (in the leader and every waiter)
+        """
+        call, leader = self._join(key)
+        if not leader:
+            if on_wait:
+                on_wait()
+            return call.result()
+        try:
+            result = func()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    async def do_async(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]], on_wait: Callable[[], None] = None
+    ) -> Any:
+        """Like do() for a coroutine function; waiting doesn't block the event loop"""
+        call, leader = self._join(key)
+        if not leader:
+            if on_wait:
+                on_wait()
+            return await asyncio.wrap_future(call)
+        try:
+            result = await func()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, FieldInfo):
+        # Endpoint called directly: the parameter still holds its Query(...) default
+        return value.default
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def request_key(route: str, params: Dict[str, Any]) -> str:
+    """Key identifying a request by route and (defaults-applied, ordered) parameters"""
+    normalized = {name: _normalize(value) for name, value in params.items()}
+    return f"{route}?{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+# Shared by every coalesced endpoint in this process
+request_flights = SingleFlight()
+
+
+def coalesce(route: str, ignore: Iterable[str] = ("current_admin",)):
+    """
+    Decorator: concurrent calls of an endpoint with identical parameters
+    share one execution.
+
+    Args:
+        route: Name for the key and the requests_coalesced_total metric
+        ignore: Parameters that don't affect the response (e.g. the
+            authenticated admin, which is checked before the handler runs)
+    """
+    ignored = set(ignore)
+
+    def count_wait():
+        requests_coalesced_total.inc((route,))
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def key_for(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return request_key(route, {
+                name: value for name, value in bound.arguments.items() if name not in ignored
+            })
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await request_flights.do_async(
+                    key_for(args, kwargs), lambda: func(*args, **kwargs), on_wait=count_wait
+                )
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return request_flights.do(key_for(args, kwargs), lambda: func(*args, **kwargs), on_wait=count_wait)
+        return wrapper
+
+    return decorator
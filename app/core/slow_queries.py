@@ -0,0 +1,300 @@
+"""
+Slow MongoDB query log with explain() capture.
+
+The command listener reports every command slower than
+SLOW_QUERY_THRESHOLD_MS. Commands are grouped by shape (collection, command
+and filter/pipeline with every value replaced by "?"), so one entry covers
+every run of the same query and no user data is kept.
+
+The first time a shape is seen - and again once its plan is older than
+SLOW_QUERY_EXPLAIN_TTL_SECONDS - a sampled fraction of occurrences
+(SLOW_QUERY_SAMPLE_RATE) is queued for explain("executionStats"). A single
+background thread runs the explains from a small bounded queue, so a burst
+of slow queries can't turn into a burst of extra load.
+"""
+
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Commands whose filter shape we record and can explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+# Session/cluster fields the driver adds that explain must not carry
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+# Plan keys kept in the stored outline (everything else may contain values)
+_PLAN_KEYS = {"stage", "indexName", "keyPattern", "direction", "isMultiKey", "inputStage", "inputStages"}
+
+
+def redact(value: Any) -> Any:
+    """Replace every literal in a filter/pipeline with "?" keeping its structure"""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ["?"]
+        return [redact(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Redacted shape of a command's query part, or None if it isn't a query
+    """
+    if command_name == "find":
+        return {"filter": redact(command.get("filter", {})), "sort": _keys(command.get("sort"))}
+    if command_name == "aggregate":
+        return {"pipeline": redact(command.get("pipeline", []))}
+    if command_name == "count":
+        return {"query": redact(command.get("query", {}))}
+    if command_name == "distinct":
+        return {"key": command.get("key"), "query": redact(command.get("query", {}))}
+    if command_name == "findAndModify":
+        return {"query": redact(command.get("query", {})), "sort": _keys(command.get("sort"))}
+    if command_name == "update":
+        return {"q": [redact(update.get("q", {})) for update in command.get("updates", [])[:1]]}
+    if command_name == "delete":
+        return {"q": [redact(delete.get("q", {})) for delete in command.get("deletes", [])[:1]]}
+    return None
+
+
+def _keys(sort) -> Optional[List[str]]:
+    if not sort:
+        return None
+    return [f"{key}:{direction}" for key, direction in dict(sort).items()]
+
+
+def plan_outline(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep stage names and index usage from a winning plan, drop any values"""
+    outline = {}
+    for key, value in plan.items():
+        if key not in _PLAN_KEYS:
+            continue
+        if key == "inputStage":
+            outline[key] = plan_outline(value)
+        elif key == "inputStages":
+            outline[key] = [plan_outline(stage) for stage in value]
+        else:
+            outline[key] = value
+    return outline
+
+
+def _find_key(document: Any, wanted: str) -> Optional[Any]:
+    """Depth-first search for a key (aggregate explains nest the plan under $cursor)"""
+    if isinstance(document, dict):
+        if wanted in document:
+            return document[wanted]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, wanted)
+        if found is not None:
+            return found
+    return None
+
+
+def _stages(outline: Dict[str, Any]) -> List[str]:
+    stages = [outline.get("stage", "?")]
+    if "inputStage" in outline:
+        stages.extend(_stages(outline["inputStage"]))
+    for child in outline.get("inputStages", []):
+        stages.extend(_stages(child))
+    return stages
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce explain("executionStats") output to a value-free summary"""
+    winning_plan = _find_key(explain, "winningPlan") or {}
+    # Newer servers wrap the classic plan in queryPlan
+    winning_plan = winning_plan.get("queryPlan", winning_plan)
+    outline = plan_outline(winning_plan)
+    stats = _find_key(explain, "executionStats") or {}
+    stages = _stages(outline) if outline else []
+    return {
+        "plan_summary": " <- ".join(stages),
+        "collection_scan": "COLLSCAN" in stages,
+        "winning_plan": outline,
+        "n_returned": stats.get("nReturned"),
+        "total_keys_examined": stats.get("totalKeysExamined"),
+        "total_docs_examined": stats.get("totalDocsExamined"),
+        "execution_time_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog:
+    """Bounded, shape-deduplicated record of slow commands"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        threshold_ms: Optional[float] = None,
+        sample_rate: Optional[float] = None,
+        explain_ttl_seconds: Optional[float] = None,
+        start_worker: bool = True,
+    ):
+        self.max_entries = max_entries if max_entries is not None else config.SLOW_QUERY_BUFFER_SIZE
+        self.threshold_ms = threshold_ms if threshold_ms is not None else config.SLOW_QUERY_THRESHOLD_MS
+        self.sample_rate = sample_rate if sample_rate is not None else config.SLOW_QUERY_SAMPLE_RATE
+        self.explain_ttl_seconds = (
+            explain_ttl_seconds if explain_ttl_seconds is not None else config.SLOW_QUERY_EXPLAIN_TTL_SECONDS
+        )
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._client = None
+        self._pending: "queue.Queue" = queue.Queue(maxsize=8)
+        self._start_worker = start_worker
+        self._worker: Optional[threading.Thread] = None
+
+    def attach(self, client):
+        """Give the log a MongoClient to run explains with"""
+        self._client = client
+
+    # ===== Recording (called from the command listener) =====
+
+    def observe(
+        self,
+        database: str,
+        collection: str,
+        command_name: str,
+        command: Optional[Dict[str, Any]],
+        duration_ms: float,
+        route: Optional[str] = None,
+    ):
+        """Record a finished command if it was slow"""
+        if duration_ms < self.threshold_ms or command_name not in EXPLAINABLE_COMMANDS or not command:
+            return
+        shape = command_shape(command_name, command)
+        key = json.dumps([collection, command_name, shape], sort_keys=True, default=str)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape,
+                    "routes": [],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": datetime.utcnow(),
+                    "last_seen": None,
+                    "explain": None,
+                    "explained_at": None,
+                    "_explain_queued": False,
+                }
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = datetime.utcnow()
+            if route and route not in entry["routes"] and len(entry["routes"]) < 10:
+                entry["routes"].append(route)
+
+            wants_explain = (
+                not entry["_explain_queued"]
+                and (entry["explained_at"] is None or now - entry["explained_at"] > self.explain_ttl_seconds)
+                and random.random() < self.sample_rate
+            )
+            if wants_explain:
+                entry["_explain_queued"] = True
+
+        if wants_explain:
+            self._queue_explain(key, database, command_name, command)
+
+    def _queue_explain(self, key, database, command_name, command):
+        if self._client is None:
+            self._explain_done(key, None)
+            return
+        explain_command = {
+            field: value for field, value in command.items()
+            if not field.startswith("$") and field not in _DRIVER_FIELDS
+        }
+        try:
+            self._pending.put_nowait((key, database, explain_command))
+        except queue.Full:
+            self._explain_done(key, None)
+            return
+        if self._start_worker:
+            self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run_worker, name="slow-query-explain", daemon=True)
+            self._worker.start()
+
+    def _run_worker(self):
+        while True:
+            self.process_pending(block=True)
+
+    def process_pending(self, block: bool = False):
+        """Run queued explains (the worker loop; tests call it directly)"""
+        while True:
+            try:
+                key, database, explain_command = self._pending.get(block=block, timeout=None if block else 0)
+            except queue.Empty:
+                return
+            summary = None
+            try:
+                explain = self._client[database].command(
+                    {"explain": explain_command, "verbosity": "executionStats"}
+                )
+                summary = summarize_explain(explain)
+            except Exception as e:
+                logger.warning(f"⚠️ explain() failed for slow query: {str(e)}")
+            self._explain_done(key, summary)
+            if block:
+                return
+
+    def _explain_done(self, key, summary):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["_explain_queued"] = False
+            if summary is not None:
+                entry["explain"] = summary
+                entry["explained_at"] = time.time()
+
+    # ===== Reading =====
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Entries, most recently seen first"""
+        with self._lock:
+            snapshot = [dict(entry) for entry in reversed(self._entries.values())]
+        for entry in snapshot:
+            entry.pop("_explain_queued")
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 2)
+            entry["total_ms"] = round(entry["total_ms"], 2)
+            entry["max_ms"] = round(entry["max_ms"], 2)
+            entry["explained_at"] = (
+                datetime.utcfromtimestamp(entry["explained_at"]) if entry["explained_at"] else None
+            )
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global log (one per worker process)
+slow_query_log = SlowQueryLog()
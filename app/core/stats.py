@@ -0,0 +1,101 @@
+"""
+Aggregation helpers for dashboard statistics.
+
+Each helper answers everything a dashboard needs from one collection in a
+single round-trip (one $facet / $group pipeline over one index scan),
+instead of one count_documents call per number. Lesson and payment
+helpers also read the archive when the filter reaches archived months.
+"""
+
+from typing import Any, Dict, Optional
+
+from app.core import archive
+
+
+LESSON_TYPES = ("individual", "group")
+LESSON_STATUSES = ("pending", "approved", "rejected", "completed", "cancelled")
+
+
+def _counts_by_id(rows) -> Dict[Any, int]:
+    """Turn [{"_id": key, "count": n}, ...] into {key: n}"""
+    return {row["_id"]: row["count"] for row in rows}
+
+
+def count_active_users_by_role(users_collection) -> Dict[str, int]:
+    """
+    Count active users per role.
+
+    Returns:
+        {"teacher": n, "admin": m}
+    """
+    pipeline = [
+        {"$match": {"status": "active", "role": {"$in": ["teacher", "admin"]}}},
+        {"$group": {"_id": "$role", "count": {"$sum": 1}}},
+    ]
+    counts = _counts_by_id(users_collection.aggregate(pipeline))
+    return {"teacher": counts.get("teacher", 0), "admin": counts.get("admin", 0)}
+
+
+def lesson_breakdown(lessons_collection, match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Count lessons by type and by status and sum their minutes in one pipeline.
+
+    Args:
+        lessons_collection: Lessons collection
+        match: Filter applied before faceting (e.g. a scheduled_date range)
+
+    Returns:
+        {
+            "total": n,
+            "by_type": {"individual": n, "group": n},
+            "by_status": {"pending": n, "approved": n, ...},
+            "total_minutes": m
+        }
+    """
+    pipeline = [
+        {"$match": match or {}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_type": [{"$group": {"_id": "$lesson_type", "count": {"$sum": 1}}}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "minutes": [{"$group": {"_id": None, "total_minutes": {"$sum": "$duration_minutes"}}}],
+        }},
+    ]
+    by_type: Dict[Any, int] = {}
+    by_status: Dict[Any, int] = {}
+    total = 0
+    total_minutes = 0
+    for results in archive.aggregate(lessons_collection, pipeline):
+        facets = results[0] if results else {}
+        for key, count in _counts_by_id(facets.get("by_type", [])).items():
+            by_type[key] = by_type.get(key, 0) + count
+        for key, count in _counts_by_id(facets.get("by_status", [])).items():
+            by_status[key] = by_status.get(key, 0) + count
+        total += (facets.get("total") or [{"count": 0}])[0]["count"]
+        total_minutes += (facets.get("minutes") or [{"total_minutes": 0}])[0]["total_minutes"] or 0
+
+    return {
+        "total": total,
+        "by_type": {lesson_type: by_type.get(lesson_type, 0) for lesson_type in LESSON_TYPES},
+        "by_status": {lesson_status: by_status.get(lesson_status, 0) for lesson_status in LESSON_STATUSES},
+        "total_minutes": total_minutes,
+    }
+
+
+def payment_totals(payments_collection, match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Count payments and sum their amounts in one pipeline.
+
+    Returns:
+        {"count": n, "total_amount": x}
+    """
+    pipeline = [
+        {"$match": match or {}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "total_amount": {"$sum": "$amount"}}},
+    ]
+    totals = {"count": 0, "total_amount": 0}
+    for results in archive.aggregate(payments_collection, pipeline):
+        if results:
+            totals["count"] += results[0]["count"]
+            totals["total_amount"] += results[0]["total_amount"] or 0
+    return totals
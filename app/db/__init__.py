@@ -5,6 +5,7 @@ from .mongodb import (
     get_users_collection,
     get_lessons_collection,
     get_payments_collection,
+    analytics,
     mongo_db,
 )
 
@@ -15,6 +16,7 @@ __all__ = [
     "get_users_collection",
     "get_lessons_collection",
     "get_payments_collection",
+    "analytics",
     "mongo_db",
 ]
 
@@ -1,6 +1,16 @@
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from app.core.config import config
+from app.core.search import SEARCH_KEYS_FIELD, backfill_search_keys
+from app.core.archive import ARCHIVES
+from app.core.lesson_summary import LESSON_SUMMARY_BUCKETS_COLLECTION
+from app.core.lesson_timeseries import LESSON_DAILY_BUCKETS_COLLECTION
+from app.db.monitoring import get_event_listeners
+from app.core.slow_queries import slow_query_log
+from app.models.user import User
+from app.models.student import Student
+from app.models.payment import Payment
+from app.models.pricing import PRICING_HISTORY_COLLECTION
 import logging
 
 # Configure logging
@@ -15,11 +25,20 @@ class MongoDatabase:
     def __init__(self):
         self.client = None
         self.db = None
+        self.analytics_client = None
+        self.analytics_db = None
         self.users_collection = None
         self.students_collection = None
         self.lessons_collection = None
         self.payments_collection = None
         self.pricing_collection = None
+        self.report_jobs_collection = None
+        self.payroll_snapshots_collection = None
+        self.lesson_summary_buckets_collection = None
+        self.lesson_daily_buckets_collection = None
+        self.lessons_archive_collection = None
+        self.payments_archive_collection = None
+        self.pricing_history_collection = None
 
     def check_mongo_connection(self):
         """
@@ -32,7 +51,9 @@ class MongoDatabase:
             client = MongoClient(
                 config.MONGO_CLUSTER_URL,
                 serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=10000
+                connectTimeoutMS=10000,
+                event_listeners=get_event_listeners(),
+                **config.get_mongo_pool_options()
             )
             client.admin.command('ping')
             logger.info("✅ Connected to MongoDB successfully!")
@@ -41,6 +62,35 @@ class MongoDatabase:
             logger.error(f"❌ MongoDB connection failed: {str(e)}")
             raise Exception(f"MongoDB connection failed: {str(e)}")
 
+    def connect_analytics(self):
+        """
+        Open the read-only analytics client.
+        
+        Dashboard and report reads go through it so they are served by
+        secondaries (within ANALYTICS_MAX_STALENESS_SECONDS) with wire
+        compression, instead of competing with writes on the primary.
+        Connects lazily; with no secondaries available, secondaryPreferred
+        falls back to the primary.
+        """
+        if not config.ANALYTICS_CLIENT_ENABLED:
+            return None
+        try:
+            self.analytics_client = MongoClient(
+                config.MONGO_CLUSTER_URL,
+                serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=10000,
+                event_listeners=get_event_listeners("analytics"),
+                **config.get_analytics_client_options()
+            )
+            self.analytics_db = self.analytics_client[config.MONGO_DATABASE]
+            logger.info(f"📊 Analytics reads use {config.ANALYTICS_READ_PREFERENCE}")
+        except Exception as e:
+            # Analytics reads fall back to the primary client
+            self.analytics_client = None
+            self.analytics_db = None
+            logger.warning(f"⚠️ Analytics client not available, using primary: {str(e)}")
+        return self.analytics_client
+
     def connect(self):
         """
         Initialize MongoDB connection and collections
@@ -48,6 +98,8 @@ class MongoDatabase:
         try:
             self.client = self.check_mongo_connection()
             self.db = self.client[config.MONGO_DATABASE]
+            slow_query_log.attach(self.client)
+            self.connect_analytics()
             
             # Initialize collections
             self.users_collection = self.db["users"]
@@ -55,13 +107,23 @@ class MongoDatabase:
             self.lessons_collection = self.db["lessons"]
             self.payments_collection = self.db["payments"]
             self.pricing_collection = self.db["pricing"]
+            self.report_jobs_collection = self.db["report_jobs"]
+            self.payroll_snapshots_collection = self.db["payroll_snapshots"]
+            self.lesson_summary_buckets_collection = self.db[LESSON_SUMMARY_BUCKETS_COLLECTION]
+            self.lesson_daily_buckets_collection = self.db[LESSON_DAILY_BUCKETS_COLLECTION]
+            self.lessons_archive_collection = self.db[ARCHIVES["lessons"][0]]
+            self.payments_archive_collection = self.db[ARCHIVES["payments"][0]]
+            self.pricing_history_collection = self.db[PRICING_HISTORY_COLLECTION]
             
             logger.info(f"✅ Connected to database: {config.MONGO_DATABASE}")
-            logger.info(f"📚 Collections initialized: users, students, lessons, payments, pricing")
+            logger.info(f"📚 Collections initialized: users, students, lessons, payments, pricing, report_jobs, payroll_snapshots")
             
             # Create indexes
             self.create_indexes()
             
+            # Populate search keys on documents written before they existed
+            self.backfill_search_keys()
+            
             return self
             
         except Exception as e:
@@ -80,11 +142,13 @@ class MongoDatabase:
             self.users_collection.create_index("email")
             self.users_collection.create_index("role")
             self.users_collection.create_index("status")
+            self.users_collection.create_index(SEARCH_KEYS_FIELD)
             
             # Students collection indexes
             self.students_collection.create_index("full_name")
             self.students_collection.create_index("email")
             self.students_collection.create_index("is_active")
+            self.students_collection.create_index(SEARCH_KEYS_FIELD)
             
             # Lessons collection indexes
             self.lessons_collection.create_index("teacher_id")
@@ -92,25 +156,71 @@ class MongoDatabase:
             self.lessons_collection.create_index("lesson_type")
             self.lessons_collection.create_index("scheduled_date")
             self.lessons_collection.create_index("subject")
+            self.lessons_collection.create_index([("teacher_id", 1), ("scheduled_date", 1)])
+            # Stored costs: recompute the lessons priced with one pricing entry
+            self.lessons_collection.create_index([("pricing_version", 1), ("scheduled_date", 1)])
             
             # Payments collection indexes
             self.payments_collection.create_index("student_name")
             self.payments_collection.create_index("payment_date")
             self.payments_collection.create_index("lesson_id")
+            self.payments_collection.create_index([(SEARCH_KEYS_FIELD, 1), ("payment_date", -1)])
             
             # Pricing collection indexes
             self.pricing_collection.create_index("subject", unique=True)
             self.pricing_collection.create_index("is_active")
             
+            # Report jobs: expire finished jobs, find in-flight duplicates
+            self.report_jobs_collection.create_index("expires_at", expireAfterSeconds=0)
+            self.report_jobs_collection.create_index([("kind", 1), ("status", 1), ("created_at", -1)])
+            
+            # Payroll snapshots: one per month and input fingerprint
+            self.payroll_snapshots_collection.create_index(
+                [("year", 1), ("month", 1), ("fingerprint", 1)], unique=True
+            )
+            
+            # Lesson summary buckets: a teacher's months in order
+            self.lesson_summary_buckets_collection.create_index([("teacher_id", 1), ("period", 1)])
+            
+            # Daily lesson buckets: date-range scans, optionally for one teacher
+            self.lesson_daily_buckets_collection.create_index("day")
+            self.lesson_daily_buckets_collection.create_index([("teacher_id", 1), ("day", 1)])
+            
+            # Archives: same date-range reads as the hot collections
+            self.lessons_archive_collection.create_index([("teacher_id", 1), ("scheduled_date", 1)])
+            self.lessons_archive_collection.create_index("scheduled_date")
+            self.payments_archive_collection.create_index("payment_date")
+            self.payments_archive_collection.create_index("student_name")
+            
+            # Pricing history: an entry's versions in effective order
+            self.pricing_history_collection.create_index([("pricing_id", 1), ("effective_from", 1), ("version", 1)])
+            
             logger.info("✅ Indexes created successfully")
             
         except Exception as e:
             logger.warning(f"⚠️ Error creating indexes (may already exist): {str(e)}")
 
+    def backfill_search_keys(self):
+        """
+        Populate search keys for users, students and payments that don't have them yet
+        """
+        try:
+            users = backfill_search_keys(self.users_collection, User.SEARCH_FIELDS)
+            students = backfill_search_keys(self.students_collection, Student.SEARCH_FIELDS)
+            payments = backfill_search_keys(self.payments_collection, Payment.SEARCH_FIELDS)
+            if users or students or payments:
+                logger.info(f"🔎 Search keys backfilled: {users} users, {students} students, {payments} payments")
+        except Exception as e:
+            logger.warning(f"⚠️ Error backfilling search keys: {str(e)}")
+
     def close(self):
         """
         Close MongoDB connection
         """
+        if self.analytics_client:
+            self.analytics_client.close()
+            self.analytics_client = None
+            self.analytics_db = None
         if self.client:
             self.client.close()
             logger.info("❌ Closed MongoDB connection")
@@ -156,6 +266,20 @@ def get_database():
     return mongo_db.db
 
 
+def analytics(collection):
+    """
+    Read-only analytics view of a primary collection.
+    
+    Use for dashboard/report reads that tolerate replication lag; writes and
+    read-your-writes paths keep using the primary collection. Returns the
+    collection unchanged when there is no analytics client.
+    """
+    analytics_db = mongo_db.analytics_db
+    if analytics_db is None or collection is None:
+        return collection
+    return analytics_db[collection.name]
+
+
 def get_users_collection():
     """
     Get users collection
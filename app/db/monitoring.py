@@ -0,0 +1,219 @@
+"""
+PyMongo event listeners, registered on the MongoClient at connect time
+"""
+from typing import Dict, Optional
+from pymongo import monitoring
+from app.core.config import config
+from app.core.metrics import (
+    registry,
+    mongodb_command_duration_seconds,
+    mongodb_pool_checkout_wait_seconds,
+    mongodb_pool_checkout_failures_total,
+    mongodb_pool_cleared_total,
+    mongodb_pool_connections,
+    mongodb_pool_connections_closed_total,
+    mongodb_pool_connections_created_total,
+)
+from app.core.monitoring import current_request
+from app.core.slow_queries import slow_query_log
+
+
+def _collection_name(event) -> str:
+    """Collection a command targets ("" for database/admin commands like ping)"""
+    if event.command_name == "getMore":
+        target = event.command.get("collection")
+    else:
+        target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """
+    Attribute every Mongo command to the request that issued it, record
+    its latency per collection and command, and hand slow ones to the
+    slow-query log.
+
+    The sync driver publishes command events on the thread that ran the
+    command, so the request's context variable is available here.
+    """
+
+    def __init__(self):
+        # (connection_id, request_id) -> started event; only succeeded/failed carry durations
+        self._pending = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = event
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        seconds = event.duration_micros / 1_000_000
+        started = self._pending.pop((getattr(event, "connection_id", None), getattr(event, "request_id", None)), None)
+        collection = _collection_name(started) if started is not None else ""
+        mongodb_command_duration_seconds.observe(seconds, (collection, event.command_name))
+
+        stats = current_request()
+        if stats is not None:
+            stats.record_command(event.command_name, seconds)
+
+        # The explain commands the slow-query log runs are never fed back into it
+        if started is not None and event.command_name != "explain":
+            slow_query_log.observe(
+                started.database_name,
+                collection,
+                event.command_name,
+                started.command,
+                seconds * 1000,
+                stats.route if stats is not None else None,
+            )
+
+
+class PoolTimingListener(monitoring.ConnectionPoolListener):
+    """
+    Connection pool telemetry: checkout wait, exhaustion (checkouts that
+    timed out waiting for a free connection), churn (connections opened and
+    closed) and live open/in-use/waiting gauges.
+
+    One listener per MongoClient: every series is labelled with its client
+    ("main" or "analytics"), so each pool is measured against its own size.
+    """
+
+    def __init__(self, client: str):
+        self.client = client
+
+    def connection_check_out_started(self, event):
+        mongodb_pool_connections.inc((self.client, "waiting"))
+
+    def connection_checked_out(self, event):
+        mongodb_pool_connections.dec((self.client, "waiting"))
+        mongodb_pool_connections.inc((self.client, "in_use"))
+        if event.duration is not None:
+            mongodb_pool_checkout_wait_seconds.observe(event.duration, (self.client, "ok"))
+
+    def connection_check_out_failed(self, event):
+        mongodb_pool_connections.dec((self.client, "waiting"))
+        mongodb_pool_checkout_failures_total.inc((self.client, event.reason))
+        if event.duration is not None:
+            mongodb_pool_checkout_wait_seconds.observe(event.duration, (self.client, event.reason))
+
+    def connection_checked_in(self, event):
+        mongodb_pool_connections.dec((self.client, "in_use"))
+
+    def connection_created(self, event):
+        mongodb_pool_connections_created_total.inc((self.client,))
+        mongodb_pool_connections.inc((self.client, "open"))
+
+    def connection_closed(self, event):
+        mongodb_pool_connections_closed_total.inc((self.client, event.reason))
+        mongodb_pool_connections.dec((self.client, "open"))
+
+    def pool_cleared(self, event):
+        mongodb_pool_cleared_total.inc((self.client,))
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+def _histogram_quantile(histogram, data, quantile: float) -> Optional[float]:
+    """Upper bound of the bucket holding the quantile (None above the last bucket)"""
+    total = sum(data[:-1])
+    if not total:
+        return None
+    rank = quantile * total
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, data[:-1]):
+        cumulative += count
+        if cumulative >= rank:
+            return bound
+    return None
+
+
+def _pool_snapshot(client: str, options: Dict, samples: Dict) -> Dict:
+    """Telemetry of one client's pool next to the options it was created with"""
+
+    def value(metric, *labels):
+        return samples.get((metric.name, (client,) + labels), 0)
+
+    def by_label(metric):
+        return {
+            labels[1]: int(count) for (name, labels), count in sorted(samples.items())
+            if name == metric.name and labels[0] == client and count
+        }
+
+    wait = samples.get((mongodb_pool_checkout_wait_seconds.name, (client, "ok")))
+    checkouts = sum(wait[:-1]) if wait else 0
+    p95 = _histogram_quantile(mongodb_pool_checkout_wait_seconds, wait, 0.95) if wait else None
+    in_use = int(value(mongodb_pool_connections, "in_use"))
+    created = int(value(mongodb_pool_connections_created_total))
+    failures = by_label(mongodb_pool_checkout_failures_total)
+    max_pool_size = options.get("maxPoolSize")
+
+    return {
+        "settings": {
+            "max_pool_size": max_pool_size,
+            "min_pool_size": options.get("minPoolSize", 0),
+            "max_idle_time_ms": options.get("maxIdleTimeMS"),
+            "wait_queue_timeout_ms": options.get("waitQueueTimeoutMS"),
+            "compressors": options.get("compressors"),
+            "read_preference": options.get("readPreference"),
+        },
+        "connections": {
+            "open": int(value(mongodb_pool_connections, "open")),
+            "in_use": in_use,
+            "waiting": int(value(mongodb_pool_connections, "waiting")),
+        },
+        "utilization": round(in_use / max_pool_size, 4) if max_pool_size else None,
+        "checkouts": checkouts,
+        "checkout_wait_ms": {
+            "avg": round(wait[-1] / checkouts * 1000, 3) if checkouts else None,
+            "p95_upper_bound": p95 * 1000 if p95 is not None else None,
+        },
+        "checkout_failures": failures,
+        "exhausted": failures.get(monitoring.ConnectionCheckOutFailedReason.TIMEOUT, 0),
+        "connections_created": created,
+        "connections_closed": by_label(mongodb_pool_connections_closed_total),
+        # Close to 0 when connections are reused; rising means the pool is churning
+        "connections_created_per_checkout": round(created / checkouts, 4) if checkouts else None,
+        "pool_cleared": int(value(mongodb_pool_cleared_total)),
+    }
+
+
+def pool_health() -> Dict:
+    """
+    Snapshot of this process's pool telemetry next to the configured limits
+    
+    The main client's pool at the top level, the analytics client's (None
+    when disabled) under "analytics". Counts are cumulative since the
+    process started; gauges are current.
+    """
+    samples = registry.collect()
+    health = _pool_snapshot("main", config.get_mongo_pool_options(), samples)
+    health["analytics"] = (
+        _pool_snapshot("analytics", config.get_analytics_client_options(), samples)
+        if config.ANALYTICS_CLIENT_ENABLED else None
+    )
+    return health
+
+
+command_timing_listener = CommandTimingListener()
+pool_timing_listener = PoolTimingListener("main")
+analytics_pool_timing_listener = PoolTimingListener("analytics")
+
+
+def get_event_listeners(client: str = "main"):
+    """Listeners to pass to MongoClient(event_listeners=...) for the main or analytics client"""
+    pool_listener = analytics_pool_timing_listener if client == "analytics" else pool_timing_listener
+    return [command_timing_listener, pool_listener]
@@ -1,10 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import config
-from app.db import connect_to_mongo, close_mongo_connection
+from app.core.monitoring import start_request, log_request
+from app.core import metrics
+import time
+from app.db import connect_to_mongo, close_mongo_connection, mongo_db
+from app.core.invalidation import invalidation_bus
 from app.api.v1.api import api_router
 
 # Configure logging
@@ -24,6 +29,9 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting General Institute System API...")
     try:
         connect_to_mongo()
+        if config.INVALIDATION_BUS_ENABLED:
+            mode = None if config.INVALIDATION_MODE == "auto" else config.INVALIDATION_MODE
+            invalidation_bus.start(mongo_db.db, mode)
         logger.info("✅ Application startup complete")
     except Exception as e:
         logger.error(f"❌ Failed to start application: {str(e)}")
@@ -33,6 +41,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down General Institute System API...")
+    invalidation_bus.stop()
     close_mongo_connection()
     logger.info("✅ Application shutdown complete")
 
@@ -53,6 +62,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """
+    Time each request and count the Mongo commands it issues.
+    Adds a Server-Timing header and logs one structured line per request.
+    """
+    stats = start_request(request.method, request.url.path, request.scope)
+    metrics.http_requests_in_flight.inc()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        metrics.http_requests_in_flight.dec()
+        metrics.http_request_duration_seconds.observe(
+            time.perf_counter() - stats.started,
+            (request.method, metrics.route_label(stats.route), str(status_code))
+        )
+    
+    response.headers["Server-Timing"] = stats.server_timing()
+    log_request(stats, status_code)
+    return response
+
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -68,3 +101,15 @@ async def root():
         "version": "1.0.0"
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus scrape endpoint (text exposition format)
+    """
+    if not config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
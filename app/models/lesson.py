@@ -2,6 +2,10 @@ from datetime import datetime
 from typing import Optional, Dict, Any, List
 from enum import Enum
 import uuid
+from pymongo import ReturnDocument
+from app.core.invalidation import INSERT, note_write
+from app.core.lesson_summary import apply_lesson_change
+from app.core.lesson_timeseries import apply_daily_change
 
 
 # Enums
@@ -194,15 +198,25 @@ class Lesson:
     
     def save(self, db_collection):
         """Insert lesson into database"""
-        db_collection.insert_one(self.to_dict())
+        document = self.to_dict()
+        db_collection.insert_one(document)
+        apply_lesson_change(db_collection, None, document)
+        apply_daily_change(db_collection, None, document)
+        note_write(db_collection, self._id, INSERT)
     
     def update_in_db(self, db_collection, update_data: Dict[str, Any]):
         """Update lesson in database"""
         update_data["updated_at"] = datetime.utcnow()
-        db_collection.update_one(
+        # The previous version moves the lesson's summary bucket contribution
+        before = db_collection.find_one_and_update(
             {"_id": self._id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
         )
+        if before:
+            apply_lesson_change(db_collection, before, changes=update_data)
+            apply_daily_change(db_collection, before, changes=update_data)
+        note_write(db_collection, self._id)
     
     def delete(self, db_collection):
         """Soft delete: Cancel lesson"""
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import uuid
+from app.core import archive
+from app.core.invalidation import DELETE, INSERT, note_write
+from app.core.search import SEARCH_KEYS_FIELD, build_search_keys, rank_documents, search_documents
 
 
 # MongoDB Model (works with PyMongo)
@@ -10,6 +13,9 @@ class Payment:
     This works with PyMongo (not an ORM, just helper methods)
     """
     
+    # Name fields indexed into search_keys
+    SEARCH_FIELDS = ("student_name",)
+    
     def __init__(
         self,
         student_name: str,
@@ -44,6 +50,7 @@ class Payment:
             "notes": self.notes,
             "created_by": self.created_by,
             "created_at": self.created_at,
+            SEARCH_KEYS_FIELD: build_search_keys(self.student_name),
         }
     
     @classmethod
@@ -86,10 +93,12 @@ class Payment:
     
     @staticmethod
     def find_by_student_name(student_name: str, db_collection) -> list["Payment"]:
-        """Find all payments by student name (case-insensitive)"""
-        payment_docs = db_collection.find({
-            "student_name": {"$regex": student_name, "$options": "i"}
-        })
+        """Find all payments by student name (case-insensitive word-prefix match, best match first)"""
+        # Includes payments moved to payments_archive, ranked together
+        payment_docs = []
+        for source in archive.sources(db_collection):
+            payment_docs.extend(search_documents(source, student_name, Payment.SEARCH_FIELDS, limit=None))
+        payment_docs = rank_documents(payment_docs, student_name, Payment.SEARCH_FIELDS)
         return [Payment.from_dict(doc) for doc in payment_docs]
     
     @staticmethod
@@ -101,12 +110,14 @@ class Payment:
         else:
             end_date = datetime(year, month + 1, 1)
         
-        payment_docs = db_collection.find({
+        # Months moved to payments_archive are read from there
+        payment_docs = archive.find(db_collection, {
             "payment_date": {
                 "$gte": start_date,
                 "$lt": end_date
             }
-        }).sort("payment_date", -1)
+        })
+        payment_docs.sort(key=lambda doc: doc["payment_date"], reverse=True)
         
         return [Payment.from_dict(doc) for doc in payment_docs]
     
@@ -124,10 +135,12 @@ class Payment:
     def save(self, db_collection):
         """Insert payment into database"""
         db_collection.insert_one(self.to_dict())
+        note_write(db_collection, self._id, INSERT)
     
     def delete(self, db_collection):
         """Delete payment from database"""
         db_collection.delete_one({"_id": self._id})
+        note_write(db_collection, self._id, DELETE)
     
     def __repr__(self):
         return f"<Payment(id={self._id}, student={self.student_name}, amount={self.amount})>"
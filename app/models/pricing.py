@@ -3,12 +3,22 @@ Pricing Model for MongoDB
 
 Represents subject pricing in the database.
 Admins can manage pricing through API endpoints.
+
+The 'pricing' document holds the current prices. Every price change is
+also kept as a numbered version in 'pricing_history' with the date it
+takes effect, so lessons can be priced as of their scheduled date.
 """
 
 from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 import uuid
+from app.core.invalidation import DELETE, INSERT, note_write
+
+PRICING_HISTORY_COLLECTION = "pricing_history"
+
+# effective_from of an entry's first prices: they apply to every earlier lesson too
+EARLIEST_EFFECTIVE_FROM = datetime(1970, 1, 1)
 
 
 class EducationLevel(str, Enum):
@@ -30,13 +40,17 @@ class Pricing:
         education_level: EducationLevel,
         individual_price: float,
         group_price: float,
-        _id: Optional[str] = None
+        _id: Optional[str] = None,
+        version: int = 1,
+        effective_from: Optional[datetime] = None
     ):
         self._id = _id or str(uuid.uuid4())
         self.subject = subject.strip()  # e.g., "Mathematics", "Physics", "Arabic"
         self.education_level = education_level  # elementary, middle, secondary
         self.individual_price = individual_price
         self.group_price = group_price
+        self.version = version  # Current version in pricing_history
+        self.effective_from = effective_from or EARLIEST_EFFECTIVE_FROM  # When the current prices took effect
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert Pricing object to dictionary for MongoDB insertion"""
@@ -45,7 +59,23 @@ class Pricing:
             "subject": self.subject,
             "education_level": self.education_level.value if isinstance(self.education_level, EducationLevel) else self.education_level,
             "individual_price": self.individual_price,
-            "group_price": self.group_price
+            "group_price": self.group_price,
+            "version": self.version,
+            "effective_from": self.effective_from
+        }
+    
+    def version_document(self) -> Dict[str, Any]:
+        """The current prices as a pricing_history entry"""
+        return {
+            "_id": f"{self._id}|{self.version}",
+            "pricing_id": self._id,
+            "version": self.version,
+            "effective_from": self.effective_from,
+            "subject": self.subject,
+            "education_level": self.education_level.value if isinstance(self.education_level, EducationLevel) else self.education_level,
+            "individual_price": self.individual_price,
+            "group_price": self.group_price,
+            "created_at": datetime.utcnow()
         }
     
     @staticmethod
@@ -56,7 +86,9 @@ class Pricing:
             subject=data.get("subject"),
             education_level=EducationLevel(data.get("education_level", "elementary")),
             individual_price=data.get("individual_price"),
-            group_price=data.get("group_price")
+            group_price=data.get("group_price"),
+            version=data.get("version") or 1,
+            effective_from=data.get("effective_from")
         )
     
     # ===== Database Methods =====
@@ -120,21 +152,55 @@ class Pricing:
             query["_id"] = {"$ne": exclude_id}
         return db_collection.count_documents(query) > 0
     
+    @staticmethod
+    def history_collection(db_collection):
+        """The pricing_history collection living next to the pricing collection"""
+        return db_collection.database[PRICING_HISTORY_COLLECTION]
+    
     def save(self, db_collection):
-        """Insert pricing into database"""
+        """Insert pricing into database (and its first version into pricing_history)"""
         db_collection.insert_one(self.to_dict())
+        Pricing.history_collection(db_collection).insert_one(self.version_document())
+        note_write(db_collection, self._id, INSERT)
     
-    def update_in_db(self, db_collection):
-        """Update pricing in database"""
+    def update_in_db(self, db_collection, effective_from: Optional[datetime] = None):
+        """
+        Update pricing in database.
+        
+        A price change becomes a new version in pricing_history, effective
+        from the start of the day `effective_from` falls on (default: today);
+        lessons scheduled before it keep the earlier prices. Renames don't
+        create a version.
+        """
+        current = db_collection.find_one({"_id": self._id}, {"individual_price": 1, "group_price": 1, "version": 1})
+        if current and (current.get("individual_price"), current.get("group_price")) != (self.individual_price, self.group_price):
+            history = Pricing.history_collection(db_collection)
+            if history.find_one({"_id": f"{self._id}|{current.get('version') or 1}"}) is None:
+                # Written before pricing history existed: keep its prices as the first version
+                history.insert_one(Pricing.from_dict({**self.to_dict(), **current}).version_document())
+            self.version = (current.get("version") or 1) + 1
+            effective_from = effective_from or datetime.utcnow()
+            self.effective_from = datetime(effective_from.year, effective_from.month, effective_from.day)
+            history.insert_one(self.version_document())
         db_collection.update_one(
             {"_id": self._id},
             {"$set": self.to_dict()}
         )
+        note_write(db_collection, self._id)
+    
+    @staticmethod
+    def get_history(pricing_id: str, db_collection) -> list[Dict[str, Any]]:
+        """Every version of a pricing entry, oldest first"""
+        return list(Pricing.history_collection(db_collection).find(
+            {"pricing_id": pricing_id}
+        ).sort([("effective_from", 1), ("version", 1)]))
     
     @staticmethod
     def delete(pricing_id: str, db_collection) -> bool:
         """Delete pricing from database"""
         result = db_collection.delete_one({"_id": pricing_id})
+        if result.deleted_count > 0:
+            note_write(db_collection, pricing_id, DELETE)
         return result.deleted_count > 0
     
     # ===== Business Logic Methods =====
@@ -5,6 +5,8 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 import uuid
 from app.models.lesson import EducationLevel
+from app.core.search import SEARCH_KEYS_FIELD, build_search_keys, search_documents, DEFAULT_SEARCH_LIMIT
+from app.core.invalidation import INSERT, note_write
 
 
 class Student:
@@ -12,6 +14,9 @@ class Student:
     Student Model - Represents the 'students' collection in MongoDB
     """
     
+    # Name fields indexed into search_keys
+    SEARCH_FIELDS = ("full_name",)
+    
     def __init__(
         self,
         full_name: str,
@@ -44,6 +49,7 @@ class Student:
             "is_active": self.is_active,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
+            SEARCH_KEYS_FIELD: build_search_keys(self.full_name),
         }
     
     @classmethod
@@ -77,11 +83,9 @@ class Student:
         return None
     
     @staticmethod
-    def find_by_name(name: str, db_collection) -> list["Student"]:
-        """Find students by name (case-insensitive, partial match)"""
-        student_docs = db_collection.find({
-            "full_name": {"$regex": name, "$options": "i"}
-        })
+    def find_by_name(name: str, db_collection, limit: Optional[int] = DEFAULT_SEARCH_LIMIT) -> list["Student"]:
+        """Find students by name (case-insensitive word-prefix match, best match first)"""
+        student_docs = search_documents(db_collection, name, Student.SEARCH_FIELDS, limit=limit)
         return [Student.from_dict(doc) for doc in student_docs]
     
     @staticmethod
@@ -117,14 +121,18 @@ class Student:
     def save(self, db_collection):
         """Insert student into database"""
         db_collection.insert_one(self.to_dict())
+        note_write(db_collection, self._id, INSERT)
     
     def update_in_db(self, db_collection, update_data: Dict[str, Any]):
         """Update student in database"""
         update_data["updated_at"] = datetime.utcnow()
+        if "full_name" in update_data:
+            update_data[SEARCH_KEYS_FIELD] = build_search_keys(update_data["full_name"])
         db_collection.update_one(
             {"_id": self._id},
             {"$set": update_data}
         )
+        note_write(db_collection, self._id)
     
     def delete(self, db_collection):
         """Soft delete: Mark student as inactive"""
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import Enum
 import uuid
+from app.core.search import SEARCH_KEYS_FIELD, build_search_keys
+from app.core.invalidation import INSERT, note_write
 
 
 # Enums
@@ -23,6 +25,9 @@ class User:
     This works with PyMongo (not an ORM, just helper methods)
     """
     
+    # Name fields indexed into search_keys
+    SEARCH_FIELDS = ("username", "first_name", "last_name")
+    
     def __init__(
         self,
         username: str,
@@ -68,7 +73,8 @@ class User:
             "birthdate": self.birthdate,
             "last_login": self.last_login,
             "created_at": self.created_at,
-            "updated_at": self.updated_at
+            "updated_at": self.updated_at,
+            SEARCH_KEYS_FIELD: build_search_keys(self.username, self.first_name, self.last_name),
         }
     
     @classmethod
@@ -150,14 +156,20 @@ class User:
     def save(self, db_collection):
         """Insert user into database"""
         db_collection.insert_one(self.to_dict())
+        note_write(db_collection, self._id, INSERT)
     
     def update_in_db(self, db_collection, update_data: Dict[str, Any]):
         """Update user in database"""
         update_data["updated_at"] = datetime.utcnow()
+        if any(field in update_data for field in User.SEARCH_FIELDS):
+            update_data[SEARCH_KEYS_FIELD] = build_search_keys(
+                *(update_data.get(field, getattr(self, field)) for field in User.SEARCH_FIELDS)
+            )
         db_collection.update_one(
             {"_id": self._id},
             {"$set": update_data}
         )
+        note_write(db_collection, self._id)
     
     def __repr__(self):
         return f"<User(id={self._id}, username={self.username}, role={self.role})>"
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Optional
 
 
@@ -75,4 +76,19 @@ class StudentDetailedStats(BaseModel):
 class StudentsDetailedStatsResponse(BaseModel):
     """Response for detailed students statistics."""
     total_students: int
-    students: List[StudentDetailedStats]
\ No newline at end of file
+    students: List[StudentDetailedStats]
+
+class PayrollSnapshotResponse(BaseModel):
+    """One page of a month's payroll snapshot (all teachers)."""
+    snapshot_id: str
+    year: int
+    month: int
+    generated_at: datetime
+    regenerated: bool
+    total_teachers: int
+    total_hours: float
+    total_earnings: float
+    total_lessons: int
+    skip: int
+    limit: int
+    teachers: List[TeacherEarningsReport]
@@ -4,7 +4,7 @@ Pricing Schemas for API request/response validation
 
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -40,6 +40,7 @@ class PricingUpdate(BaseModel):
     education_level: Optional[EducationLevel] = None
     individual_price: Optional[float] = Field(None, gt=0)
     group_price: Optional[float] = Field(None, gt=0)
+    effective_from: Optional[datetime] = Field(None, description="Day new prices take effect (default: today); earlier lessons keep the old prices")
     
     @field_validator('subject')
     @classmethod
@@ -47,16 +48,42 @@ class PricingUpdate(BaseModel):
         if v:
             return v.strip().title()
         return v
+    
+    @field_validator('effective_from')
+    @classmethod
+    def validate_effective_from(cls, v):
+        """Stored dates are naive UTC"""
+        if v is not None and v.tzinfo is not None:
+            return v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
 
 
 class PricingResponse(PricingBase):
     """Schema for pricing response"""
     id: str = Field(..., description="Pricing ID")
+    version: int = Field(1, description="Current price version")
+    effective_from: Optional[datetime] = Field(None, description="When the current prices took effect")
     
     class Config:
         from_attributes = True
 
 
+class PricingVersionResponse(BaseModel):
+    """One effective-dated version of a pricing entry"""
+    version: int
+    effective_from: datetime
+    individual_price: float
+    group_price: float
+
+
+class PricingHistoryResponse(BaseModel):
+    """Schema for the price history of a pricing entry"""
+    pricing_id: str
+    subject: str
+    education_level: str
+    versions: list[PricingVersionResponse]
+
+
 class PricingListResponse(BaseModel):
     """Schema for list of pricing"""
     total: int
@@ -2,7 +2,7 @@
 Student Schemas
 """
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 from app.schemas.lesson import EducationLevel
 
@@ -43,3 +43,27 @@ class StudentListResponse(BaseModel):
     total: int
     students: list[StudentResponse]
 
+
+class StudentFieldsListResponse(BaseModel):
+    """List of students with only the requested fields (fields=...)"""
+    total: int
+    students: list[Dict[str, Any]]
+
+
+class StudentCountResponse(BaseModel):
+    """Number of students (count_only=true)"""
+    total: int
+
+
+
+class StudentSuggestion(BaseModel):
+    """Autocomplete suggestion for a student name"""
+    id: str
+    full_name: str
+    education_level: Optional[EducationLevel] = None
+
+
+class StudentAutocompleteResponse(BaseModel):
+    """Autocomplete suggestions"""
+    total: int
+    students: list[StudentSuggestion]
@@ -0,0 +1,63 @@
+"""
+Shared helpers for API endpoints
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException, status
+
+
+def build_projection(
+    fields: Optional[str],
+    allowed_fields: Iterable[str],
+    required_fields: Iterable[str] = (),
+) -> Tuple[Optional[Dict[str, int]], List[str]]:
+    """
+    Parse a comma-separated ``fields=`` query parameter into a MongoDB projection.
+
+    Args:
+        fields: Raw parameter value (e.g. "id,full_name"); None/empty means full documents
+        allowed_fields: Response field names the client may request ("id" maps to "_id")
+        required_fields: Extra document fields the endpoint needs for its own
+            calculations (fetched from Mongo but not returned unless requested)
+
+    Returns:
+        (projection, requested_fields) - projection is None when no fields were requested
+
+    Raises:
+        HTTPException 400 if an unknown field is requested
+    """
+    if not fields:
+        return None, []
+
+    requested = []
+    for field in fields.split(","):
+        field = field.strip()
+        if field and field not in requested:
+            requested.append(field)
+
+    allowed = set(allowed_fields)
+    unknown = [field for field in requested if field not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown) or fields}. Allowed fields: {', '.join(sorted(allowed))}"
+        )
+
+    projection = {"_id": 1}
+    for field in list(requested) + list(required_fields):
+        if field != "id":
+            projection[field] = 1
+    return projection, requested
+
+
+def project_document(doc: Dict[str, Any], requested_fields: List[str]) -> Dict[str, Any]:
+    """
+    Shape a projected MongoDB document for the response: "_id" becomes "id"
+    and only requested fields are returned.
+    """
+    result = {}
+    for field in requested_fields:
+        if field == "id":
+            result["id"] = str(doc["_id"])
+        else:
+            result[field] = doc.get(field)
+    return result
@@ -0,0 +1,96 @@
+"""
+Celery application for background jobs (Redis broker)
+
+Run a worker with:
+    celery -A app.worker worker --loglevel=info
+
+With CELERY_TASK_ALWAYS_EAGER=True (set by the tests; use it for local
+development without Redis) tasks run in-process when they are enqueued and
+no broker is needed. It defaults to False: deployments run the worker
+process from the Procfile.
+"""
+from datetime import datetime
+from typing import Optional
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from app.core.config import config
+from app.core import archive, lesson_costs, lesson_timeseries, reports
+
+celery_app = Celery("institute", broker=config.CELERY_BROKER_URL)
+celery_app.conf.update(
+    task_always_eager=config.CELERY_TASK_ALWAYS_EAGER,
+    # Results live on the job document, not in a Celery result backend
+    task_ignore_result=True,
+    task_serializer="json",
+    accept_content=["json"],
+    # A report lost with its worker is redelivered; run_job re-claims it once
+    # its claim is older than REPORT_JOB_TIMEOUT_SECONDS
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+)
+
+
+@worker_process_init.connect
+def _connect_worker_to_mongo(**kwargs):
+    """
+    Each worker process opens its own MongoDB client and listens for
+    invalidations, so its caches hear about writes made elsewhere
+    """
+    from app.core.invalidation import invalidation_bus
+    from app.db import connect_to_mongo, mongo_db
+    connect_to_mongo()
+    if config.INVALIDATION_BUS_ENABLED:
+        mode = None if config.INVALIDATION_MODE == "auto" else config.INVALIDATION_MODE
+        invalidation_bus.start(mongo_db.db, mode)
+
+
+@worker_process_shutdown.connect
+def _disconnect_worker_from_mongo(**kwargs):
+    """Stop listening for invalidations and close the process's MongoDB client"""
+    from app.core.invalidation import invalidation_bus
+    from app.db import close_mongo_connection
+    invalidation_bus.stop()
+    close_mongo_connection()
+
+
+@celery_app.task(name="reports.run")
+def run_report(job_id: str):
+    """Build one queued report job"""
+    reports.run_job(job_id)
+
+
+@celery_app.task(name="analytics.backfill_daily_buckets")
+def backfill_daily_buckets(start: Optional[str] = None, end: Optional[str] = None):
+    """Rebuild daily lesson buckets for [start, end) (ISO dates, both optional)"""
+    from app.db import mongo_db
+    lesson_timeseries.backfill_daily_buckets(
+        mongo_db.lessons_collection,
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None,
+    )
+
+
+@celery_app.task(name="archive.run")
+def run_archive():
+    """Move lessons and payments older than ARCHIVE_AFTER_MONTHS to the archive"""
+    from app.db import mongo_db
+    archive.run_archive(mongo_db)
+
+
+@celery_app.task(name="lessons.recompute_costs")
+def recompute_lesson_costs(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    pricing_id: Optional[str] = None,
+    unpriced_only: bool = False,
+):
+    """Reprice stored lesson costs (ISO dates, all filters optional)"""
+    from app.db import mongo_db
+    lesson_costs.recompute_lesson_costs(
+        mongo_db.lessons_collection,
+        mongo_db.pricing_collection,
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None,
+        pricing_id,
+        unpriced_only,
+    )
@@ -0,0 +1,136 @@
+"""
+Benchmark: lesson statistics with per-value count_documents vs one $facet
+
+Seeds a scratch database with N lessons (100k by default), then times the
+old get_lessons_stats query pattern (7 count_documents + 1 aggregate) against
+app.core.stats.lesson_breakdown (1 $facet aggregate), with and without a
+month filter.
+
+Run with:
+    python benchmarks/bench_lesson_stats.py [--lessons 100000] [--repeat 20]
+
+Uses BENCH_MONGO_URL (falls back to MONGO_CLUSTER_URL) and the scratch
+database BENCH_MONGO_DATABASE (default "institute_bench"), which is dropped
+first. Pass --mongomock for a quick in-process smoke run; its timings say
+nothing about a real server.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.stats import LESSON_STATUSES, LESSON_TYPES, lesson_breakdown
+
+
+def seed_lessons(collection, count, seed=42):
+    """Insert `count` synthetic lessons spread over the last two years"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for _ in range(count):
+        batch.append({
+            "_id": str(uuid.uuid4()),
+            "teacher_id": f"teacher-{rng.randrange(200)}",
+            "teacher_name": "Bench Teacher",
+            "lesson_type": rng.choice(LESSON_TYPES),
+            "subject": rng.choice(["Math", "English", "Physics", "Arabic"]),
+            "education_level": rng.choice(["elementary", "middle", "secondary"]),
+            "scheduled_date": start + timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+            "duration_minutes": rng.choice([30, 45, 60, 90, 120]),
+            "status": rng.choice(LESSON_STATUSES),
+            "students": [],
+            "created_at": start,
+        })
+        if len(batch) == 10_000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    collection.create_index("scheduled_date")
+    collection.create_index("status")
+    collection.create_index("lesson_type")
+
+
+def legacy_stats(collection, query):
+    """The previous get_lessons_stats query pattern: one round-trip per number"""
+    counts = {}
+    for lesson_type in LESSON_TYPES:
+        counts[lesson_type] = collection.count_documents({**query, "lesson_type": lesson_type})
+    for lesson_status in LESSON_STATUSES:
+        counts[lesson_status] = collection.count_documents({**query, "status": lesson_status})
+    pipeline = [{"$match": query}, {"$group": {"_id": None, "total_minutes": {"$sum": "$duration_minutes"}}}]
+    result = list(collection.aggregate(pipeline))
+    counts["total_minutes"] = result[0]["total_minutes"] if result else 0
+    return counts
+
+
+def time_call(func, repeat):
+    """Return per-call latencies in milliseconds"""
+    func()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"median {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms"
+
+
+def get_collection(use_mongomock):
+    database_name = os.getenv("BENCH_MONGO_DATABASE", "institute_bench")
+    if use_mongomock:
+        from mongomock import MongoClient
+        return MongoClient()[database_name]["lessons"]
+
+    from pymongo import MongoClient
+    url = os.getenv("BENCH_MONGO_URL") or os.getenv("MONGO_CLUSTER_URL") or "mongodb://localhost:27017"
+    client = MongoClient(url)
+    client.drop_database(database_name)
+    return client[database_name]["lessons"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    collection = get_collection(args.mongomock)
+    print(f"Seeding {args.lessons} lessons into {collection.database.name}.{collection.name} ...")
+    seed_lessons(collection, args.lessons)
+
+    month_query = {"scheduled_date": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)}}
+    for label, query in [("all lessons", {}), ("one month", month_query)]:
+        legacy = legacy_stats(collection, query)
+        facet = lesson_breakdown(collection, query)
+        assert legacy["total_minutes"] == facet["total_minutes"]
+        assert all(legacy[key] == facet["by_type"][key] for key in LESSON_TYPES)
+        assert all(legacy[key] == facet["by_status"][key] for key in LESSON_STATUSES)
+
+        print(f"\n{label}:")
+        print(f"  8 round-trips (count_documents x7 + aggregate): "
+              f"{summarize(time_call(lambda: legacy_stats(collection, query), args.repeat))}")
+        print(f"  1 round-trip  ($facet)                        : "
+              f"{summarize(time_call(lambda: lesson_breakdown(collection, query), args.repeat))}")
+
+    if not args.mongomock:
+        collection.database.client.drop_database(collection.database.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files produced by benchmarks.run
+
+Run with:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Prints p50/p95/p99 and throughput per scenario with the relative change,
+and exits with status 1 if any scenario's p95 got slower by more than
+--threshold percent.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "throughput_rps"]
+
+
+def change_pct(old: float, new: float) -> float:
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    """
+    Returns:
+        (rows, regressions) - rows are printable lines, regressions the names
+        of scenarios whose p95 rose by more than `threshold` percent
+    """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline["scenarios"]) | set(candidate["scenarios"])):
+        old = baseline["scenarios"].get(name)
+        new = candidate["scenarios"].get(name)
+        if old is None or new is None:
+            rows.append(f"{name:32} {'only in candidate' if old is None else 'only in baseline'}")
+            continue
+        cells = []
+        for metric in METRICS:
+            cells.append(f"{metric[:-3] if metric.endswith('_ms') else 'rps'} "
+                         f"{old[metric]:9.2f} -> {new[metric]:9.2f} ({change_pct(old[metric], new[metric]):+6.1f}%)")
+        rows.append(f"{name:32} " + "  ".join(cells))
+        if change_pct(old["p95_ms"], new["p95_ms"]) > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 slowdown in percent")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text())
+    candidate = json.loads(args.candidate.read_text())
+    print(f"baseline  {baseline['meta']['commit']} ({baseline['meta']['mode']})")
+    print(f"candidate {candidate['meta']['commit']} ({candidate['meta']['mode']})\n")
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    print("\n".join(rows))
+    if regressions:
+        print(f"\np95 regressions above {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
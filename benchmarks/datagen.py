@@ -0,0 +1,263 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+The same seed and volumes always produce the same documents, so runs on
+different commits measure the same workload. Volumes are skewed the way a
+real institute is: a few teachers give most of the lessons, a few students
+take most of them and make most of the payments, and most lessons end up
+approved or completed.
+"""
+
+import bisect
+import itertools
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from app.core.security import get_password_hash
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.payment import Payment
+from app.models.pricing import Pricing
+from app.models.student import Student
+from app.models.user import User, UserRole, UserStatus
+
+
+BENCH_PASSWORD = "benchpass123"
+ADMIN_USERNAME = "bench_admin"
+
+SUBJECTS = [
+    "Mathematics", "English", "Physics", "Chemistry", "Biology",
+    "Arabic", "Hebrew", "History", "Geography", "Computer Science",
+]
+EDUCATION_LEVELS = [EducationLevel.ELEMENTARY, EducationLevel.MIDDLE, EducationLevel.SECONDARY]
+FIRST_NAMES = ["Mohammed", "Ahmad", "Omar", "Sara", "Lina", "Yousef", "Noor", "Hala", "Adam", "Maya", "Ali", "Rami"]
+LAST_NAMES = ["Hassan", "Khalil", "Saleh", "Haddad", "Nasser", "Mansour", "Aziz", "Darwish", "Najjar", "Amin"]
+
+# Status mix for lessons (weights sum to 100)
+STATUS_WEIGHTS = [
+    (LessonStatus.COMPLETED, 45),
+    (LessonStatus.APPROVED, 30),
+    (LessonStatus.PENDING, 15),
+    (LessonStatus.CANCELLED, 6),
+    (LessonStatus.REJECTED, 4),
+]
+DURATIONS = [30, 45, 60, 60, 60, 90, 90, 120]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Volumes and shape of a generated dataset"""
+    teachers: int = 50
+    students: int = 2_000
+    lessons: int = 100_000
+    payments: int = 20_000
+    seed: int = 42
+    months: int = 24
+    skew: float = 1.1  # Zipf exponent; 0 means uniform
+    start_date: datetime = datetime(2024, 1, 1)
+
+
+def zipf_weights(n: int, s: float, rng: random.Random) -> Tuple[List[int], List[float]]:
+    """
+    Zipf-distributed sampling table over items 0..n-1.
+
+    Returns:
+        (order, cum_weights) - rank r is item order[r]; pass cum_weights to
+        random.choices over range(n) and map the result through order.
+        Which item gets which rank is shuffled so skew isn't tied to
+        creation order.
+    """
+    weights = [1.0 / ((rank + 1) ** s) for rank in range(n)]
+    order = list(range(n))
+    rng.shuffle(order)
+    return order, list(itertools.accumulate(weights))
+
+
+class ZipfPicker:
+    """Pick indexes 0..n-1 with probability proportional to 1 / (rank ** s)"""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self._rng = rng
+        self._order, self._cumulative = zipf_weights(n, s, rng)
+
+    def pick(self) -> int:
+        target = self._rng.random() * self._cumulative[-1]
+        return self._order[bisect.bisect_left(self._cumulative, target)]
+
+
+def _deterministic_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _name(rng: random.Random, index: int) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}"
+
+
+class DatasetGenerator:
+    """
+    Build users, students, pricing, lessons and payments for a DatasetSpec.
+
+    Every bench user shares BENCH_PASSWORD (hashed once - bcrypt per user
+    would dominate generation time).
+    """
+
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self._rng = random.Random(spec.seed)
+        self._hashed_password = get_password_hash(BENCH_PASSWORD)
+        self.teachers = self._build_teachers()
+        self.students = self._build_students()
+
+    def _build_teachers(self) -> List[User]:
+        rng = random.Random(self.spec.seed + 1)
+        teachers = []
+        for index in range(self.spec.teachers):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            teachers.append(User(
+                _id=_deterministic_id(rng),
+                username=f"bench_teacher_{index}",
+                hashed_password=self._hashed_password,
+                role=UserRole.TEACHER,
+                status=UserStatus.ACTIVE,
+                first_name=first_name,
+                last_name=last_name,
+                created_at=self.spec.start_date,
+            ))
+        return teachers
+
+    def _build_students(self) -> List[Student]:
+        rng = random.Random(self.spec.seed + 2)
+        return [
+            Student(
+                _id=_deterministic_id(rng),
+                full_name=_name(rng, index),
+                education_level=rng.choice(EDUCATION_LEVELS),
+                is_active=rng.random() > 0.05,
+                created_at=self.spec.start_date,
+            )
+            for index in range(self.spec.students)
+        ]
+
+    def users(self) -> List[Dict]:
+        admin = User(
+            _id=_deterministic_id(random.Random(self.spec.seed)),
+            username=ADMIN_USERNAME,
+            hashed_password=self._hashed_password,
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE,
+            first_name="Bench",
+            last_name="Admin",
+            created_at=self.spec.start_date,
+        )
+        return [admin.to_dict()] + [teacher.to_dict() for teacher in self.teachers]
+
+    def student_docs(self) -> List[Dict]:
+        return [student.to_dict() for student in self.students]
+
+    def pricing(self) -> List[Dict]:
+        rng = random.Random(self.spec.seed + 3)
+        docs = []
+        for subject in SUBJECTS:
+            for level in EDUCATION_LEVELS:
+                individual = rng.choice([60, 70, 80, 90, 100])
+                docs.append(Pricing(
+                    _id=_deterministic_id(rng),
+                    subject=subject,
+                    education_level=level,
+                    individual_price=float(individual),
+                    group_price=float(individual // 2),
+                ).to_dict())
+        return docs
+
+    def lessons(self) -> Iterator[Dict]:
+        """Yield lesson documents (a generator - 100k+ lessons needn't sit in memory)"""
+        rng = random.Random(self.spec.seed + 4)
+        teacher_picker = ZipfPicker(len(self.teachers), self.spec.skew, rng)
+        student_picker = ZipfPicker(len(self.students), self.spec.skew, rng)
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        minutes_range = self.spec.months * 30 * 24 * 60
+
+        for _ in range(self.spec.lessons):
+            teacher = self.teachers[teacher_picker.pick()]
+            lesson_type = LessonType.INDIVIDUAL if rng.random() < 0.7 else LessonType.GROUP
+            group_size = 1 if lesson_type == LessonType.INDIVIDUAL else rng.randint(2, 6)
+            students = []
+            for _ in range(group_size):
+                student = self.students[student_picker.pick()]
+                students.append({"student_id": student._id, "student_name": student.full_name})
+
+            status = rng.choices(statuses, weights)[0]
+            scheduled_date = self.spec.start_date + timedelta(minutes=rng.randrange(minutes_range))
+            yield Lesson(
+                _id=_deterministic_id(rng),
+                teacher_id=teacher._id,
+                teacher_name=teacher.get_full_name(),
+                subject=rng.choice(SUBJECTS),
+                education_level=rng.choice(EDUCATION_LEVELS),
+                lesson_type=lesson_type,
+                scheduled_date=scheduled_date,
+                duration_minutes=rng.choice(DURATIONS),
+                status=status,
+                max_students=group_size,
+                students=students,
+                created_at=scheduled_date - timedelta(days=1),
+                completed_at=scheduled_date if status == LessonStatus.COMPLETED else None,
+            ).to_dict()
+
+    def payments(self, created_by: str) -> Iterator[Dict]:
+        rng = random.Random(self.spec.seed + 5)
+        student_picker = ZipfPicker(len(self.students), self.spec.skew, rng)
+        days_range = self.spec.months * 30
+        for _ in range(self.spec.payments):
+            student = self.students[student_picker.pick()]
+            payment_date = self.spec.start_date + timedelta(days=rng.randrange(days_range))
+            yield Payment(
+                _id=_deterministic_id(rng),
+                student_name=student.full_name,
+                amount=float(rng.choice([50, 100, 150, 200, 300, 500])),
+                payment_date=payment_date,
+                created_by=created_by,
+                created_at=payment_date,
+            ).to_dict()
+
+
+def _insert_in_chunks(collection, docs, chunk_size: int = 10_000) -> int:
+    inserted = 0
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == chunk_size:
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+
+def load_dataset(db, spec: DatasetSpec) -> Dict[str, int]:
+    """
+    Drop and repopulate users, students, pricing, lessons and payments in `db`.
+
+    Returns:
+        Number of documents inserted per collection
+    """
+    generator = DatasetGenerator(spec)
+    users = generator.users()
+    admin_id = users[0]["_id"]
+
+    counts = {}
+    for name, docs in [
+        ("users", users),
+        ("students", generator.student_docs()),
+        ("pricing", generator.pricing()),
+        ("lessons", generator.lessons()),
+        ("payments", generator.payments(admin_id)),
+    ]:
+        db[name].drop()
+        counts[name] = _insert_in_chunks(db[name], docs)
+    return counts
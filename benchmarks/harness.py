@@ -0,0 +1,103 @@
+"""
+Latency collection and reporting for benchmark scenarios.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from benchmarks.scenarios import Scenario
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0..100) of unsorted samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies_ms: List[float], wall_seconds: float, errors: int) -> Dict[str, Any]:
+    """Reduce raw latencies to the numbers stored in the results file"""
+    completed = len(latencies_ms)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(sum(latencies_ms) / completed, 3) if completed else 0.0,
+        "min_ms": round(min(latencies_ms), 3) if completed else 0.0,
+        "max_ms": round(max(latencies_ms), 3) if completed else 0.0,
+        "throughput_rps": round(completed / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+    }
+
+
+def run_scenario(
+    scenario: Scenario,
+    client_factory: Callable[[], Any],
+    context: Dict[str, Any],
+    headers: Dict[str, Dict[str, str]],
+    requests: int,
+    concurrency: int,
+    warmup: int = 5,
+) -> Dict[str, Any]:
+    """
+    Issue `requests` calls of one scenario from `concurrency` threads.
+
+    Args:
+        client_factory: Returns an httpx-compatible client (TestClient or
+            httpx.Client); each worker thread gets its own
+        headers: Auth headers per role ("admin", "teacher")
+
+    Returns:
+        Summary dict (see summarize), plus "status_codes" seen
+    """
+    path = scenario.render_path(context)
+    body = scenario.render_json(context)
+    request_headers = headers.get(scenario.auth, {}) if scenario.auth else {}
+
+    local = threading.local()
+    lock = threading.Lock()
+    latencies_ms: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors = 0
+
+    def get_client():
+        if not hasattr(local, "client"):
+            local.client = client_factory()
+        return local.client
+
+    def call(record: bool):
+        nonlocal errors
+        client = get_client()
+        started = time.perf_counter()
+        try:
+            response = client.request(scenario.method, path, json=body, headers=request_headers)
+            code = response.status_code
+        except Exception:
+            code = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not record:
+            return
+        with lock:
+            status_codes[str(code)] = status_codes.get(str(code), 0) + 1
+            if code is not None and code < 400:
+                latencies_ms.append(elapsed_ms)
+            else:
+                errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        list(pool.map(lambda _: call(False), range(warmup)))
+        started = time.perf_counter()
+        list(pool.map(lambda _: call(True), range(requests)))
+        wall_seconds = time.perf_counter() - started
+
+    summary = summarize(latencies_ms, wall_seconds, errors)
+    summary["status_codes"] = status_codes
+    return summary
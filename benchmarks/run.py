@@ -0,0 +1,199 @@
+"""
+Benchmark runner: seed a MongoDB database, replay scenarios, save JSON results
+
+Run with:
+    python -m benchmarks.run                         # seed defaults, run all scenarios
+    python -m benchmarks.run --skip-load -s dashboard.stats -s user.login
+    python -m benchmarks.run --base-url http://localhost:8000 --skip-load
+    python -m benchmarks.compare old.json new.json
+
+Modes:
+    in-process (default) - requests go through FastAPI's TestClient with the
+        app pointed at the benchmark database. Includes a constant per-request
+        TestClient overhead, so compare runs with each other, not with prod.
+    --base-url - requests go over HTTP to a running server. Seed the database
+        that server uses (same --mongo-url / --database) or pass --skip-load.
+
+Data goes to BENCH_MONGO_URL (falls back to MONGO_CLUSTER_URL, then
+localhost) in the database --database (default "institute_bench"), which
+is dropped and reseeded unless --skip-load is given. --mongomock runs
+everything in-process for a smoke test; its timings are not meaningful.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.datagen import ADMIN_USERNAME, BENCH_PASSWORD, DatasetSpec, load_dataset
+from benchmarks.harness import run_scenario
+from benchmarks.scenarios import SCENARIOS, SCENARIOS_BY_NAME
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def open_database(args):
+    if args.mongomock:
+        from mongomock import MongoClient
+        return MongoClient()[args.database]
+
+    from pymongo import MongoClient
+    url = args.mongo_url or os.getenv("BENCH_MONGO_URL") or os.getenv("MONGO_CLUSTER_URL") or "mongodb://localhost:27017"
+    return MongoClient(url)[args.database]
+
+
+def attach_database(db):
+    """Point the application's shared connection at the benchmark database"""
+    from app.db import mongo_db
+
+    mongo_db.client = db.client
+    mongo_db.db = db
+    mongo_db.users_collection = db["users"]
+    mongo_db.students_collection = db["students"]
+    mongo_db.lessons_collection = db["lessons"]
+    mongo_db.payments_collection = db["payments"]
+    mongo_db.pricing_collection = db["pricing"]
+    return mongo_db
+
+
+def build_context(db):
+    """Pick the values scenarios are parameterized with (busiest teacher/student/month)"""
+    busiest_teacher = next(db["lessons"].aggregate([
+        {"$group": {"_id": "$teacher_id", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 1},
+    ]), None)
+    busiest_student = next(db["payments"].aggregate([
+        {"$group": {"_id": "$student_name", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 1},
+    ]), None)
+    latest = db["lessons"].find_one({}, sort=[("scheduled_date", -1)], projection={"scheduled_date": 1})
+    if not busiest_teacher or not busiest_student or not latest:
+        raise SystemExit("Benchmark database is empty - run without --skip-load first")
+
+    teacher = db["users"].find_one({"_id": busiest_teacher["_id"]})
+    student_name = busiest_student["_id"]
+    return {
+        "teacher_id": teacher["_id"],
+        "teacher_username": teacher["username"],
+        "student_name": student_name,
+        "student_prefix": student_name.split()[0][:3],
+        "month": latest["scheduled_date"].month,
+        "year": latest["scheduled_date"].year,
+    }
+
+
+def make_client_factory(args):
+    if args.base_url:
+        import httpx
+        return lambda: httpx.Client(base_url=args.base_url, timeout=60)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return lambda: TestClient(app)
+
+
+def login(client, username: str) -> dict:
+    response = client.post("/api/v1/user/login", json={"username": username, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def parse_args(argv=None):
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teachers", type=int, default=defaults.teachers)
+    parser.add_argument("--students", type=int, default=defaults.students)
+    parser.add_argument("--lessons", type=int, default=defaults.lessons)
+    parser.add_argument("--payments", type=int, default=defaults.payments)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--skew", type=float, default=defaults.skew, help="Zipf exponent (0 = uniform)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS_BY_NAME),
+                        help="Run only this scenario (repeatable)")
+    parser.add_argument("--mongo-url")
+    parser.add_argument("--database", default=os.getenv("BENCH_MONGO_DATABASE", "institute_bench"))
+    parser.add_argument("--mongomock", action="store_true")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of in-process")
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the already seeded database")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<commit>-<time>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # One INFO line per request would drown the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    spec = DatasetSpec(
+        teachers=args.teachers, students=args.students, lessons=args.lessons,
+        payments=args.payments, seed=args.seed, skew=args.skew,
+    )
+
+    db = open_database(args)
+    if not args.skip_load:
+        print(f"Seeding {db.name}: {spec}")
+        print(f"   Inserted: {load_dataset(db, spec)}")
+
+    if not args.base_url:
+        attach_database(db).create_indexes()
+
+    context = build_context(db)
+    client_factory = make_client_factory(args)
+    setup_client = client_factory()
+    headers = {
+        "admin": login(setup_client, ADMIN_USERNAME),
+        "teacher": login(setup_client, context["teacher_username"]),
+    }
+
+    scenarios = [SCENARIOS_BY_NAME[name] for name in args.scenario] if args.scenario else SCENARIOS
+    results = {}
+    for scenario in scenarios:
+        summary = run_scenario(scenario, client_factory, context, headers, args.requests, args.concurrency)
+        results[scenario.name] = summary
+        print(f"  {scenario.name:32} p50 {summary['p50_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms  "
+              f"p99 {summary['p99_ms']:9.2f} ms  {summary['throughput_rps']:8.1f} req/s  errors {summary['errors']}")
+
+    commit = git_commit()
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": timestamp.isoformat(),
+            "mode": "http" if args.base_url else ("mongomock" if args.mongomock else "in-process"),
+            "dataset": {**vars(spec), "start_date": spec.start_date.isoformat()},
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{commit}-{timestamp.strftime('%Y%m%dT%H%M%SZ')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
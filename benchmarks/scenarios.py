@@ -0,0 +1,70 @@
+"""
+Request scenarios exercised by the benchmark runner.
+
+Paths may contain {placeholders} filled from the run context (see
+benchmarks.run.build_context), e.g. the name of the busiest student.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from benchmarks.datagen import BENCH_PASSWORD
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One request shape, repeated `requests` times by the runner"""
+    name: str
+    method: str
+    path: str
+    auth: Optional[str] = None  # "admin", "teacher" or None
+    json: Optional[Dict[str, Any]] = field(default=None)
+
+    def render_path(self, context: Dict[str, Any]) -> str:
+        return self.path.format(**context)
+
+    def render_json(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.json is None:
+            return None
+        return {key: value.format(**context) if isinstance(value, str) else value
+                for key, value in self.json.items()}
+
+
+SCENARIOS = [
+    # Authentication (dominated by bcrypt verification)
+    Scenario("user.login", "POST", "/api/v1/user/login",
+             json={"username": "{teacher_username}", "password": BENCH_PASSWORD}),
+
+    # Teacher lesson listing - the busiest teacher, to hit the skewed tail
+    Scenario("lessons.my_lessons", "GET", "/api/v1/lessons/my-lessons", auth="teacher"),
+    Scenario("lessons.my_lessons.month", "GET",
+             "/api/v1/lessons/my-lessons?month={month}&year={year}", auth="teacher"),
+    Scenario("lessons.my_lessons.count_only", "GET",
+             "/api/v1/lessons/my-lessons?count_only=true", auth="teacher"),
+
+    # Admin dashboard
+    Scenario("dashboard.stats", "GET", "/api/v1/dashboard/stats", auth="admin"),
+    Scenario("dashboard.stats.month", "GET",
+             "/api/v1/dashboard/stats?month={month}&year={year}", auth="admin"),
+    Scenario("dashboard.stats.lessons", "GET", "/api/v1/dashboard/stats/lessons", auth="admin"),
+    Scenario("dashboard.stats.teachers", "GET",
+             "/api/v1/dashboard/stats/teachers?month={month}&year={year}", auth="admin"),
+    Scenario("dashboard.stats.students", "GET", "/api/v1/dashboard/stats/students", auth="admin"),
+    Scenario("dashboard.teacher_earnings", "GET",
+             "/api/v1/dashboard/teacher-earnings/{teacher_id}?month={month}&year={year}", auth="admin"),
+
+    # Columnar analytics - a year of lessons pivoted teacher x subject x level by type
+    Scenario("analytics.pivot.year", "GET",
+             "/api/v1/analytics/pivot/lessons?from={year}-01-01&to={year}-12-31"
+             "&rows=teacher_name,subject,education_level&columns=lesson_type&value=cost", auth="admin"),
+
+    # Payments
+    Scenario("payments.list", "GET", "/api/v1/payments/?month={month}&year={year}", auth="admin"),
+    Scenario("payments.search", "GET", "/api/v1/payments/?student_name={student_prefix}", auth="admin"),
+    Scenario("payments.student", "GET", "/api/v1/payments/student/{student_name}", auth="admin"),
+    Scenario("payments.student_total", "GET", "/api/v1/payments/student/{student_name}/total", auth="admin"),
+    Scenario("payments.cost_summary", "GET",
+             "/api/v1/payments/student/{student_name}/cost-summary", auth="admin"),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
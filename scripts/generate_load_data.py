@@ -0,0 +1,294 @@
+"""
+High-volume synthetic data generator for load testing
+
+Builds lessons and payments as raw dicts (no model objects) in batches of
+--chunk-size, spreads the batches over a process pool, and has each worker
+write its batches with unordered insert_many. The target collections are
+dropped first and indexes are built once after the load, which is much
+cheaper than maintaining them on every insert.
+
+Teachers, students and pricing come from benchmarks.datagen, so the same
+seed gives the same people as the benchmark suite.
+
+Run with:
+    python scripts/generate_load_data.py --lessons 5000000 --payments 500000
+    python scripts/generate_load_data.py --lessons 100000 --dry-run   # generation speed only
+
+Writes to --mongo-url (BENCH_MONGO_URL, then MONGO_CLUSTER_URL, then
+localhost) in --database (default "institute_load"). The users, students,
+pricing, lessons and payments collections there are dropped first.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from multiprocessing import get_context
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.datagen import (
+    DURATIONS, EDUCATION_LEVELS, STATUS_WEIGHTS, SUBJECTS,
+    DatasetGenerator, DatasetSpec, zipf_weights,
+)
+from app.core.config import config
+from app.core.search import SEARCH_KEYS_FIELD, build_search_keys
+
+COLLECTIONS = ["users", "students", "pricing", "lessons", "payments"]
+STATUS_VALUES = [status.value for status, _ in STATUS_WEIGHTS]
+STATUS_CUM_WEIGHTS = list(itertools.accumulate(weight for _, weight in STATUS_WEIGHTS))
+LEVEL_VALUES = [level.value for level in EDUCATION_LEVELS]
+PAYMENT_AMOUNTS = [50.0, 100.0, 150.0, 200.0, 300.0, 500.0]
+
+
+def build_reference(spec: DatasetSpec):
+    """
+    Everything workers need to build lessons/payments, as plain picklable data
+
+    Returns:
+        (generator, reference) - the generator also holds the user, student
+        and pricing documents for the parent process to insert
+    """
+    generator = DatasetGenerator(spec)
+    rng = random.Random(spec.seed + 6)
+    teacher_order, teacher_cum = zipf_weights(len(generator.teachers), spec.skew, rng)
+    student_order, student_cum = zipf_weights(len(generator.students), spec.skew, rng)
+    reference = {
+        "seed": spec.seed,
+        "start_date": spec.start_date,
+        "minutes_range": spec.months * 30 * 24 * 60,
+        "days_range": spec.months * 30,
+        "teachers": [(teacher._id, teacher.get_full_name()) for teacher in generator.teachers],
+        "teacher_order": teacher_order,
+        "teacher_cum": teacher_cum,
+        "students": [(student._id, student.full_name) for student in generator.students],
+        "student_order": student_order,
+        "student_cum": student_cum,
+    }
+    return generator, reference
+
+
+def _chunk_rng(reference, kind: str, chunk_index: int) -> random.Random:
+    # Seeded per chunk, so output doesn't depend on which worker builds it
+    return random.Random(f"{reference['seed']}-{kind}-{chunk_index}")
+
+
+def _ids(rng: random.Random, count: int):
+    return [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count)]
+
+
+def _zipf_sample(rng: random.Random, order, cum_weights, count: int):
+    population = range(len(order))
+    return [order[index] for index in rng.choices(population, cum_weights=cum_weights, k=count)]
+
+
+def build_lesson_chunk(reference, chunk_index: int, size: int):
+    """Build `size` lesson dicts shaped like Lesson.to_dict()"""
+    rng = _chunk_rng(reference, "lessons", chunk_index)
+    teachers = reference["teachers"]
+    students = reference["students"]
+    start_date = reference["start_date"]
+
+    # Draw every column for the whole batch at once
+    ids = _ids(rng, size)
+    teacher_indexes = _zipf_sample(rng, reference["teacher_order"], reference["teacher_cum"], size)
+    statuses = rng.choices(STATUS_VALUES, cum_weights=STATUS_CUM_WEIGHTS, k=size)
+    subjects = rng.choices(SUBJECTS, k=size)
+    levels = rng.choices(LEVEL_VALUES, k=size)
+    durations = rng.choices(DURATIONS, k=size)
+    offsets = [rng.randrange(reference["minutes_range"]) for _ in range(size)]
+    group_sizes = [1 if rng.random() < 0.7 else rng.randint(2, 6) for _ in range(size)]
+    student_indexes = _zipf_sample(rng, reference["student_order"], reference["student_cum"], sum(group_sizes))
+
+    docs = []
+    cursor = 0
+    for row in range(size):
+        teacher_id, teacher_name = teachers[teacher_indexes[row]]
+        group_size = group_sizes[row]
+        lesson_students = [
+            {"student_id": students[index][0], "student_name": students[index][1]}
+            for index in student_indexes[cursor:cursor + group_size]
+        ]
+        cursor += group_size
+        scheduled_date = start_date + timedelta(minutes=offsets[row])
+        docs.append({
+            "_id": ids[row],
+            "teacher_id": teacher_id,
+            "teacher_name": teacher_name,
+            "lesson_type": "individual" if group_size == 1 else "group",
+            "subject": subjects[row],
+            "education_level": levels[row],
+            "scheduled_date": scheduled_date,
+            "duration_minutes": durations[row],
+            "max_students": group_size,
+            "status": statuses[row],
+            "students": lesson_students,
+            "created_at": scheduled_date - timedelta(days=1),
+            "updated_at": None,
+            "completed_at": scheduled_date if statuses[row] == "completed" else None,
+        })
+    return docs
+
+
+def build_payment_chunk(reference, chunk_index: int, size: int):
+    """Build `size` payment dicts shaped like Payment.to_dict()"""
+    rng = _chunk_rng(reference, "payments", chunk_index)
+    students = reference["students"]
+    start_date = reference["start_date"]
+
+    ids = _ids(rng, size)
+    student_indexes = _zipf_sample(rng, reference["student_order"], reference["student_cum"], size)
+    amounts = rng.choices(PAYMENT_AMOUNTS, k=size)
+    days = [rng.randrange(reference["days_range"]) for _ in range(size)]
+
+    search_keys = {}
+    docs = []
+    for row in range(size):
+        student_name = students[student_indexes[row]][1]
+        if student_name not in search_keys:
+            search_keys[student_name] = build_search_keys(student_name)
+        payment_date = start_date + timedelta(days=days[row])
+        docs.append({
+            "_id": ids[row],
+            "student_name": student_name,
+            "student_email": None,
+            "amount": amounts[row],
+            "payment_date": payment_date,
+            "lesson_id": None,
+            "notes": None,
+            "created_by": reference["admin_id"],
+            "created_at": payment_date,
+            SEARCH_KEYS_FIELD: search_keys[student_name],
+        })
+    return docs
+
+
+# Per-process state, set by _init_worker
+_worker_reference = None
+_worker_db = None
+
+CHUNK_BUILDERS = {"lessons": build_lesson_chunk, "payments": build_payment_chunk}
+
+
+def _init_worker(reference, mongo_url, database):
+    global _worker_reference, _worker_db
+    _worker_reference = reference
+    if mongo_url:
+        from pymongo import MongoClient
+        _worker_db = MongoClient(mongo_url)[database]
+
+
+def _run_chunk(task):
+    kind, chunk_index, size = task
+    docs = CHUNK_BUILDERS[kind](_worker_reference, chunk_index, size)
+    if _worker_db is not None:
+        _worker_db[kind].insert_many(docs, ordered=False, bypass_document_validation=True)
+    return kind, len(docs)
+
+
+def chunk_tasks(kind: str, total: int, chunk_size: int):
+    return [
+        (kind, chunk_index, min(chunk_size, total - start))
+        for chunk_index, start in enumerate(range(0, total, chunk_size))
+    ]
+
+
+def create_indexes(db):
+    """Build the application's indexes once, after the data is in"""
+    from app.db.mongodb import MongoDatabase
+
+    target = MongoDatabase()
+    target.client = db.client
+    target.db = db
+    for name in COLLECTIONS:
+        setattr(target, f"{name}_collection", db[name])
+    target.create_indexes()
+
+
+def parse_args(argv=None):
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--lessons", type=int, default=1_000_000)
+    parser.add_argument("--payments", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--skew", type=float, default=defaults.skew, help="Zipf exponent (0 = uniform)")
+    parser.add_argument("--months", type=int, default=defaults.months)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--mongo-url")
+    parser.add_argument("--database", default="institute_load")
+    parser.add_argument("--dry-run", action="store_true", help="Generate only, don't connect or insert")
+    parser.add_argument("--force", action="store_true", help="Allow writing to the application's own database")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database == config.MONGO_DATABASE and not args.force and not args.dry_run:
+        sys.exit(f"[ERROR] Refusing to load into the application database '{args.database}' without --force")
+
+    spec = DatasetSpec(
+        teachers=args.teachers, students=args.students, lessons=args.lessons,
+        payments=args.payments, seed=args.seed, skew=args.skew, months=args.months,
+    )
+    started = time.perf_counter()
+    generator, reference = build_reference(spec)
+    users = generator.users()
+    reference["admin_id"] = users[0]["_id"]
+
+    mongo_url = None
+    db = None
+    if not args.dry_run:
+        from pymongo import MongoClient
+        mongo_url = args.mongo_url or os.getenv("BENCH_MONGO_URL") or config.MONGO_CLUSTER_URL or "mongodb://localhost:27017"
+        db = MongoClient(mongo_url)[args.database]
+        # Fresh collections have no secondary indexes to maintain during the load
+        for name in COLLECTIONS:
+            db[name].drop()
+        db["users"].insert_many(users, ordered=False)
+        db["students"].insert_many(generator.student_docs(), ordered=False)
+        db["pricing"].insert_many(generator.pricing(), ordered=False)
+        print(f"[INFO] Inserted {len(users)} users, {spec.students} students and pricing into {args.database}")
+
+    tasks = chunk_tasks("lessons", spec.lessons, args.chunk_size) + chunk_tasks("payments", spec.payments, args.chunk_size)
+    totals = {"lessons": 0, "payments": 0}
+    load_started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(reference, mongo_url, args.database),
+    ) as pool:
+        futures = [pool.submit(_run_chunk, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            kind, count = future.result()
+            totals[kind] += count
+            if done % 10 == 0 or done == len(futures):
+                elapsed = time.perf_counter() - load_started
+                written = totals["lessons"] + totals["payments"]
+                print(f"   {done}/{len(futures)} chunks - {written:,} docs - {written / elapsed:,.0f} docs/s")
+
+    load_seconds = time.perf_counter() - load_started
+    print(f"[INFO] {'Generated' if args.dry_run else 'Loaded'} {totals['lessons']:,} lessons and "
+          f"{totals['payments']:,} payments in {load_seconds:.1f}s")
+
+    if db is not None:
+        index_started = time.perf_counter()
+        create_indexes(db)
+        print(f"[INFO] Built indexes in {time.perf_counter() - index_started:.1f}s")
+
+    print(f"[SUCCESS] Done in {time.perf_counter() - started:.1f}s")
+    return totals
+
+
+if __name__ == "__main__":
+    main()
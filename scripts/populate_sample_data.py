@@ -15,7 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.db.mongodb import mongo_db
 from app.models.user import User, UserRole, UserStatus
-from app.models.lesson import Lesson, LessonType, LessonStatus
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
 from app.core.security import get_password_hash
 
 
@@ -73,7 +73,8 @@ def create_lessons(teacher):
     """Create sample lessons for the teacher"""
     print_section("Step 2: Creating Lessons")
     
-    # Lesson data: (title, subject, type, duration, num_students, date_offset)
+    # Lesson data: (topic, subject, type, duration, num_students, date_offset)
+    # The topic is only printed - lessons have no title field
     lessons_data = [
         # Mathematics lessons (5 total: 3 individual, 2 group)
         ("Algebra Basics", "Mathematics", LessonType.INDIVIDUAL, 60, 1, 0),
@@ -122,16 +123,14 @@ def create_lessons(teacher):
         lesson = Lesson(
             teacher_id=teacher._id,
             teacher_name=teacher.get_full_name(),
-            title=title,
             subject=subject,
-            description=f"{subject} lesson on {title}",
+            education_level=EducationLevel.SECONDARY,
             lesson_type=lesson_type,
             scheduled_date=scheduled_date,
             duration_minutes=duration,
             max_students=num_students,
             students=students,
-            status=LessonStatus.PENDING,
-            notes=f"Sample lesson for {subject}"
+            status=LessonStatus.PENDING
         )
         
         lesson.save(mongo_db.lessons_collection)
@@ -212,7 +211,7 @@ def query_and_print_summary(teacher):
     for lesson in sorted(upcoming_lessons, key=lambda x: x["scheduled_date"]):
         date_str = lesson["scheduled_date"].strftime("%Y-%m-%d")
         type_icon = "[IND]" if lesson["lesson_type"] == LessonType.INDIVIDUAL else "[GRP]"
-        print(f"   {type_icon} {date_str} - {lesson['title']} ({lesson['subject']}) - {lesson['duration_minutes']} min")
+        print(f"   {type_icon} {date_str} - {lesson['subject']} - {lesson['duration_minutes']} min")
     
     print(f"\n   Total upcoming: {len(upcoming_lessons)} lessons")
     
@@ -248,7 +247,7 @@ def demonstrate_specific_queries(teacher):
     }))
     print(f"   Found {len(math_individual)} lessons:")
     for lesson in math_individual:
-        print(f"   - {lesson['title']} ({lesson['duration_minutes']} min)")
+        print(f"   - {lesson['scheduled_date'].strftime('%Y-%m-%d')} ({lesson['duration_minutes']} min)")
     
     # Query 2: Find all group lessons with 5+ students
     print("\n[QUERY 2] Group lessons with 5+ students")
@@ -259,7 +258,7 @@ def demonstrate_specific_queries(teacher):
     large_groups = [l for l in large_groups if len(l["students"]) >= 5]
     print(f"   Found {len(large_groups)} lessons:")
     for lesson in large_groups:
-        print(f"   - {lesson['title']} ({lesson['subject']}) - {len(lesson['students'])} students")
+        print(f"   - {lesson['subject']} - {len(lesson['students'])} students")
     
     # Query 3: Find lessons longer than 90 minutes
     print("\n[QUERY 3] Lessons longer than 90 minutes")
@@ -269,7 +268,7 @@ def demonstrate_specific_queries(teacher):
     }))
     print(f"   Found {len(long_lessons)} lessons:")
     for lesson in long_lessons:
-        print(f"   - {lesson['title']} ({lesson['subject']}) - {lesson['duration_minutes']} min")
+        print(f"   - {lesson['subject']} - {lesson['duration_minutes']} min")
     
     # Query 4: Count lessons by subject using aggregation
     print("\n[QUERY 4] Lesson count by subject (using aggregation)")
@@ -0,0 +1,92 @@
+"""
+Tests for the benchmark data generator and result reporting
+"""
+import json
+from collections import Counter
+from mongomock import MongoClient as MockMongoClient
+from benchmarks.datagen import DatasetGenerator, DatasetSpec, load_dataset
+from benchmarks.harness import percentile, summarize
+from benchmarks.compare import compare
+from benchmarks import run
+from app.db import mongo_db
+
+
+SMALL = DatasetSpec(teachers=10, students=40, lessons=400, payments=80)
+
+
+class TestDatasetGenerator:
+    """Test the synthetic dataset"""
+
+    def test_same_seed_same_documents(self):
+        """Test that generation is deterministic (ids included)"""
+        first = DatasetGenerator(SMALL)
+        second = DatasetGenerator(SMALL)
+
+        assert list(first.lessons()) == list(second.lessons())
+        assert first.student_docs() == second.student_docs()
+        assert [u["_id"] for u in first.users()] == [u["_id"] for u in second.users()]
+
+    def test_lessons_are_skewed_towards_few_teachers(self):
+        """Test that the busiest teacher gets far more than an even share"""
+        lessons = list(DatasetGenerator(SMALL).lessons())
+        per_teacher = Counter(lesson["teacher_id"] for lesson in lessons)
+
+        assert len(lessons) == SMALL.lessons
+        assert max(per_teacher.values()) > 2 * SMALL.lessons / SMALL.teachers
+        assert all(lesson["scheduled_date"] >= SMALL.start_date for lesson in lessons)
+
+    def test_load_dataset_counts(self):
+        """Test that the loader populates every collection"""
+        db = MockMongoClient()["bench"]
+
+        counts = load_dataset(db, SMALL)
+
+        assert counts == {"users": 11, "students": 40, "pricing": 30, "lessons": 400, "payments": 80}
+        assert db["users"].count_documents({"role": "admin"}) == 1
+
+
+class TestReporting:
+    """Test percentile math and regression comparison"""
+
+    def test_percentiles_and_summary(self):
+        """Test interpolated percentiles and throughput"""
+        samples = [float(value) for value in range(1, 101)]
+
+        assert percentile(samples, 50) == 50.5
+        assert percentile(samples, 99) == 99.01
+        summary = summarize(samples, wall_seconds=2.0, errors=3)
+        assert summary["requests"] == 103
+        assert summary["throughput_rps"] == 50.0
+
+    def test_compare_flags_p95_regressions(self):
+        """Test that only scenarios slower than the threshold are flagged"""
+        def report(p95_by_name):
+            return {"scenarios": {
+                name: {"p50_ms": 1.0, "p95_ms": p95, "p99_ms": 1.0, "throughput_rps": 1.0}
+                for name, p95 in p95_by_name.items()
+            }}
+
+        _, regressions = compare(report({"a": 10, "b": 10}), report({"a": 10.5, "b": 13}), threshold=10)
+
+        assert regressions == ["b"]
+
+    def test_run_writes_json_results(self, tmp_path, monkeypatch):
+        """Test an end-to-end smoke run against mongomock"""
+        output = tmp_path / "result.json"
+        # The runner repoints the shared connection; restore it afterwards
+        for attr in ("client", "db", "users_collection", "students_collection",
+                     "lessons_collection", "payments_collection", "pricing_collection"):
+            monkeypatch.setattr(mongo_db, attr, getattr(mongo_db, attr))
+
+        run.main([
+            "--mongomock", "--teachers", "3", "--students", "10", "--lessons", "50", "--payments", "10",
+            "--requests", "3", "--concurrency", "2",
+            "-s", "dashboard.stats", "-s", "lessons.my_lessons",
+            "--output", str(output),
+        ])
+
+        report = json.loads(output.read_text())
+        assert set(report["scenarios"]) == {"dashboard.stats", "lessons.my_lessons"}
+        for summary in report["scenarios"].values():
+            assert summary["errors"] == 0
+            assert {"p50_ms", "p95_ms", "p99_ms", "throughput_rps"} <= set(summary)
@@ -0,0 +1,66 @@
+"""
+Tests for the high-volume load data generator
+"""
+from datetime import datetime
+from app.models.lesson import Lesson
+from app.models.payment import Payment
+from benchmarks.datagen import DatasetSpec
+from scripts.generate_load_data import (
+    build_lesson_chunk, build_payment_chunk, build_reference, chunk_tasks, main
+)
+
+
+def _reference():
+    generator, reference = build_reference(DatasetSpec(teachers=5, students=30))
+    reference["admin_id"] = generator.users()[0]["_id"]
+    return reference
+
+
+class TestChunkBuilders:
+    """Test raw-dict batch generation"""
+
+    def test_lesson_chunk_matches_model_shape(self):
+        """Test that raw lesson dicts look exactly like Lesson.to_dict()"""
+        docs = build_lesson_chunk(_reference(), chunk_index=0, size=200)
+
+        assert len(docs) == 200
+        assert len({doc["_id"] for doc in docs}) == 200
+        for doc in docs[:20]:
+            assert Lesson.from_dict(doc).to_dict() == doc
+            assert len(doc["students"]) == doc["max_students"]
+            assert (doc["lesson_type"] == "individual") == (doc["max_students"] == 1)
+
+    def test_payment_chunk_matches_model_shape(self):
+        """Test that raw payment dicts look exactly like Payment.to_dict()"""
+        docs = build_payment_chunk(_reference(), chunk_index=3, size=50)
+
+        for doc in docs[:10]:
+            assert Payment.from_dict(doc).to_dict() == doc
+            assert doc["payment_date"] >= datetime(2024, 1, 1)
+
+    def test_chunks_are_deterministic_and_distinct(self):
+        """Test that a chunk depends only on its index, not on the worker"""
+        reference = _reference()
+
+        assert build_lesson_chunk(reference, 1, 20) == build_lesson_chunk(_reference(), 1, 20)
+        assert build_lesson_chunk(reference, 1, 20) != build_lesson_chunk(reference, 2, 20)
+
+
+class TestLoadPlan:
+    """Test chunking and the dry-run CLI"""
+
+    def test_chunk_tasks_cover_total(self):
+        """Test that chunks add up to the requested volume"""
+        tasks = chunk_tasks("lessons", 25_001, 10_000)
+
+        assert [size for _, _, size in tasks] == [10_000, 10_000, 5_001]
+        assert [index for _, index, _ in tasks] == [0, 1, 2]
+
+    def test_dry_run_generates_without_database(self):
+        """Test the process-pool path end to end without MongoDB"""
+        totals = main([
+            "--dry-run", "--teachers", "3", "--students", "20",
+            "--lessons", "2500", "--payments", "700", "--chunk-size", "1000", "--workers", "2",
+        ])
+
+        assert totals == {"lessons": 2500, "payments": 700}
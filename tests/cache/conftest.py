@@ -0,0 +1,63 @@
+"""
+Fixtures for cache tests
+"""
+import threading
+import time
+import pytest
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis.Redis calls the cache makes
+    (get, set with px, delete, incr)
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.fail = False
+        self.calls = []
+
+    def _check(self, name):
+        self.calls.append(name)
+        if self.fail:
+            raise ConnectionError("redis down")
+
+    def get(self, key):
+        self._check("get")
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, px=None):
+        self._check("set")
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def delete(self, *keys):
+        self._check("delete")
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def incr(self, key):
+        self._check("incr")
+        with self._lock:
+            value, expires_at = self._data.get(key, (b"0", None))
+            value = int(value) + 1
+            self._data[key] = (str(value).encode(), expires_at)
+            return value
+
+    def keys(self):
+        return list(self._data)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
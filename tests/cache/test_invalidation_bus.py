@@ -0,0 +1,195 @@
+"""
+Tests for the cross-worker cache invalidation bus
+"""
+import threading
+import pytest
+from datetime import datetime
+from pymongo.errors import OperationFailure
+from app.core import invalidation
+from app.core.autocomplete import StudentNameIndex
+from app.core.cache_versions import bump_version, get_version
+from app.core.invalidation import InvalidationBus, InvalidationEvent, invalidation_bus
+from app.models.lesson import Lesson, LessonType, EducationLevel
+from app.models.student import Student
+
+
+@pytest.fixture
+def received():
+    """Events the global bus delivers for 'lessons' during the test"""
+    events = []
+    invalidation_bus.subscribe("lessons", events.append)
+    yield events
+    invalidation_bus.unsubscribe("lessons", events.append)
+
+
+class FakeStream:
+    """Change stream yielding the given changes, then stopping the bus"""
+
+    def __init__(self, bus, changes):
+        self._bus = bus
+        self._changes = list(changes)
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        if not self._changes:
+            self._bus._stop.set()
+            return None
+        self.resume_token = {"_data": str(len(self._changes))}
+        return self._changes.pop(0)
+
+
+class FakeDatabase:
+    def __init__(self, bus, changes=None, error=None):
+        self._bus = bus
+        self._changes = changes or []
+        self._error = error
+        self.watch_calls = []
+
+    def watch(self, pipeline, **kwargs):
+        self.watch_calls.append(pipeline)
+        if self._error:
+            raise self._error
+        return FakeStream(self._bus, self._changes)
+
+
+class TestWrites:
+    """Test that model writes reach the bus"""
+
+    def test_model_write_publishes_local_event_and_bumps_version(self, mock_db, received):
+        """Test Lesson.save: local event with the id, version counter for other workers"""
+        lesson = Lesson(teacher_id="t1", teacher_name="T", subject="Math", education_level=EducationLevel.MIDDLE,
+                        lesson_type=LessonType.INDIVIDUAL, scheduled_date=datetime(2025, 1, 1), duration_minutes=60)
+
+        lesson.save(mock_db["lessons"])
+        lesson.update_in_db(mock_db["lessons"], {"duration_minutes": 90})
+
+        assert [(e.operation, e.document_id, e.source) for e in received] == [
+            ("insert", lesson._id, "local"), ("update", lesson._id, "local")
+        ]
+        assert get_version(mock_db["lessons"]) == 2
+
+    def test_no_version_bump_when_change_streams_carry_events(self, mock_db, received, monkeypatch):
+        """Test that writers skip the counter when every worker tails a change stream"""
+        monkeypatch.setattr(invalidation_bus, "mode", invalidation.MODE_CHANGE_STREAM)
+        lesson = Lesson(teacher_id="t1", teacher_name="T", subject="Math", education_level=EducationLevel.MIDDLE,
+                        lesson_type=LessonType.INDIVIDUAL, scheduled_date=datetime(2025, 1, 1), duration_minutes=60)
+
+        lesson.save(mock_db["lessons"])
+
+        assert len(received) == 1
+        assert get_version(mock_db["lessons"]) == 0
+
+    def test_failing_handler_does_not_break_delivery(self):
+        """Test that one broken cache can't stop the others"""
+        bus = InvalidationBus()
+        seen = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe("pricing", broken)
+        bus.subscribe("pricing", seen.append)
+        bus.publish(InvalidationEvent("pricing", "update", "p1", "poll"))
+
+        assert len(seen) == 1
+
+
+class TestPolling:
+    """Test the version-poll fallback"""
+
+    def test_reports_foreign_changes_only(self, mock_db):
+        """Test that other workers' bumps become events and our own don't"""
+        bus = InvalidationBus(poll_interval_seconds=60)
+        events = []
+        bus.subscribe("lessons", events.append)
+        bus._db = mock_db["db"]
+        bus.poll_once()
+
+        bus.note_write(mock_db["lessons"], "mine")
+        bus.poll_once()
+        assert [(e.operation, e.source) for e in events] == [("update", "local")]
+
+        bump_version(mock_db["lessons"])  # another worker
+        bus.poll_once()
+        assert events[-1] == InvalidationEvent("lessons", "changed", None, "poll")
+
+
+class TestChangeStream:
+    """Test change stream tailing"""
+
+    def test_changes_become_typed_events(self):
+        """Test that each change is published per document"""
+        bus = InvalidationBus()
+        events = []
+        bus.subscribe("pricing", events.append)
+        bus._db = FakeDatabase(bus, [
+            {"operationType": "replace", "ns": {"db": "x", "coll": "pricing"}, "documentKey": {"_id": "p1"}},
+            {"operationType": "delete", "ns": {"db": "x", "coll": "pricing"}, "documentKey": {"_id": "p2"}},
+        ])
+
+        bus._run_change_stream()
+
+        assert events == [
+            InvalidationEvent("pricing", "update", "p1", "change_stream"),
+            InvalidationEvent("pricing", "delete", "p2", "change_stream"),
+        ]
+        match = bus._db.watch_calls[0][0]["$match"]
+        assert set(match["ns.coll"]["$in"]) == {"users", "students", "pricing", "lessons", "payments"}
+
+    def test_falls_back_to_polling_on_standalone(self, mock_db, monkeypatch):
+        """Test that a server without change streams switches the bus to polling"""
+        bus = InvalidationBus(poll_interval_seconds=60)
+        bus._db = FakeDatabase(bus, error=OperationFailure("replica sets only", code=40573))
+        polled = threading.Event()
+        monkeypatch.setattr(bus, "poll_once", polled.set)
+        monkeypatch.setattr(bus, "_run_polling", lambda: None)
+
+        bus._run_change_stream()
+
+        assert bus.mode == invalidation.MODE_POLLING
+        assert polled.is_set()
+
+
+class TestWorkerProcess:
+    """Test that Celery worker processes run the bus like the API does"""
+
+    def test_process_hooks_start_and_stop_the_bus(self, monkeypatch):
+        from app import db, worker
+        calls = []
+        monkeypatch.setattr(db, "connect_to_mongo", lambda: calls.append("connect"))
+        monkeypatch.setattr(db, "close_mongo_connection", lambda: calls.append("close"))
+        monkeypatch.setattr(invalidation_bus, "start", lambda database, mode: calls.append(("start", mode)))
+        monkeypatch.setattr(invalidation_bus, "stop", lambda: calls.append("stop"))
+        monkeypatch.setattr(worker.config, "INVALIDATION_BUS_ENABLED", True)
+        monkeypatch.setattr(worker.config, "INVALIDATION_MODE", "polling")
+
+        worker._connect_worker_to_mongo()
+        worker._disconnect_worker_from_mongo()
+
+        assert calls == ["connect", ("start", "polling"), "stop", "close"]
+
+
+class TestAutocompleteSubscriber:
+    """Test that the student name index follows bus events"""
+
+    def test_other_workers_student_is_indexed_from_event(self, mock_db):
+        """Test per-document refresh without a full rebuild"""
+        index = StudentNameIndex(refresh_interval_seconds=60)
+        assert index.search("zed", mock_db["students"]) == []
+
+        # Written by another worker: present in Mongo, but no local call
+        student = Student(full_name="Zed Newcomer")
+        mock_db["students"].insert_one(student.to_dict())
+        index.handle_invalidation(InvalidationEvent("students", "insert", student._id, "change_stream"))
+
+        assert [s["full_name"] for s in index.search("zed", mock_db["students"])] == ["Zed Newcomer"]
+
+        mock_db["students"].update_one({"_id": student._id}, {"$set": {"is_active": False}})
+        index.handle_invalidation(InvalidationEvent("students", "update", student._id, "change_stream"))
+        assert index.search("zed", mock_db["students"]) == []
@@ -0,0 +1,219 @@
+"""
+Tests for the two-tier (L1 LRU + Redis L2) cache
+"""
+import threading
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from app.core.cache import MISSING, JsonSerializer, TwoTierCache, get_serializer
+from app.core.invalidation import InvalidationEvent
+from app.core.pricing import find_subject_prices
+from app.core.security import create_access_token
+from app.models.payment import Payment
+from app.models.pricing import Pricing, EducationLevel
+
+
+class TestTiers:
+    """Test L1/L2 behaviour"""
+
+    def test_other_worker_reads_value_from_l2(self, fake_redis):
+        """Test that a value computed in one worker is served to another without recomputing"""
+        worker_a = TwoTierCache("t_shared", l2=fake_redis)
+        worker_b = TwoTierCache("t_shared", l2=fake_redis)
+        value = {"when": datetime(2025, 3, 1, 9, 30), "total": 12.5, "names": ["a", "b"]}
+
+        assert worker_a.get_or_compute("k", lambda: value) == value
+        computed = []
+        assert worker_b.get_or_compute("k", lambda: computed.append(1)) == value
+        assert computed == []
+        assert fake_redis.keys() == ["cache:t_shared:0:k"]
+
+    def test_l1_lru_evicts_oldest(self):
+        """Test the L1 size bound"""
+        cache = TwoTierCache("t_lru", l1_max_entries=2, l2=None)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    def test_entries_expire(self, fake_redis):
+        """Test the TTL in both tiers"""
+        cache = TwoTierCache("t_ttl", ttl_seconds=0.05, l2=fake_redis)
+        cache.set("k", "v")
+        time.sleep(0.08)
+
+        assert cache.get("k") is MISSING
+
+    def test_redis_errors_fall_back_to_l1(self, fake_redis):
+        """Test that an unreachable L2 never fails a lookup and is skipped afterwards"""
+        cache = TwoTierCache("t_down", l2=fake_redis)
+        fake_redis.fail = True
+
+        assert cache.get_or_compute("k", lambda: 7) == 7
+        calls = len(fake_redis.calls)
+        assert cache.get_or_compute("k", lambda: 8) == 7
+        assert len(fake_redis.calls) == calls
+
+    def test_serializers_round_trip(self):
+        """Test datetimes survive JSON and msgpack encoding"""
+        value = {"at": datetime(2025, 1, 2, 3, 4, 5), "n": [1, 2.5, None]}
+        assert JsonSerializer().loads(JsonSerializer().dumps(value)) == value
+
+        pytest.importorskip("msgpack")
+        msgpack = get_serializer("msgpack")
+        assert msgpack.loads(msgpack.dumps(value)) == value
+
+    def test_unknown_serializer(self):
+        with pytest.raises(ValueError):
+            get_serializer("pickle")
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent misses"""
+
+    def test_concurrent_misses_compute_once(self):
+        """Test 20 simultaneous misses share one computation"""
+        cache = TwoTierCache("t_flight", l2=None)
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return {"answer": 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(2)
+
+        assert calls == [1]
+        assert results == [{"answer": 42}] * 20
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self):
+        """Test a failed computation is retried on the next call"""
+        cache = TwoTierCache("t_error", l2=None)
+
+        def broken():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", broken)
+        assert cache.get_or_compute("k", lambda: "ok") == "ok"
+
+
+class TestInvalidation:
+    """Test clearing on invalidation events"""
+
+    def test_local_write_clears_shared_tier_remote_write_only_l1(self, fake_redis):
+        cache = TwoTierCache("t_inval", l2=fake_redis)
+        other_worker = TwoTierCache("t_inval", l2=fake_redis)
+        cache.set("k", 1)
+
+        cache.handle_invalidation(InvalidationEvent("lessons", "update", "x", "poll"))
+        assert cache.l1.get("cache:t_inval:k") is MISSING
+        assert other_worker.get("k") == 1
+
+        cache.handle_invalidation(InvalidationEvent("lessons", "update", "x", "local"))
+        other_worker.clear(shared=False)
+        assert other_worker.get("k") is MISSING
+        assert "scan_iter" not in fake_redis.calls
+
+    def test_fill_overlapping_a_write_is_not_served(self, fake_redis):
+        """Test that a value computed before another worker's write never reaches later readers"""
+        filling_worker = TwoTierCache("t_race", l2=fake_redis)
+        writing_worker = TwoTierCache("t_race", l2=fake_redis)
+
+        def compute_then_write_elsewhere():
+            # The read happened; the write and its invalidation land before the fill is stored
+            writing_worker.handle_invalidation(InvalidationEvent("lessons", "update", "x", "local"))
+            filling_worker.handle_invalidation(InvalidationEvent("lessons", "update", "x", "poll"))
+            return "stale"
+
+        assert filling_worker.get_or_compute("k", compute_then_write_elsewhere) == "stale"
+
+        assert filling_worker.get_or_compute("k", lambda: "fresh") == "fresh"
+        assert writing_worker.get_or_compute("k", lambda: "fresh again") == "fresh"
+
+
+class TestPricingNegativeCache:
+    """Test cached pricing lookups"""
+
+    def test_missing_subject_is_looked_up_once(self, mock_db):
+        """Test that an unpriced subject doesn't query MongoDB for every lesson"""
+        pricing = MagicMock(wraps=mock_db["pricing"])
+
+        for _ in range(5):
+            assert find_subject_prices("Astronomy", "middle", pricing) is None
+
+        # One miss = exact + any-level query, then served from the negative cache
+        assert pricing.find_one.call_count == 2
+
+    def test_pricing_write_clears_cache(self, mock_db):
+        """Test that creating the missing pricing is picked up immediately"""
+        assert find_subject_prices("Astronomy", "middle", mock_db["pricing"]) is None
+
+        Pricing(subject="Astronomy", education_level=EducationLevel.MIDDLE,
+                individual_price=60.0, group_price=35.0).save(mock_db["pricing"])
+
+        assert find_subject_prices("astronomy", "middle", mock_db["pricing"]) == {"individual": 60.0, "group": 35.0}
+
+
+class TestDashboardStatsCache:
+    """Test /dashboard/stats caching"""
+
+    def test_concurrent_admins_trigger_one_computation(self, client, mock_db, admin_user):
+        token = create_access_token({"sub": admin_user._id, "username": admin_user.username, "role": admin_user.role})
+        headers = {"Authorization": f"Bearer {token}"}
+        calls = []
+
+        with patch("app.api.v1.endpoints.dashboard.mongo_db") as mock_mongo, \
+             patch("app.api.deps.mongo_db") as mock_deps:
+            mock_deps.users_collection = mock_db["users"]
+            mock_mongo.analytics_db = None
+            mock_mongo.users_collection = mock_db["users"]
+            mock_mongo.students_collection = mock_db["students"]
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            mock_mongo.payments_collection = mock_db["payments"]
+            mock_mongo.pricing_collection = mock_db["pricing"]
+
+            from app.api.v1.endpoints import dashboard
+            build = dashboard._build_dashboard_stats
+
+            def slow_build(month, year):
+                calls.append((month, year))
+                time.sleep(0.1)
+                return build(month, year)
+
+            with patch.object(dashboard, "_build_dashboard_stats", slow_build):
+                responses = []
+                threads = [
+                    threading.Thread(target=lambda: responses.append(client.get("/api/v1/dashboard/stats", headers=headers)))
+                    for _ in range(20)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join(5)
+
+                assert calls == [(None, None)]
+                assert {response.status_code for response in responses} == {200}
+                assert responses[0].json()["users"]["total_admins"] == 1
+
+                # A write through a model clears the cache
+                Payment(student_name="Sara", amount=120.0, payment_date=datetime(2025, 1, 5),
+                        created_by=admin_user._id).save(mock_db["payments"])
+                response = client.get("/api/v1/dashboard/stats", headers=headers)
+                assert response.json()["payments"] == {"total_payments": 1, "total_revenue": 120.0}
+                assert len(calls) == 2
@@ -1,6 +1,11 @@
 """
 Pytest configuration and shared fixtures
 """
+import os
+
+# Background jobs run in-process during tests (read when app.worker is imported)
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "True")
+
 import pytest
 from fastapi.testclient import TestClient
 from mongomock import MongoClient as MockMongoClient
@@ -9,6 +14,16 @@ from app.main import app
 from app.db import mongo_db
 from app.models.user import User, UserRole, UserStatus
 from app.core.security import get_password_hash
+from app.core.cache import clear_all_caches
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """
+    Start every test with empty application caches
+    """
+    clear_all_caches()
+    yield
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1,82 @@
+"""
+Tests for routing dashboard reads through the analytics client
+"""
+import mongomock
+from datetime import datetime
+from unittest.mock import patch
+from app.core.config import Config
+from app.core.security import get_password_hash, create_access_token
+from app.db import analytics
+from app.db.mongodb import MongoDatabase, mongo_db as global_mongo_db
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+class TestAnalyticsClientOptions:
+    """Test the analytics client configuration"""
+
+    def test_secondary_reads_with_staleness_and_compression(self):
+        """Test read preference, bounded staleness and compressors"""
+        options = Config.get_analytics_client_options()
+
+        assert options["readPreference"] == "secondaryPreferred"
+        assert options["maxStalenessSeconds"] == 120
+        assert options["compressors"] == "zstd,snappy,zlib"
+
+    def test_primary_drops_max_staleness(self):
+        """Test that maxStalenessSeconds is omitted for primary reads (the driver rejects it)"""
+        with patch.object(Config, "ANALYTICS_READ_PREFERENCE", "primary"):
+            options = Config.get_analytics_client_options()
+
+        assert "maxStalenessSeconds" not in options
+
+    def test_connect_analytics_builds_separate_client(self):
+        """Test that the analytics client gets its own options and can be disabled"""
+        database = MongoDatabase()
+        with patch('app.db.mongodb.MongoClient') as mock_client:
+            database.connect_analytics()
+        assert mock_client.call_args.kwargs["readPreference"] == "secondaryPreferred"
+        assert database.analytics_db is not None
+
+        disabled = MongoDatabase()
+        with patch.object(Config, "ANALYTICS_CLIENT_ENABLED", False), \
+             patch('app.db.mongodb.MongoClient') as mock_client:
+            disabled.connect_analytics()
+        mock_client.assert_not_called()
+        assert disabled.analytics_db is None
+
+
+class TestAnalyticsRouting:
+    """Test that dashboard endpoints read from the analytics database"""
+
+    def test_falls_back_to_primary_collection(self, mock_db):
+        """Test that without an analytics client the primary collection is used"""
+        assert analytics(mock_db["lessons"]) is mock_db["lessons"]
+
+    def test_dashboard_reads_go_to_analytics_db(self, client, mock_db):
+        """Test that /dashboard/stats/lessons counts lessons from the analytics database"""
+        admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                     role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        mock_db["users"].insert_one(admin.to_dict())
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+
+        # Primary has no lessons; the (stand-in) secondary has two
+        analytics_db = mongomock.MongoClient().db
+        for _ in range(2):
+            analytics_db["lessons"].insert_one(Lesson(
+                teacher_id="t1", teacher_name="Teacher", subject="Math",
+                education_level=EducationLevel.MIDDLE, lesson_type=LessonType.INDIVIDUAL,
+                scheduled_date=datetime(2025, 1, 10), duration_minutes=60, status=LessonStatus.COMPLETED
+            ).to_dict())
+
+        with patch('app.api.v1.endpoints.dashboard.mongo_db') as mock_dashboard_db, \
+             patch('app.api.deps.mongo_db') as mock_deps, \
+             patch.object(global_mongo_db, "analytics_db", analytics_db):
+            mock_dashboard_db.lessons_collection = mock_db["lessons"]
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/dashboard/stats/lessons",
+                                  headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        assert response.json()["by_type"]["total_lessons"] == 2
@@ -0,0 +1,208 @@
+"""
+Tests for archiving old lessons and payments
+"""
+import gzip
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from bson import json_util
+from app.core import archive
+from app.core.config import config
+from app.core.payroll import earnings_buckets, lessons_fingerprint
+from app.core.security import get_password_hash, create_access_token
+from app.core.stats import lesson_breakdown, payment_totals
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.payment import Payment
+from app.models.user import User, UserRole, UserStatus
+
+
+def make_lesson(scheduled_date, minutes=60, teacher_id="t1"):
+    return Lesson(
+        teacher_id=teacher_id, teacher_name="T", subject="Math", education_level=EducationLevel.MIDDLE,
+        lesson_type=LessonType.INDIVIDUAL, scheduled_date=scheduled_date, duration_minutes=minutes,
+        students=[{"student_name": "S"}], status=LessonStatus.COMPLETED,
+    )
+
+
+@pytest.fixture
+def archive_env(mock_db, tmp_path):
+    """Lessons and payments in Jan 2023, Feb 2023 and Jun 2025; exports go to tmp_path"""
+    for day in (datetime(2023, 1, 10), datetime(2023, 1, 20), datetime(2023, 2, 5), datetime(2025, 6, 1)):
+        mock_db["lessons"].insert_one(make_lesson(day).to_dict())
+        mock_db["payments"].insert_one(Payment(student_name="S", amount=100.0, payment_date=day, created_by="admin").to_dict())
+    db = SimpleNamespace(
+        db=mock_db["db"],
+        lessons_collection=mock_db["lessons"],
+        payments_collection=mock_db["payments"],
+        users_collection=mock_db["users"],
+        pricing_collection=mock_db["pricing"],
+        payroll_snapshots_collection=mock_db["db"]["payroll_snapshots"],
+    )
+    with patch.object(config, "ARCHIVE_EXPORT_DIR", str(tmp_path)), patch.object(config, "ARCHIVE_AFTER_MONTHS", 24):
+        yield db
+
+
+class TestArchiveJob:
+    """Test moving months to the archive"""
+
+    def test_moves_old_months_oldest_first(self, archive_env):
+        result = archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        assert result["horizon"] == datetime(2023, 7, 1)
+        assert [(row["year"], row["month"], row["documents"]) for row in result["lessons"]] == [(2023, 1, 2), (2023, 2, 1)]
+        assert archive_env.lessons_collection.count_documents({}) == 1
+        assert archive_env.db["lessons_archive"].count_documents({}) == 3
+        assert archive_env.db["payments_archive"].count_documents({}) == 3
+        assert archive.archived_before(archive_env.lessons_collection) == datetime(2023, 3, 1)
+
+    def test_finalizes_month_before_moving(self, archive_env):
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        snapshot = archive_env.payroll_snapshots_collection.find_one({"year": 2023, "month": 1})
+        assert snapshot is not None and snapshot["lessons_count"] == 2
+        assert archive_env.db["lesson_daily_buckets"].count_documents({"_id": "t1|2023-01-10"}) == 1
+
+    def test_exports_ndjson(self, archive_env):
+        result = archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        path = result["payments"][0]["export_path"]
+        assert path.endswith("payments/2023-01.ndjson.gz")
+        with gzip.open(path, "rt") as handle:
+            documents = [json_util.loads(line) for line in handle]
+        assert sorted(doc["payment_date"] for doc in documents) == [datetime(2023, 1, 10), datetime(2023, 1, 20)]
+
+    def test_exports_parquet(self, archive_env):
+        pq = pytest.importorskip("pyarrow.parquet")
+        result = archive.run_archive(archive_env, now=datetime(2025, 7, 15), export_format="parquet")
+
+        path = result["lessons"][1]["export_path"]
+        assert path.endswith("lessons/2023-02.parquet")
+        assert pq.read_table(path).num_rows == 1
+
+    def test_second_run_is_a_no_op(self, archive_env):
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+        result = archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        assert result["lessons"] == [] and result["payments"] == []
+        assert len(archive.archive_status(archive_env.db)["lessons"]["months"]) == 2
+
+
+class TestArchiveReads:
+    """Test that reads include the archive only when their range reaches it"""
+
+    def test_sources_follow_the_range(self, archive_env):
+        lessons = archive_env.lessons_collection
+        assert archive.sources(lessons, {}) == [lessons]
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        recent = {"scheduled_date": {"$gte": datetime(2025, 6, 1), "$lt": datetime(2025, 7, 1)}}
+        old = {"scheduled_date": {"$gte": datetime(2023, 1, 1), "$lt": datetime(2023, 2, 1)}}
+        assert archive.sources(lessons, recent) == [lessons]
+        assert len(archive.sources(lessons, old)) == 2
+        assert len(archive.sources(lessons, {"teacher_id": "t1"})) == 2
+
+    def test_totals_unchanged_by_archiving(self, archive_env):
+        lessons, payments = archive_env.lessons_collection, archive_env.payments_collection
+        before = (lesson_breakdown(lessons), payment_totals(payments), lessons_fingerprint(lessons, 2023, 1),
+                  earnings_buckets(lessons, 2023, 1))
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        after = (lesson_breakdown(lessons), payment_totals(payments), lessons_fingerprint(lessons, 2023, 1),
+                 earnings_buckets(lessons, 2023, 1))
+        assert after == before
+        assert payment_totals(payments)["total_amount"] == 400.0
+
+    def test_find_by_month_reads_archive(self, archive_env):
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        january = Payment.find_by_month(1, 2023, archive_env.payments_collection)
+        assert [payment.payment_date for payment in january] == [datetime(2023, 1, 20), datetime(2023, 1, 10)]
+
+    def test_find_by_student_name_reads_archive(self, archive_env):
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        payments = Payment.find_by_student_name("S", archive_env.payments_collection)
+        assert len(payments) == 4
+        assert Payment.calculate_total(payments) == 400.0
+
+
+class TestArchiveRoutes:
+    """Test the admin archive endpoints"""
+
+    def test_status_and_run(self, archive_env, client):
+        admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                     role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        archive_env.users_collection.insert_one(admin.to_dict())
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with patch("app.api.v1.endpoints.archive.mongo_db", archive_env), \
+             patch("app.api.deps.mongo_db", archive_env), \
+             patch("app.db.mongo_db", archive_env):
+            run = client.post("/api/v1/admin/archive/run", headers=headers)
+            status_response = client.get("/api/v1/admin/archive", headers=headers)
+
+        assert run.status_code == 202
+        lessons = status_response.json()["collections"]["lessons"]
+        assert lessons["archive_collection"] == "lessons_archive"
+        assert [month["month"] for month in lessons["months"]] == [1, 2]
+
+    def test_lesson_lists_include_archived_lessons(self, archive_env, client):
+        """Test that teacher and admin lesson lists page across hot and archived lessons, newest first"""
+        admin = User(username="admin", hashed_password="x", role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        teacher = User(username="teacher", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE, _id="t1")
+        archive_env.users_collection.insert_many([admin.to_dict(), teacher.to_dict()])
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+
+        def headers(user):
+            token = create_access_token({"sub": user._id, "username": user.username, "role": user.role.value})
+            return {"Authorization": f"Bearer {token}"}
+
+        with patch("app.api.v1.endpoints.lessons.mongo_db", archive_env), \
+             patch("app.api.deps.mongo_db", archive_env):
+            totals = client.get("/api/v1/lessons/my-lessons?count_only=true", headers=headers(teacher)).json()
+            page = client.get("/api/v1/lessons/my-lessons?skip=1&limit=2&fields=id,scheduled_date",
+                              headers=headers(teacher)).json()
+            january = client.get("/api/v1/lessons/admin/all?month=1&year=2023", headers=headers(admin)).json()
+
+        assert (totals["total_lessons"], totals["total_hours"]) == (4, 4.0)
+        assert [lesson["scheduled_date"][:10] for lesson in page["lessons"]] == ["2023-02-05", "2023-01-20"]
+        assert january["total_lessons"] == 2
+
+    def test_dashboard_reports_cover_archived_month(self, archive_env, client):
+        """Test that dashboard endpoints filtered to an archived month still see its lessons and payments"""
+        admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                     role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        teacher = User(username="teacher", hashed_password="x", role=UserRole.TEACHER, _id="t1")
+        archive_env.users_collection.insert_many([admin.to_dict(), teacher.to_dict()])
+        archive_env.students_collection = archive_env.db["students"]
+        archive_env.students_collection.insert_one({"_id": "s1", "full_name": "S", "is_active": True,
+                                                    "education_level": "middle"})
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+        headers = {"Authorization": f"Bearer {token}"}
+        archive.run_archive(archive_env, now=datetime(2025, 7, 15))
+        january = "month=1&year=2023"
+
+        with patch("app.api.v1.endpoints.dashboard.mongo_db", archive_env), \
+             patch("app.api.deps.mongo_db", archive_env):
+            def get(path):
+                response = client.get(f"/api/v1/dashboard/{path}", headers=headers)
+                assert response.status_code == 200
+                return response.json()
+
+            earnings = get(f"teacher-earnings/t1?{january}")
+            payment_status = get(f"students/payment-status?{january}")["students"][0]
+            teachers = get(f"stats/teachers?{january}")["teachers"][0]
+            students = get("stats/students")["students"][0]
+            hours = get(f"student-hours/S?{january}")
+            teachers_detailed = get(f"stats/teachers-detailed?{january}&lesson_status=completed")["teachers"][0]
+            students_detailed = get(f"stats/students-detailed?{january}")["students"][0]
+
+        assert (earnings["total_lessons"], earnings["total_hours"]) == (2, 2.0)
+        assert (payment_status["lessons_count"], payment_status["total_paid"]) == (2, 200.0)
+        assert teachers["total_lessons"] == 2
+        assert (students["total_payments"], students["total_paid"]) == (4, 400.0)
+        assert hours["total_lessons"] == 2
+        assert teachers_detailed["total_individual_hours"] == 2.0
+        assert students_detailed["total_hours"] == 2.0
@@ -0,0 +1,176 @@
+"""
+Tests for columnar group-by/pivot reports and Parquet/Arrow exports
+"""
+import io
+import time
+import numpy as np
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.core import columnar
+from app.core.pricing import PricingTable
+from app.core.security import get_password_hash, create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.pricing import Pricing, EducationLevel as PricingLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+def make_lesson(teacher, subject, level, lesson_type, day, minutes, lesson_status=LessonStatus.COMPLETED):
+    return Lesson(
+        teacher_id=teacher, teacher_name=teacher.title(), subject=subject, education_level=level,
+        lesson_type=lesson_type, scheduled_date=day, duration_minutes=minutes, status=lesson_status,
+    )
+
+
+@pytest.fixture
+def columnar_env(mock_db):
+    """Admin, Math pricing and five lessons in Jan-Feb 2025 (one cancelled), all mongo_db patched"""
+    db = mock_db["db"]
+    admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                 role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+    db["users"].insert_one(admin.to_dict())
+    db["pricing"].insert_one(Pricing("Math", PricingLevel.MIDDLE, 60.0, 30.0).to_dict())
+    lessons = [
+        make_lesson("alice", "Math", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, datetime(2025, 1, 5), 60),
+        make_lesson("alice", "Math", EducationLevel.MIDDLE, LessonType.GROUP, datetime(2025, 1, 6), 120),
+        make_lesson("alice", "Physics", EducationLevel.SECONDARY, LessonType.INDIVIDUAL, datetime(2025, 2, 1), 30),
+        make_lesson("bob", "Math", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, datetime(2025, 2, 2), 90),
+        make_lesson("bob", "Math", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, datetime(2025, 2, 3), 60,
+                    LessonStatus.CANCELLED),
+    ]
+    db["lessons"].insert_many([lesson.to_dict() for lesson in lessons])
+    token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+
+    with patch("app.api.v1.endpoints.analytics.mongo_db") as mock_mongo, \
+         patch("app.api.deps.mongo_db") as mock_deps:
+        for target in (mock_mongo, mock_deps):
+            target.users_collection = db["users"]
+            target.lessons_collection = db["lessons"]
+            target.payments_collection = db["payments"]
+            target.pricing_collection = db["pricing"]
+        yield {"db": db, "headers": {"Authorization": f"Bearer {token}"}}
+
+
+def load_lessons(db):
+    return columnar.load_columns(
+        db["lessons"], columnar.LESSONS, datetime(2025, 1, 1), datetime(2025, 3, 1),
+        {"status": {"$in": ["pending", "approved", "completed"]}}, batch_size=2,
+    )
+
+
+class TestColumnarKernels:
+    """Test loading, group-by, pivot and costs"""
+
+    def test_load_columns_applies_filter_and_defaults(self, columnar_env):
+        columns = load_lessons(columnar_env["db"])
+
+        assert len(columns["_id"]) == 4
+        assert columns["duration_minutes"].dtype == np.float64
+        assert columns["scheduled_date"].dtype == np.dtype("datetime64[ms]")
+        assert sorted(columnar.month_labels(columns["scheduled_date"])) == ["2025-01", "2025-01", "2025-02", "2025-02"]
+
+    def test_costs_match_pricing_table(self, columnar_env):
+        columns = load_lessons(columnar_env["db"])
+        table = PricingTable.load(columnar_env["db"]["pricing"])
+
+        expected = [
+            minutes / 60 * table.price(subject, level, lesson_type)
+            for subject, level, lesson_type, minutes in zip(
+                columns["subject"], columns["education_level"], columns["lesson_type"], columns["duration_minutes"]
+            )
+        ]
+        assert columnar.lesson_costs(columns, table).tolist() == pytest.approx(expected)
+
+    def test_group_by_sums_measures(self, columnar_env):
+        columns = load_lessons(columnar_env["db"])
+        measures = {
+            "lessons": columnar.measure(columns, columnar.LESSONS, "lessons"),
+            "hours": columnar.measure(columns, columnar.LESSONS, "hours"),
+        }
+
+        rows = columnar.group_by(columns, columnar.LESSONS, ["teacher_id", "month"], measures)
+        assert rows == [
+            {"teacher_id": "alice", "month": "2025-01", "lessons": 2.0, "hours": 3.0},
+            {"teacher_id": "alice", "month": "2025-02", "lessons": 1.0, "hours": 0.5},
+            {"teacher_id": "bob", "month": "2025-02", "lessons": 1.0, "hours": 1.5},
+        ]
+
+    def test_pivot_matches_naive_loop(self):
+        """Test a random year of lessons against a dict-based pivot, and its speed"""
+        rng = np.random.default_rng(7)
+        size = 50_000
+        start = np.datetime64("2025-01-01T00:00", "ms")
+        columns = {
+            "teacher_name": rng.choice([f"Teacher {n}" for n in range(40)], size).astype(object),
+            "subject": rng.choice(["Math", "Physics", "English", "History"], size).astype(object),
+            "education_level": rng.choice(["elementary", "middle", "secondary"], size).astype(object),
+            "lesson_type": rng.choice(["individual", "group"], size).astype(object),
+            "scheduled_date": start + rng.integers(0, 365 * 86_400_000, size).astype("timedelta64[ms]"),
+            "duration_minutes": rng.choice([30.0, 45.0, 60.0, 90.0], size),
+        }
+        hours = columns["duration_minutes"] / 60
+
+        began = time.perf_counter()
+        table = columnar.pivot(columns, columnar.LESSONS, ["teacher_name", "subject", "education_level"], "lesson_type", hours)
+        elapsed = time.perf_counter() - began
+
+        naive = {}
+        for teacher, subject, level, lesson_type, value in zip(
+            columns["teacher_name"], columns["subject"], columns["education_level"], columns["lesson_type"], hours
+        ):
+            naive[(teacher, subject, level, lesson_type)] = naive.get((teacher, subject, level, lesson_type), 0) + value
+        assert table["columns"] == ["group", "individual"]
+        for row in table["rows"]:
+            key = (row["teacher_name"], row["subject"], row["education_level"])
+            assert row["values"] == [round(naive.get(key + (name,), 0), 2) for name in table["columns"]]
+        assert table["total"] == pytest.approx(hours.sum(), abs=0.05)
+        assert elapsed < 1.0
+
+
+class TestColumnarRoutes:
+    """Test the report, pivot and export endpoints"""
+
+    def test_pivot_cost(self, client, columnar_env):
+        response = client.get(
+            "/api/v1/analytics/pivot/lessons?from=2025-01-01&to=2025-02-28"
+            "&rows=teacher_id,subject&columns=lesson_type&value=cost",
+            headers=columnar_env["headers"],
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["columns"] == ["group", "individual"]
+        alice_math = next(row for row in data["rows"] if row["teacher_id"] == "alice" and row["subject"] == "Math")
+        assert alice_math["values"] == [60.0, 60.0]
+        assert data["total"] == pytest.approx(60.0 + 60.0 + 90.0 + 45.0 * 0.5)
+
+    def test_report_rejects_unknown_dimension(self, client, columnar_env):
+        response = client.get("/api/v1/analytics/report/lessons?group_by=password", headers=columnar_env["headers"])
+
+        assert response.status_code == 400
+
+    def test_report_includes_requested_statuses(self, client, columnar_env):
+        response = client.get(
+            "/api/v1/analytics/report/lessons?group_by=status&from=2025-01-01&to=2025-02-28&status=cancelled",
+            headers=columnar_env["headers"],
+        )
+
+        assert response.json()["rows"] == [{"status": "cancelled", "lessons": 1.0, "hours": 1.0, "cost": 60.0}]
+
+    @pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+    def test_export(self, client, columnar_env, export_format):
+        pa = pytest.importorskip("pyarrow")
+        response = client.get(
+            f"/api/v1/analytics/export/lessons?from=2025-01-01&to=2025-02-28&format={export_format}",
+            headers=columnar_env["headers"],
+        )
+
+        assert response.status_code == 200
+        assert f"lessons_2025-01-01_2025-02-28.{export_format}" in response.headers["content-disposition"]
+        if export_format == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(io.BytesIO(response.content))
+        else:
+            table = pa.ipc.open_file(io.BytesIO(response.content)).read_all()
+        assert table.num_rows == 4
+        assert {"id", "teacher_id", "hours", "cost"} <= set(table.column_names)
@@ -0,0 +1,110 @@
+"""
+Tests for the concurrent dashboard query fan-out
+"""
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.core.concurrency import fan_out
+from app.models.user import User, UserRole, UserStatus
+from app.core.security import get_password_hash, create_access_token
+
+
+class TestFanOut:
+    """Test app.core.concurrency.fan_out"""
+
+    def test_queries_overlap(self):
+        """Test that wall time is close to the slowest query, not the sum"""
+        def slow(value):
+            def run():
+                time.sleep(0.2)
+                return value
+            return run
+
+        started = time.perf_counter()
+        results, timings_ms = fan_out({"a": slow(1), "b": slow(2), "c": slow(3)})
+        elapsed = time.perf_counter() - started
+
+        assert results == {"a": 1, "b": 2, "c": 3}
+        assert elapsed < 0.5
+        assert set(timings_ms) == {"a", "b", "c", "total"}
+        assert all(timings_ms[name] >= 190 for name in ("a", "b", "c"))
+
+    def test_error_is_raised(self):
+        """Test that a failing query fails the whole fan-out"""
+        def broken():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            fan_out({"ok": lambda: 1, "broken": broken})
+
+
+class TestDashboardStatsFanOut:
+    """Test GET /dashboard/stats values and debug timings"""
+
+    def _request(self, client, mock_db, debug):
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(admin.to_dict())
+        mock_db["students"].insert_many([
+            {"full_name": "Student A", "is_active": True},
+            {"full_name": "Student B", "is_active": False},
+        ])
+        mock_db["lessons"].insert_many([
+            {"status": "pending", "lesson_type": "individual", "duration_minutes": 60,
+             "scheduled_date": datetime(2025, 1, 5)},
+            {"status": "completed", "lesson_type": "group", "duration_minutes": 60,
+             "scheduled_date": datetime(2025, 1, 6)},
+        ])
+        mock_db["payments"].insert_one(
+            {"student_name": "Student A", "amount": 99.999, "payment_date": datetime(2025, 1, 7)}
+        )
+
+        token = create_access_token({
+            "sub": admin._id,
+            "username": admin.username,
+            "role": admin.role.value
+        })
+
+        with patch('app.api.v1.endpoints.dashboard.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps, \
+             patch('app.api.v1.endpoints.dashboard.config.DEBUG', debug):
+            mock_mongo.users_collection = mock_db["users"]
+            mock_mongo.students_collection = mock_db["students"]
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            mock_mongo.payments_collection = mock_db["payments"]
+            mock_mongo.pricing_collection = mock_db["pricing"]
+            mock_deps.users_collection = mock_db["users"]
+
+            return client.get(
+                "/api/v1/dashboard/stats",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+
+    def test_values_and_timings_in_debug(self, client, mock_db):
+        """Test that concurrent results are assembled correctly with timings"""
+        response = self._request(client, mock_db, debug=True)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["users"] == {"total_teachers": 0, "total_admins": 1, "total_users": 1}
+        assert data["students"] == {"total_students": 1}
+        assert data["lessons"] == {
+            "total_lessons": 2,
+            "pending_lessons": 1,
+            "completed_lessons": 1,
+            "cancelled_lessons": 0
+        }
+        assert data["payments"] == {"total_payments": 1, "total_revenue": 100.0}
+        assert set(data["timings_ms"]) == {"users", "students", "lessons", "payments", "pricing", "total"}
+
+    def test_no_timings_outside_debug(self, client, mock_db):
+        """Test that timings are not exposed when debug is off"""
+        response = self._request(client, mock_db, debug=False)
+
+        assert response.status_code == 200
+        assert "timings_ms" not in response.json()
@@ -0,0 +1,136 @@
+"""
+Tests for daily lesson buckets and the trends/utilization/growth endpoints
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.core.lesson_timeseries import backfill_daily_buckets, daily_buckets_collection, growth_curve, trend_series
+from app.core.security import get_password_hash, create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+def make_lesson(teacher_id, scheduled_date, minutes=60, lesson_type=LessonType.INDIVIDUAL, status=LessonStatus.PENDING):
+    return Lesson(
+        teacher_id=teacher_id, teacher_name="T", subject="Math", education_level=EducationLevel.MIDDLE,
+        lesson_type=lesson_type, scheduled_date=scheduled_date, duration_minutes=minutes,
+        students=[{"student_name": "S"}], status=status,
+    )
+
+
+def bucket_state(lessons_collection):
+    return sorted(
+        (bucket["_id"], bucket["lessons"], bucket["minutes"], bucket.get("individual_minutes", 0), bucket.get("group_minutes", 0))
+        for bucket in daily_buckets_collection(lessons_collection).find({"lessons": {"$gt": 0}})
+    )
+
+
+class TestDailyBuckets:
+    """Test bucket maintenance"""
+
+    def test_writes_match_backfill(self, mock_db):
+        """Test that incremental deltas equal a full backfill"""
+        lessons = mock_db["lessons"]
+        first = make_lesson("t1", datetime(2025, 1, 6, 10))
+        second = make_lesson("t1", datetime(2025, 1, 6, 15), minutes=90, lesson_type=LessonType.GROUP)
+        cancelled = make_lesson("t2", datetime(2025, 1, 7))
+        for lesson in (first, second, cancelled):
+            lesson.save(lessons)
+        cancelled.delete(lessons)
+        first.update_in_db(lessons, {"scheduled_date": datetime(2025, 1, 8, 9)})
+
+        incremental = bucket_state(lessons)
+        assert incremental == [
+            ("t1|2025-01-06", 1, 90, 0, 90),
+            ("t1|2025-01-08", 1, 60, 60, 0),
+        ]
+        assert backfill_daily_buckets(lessons) == 2
+        assert bucket_state(lessons) == incremental
+
+    def test_backfill_range_keeps_other_days(self, mock_db):
+        lessons = mock_db["lessons"]
+        lessons.insert_one(make_lesson("t1", datetime(2025, 1, 6)).to_dict())
+        lessons.insert_one(make_lesson("t1", datetime(2025, 2, 6)).to_dict())
+        backfill_daily_buckets(lessons, datetime(2025, 2, 1), datetime(2025, 3, 1))
+
+        assert [bucket[0] for bucket in bucket_state(lessons)] == ["t1|2025-02-06"]
+
+
+class TestSeries:
+    """Test trend and growth shaping"""
+
+    def test_weekly_series_zero_fills(self):
+        buckets = [
+            {"teacher_id": "t1", "day": datetime(2025, 1, 7), "lessons": 2, "minutes": 120,
+             "individual_minutes": 120, "group_minutes": 0, "students": 2},
+            {"teacher_id": "t2", "day": datetime(2025, 1, 22), "lessons": 1, "minutes": 30,
+             "individual_minutes": 0, "group_minutes": 30, "students": 4},
+        ]
+        series = trend_series(buckets, datetime(2025, 1, 6), datetime(2025, 1, 27), "week")
+
+        assert [row["period_start"].day for row in series] == [6, 13, 20]
+        assert [row["hours"] for row in series] == [2.0, 0.0, 0.5]
+        assert series[2]["active_teachers"] == 1
+
+        curve = growth_curve(trend_series(buckets, datetime(2025, 1, 1), datetime(2025, 3, 1), "month"))
+        assert [row["cumulative_hours"] for row in curve] == [2.5, 2.5]
+        assert [row["hours_growth_pct"] for row in curve] == [None, -100.0]
+
+
+class TestAnalyticsEndpoints:
+    """Test the /analytics endpoints"""
+
+    @pytest.fixture
+    def env(self, mock_db):
+        admin = User(username="admin", hashed_password=get_password_hash("x"), role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        busy = User(username="busy", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE,
+                    first_name="Busy", last_name="Teacher")
+        idle = User(username="idle", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE)
+        for user in (admin, busy, idle):
+            mock_db["users"].insert_one(user.to_dict())
+        for day in (6, 7, 8):
+            make_lesson(busy._id, datetime(2025, 1, day), minutes=120).save(mock_db["lessons"])
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role})
+
+        with patch("app.api.v1.endpoints.analytics.mongo_db") as mock_mongo, \
+             patch("app.api.deps.mongo_db") as mock_deps:
+            mock_deps.users_collection = mock_db["users"]
+            mock_mongo.users_collection = mock_db["users"]
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            yield {"headers": {"Authorization": f"Bearer {token}"}, "busy": busy, "idle": idle}
+
+    def test_trends(self, client, env):
+        response = client.get("/api/v1/analytics/trends?granularity=month&from=2025-01-01&to=2025-02-28", headers=env["headers"])
+
+        assert response.status_code == 200
+        assert [(row["period_start"][:7], row["hours"]) for row in response.json()["series"]] == [
+            ("2025-01", 6.0), ("2025-02", 0.0)
+        ]
+
+    def test_utilization(self, client, env):
+        response = client.get(
+            "/api/v1/analytics/utilization?from=2025-01-06&to=2025-01-19&capacity_hours_per_week=10",
+            headers=env["headers"]
+        )
+
+        data = response.json()
+        assert [(row["teacher_name"], row["utilization_pct"]) for row in data["teachers"]] == [
+            ("Busy Teacher", 30.0), ("idle", 0.0)
+        ]
+        assert data["overall_utilization_pct"] == 15.0
+
+    def test_growth_and_validation(self, client, env):
+        response = client.get("/api/v1/analytics/growth?granularity=week&from=2025-01-06&to=2025-01-19", headers=env["headers"])
+        assert [row["cumulative_hours"] for row in response.json()["series"]] == [6.0, 6.0]
+
+        assert client.get("/api/v1/analytics/trends?from=2025-02-01&to=2025-01-01", headers=env["headers"]).status_code == 400
+        assert client.get("/api/v1/analytics/trends?granularity=day", headers=env["headers"]).status_code == 422
+
+    def test_backfill_runs_job(self, client, env, mock_db):
+        daily_buckets_collection(mock_db["lessons"]).delete_many({})
+        with patch("app.db.mongo_db") as worker_mongo:
+            worker_mongo.lessons_collection = mock_db["lessons"]
+            response = client.post("/api/v1/analytics/backfill?from=2025-01-01&to=2025-01-31", headers=env["headers"])
+
+        assert response.status_code == 202
+        assert len(bucket_state(mock_db["lessons"])) == 3
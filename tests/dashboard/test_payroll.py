@@ -0,0 +1,166 @@
+"""
+Tests for the month-end payroll snapshot
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.core.pricing import DEFAULT_GROUP_PRICE, PricingTable, get_subject_price
+from app.core.pricing_kernel import PriceKernel, load_price_kernel
+from app.core.security import get_password_hash, create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.pricing import Pricing, EducationLevel as PricingLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+def _lesson(teacher, subject, level, lesson_type, day, minutes, lesson_status=LessonStatus.COMPLETED):
+    return Lesson(
+        teacher_id=teacher._id, teacher_name=teacher.get_full_name(), subject=subject,
+        education_level=level, lesson_type=lesson_type, scheduled_date=datetime(2025, 3, day),
+        duration_minutes=minutes, status=lesson_status
+    )
+
+
+@pytest.fixture
+def payroll_env(mock_db):
+    """Admin, two teachers, pricing with a level fallback and a default, all mongo_db patched"""
+    db = mock_db["db"]
+    admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                 role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+    alice = User(username="alice", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE,
+                 first_name="Alice", last_name="Adams")
+    bob = User(username="bob", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE,
+               first_name="Bob", last_name="Brown")
+    db["users"].insert_many([admin.to_dict(), alice.to_dict(), bob.to_dict()])
+    db["pricing"].insert_many([
+        Pricing("Math", PricingLevel.MIDDLE, 60.0, 35.0).to_dict(),
+        Pricing("Physics", PricingLevel.SECONDARY, 70.0, 40.0).to_dict(),
+    ])
+    lessons = [
+        _lesson(alice, "Math", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, 3, 90),
+        _lesson(alice, "math", EducationLevel.MIDDLE, LessonType.GROUP, 4, 45),
+        _lesson(alice, "Physics", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, 5, 60, LessonStatus.PENDING),
+        _lesson(alice, "Math", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, 6, 60, LessonStatus.CANCELLED),
+        _lesson(bob, "Chemistry", EducationLevel.SECONDARY, LessonType.GROUP, 7, 120),
+    ]
+    db["lessons"].insert_many([lesson.to_dict() for lesson in lessons])
+
+    with patch('app.api.v1.endpoints.dashboard.mongo_db') as mock_dashboard_db, \
+         patch('app.core.pricing.mongo_db') as mock_pricing_db, \
+         patch('app.api.deps.mongo_db') as mock_deps:
+        for mocked in (mock_dashboard_db, mock_pricing_db, mock_deps):
+            for name in ("users", "lessons", "pricing", "payroll_snapshots"):
+                setattr(mocked, f"{name}_collection", db[name])
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+        yield {"db": db, "headers": {"Authorization": f"Bearer {token}"}, "alice": alice, "bob": bob}
+
+
+class TestPricingTable:
+    """Test in-memory price resolution"""
+
+    def test_matches_get_subject_price(self, payroll_env):
+        """Test exact level, other-level fallback, case-insensitivity and defaults"""
+        table = PricingTable.load(payroll_env["db"]["pricing"])
+        for subject, level, lesson_type in [
+            ("Math", "middle", "individual"), ("MATH", "middle", "group"),
+            ("Physics", "elementary", "individual"), ("Chemistry", "secondary", "group"),
+            ("Chemistry", "secondary", "individual"),
+        ]:
+            assert table.price(subject, level, lesson_type) == get_subject_price(subject, level, lesson_type)
+
+
+class TestPriceKernel:
+    """Test vectorized lesson pricing"""
+
+    LESSONS = [
+        ("Math", "middle", "individual", 90), ("MATH", "middle", "group", 45),
+        ("Physics", "elementary", "individual", 60), ("Chemistry", "secondary", "group", 120),
+        ("Chemistry", "secondary", "individual", 30), ("math", "middle", "individual", 0),
+    ]
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_matches_pricing_table(self, payroll_env, use_numpy):
+        """Test that both paths price every lesson like PricingTable.price"""
+        table = PricingTable.load(payroll_env["db"]["pricing"])
+        kernel = PriceKernel(table, use_numpy=use_numpy)
+
+        costs = kernel.compute(*zip(*self.LESSONS))
+        for (subject, level, lesson_type, minutes), price, cost in zip(self.LESSONS, costs.price_per_hour, costs.cost):
+            assert price == table.price(subject, level, lesson_type)
+            assert cost == pytest.approx(minutes / 60 * price)
+        assert list(costs.priced) == [True, True, True, False, False, True]
+        assert costs.total == pytest.approx(90.0 + 26.25 + 70.0 + 2 * DEFAULT_GROUP_PRICE + 22.5)
+
+    def test_price_lessons_defaults_and_cache(self, payroll_env):
+        """Test lesson documents with missing fields, and the cached pricing documents"""
+        pricing = payroll_env["db"]["pricing"]
+        kernel = load_price_kernel(pricing)
+        pricing.delete_many({})
+
+        costs = load_price_kernel(pricing).price_lessons([{"subject": "Math", "education_level": "middle", "duration_minutes": 30}, {}])
+        assert list(costs.price_per_hour) == [60.0, 45.0]
+        assert list(costs.priced) == [True, False]
+        assert kernel.price_lessons([]).total == 0.0
+
+
+class TestPayrollSnapshot:
+    """Test GET /dashboard/payroll"""
+
+    def test_matches_per_teacher_endpoint(self, client, payroll_env):
+        """Test that every teacher's entry equals /teacher-earnings/{teacher_id}"""
+        headers = payroll_env["headers"]
+        response = client.get("/api/v1/dashboard/payroll?year=2025&month=3", headers=headers)
+
+        assert response.status_code == 200
+        payroll = response.json()
+        assert payroll["regenerated"] is True
+        assert payroll["total_teachers"] == 2
+        assert [teacher["teacher_name"] for teacher in payroll["teachers"]] == ["Alice Adams", "Bob Brown"]
+
+        for teacher in payroll["teachers"]:
+            single = client.get(
+                f"/api/v1/dashboard/teacher-earnings/{teacher['teacher_id']}?year=2025&month=3", headers=headers
+            ).json()
+            assert teacher == single
+        assert payroll["total_earnings"] == round(sum(t["total_earnings"] for t in payroll["teachers"]), 2)
+
+    def test_snapshot_reused_until_lessons_or_pricing_change(self, client, payroll_env):
+        """Test that snapshots are immutable and rebuilt only when inputs change"""
+        headers = payroll_env["headers"]
+        url = "/api/v1/dashboard/payroll?year=2025&month=3"
+        first = client.get(url, headers=headers).json()
+
+        second = client.get(url, headers=headers).json()
+        assert second["regenerated"] is False
+        assert second["snapshot_id"] == first["snapshot_id"]
+
+        # Another month's lessons don't matter
+        other = _lesson(payroll_env["bob"], "Math", EducationLevel.MIDDLE, LessonType.INDIVIDUAL, 8, 60).to_dict()
+        other["scheduled_date"] = datetime(2025, 4, 8)
+        payroll_env["db"]["lessons"].insert_one(other)
+        assert client.get(url, headers=headers).json()["regenerated"] is False
+
+        lesson = Lesson.from_dict(payroll_env["db"]["lessons"].find_one({"subject": "Chemistry"}))
+        lesson.update_in_db(payroll_env["db"]["lessons"], {"duration_minutes": 180})
+        third = client.get(url, headers=headers).json()
+        assert third["regenerated"] is True
+        assert third["snapshot_id"] != first["snapshot_id"]
+        assert third["total_hours"] == first["total_hours"] + 1
+
+        payroll_env["db"]["pricing"].update_one({"subject": "Math"}, {"$set": {"individual_price": 65.0}})
+        fourth = client.get(url, headers=headers).json()
+        assert fourth["regenerated"] is True
+        assert fourth["total_earnings"] == third["total_earnings"] + 7.5
+
+        # Earlier snapshots are kept unchanged
+        assert payroll_env["db"]["payroll_snapshots"].count_documents({"year": 2025, "month": 3}) == 3
+
+    def test_pagination(self, client, payroll_env):
+        """Test that skip/limit page through teachers of a stored snapshot"""
+        headers = payroll_env["headers"]
+        client.get("/api/v1/dashboard/payroll?year=2025&month=3", headers=headers)
+
+        page = client.get("/api/v1/dashboard/payroll?year=2025&month=3&skip=1&limit=1", headers=headers).json()
+
+        assert page["regenerated"] is False
+        assert page["total_teachers"] == 2
+        assert [teacher["teacher_name"] for teacher in page["teachers"]] == ["Bob Brown"]
@@ -0,0 +1,147 @@
+"""
+Tests for effective-dated pricing versions and as-of lesson pricing
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.core.payroll import get_payroll_snapshot
+from app.core.pricing import PricingHistory, PricingTable
+from app.core.pricing_kernel import PriceKernel, load_price_kernel
+from app.core.security import get_password_hash, create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.pricing import EARLIEST_EFFECTIVE_FROM, Pricing, EducationLevel as PricingLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+@pytest.fixture
+def history_env(mock_db):
+    """Admin, a teacher, Math pricing raised from 60/30 to 80/40 on 2025-03-15, all mongo_db patched"""
+    db = mock_db["db"]
+    admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                 role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+    alice = User(username="alice", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE,
+                 first_name="Alice", last_name="Adams")
+    db["users"].insert_many([admin.to_dict(), alice.to_dict()])
+    math = Pricing("Math", PricingLevel.MIDDLE, 60.0, 30.0)
+    math.save(db["pricing"])
+    math.individual_price, math.group_price = 80.0, 40.0
+    math.update_in_db(db["pricing"], effective_from=datetime(2025, 3, 15, 17, 30))
+    lessons = [
+        Lesson(teacher_id=alice._id, teacher_name="Alice Adams", subject="Math", education_level=EducationLevel.MIDDLE,
+               lesson_type=lesson_type, scheduled_date=day, duration_minutes=60, status=LessonStatus.COMPLETED)
+        for lesson_type, day in [
+            (LessonType.INDIVIDUAL, datetime(2025, 3, 10, 9)),
+            (LessonType.INDIVIDUAL, datetime(2025, 3, 15, 9)),
+            (LessonType.INDIVIDUAL, datetime(2025, 3, 20, 9)),
+            (LessonType.GROUP, datetime(2025, 3, 1, 9)),
+        ]
+    ]
+    db["lessons"].insert_many([lesson.to_dict() for lesson in lessons])
+
+    with patch('app.api.v1.endpoints.dashboard.mongo_db') as mock_dashboard_db, \
+         patch('app.api.v1.endpoints.pricing.mongo_db') as mock_pricing_db, \
+         patch('app.api.deps.mongo_db') as mock_deps, \
+         patch('app.db.mongo_db') as mock_worker_db:
+        for mocked in (mock_dashboard_db, mock_pricing_db, mock_deps, mock_worker_db):
+            for name in ("users", "lessons", "pricing", "payroll_snapshots"):
+                setattr(mocked, f"{name}_collection", db[name])
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+        yield {"db": db, "headers": {"Authorization": f"Bearer {token}"}, "alice": alice, "math": math}
+
+
+class TestPricingVersions:
+    """Test versions written by Pricing.save / update_in_db"""
+
+    def test_price_change_adds_version_from_start_of_day(self, history_env):
+        versions = Pricing.get_history(history_env["math"]._id, history_env["db"]["pricing"])
+
+        assert [(doc["version"], doc["effective_from"], doc["individual_price"]) for doc in versions] == [
+            (1, EARLIEST_EFFECTIVE_FROM, 60.0),
+            (2, datetime(2025, 3, 15), 80.0),
+        ]
+
+    def test_rename_keeps_version_and_legacy_prices_are_recorded(self, history_env):
+        pricing = history_env["db"]["pricing"]
+        legacy = Pricing("Physics", PricingLevel.SECONDARY, 70.0, 35.0)
+        pricing.insert_one(legacy.to_dict())
+
+        legacy.subject = "Physics II"
+        legacy.update_in_db(pricing)
+        assert Pricing.get_history(legacy._id, pricing) == []
+
+        legacy.individual_price = 75.0
+        legacy.update_in_db(pricing, effective_from=datetime(2025, 1, 1))
+        assert [(doc["version"], doc["individual_price"]) for doc in Pricing.get_history(legacy._id, pricing)] == [
+            (1, 70.0), (2, 75.0),
+        ]
+
+    def test_as_of_lookup(self, history_env):
+        history = PricingHistory.load(history_env["db"]["pricing"])
+        math_id = history_env["math"]._id
+
+        assert history.at(math_id, datetime(2025, 3, 14, 23, 59)) == (1, (60.0, 30.0))
+        assert history.at(math_id, datetime(2025, 3, 15)) == (2, (80.0, 40.0))
+        assert history.at(math_id) == (2, (80.0, 40.0))
+        assert history.at("unknown", datetime(2025, 3, 15)) is None
+
+
+class TestAsOfPricing:
+    """Test lessons priced as of their scheduled date"""
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_kernel_prices_each_lesson_by_date(self, history_env, use_numpy):
+        pricing = history_env["db"]["pricing"]
+        kernel = PriceKernel(PricingTable.load(pricing), PricingHistory.load(pricing), use_numpy=use_numpy)
+
+        prices, priced = kernel.prices(
+            ["Math", "math", "Math", "Math", "Chemistry"],
+            ["middle"] * 4 + ["secondary"],
+            ["individual", "individual", "group", "individual", "individual"],
+            [datetime(2025, 3, 14), datetime(2025, 3, 15, 9), datetime(2025, 2, 1), None, datetime(2025, 3, 1)],
+        )
+        assert list(prices) == [60.0, 80.0, 30.0, 80.0, 45.0]
+        assert list(priced) == [True, True, True, True, False]
+
+    def test_load_price_kernel_uses_history(self, history_env):
+        costs = load_price_kernel(history_env["db"]["pricing"]).price_lessons(
+            list(history_env["db"]["lessons"].find({}).sort("scheduled_date", 1))
+        )
+
+        assert list(costs.price_per_hour) == [30.0, 60.0, 80.0, 80.0]
+
+    def test_payroll_splits_rows_at_price_change(self, client, history_env):
+        """Test that the payroll entry equals /teacher-earnings and keeps both rates"""
+        db, alice = history_env["db"], history_env["alice"]
+        response = client.get(
+            f"/api/v1/dashboard/teacher-earnings/{alice._id}?month=3&year=2025", headers=history_env["headers"]
+        )
+        snapshot = get_payroll_snapshot(db["payroll_snapshots"], db["lessons"], db["users"], db["pricing"], 2025, 3)
+
+        report = response.json()
+        assert [(row["lesson_type"], row["price_per_hour"], row["lesson_count"]) for row in report["by_subject"]] == [
+            ("group", 30.0, 1), ("individual", 60.0, 1), ("individual", 80.0, 2),
+        ]
+        assert report["total_earnings"] == 250.0
+        assert snapshot["teachers"][0] == report
+
+
+class TestPricingHistoryRoutes:
+    """Test PUT /pricing/{id} with effective_from and GET /pricing/{id}/history"""
+
+    def test_update_with_effective_from_and_history(self, client, history_env):
+        math_id, headers = history_env["math"]._id, history_env["headers"]
+
+        response = client.put(f"/api/v1/pricing/{math_id}", headers=headers,
+                              json={"group_price": 45.0, "effective_from": "2025-04-01T00:00:00"})
+        assert response.status_code == 200
+        assert response.json()["version"] == 3
+
+        history = client.get(f"/api/v1/pricing/{math_id}/history", headers=headers).json()
+        assert [(row["version"], row["group_price"]) for row in history["versions"]] == [(1, 30.0), (2, 40.0), (3, 45.0)]
+
+    @pytest.mark.parametrize("effective_from", ["2025-03-01T00:00:00", "2999-01-01T00:00:00"])
+    def test_rejects_out_of_order_dates(self, client, history_env, effective_from):
+        response = client.put(f"/api/v1/pricing/{history_env['math']._id}", headers=history_env["headers"],
+                              json={"individual_price": 90.0, "effective_from": effective_from})
+
+        assert response.status_code == 400
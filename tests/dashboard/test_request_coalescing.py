@@ -0,0 +1,107 @@
+"""
+Tests for single-flight coalescing of identical dashboard requests
+"""
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import Query
+from unittest.mock import patch
+from app.core.security import create_access_token
+from app.core.singleflight import SingleFlight, coalesce, request_key
+
+
+class TestSingleFlight:
+    """Test the coalescing primitive"""
+
+    def test_threads_and_coroutines_share_one_call(self):
+        """Test that an async caller joins a call led by a thread"""
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return "result"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do("k", compute)))
+        leader.start()
+        started.wait(2)
+
+        async def follower():
+            async def never():
+                raise AssertionError("follower must not run")
+            waiting = asyncio.ensure_future(flights.do_async("k", never))
+            await asyncio.sleep(0.02)
+            assert not waiting.done()  # the event loop keeps running while waiting
+            release.set()
+            return await waiting
+
+        results.append(asyncio.run(follower()))
+        leader.join(2)
+
+        assert calls == [1]
+        assert results == ["result", "result"]
+        assert flights.in_flight() == 0
+
+    def test_error_is_shared_then_forgotten(self):
+        flights = SingleFlight()
+        with pytest.raises(ValueError):
+            flights.do("k", lambda: (_ for _ in ()).throw(ValueError("bad")))
+        assert flights.do("k", lambda: 1) == 1
+
+
+class TestRequestKey:
+    """Test request normalization"""
+
+    def test_query_defaults_and_order(self):
+        """Test that a direct call with Query defaults keys like an HTTP call without params"""
+        @coalesce("test/keys")
+        def endpoint(current_admin=None, month=Query(None), status=Query("active")):
+            return request_key("test/keys", {"month": month, "status": status})
+
+        assert endpoint(current_admin={"_id": "a"}) == request_key("test/keys", {"status": "active", "month": None})
+        assert request_key("r", {"a": 1, "b": 2}) == request_key("r", {"b": 2, "a": 1})
+
+
+class TestCoalescedEndpoints:
+    """Test concurrent identical dashboard requests"""
+
+    def test_identical_requests_run_once(self, client, mock_db, admin_user):
+        """Test 10 identical /stats/lessons requests share one aggregation; other params don't"""
+        token = create_access_token({"sub": admin_user._id, "username": admin_user.username, "role": admin_user.role})
+        headers = {"Authorization": f"Bearer {token}"}
+        calls = []
+
+        from app.api.v1.endpoints import dashboard
+        breakdown = dashboard.lesson_breakdown
+
+        def slow_breakdown(collection, query):
+            calls.append(query)
+            time.sleep(0.1)
+            return breakdown(collection, query)
+
+        with patch("app.api.v1.endpoints.dashboard.mongo_db") as mock_mongo, \
+             patch("app.api.deps.mongo_db") as mock_deps, \
+             patch.object(dashboard, "lesson_breakdown", slow_breakdown):
+            mock_deps.users_collection = mock_db["users"]
+            mock_mongo.lessons_collection = mock_db["lessons"]
+
+            responses = []
+
+            def request(month):
+                responses.append(client.get(f"/api/v1/dashboard/stats/lessons?month={month}&year=2025", headers=headers))
+
+            threads = [threading.Thread(target=request, args=(1,)) for _ in range(10)]
+            threads.append(threading.Thread(target=request, args=(2,)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        assert len(calls) == 2
+        assert [response.status_code for response in responses] == [200] * 11
@@ -0,0 +1,133 @@
+"""
+Tests for the single-pipeline dashboard statistics
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.models.user import User, UserRole, UserStatus
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.core.security import get_password_hash, create_access_token
+from app.core.stats import count_active_users_by_role, lesson_breakdown, payment_totals
+
+
+def _insert_lesson(mock_db, lesson_type, lesson_status, scheduled_date, duration_minutes=60):
+    lesson = Lesson(
+        teacher_id="t1",
+        teacher_name="Teacher",
+        subject="Math",
+        education_level=EducationLevel.MIDDLE,
+        lesson_type=lesson_type,
+        scheduled_date=scheduled_date,
+        duration_minutes=duration_minutes,
+        status=lesson_status
+    )
+    mock_db["lessons"].insert_one(lesson.to_dict())
+
+
+@pytest.fixture
+def seeded_lessons(mock_db):
+    january = datetime(2025, 1, 10)
+    february = datetime(2025, 2, 10)
+    _insert_lesson(mock_db, LessonType.INDIVIDUAL, LessonStatus.PENDING, january, 60)
+    _insert_lesson(mock_db, LessonType.INDIVIDUAL, LessonStatus.APPROVED, january, 90)
+    _insert_lesson(mock_db, LessonType.GROUP, LessonStatus.COMPLETED, january, 30)
+    _insert_lesson(mock_db, LessonType.GROUP, LessonStatus.CANCELLED, february, 45)
+    _insert_lesson(mock_db, LessonType.INDIVIDUAL, LessonStatus.REJECTED, february, 120)
+    return mock_db
+
+
+class TestStatsHelpers:
+    """Test that the $facet helpers agree with per-value count_documents"""
+
+    def test_lesson_breakdown_matches_count_documents(self, seeded_lessons):
+        """Test every facet against the equivalent count_documents call"""
+        lessons = seeded_lessons["lessons"]
+        result = lesson_breakdown(lessons)
+
+        assert result["total"] == lessons.count_documents({})
+        for lesson_type in ("individual", "group"):
+            assert result["by_type"][lesson_type] == lessons.count_documents({"lesson_type": lesson_type})
+        for lesson_status in ("pending", "approved", "rejected", "completed", "cancelled"):
+            assert result["by_status"][lesson_status] == lessons.count_documents({"status": lesson_status})
+        assert result["total_minutes"] == 345
+
+    def test_lesson_breakdown_applies_match_and_handles_empty(self, seeded_lessons):
+        """Test the date filter and that missing values come back as zero"""
+        january = {"scheduled_date": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)}}
+        result = lesson_breakdown(seeded_lessons["lessons"], january)
+
+        assert result["total"] == 3
+        assert result["by_status"]["cancelled"] == 0
+        assert result["total_minutes"] == 180
+
+        empty = lesson_breakdown(seeded_lessons["lessons"], {"teacher_id": "nobody"})
+        assert empty == {
+            "total": 0,
+            "by_type": {"individual": 0, "group": 0},
+            "by_status": {"pending": 0, "approved": 0, "rejected": 0, "completed": 0, "cancelled": 0},
+            "total_minutes": 0
+        }
+
+    def test_user_and_payment_totals(self, mock_db):
+        """Test role counts (active only) and payment count/sum"""
+        for username, role, user_status in [
+            ("t1", UserRole.TEACHER, UserStatus.ACTIVE),
+            ("t2", UserRole.TEACHER, UserStatus.ACTIVE),
+            ("t3", UserRole.TEACHER, UserStatus.INACTIVE),
+            ("a1", UserRole.ADMIN, UserStatus.ACTIVE),
+        ]:
+            mock_db["users"].insert_one(
+                User(username=username, hashed_password="x", role=role, status=user_status).to_dict()
+            )
+        mock_db["payments"].insert_many([
+            {"student_name": "A", "amount": 100.5, "payment_date": datetime(2025, 1, 5)},
+            {"student_name": "B", "amount": 50, "payment_date": datetime(2025, 2, 5)},
+        ])
+
+        assert count_active_users_by_role(mock_db["users"]) == {"teacher": 2, "admin": 1}
+        assert payment_totals(mock_db["payments"]) == {"count": 2, "total_amount": 150.5}
+        assert payment_totals(mock_db["payments"], {"student_name": "C"}) == {"count": 0, "total_amount": 0}
+
+
+class TestLessonsStatsResponse:
+    """Test that /dashboard/stats/lessons keeps its response shape"""
+
+    def test_lessons_stats_values(self, client, seeded_lessons):
+        """Test the endpoint numbers built from the single pipeline"""
+        mock_db = seeded_lessons
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(admin.to_dict())
+
+        token = create_access_token({
+            "sub": admin._id,
+            "username": admin.username,
+            "role": admin.role.value
+        })
+
+        with patch('app.api.v1.endpoints.dashboard.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get(
+                "/api/v1/dashboard/stats/lessons?month=1&year=2025",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["by_type"] == {"individual_lessons": 2, "group_lessons": 1, "total_lessons": 3}
+            assert data["by_status"] == {
+                "pending_lessons": 1,
+                "approved_lessons": 1,
+                "rejected_lessons": 0,
+                "completed_lessons": 1,
+                "cancelled_lessons": 0,
+                "total_lessons": 3
+            }
+            assert data["total_hours"] == 3.0
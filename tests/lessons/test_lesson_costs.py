@@ -0,0 +1,229 @@
+"""
+Tests for lesson costs stored at approval/completion and their recomputation
+"""
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.lesson_costs import recompute_lesson_costs
+from app.core.security import get_password_hash, create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.pricing import Pricing, EducationLevel as PricingLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+def make_lesson(teacher, day, minutes=90, subject="Math", lesson_status=LessonStatus.PENDING):
+    return Lesson(
+        teacher_id=teacher._id, teacher_name=teacher.get_full_name(), subject=subject,
+        education_level=EducationLevel.MIDDLE, lesson_type=LessonType.INDIVIDUAL, scheduled_date=day,
+        duration_minutes=minutes, students=[{"student_name": "Sara"}], status=lesson_status,
+    )
+
+
+@pytest.fixture
+def costs_env(mock_db):
+    """Admin, a teacher, Math pricing 60/30 and every mongo_db patched (Celery tasks run eagerly)"""
+    db = mock_db["db"]
+    admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                 role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+    teacher = User(username="teacher", hashed_password=get_password_hash("teacher123"),
+                   role=UserRole.TEACHER, status=UserStatus.ACTIVE, first_name="Tom", last_name="Teacher")
+    db["users"].insert_many([admin.to_dict(), teacher.to_dict()])
+    math = Pricing("Math", PricingLevel.MIDDLE, 60.0, 30.0)
+    math.save(db["pricing"])
+    mongo = SimpleNamespace(
+        users_collection=db["users"], lessons_collection=db["lessons"],
+        payments_collection=db["payments"], pricing_collection=db["pricing"],
+    )
+
+    def token(user):
+        return {"Authorization": f"Bearer {create_access_token({'sub': user._id, 'username': user.username, 'role': user.role.value})}"}
+
+    with patch("app.api.v1.endpoints.lessons.mongo_db", mongo), \
+         patch("app.api.v1.endpoints.payments.mongo_db", mongo), \
+         patch("app.api.v1.endpoints.pricing.mongo_db", mongo), \
+         patch("app.api.deps.mongo_db", mongo), \
+         patch("app.db.mongo_db", mongo):
+        yield {"db": db, "admin": token(admin), "teacher_headers": token(teacher), "teacher": teacher, "math": math}
+
+
+def add_lesson(env, day, **kwargs):
+    lesson = make_lesson(env["teacher"], day, **kwargs)
+    lesson.save(env["db"]["lessons"])
+    return lesson
+
+
+class TestStoredCosts:
+    """Test costs written when lessons are approved or completed"""
+
+    def test_approve_stores_cost(self, client, costs_env):
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10))
+
+        response = client.put(f"/api/v1/lessons/admin/approve/{lesson._id}", headers=costs_env["admin"])
+
+        assert response.status_code == 200
+        stored = costs_env["db"]["lessons"].find_one({"_id": lesson._id})
+        assert (stored["price_per_hour"], stored["cost"]) == (60.0, 90.0)
+        assert stored["pricing_version"] == f"{costs_env['math']._id}@1"
+        assert stored["priced_at"] is not None
+
+    def test_complete_stores_cost_and_default_price(self, client, costs_env):
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10), minutes=60, subject="Chemistry")
+
+        response = client.put(f"/api/v1/lessons/update-lesson/{lesson._id}", headers=costs_env["teacher_headers"],
+                              json={"status": "completed"})
+
+        assert response.status_code == 200
+        stored = costs_env["db"]["lessons"].find_one({"_id": lesson._id})
+        assert (stored["price_per_hour"], stored["cost"], stored["pricing_version"]) == (45.0, 45.0, None)
+
+    def test_approve_ignores_stale_pricing_cache(self, client, costs_env):
+        """Test approving in a process whose cached pricing missed the latest price change"""
+        db = costs_env["db"]
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10))
+        add_lesson(costs_env, datetime(2025, 3, 11), lesson_status=LessonStatus.APPROVED)
+        client.get("/api/v1/payments/student/Sara/cost-summary?month=3&year=2025", headers=costs_env["admin"])
+        with patch("app.models.pricing.note_write"):
+            math = costs_env["math"]
+            math.individual_price = 80.0
+            math.update_in_db(db["pricing"], effective_from=datetime(2025, 3, 1))
+
+        client.put(f"/api/v1/lessons/admin/approve/{lesson._id}", headers=costs_env["admin"])
+
+        stored = db["lessons"].find_one({"_id": lesson._id})
+        assert (stored["cost"], stored["pricing_version"]) == (120.0, f"{math._id}@2")
+
+    def test_cost_summary_sums_stored_costs(self, client, costs_env):
+        """Test that stored costs are summed as they are, and lessons without one are priced"""
+        lessons = costs_env["db"]["lessons"]
+        approved = add_lesson(costs_env, datetime(2025, 3, 10))
+        client.put(f"/api/v1/lessons/admin/approve/{approved._id}", headers=costs_env["admin"])
+        lessons.update_one({"_id": approved._id}, {"$set": {"cost": 100.0}})
+        add_lesson(costs_env, datetime(2025, 3, 12), minutes=30, lesson_status=LessonStatus.COMPLETED)
+        add_lesson(costs_env, datetime(2025, 3, 14), subject="Chemistry", lesson_status=LessonStatus.APPROVED)
+
+        response = client.get("/api/v1/payments/student/Sara/cost-summary?month=3&year=2025", headers=costs_env["admin"])
+
+        data = response.json()
+        assert data["total_lessons_cost"] == 100.0 + 30.0 + 67.5
+        assert data["lessons_count"] == 3
+        assert data["warning"]["missing_subjects"] == [
+            {"subject": "Chemistry", "education_level": "middle", "lesson_type": "individual", "used_default_price": 45.0}
+        ]
+
+
+class TestRecompute:
+    """Test repricing stored costs after pricing corrections"""
+
+    def test_backdated_price_change_reprices_later_lessons(self, client, costs_env):
+        before = add_lesson(costs_env, datetime(2025, 3, 1))
+        after = add_lesson(costs_env, datetime(2025, 3, 20))
+        for lesson in (before, after):
+            client.put(f"/api/v1/lessons/admin/approve/{lesson._id}", headers=costs_env["admin"])
+
+        response = client.put(f"/api/v1/pricing/{costs_env['math']._id}", headers=costs_env["admin"],
+                              json={"individual_price": 80.0, "effective_from": "2025-03-15T00:00:00"})
+
+        assert response.status_code == 200
+        lessons = costs_env["db"]["lessons"]
+        assert lessons.find_one({"_id": before._id})["cost"] == 90.0
+        assert lessons.find_one({"_id": after._id})["pricing_version"] == f"{costs_env['math']._id}@2"
+        assert lessons.find_one({"_id": after._id})["cost"] == 120.0
+
+    def test_new_pricing_reprices_default_priced_lessons(self, client, costs_env):
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10), subject="Physics", lesson_status=LessonStatus.APPROVED)
+
+        response = client.post("/api/v1/pricing/", headers=costs_env["admin"], json={
+            "subject": "Physics", "education_level": "middle", "individual_price": 70.0, "group_price": 35.0,
+        })
+
+        assert response.status_code == 201
+        assert costs_env["db"]["lessons"].find_one({"_id": lesson._id})["cost"] == 105.0
+
+    def test_deleted_pricing_reprices_its_lessons(self, client, costs_env):
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10))
+        client.put(f"/api/v1/lessons/admin/approve/{lesson._id}", headers=costs_env["admin"])
+
+        response = client.delete(f"/api/v1/pricing/{costs_env['math']._id}", headers=costs_env["admin"])
+
+        assert response.status_code == 204
+        stored = costs_env["db"]["lessons"].find_one({"_id": lesson._id})
+        assert (stored["price_per_hour"], stored["cost"], stored["pricing_version"]) == (45.0, 67.5, None)
+
+    def test_renamed_pricing_reprices_old_and_new_subject(self, client, costs_env):
+        math = add_lesson(costs_env, datetime(2025, 3, 10))
+        algebra = add_lesson(costs_env, datetime(2025, 3, 11), subject="Algebra")
+        for lesson in (math, algebra):
+            client.put(f"/api/v1/lessons/admin/approve/{lesson._id}", headers=costs_env["admin"])
+
+        response = client.put(f"/api/v1/pricing/{costs_env['math']._id}", headers=costs_env["admin"],
+                              json={"subject": "Algebra"})
+
+        assert response.status_code == 200
+        lessons = costs_env["db"]["lessons"]
+        assert lessons.find_one({"_id": math._id})["cost"] == 67.5
+        assert lessons.find_one({"_id": algebra._id})["cost"] == 90.0
+
+    def test_recompute_only_rewrites_changed_lessons(self, costs_env):
+        db = costs_env["db"]
+        for day in (1, 2, 3):
+            add_lesson(costs_env, datetime(2025, 3, day), lesson_status=LessonStatus.COMPLETED)
+        add_lesson(costs_env, datetime(2025, 3, 4))
+
+        first = recompute_lesson_costs(db["lessons"], db["pricing"], batch_size=2)
+        second = recompute_lesson_costs(db["lessons"], db["pricing"], start=datetime(2025, 3, 2))
+
+        assert first == {"matched": 3, "updated": 3}
+        assert second == {"matched": 2, "updated": 0}
+
+    def test_recompute_ignores_stale_pricing_cache(self, costs_env):
+        """Test a worker whose cached pricing missed the latest price change"""
+        db = costs_env["db"]
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10), lesson_status=LessonStatus.APPROVED)
+        recompute_lesson_costs(db["lessons"], db["pricing"])
+        with patch("app.models.pricing.note_write"):
+            math = costs_env["math"]
+            math.individual_price = 80.0
+            math.update_in_db(db["pricing"], effective_from=datetime(2025, 3, 1))
+
+        recompute_lesson_costs(db["lessons"], db["pricing"])
+
+        stored = db["lessons"].find_one({"_id": lesson._id})
+        assert (stored["cost"], stored["pricing_version"]) == (120.0, f"{math._id}@2")
+
+    def test_reports_use_stored_costs(self, client, costs_env):
+        """Test that earnings, payroll and columnar costs agree with the cost summary on stored costs"""
+        db, headers = costs_env["db"], costs_env["admin"]
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10), lesson_status=LessonStatus.COMPLETED)
+        recompute_lesson_costs(db["lessons"], db["pricing"])
+        # A correction stored on the lesson without touching the pricing table
+        db["lessons"].update_one({"_id": lesson._id}, {"$set": {"price_per_hour": 80.0, "cost": 120.0}})
+        mongo = SimpleNamespace(**{f"{name}_collection": db[name] for name in (
+            "users", "lessons", "payments", "pricing", "payroll_snapshots")})
+
+        with patch("app.api.v1.endpoints.dashboard.mongo_db", mongo), \
+             patch("app.api.v1.endpoints.analytics.mongo_db", mongo):
+            earnings = client.get(f"/api/v1/dashboard/teacher-earnings/{costs_env['teacher']._id}?month=3&year=2025",
+                                  headers=headers).json()
+            payroll = client.get("/api/v1/dashboard/payroll?month=3&year=2025", headers=headers).json()
+            report = client.get("/api/v1/analytics/report/lessons?group_by=teacher_id&from=2025-03-01&to=2025-03-31",
+                                headers=headers).json()
+        summary = client.get("/api/v1/payments/student/Sara/cost-summary?month=3&year=2025", headers=headers).json()
+
+        assert summary["total_lessons_cost"] == 120.0
+        assert earnings["total_earnings"] == 120.0
+        assert earnings["by_subject"][0]["price_per_hour"] == 80.0
+        assert payroll["teachers"][0] == earnings
+        assert report["rows"][0]["cost"] == 120.0
+
+    def test_recompute_endpoint(self, client, costs_env):
+        lesson = add_lesson(costs_env, datetime(2025, 3, 10), lesson_status=LessonStatus.APPROVED)
+
+        response = client.post("/api/v1/lessons/admin/recompute-costs?from=2025-03-01&to=2025-03-31",
+                               headers=costs_env["admin"])
+        rejected = client.post("/api/v1/lessons/admin/recompute-costs?from=2025-04-01&to=2025-03-01",
+                               headers=costs_env["admin"])
+
+        assert response.status_code == 202
+        assert costs_env["db"]["lessons"].find_one({"_id": lesson._id})["cost"] == 90.0
+        assert rejected.status_code == 400
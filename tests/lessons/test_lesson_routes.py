@@ -1360,3 +1360,74 @@ class TestLessonsSummaryEndpoint:
             assert math["total_lessons"] == 6
             assert math["total_hours"] == 9.0
 
+
+
+class TestMyLessonsProjection:
+    """Test GET /api/v1/lessons/my-lessons count_only and fields modes"""
+    
+    def _setup(self, mock_db):
+        teacher = User(
+            username="teacher",
+            hashed_password=get_password_hash("teacher123"),
+            role=UserRole.TEACHER,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(teacher.to_dict())
+        for lesson_type, minutes in [(LessonType.INDIVIDUAL, 60), (LessonType.INDIVIDUAL, 30), (LessonType.GROUP, 90)]:
+            Lesson(
+                teacher_id=teacher._id,
+                teacher_name="Teacher",
+                subject="Math",
+                education_level="elementary",
+                lesson_type=lesson_type,
+                scheduled_date=datetime(2024, 1, 15),
+                duration_minutes=minutes
+            ).save(mock_db["lessons"])
+        return create_access_token({
+            "sub": teacher._id,
+            "username": teacher.username,
+            "role": teacher.role.value
+        })
+    
+    def test_count_only_returns_breakdown_without_lessons(self, client, mock_db):
+        """Test that count_only aggregates totals in the database"""
+        token = self._setup(mock_db)
+        
+        with patch('app.api.v1.endpoints.lessons.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/lessons/my-lessons?count_only=true",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data == {
+                "total_lessons": 3,
+                "total_hours": 3.0,
+                "individual": {"lessons": 2, "hours": 1.5},
+                "group": {"lessons": 1, "hours": 1.5},
+            }
+    
+    def test_fields_projection_returns_requested_fields_only(self, client, mock_db):
+        """Test that fields limits each lesson but keeps the breakdown"""
+        token = self._setup(mock_db)
+        
+        with patch('app.api.v1.endpoints.lessons.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/lessons/my-lessons?fields=id,subject",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total_hours"] == 3.0
+            assert data["individual"]["lessons"] == 2
+            assert all(set(lesson) == {"id", "subject"} for lesson in data["lessons"])
@@ -0,0 +1,141 @@
+"""
+Tests for incremental monthly lesson summary buckets
+"""
+from datetime import datetime
+from unittest.mock import patch
+from app.core import lesson_summary
+from app.core.lesson_summary import buckets_collection, rebuild_teacher_buckets, summary_rows
+from app.core.security import create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.user import User, UserRole, UserStatus
+
+NOW = datetime(2025, 3, 15)
+
+
+def make_lesson(teacher_id, scheduled_date, subject="Math", lesson_type=LessonType.INDIVIDUAL, minutes=60, students=1):
+    return Lesson(
+        teacher_id=teacher_id, teacher_name="T", subject=subject, education_level=EducationLevel.MIDDLE,
+        lesson_type=lesson_type, scheduled_date=scheduled_date, duration_minutes=minutes,
+        students=[{"student_name": f"S{i}"} for i in range(students)],
+    )
+
+
+def bucket_state(lessons_collection, teacher_id):
+    return sorted(
+        (bucket["_id"], bucket["lessons"], bucket["minutes"], bucket["students"],
+         tuple(sorted((k, v) for k, v in bucket["status"].items() if v)))
+        for bucket in buckets_collection(lessons_collection).find({"teacher_id": teacher_id, "period": {"$exists": True}})
+        if bucket["lessons"]
+    )
+
+
+class TestIncrementalBuckets:
+    """Test that lesson writes keep buckets equal to a full rebuild"""
+
+    def test_writes_match_rebuild(self, mock_db):
+        lessons = mock_db["lessons"]
+        rebuild_teacher_buckets(lessons, "t1")
+
+        jan = make_lesson("t1", datetime(2025, 1, 10), minutes=90, students=2)
+        feb = make_lesson("t1", datetime(2025, 2, 3), lesson_type=LessonType.GROUP, students=3)
+        moved = make_lesson("t1", datetime(2025, 1, 20), subject="Physics")
+        for lesson in (jan, feb, moved):
+            lesson.save(lessons)
+
+        jan.approve()
+        jan.update_in_db(lessons, {"status": jan.status.value})
+        feb.delete(lessons)
+        moved.update_in_db(lessons, {"scheduled_date": datetime(2025, 2, 20), "duration_minutes": 45})
+
+        incremental = bucket_state(lessons, "t1")
+        rebuild_teacher_buckets(lessons, "t1")
+        assert incremental == bucket_state(lessons, "t1")
+        assert ("t1|202501|Math|individual", 1, 90, 2, (("approved", 1),)) in incremental
+        assert ("t1|202502|Physics|individual", 1, 45, 1, (("pending", 1),)) in incremental
+
+
+class TestConcurrentRebuilds:
+    """Test rebuilds racing each other and lesson writes"""
+
+    def test_rebuild_in_progress_is_not_duplicated(self, mock_db):
+        """Test that a second first-time summary aggregates live instead of rebuilding"""
+        lessons = mock_db["lessons"]
+        make_lesson("t1", datetime(2025, 1, 10)).save(lessons)
+        buckets = buckets_collection(lessons)
+        buckets.insert_one({"_id": "t1|built", "teacher_id": "t1", "building_since": datetime.utcnow(),
+                            "token": "other", "dirty": False})
+
+        assert rebuild_teacher_buckets(lessons, "t1") is None
+        assert summary_rows(lessons, "t1", now=NOW)[0]["lessons"] == 1
+        assert buckets.find_one({"_id": "t1|built"})["token"] == "other"
+
+    def test_write_during_rebuild_is_not_lost(self, mock_db):
+        """Test that a lesson written mid-rebuild makes the next summary rebuild"""
+        lessons = mock_db["lessons"]
+        make_lesson("t1", datetime(2025, 1, 10)).save(lessons)
+        aggregate = lesson_summary.archive.aggregate
+
+        def aggregate_then_write(collection, pipeline):
+            results = aggregate(collection, pipeline)
+            make_lesson("t1", datetime(2025, 1, 20), minutes=30).save(lessons)
+            return results
+
+        with patch.object(lesson_summary.archive, "aggregate", aggregate_then_write):
+            assert rebuild_teacher_buckets(lessons, "t1") is None
+
+        rows = summary_rows(lessons, "t1", now=NOW)
+        assert [(row["lessons"], row["minutes"]) for row in rows] == [(2, 90)]
+        incremental = bucket_state(lessons, "t1")
+        rebuild_teacher_buckets(lessons, "t1")
+        assert incremental == bucket_state(lessons, "t1")
+
+
+class TestSummaryComposition:
+    """Test closed months from buckets, open month live"""
+
+    def test_past_months_from_buckets_current_month_live(self, mock_db):
+        lessons = mock_db["lessons"]
+        make_lesson("t1", datetime(2025, 1, 10)).save(lessons)
+        assert summary_rows(lessons, "t1", now=NOW)[0]["lessons"] == 1  # builds the buckets
+
+        # Written behind the buckets' back: invisible in a closed month, counted in the open one
+        lessons.insert_one(make_lesson("t1", datetime(2025, 2, 1)).to_dict())
+        lessons.insert_one(make_lesson("t1", datetime(2025, 3, 2), minutes=30).to_dict())
+
+        rows = summary_rows(lessons, "t1", now=NOW)
+        assert [(row["subject"], row["lessons"], row["minutes"]) for row in rows] == [("Math", 2, 90)]
+
+    def test_range(self, mock_db):
+        lessons = mock_db["lessons"]
+        for month in (1, 2, 3, 4):
+            make_lesson("t1", datetime(2025, month, 5), minutes=month * 10).save(lessons)
+
+        assert summary_rows(lessons, "t1", 202502, 202503, now=NOW)[0]["minutes"] == 50
+        assert summary_rows(lessons, "t1", 202504, None, now=NOW)[0]["minutes"] == 40
+        assert summary_rows(lessons, "t1", None, 202501, now=NOW)[0]["minutes"] == 10
+
+
+class TestSummaryEndpointRange:
+    """Test the from/to parameters of GET /lessons/summary"""
+
+    def test_from_to(self, client, mock_db):
+        teacher = User(username="teacher", hashed_password="x", role=UserRole.TEACHER, status=UserStatus.ACTIVE)
+        mock_db["users"].insert_one(teacher.to_dict())
+        make_lesson(teacher._id, datetime(2024, 5, 1), minutes=120).save(mock_db["lessons"])
+        make_lesson(teacher._id, datetime(2024, 6, 1), subject="Physics").save(mock_db["lessons"])
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': teacher._id, 'role': 'teacher'})}"}
+
+        with patch('app.api.v1.endpoints.lessons.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.lessons_collection = mock_db["lessons"]
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/lessons/summary?from=2024-05&to=2024-05", headers=headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["overall"]["total_hours"] == 2.0
+            assert list(data["by_subject"]) == ["Math"]
+            assert data["range"] == {"from": "2024-05", "to": "2024-05"}
+
+            assert client.get("/api/v1/lessons/summary?from=2024-06&to=2024-05", headers=headers).status_code == 400
+            assert client.get("/api/v1/lessons/summary?from=2024-13", headers=headers).status_code == 422
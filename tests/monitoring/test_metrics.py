@@ -0,0 +1,100 @@
+"""
+Tests for the in-process Prometheus metrics
+"""
+import threading
+from types import SimpleNamespace
+from app.core.metrics import Counter, DerivedGauge, Gauge, Histogram, MetricsRegistry, registry
+from app.core.security import get_password_hash
+from app.db.monitoring import command_timing_listener
+
+
+class TestMetricsRegistry:
+    """Test per-thread shards and text exposition"""
+
+    def test_counters_from_many_threads_are_merged(self):
+        """Test that per-thread samples add up, including finished threads"""
+        local_registry = MetricsRegistry()
+        counter = Counter(local_registry, "jobs_total", "Jobs", ("kind",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(("a",))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(("b",), amount=2)
+
+        assert counter.value(("a",)) == 4000
+        # Retired shards keep counting after their threads are gone
+        assert counter.value(("a",)) == 4000
+        assert 'jobs_total{kind="b"} 2' in local_registry.render()
+
+    def test_histogram_exposition(self):
+        """Test cumulative buckets, +Inf, sum and count"""
+        local_registry = MetricsRegistry()
+        histogram = Histogram(local_registry, "latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, ('/a/{id}',))
+
+        text = local_registry.render()
+
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{route="/a/{id}",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{route="/a/{id}",le="1"} 3' in text
+        assert 'latency_seconds_bucket{route="/a/{id}",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{route="/a/{id}"} 3.65' in text
+        assert 'latency_seconds_count{route="/a/{id}"} 4' in text
+
+    def test_gauge_and_derived_gauge(self):
+        """Test inc/dec gauges and values computed at scrape time"""
+        local_registry = MetricsRegistry()
+        gauge = Gauge(local_registry, "in_flight", "In flight")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        DerivedGauge(local_registry, "doubled", "Twice in_flight", (),
+                     lambda samples: {(): 2 * samples[("in_flight", ())]})
+
+        text = local_registry.render()
+
+        assert "in_flight 1" in text
+        assert "doubled 2" in text
+
+
+class TestApplicationMetrics:
+    """Test the instrumented code paths and /metrics"""
+
+    def test_metrics_endpoint_exposes_instrumented_paths(self, client):
+        """Test route templates, Mongo commands, bcrypt and cache metrics in the scrape"""
+        get_password_hash("password123")
+        command_timing_listener.started(SimpleNamespace(
+            command_name="find", command={"find": "lessons"}, database_name="institute_db",
+            connection_id=("h", 1), request_id=7
+        ))
+        command_timing_listener.succeeded(SimpleNamespace(
+            command_name="find", duration_micros=2500, connection_id=("h", 1), request_id=7
+        ))
+        client.get("/")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in text
+        assert 'mongodb_command_duration_seconds_count{collection="lessons",command="find"}' in text
+        assert 'password_hash_duration_seconds_count{operation="hash"}' in text
+        assert "# TYPE cache_hit_ratio gauge" in text
+        assert "# TYPE mongodb_pool_checkout_wait_seconds histogram" in text
+        assert "http_requests_in_flight 1" in text  # the scrape itself
+
+    def test_unmatched_paths_share_one_label(self, client):
+        """Test that unknown URLs don't create a series per path"""
+        client.get("/no/such/path/123")
+
+        assert registry.collect().get(
+            ("http_request_duration_seconds", ("GET", "unmatched", "404"))
+        ) is not None
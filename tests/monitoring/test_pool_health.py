@@ -0,0 +1,119 @@
+"""
+Tests for connection pool settings and pool telemetry
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.config import Config
+from app.core.metrics import registry
+from app.core.security import get_password_hash, create_access_token
+from app.db.mongodb import MongoDatabase
+from app.db.monitoring import analytics_pool_timing_listener, get_event_listeners, pool_health, pool_timing_listener
+from app.models.user import User, UserRole, UserStatus
+
+
+def _event(**kwargs):
+    return SimpleNamespace(address=("localhost", 27017), connection_id=1, **kwargs)
+
+
+class TestPoolSettings:
+    """Test that pool configuration reaches MongoClient"""
+
+    def test_client_gets_pool_options(self):
+        """Test pool size, idle time, wait queue, compressors and read preference"""
+        with patch.object(Config, "MONGO_MAX_POOL_SIZE", 40), \
+             patch.object(Config, "MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000), \
+             patch.object(Config, "MONGO_COMPRESSORS", "zstd, zlib"), \
+             patch.object(Config, "MONGO_READ_PREFERENCE", "primaryPreferred"), \
+             patch('app.db.mongodb.config.MONGO_CLUSTER_URL', "mongodb://localhost:27017"), \
+             patch('app.db.mongodb.MongoClient') as mock_client:
+            MongoDatabase().check_mongo_connection()
+
+        kwargs = mock_client.call_args.kwargs
+        assert kwargs["maxPoolSize"] == 40
+        assert kwargs["waitQueueTimeoutMS"] == 2000
+        assert kwargs["maxIdleTimeMS"] == 300000
+        assert kwargs["compressors"] == "zstd,zlib"
+        assert kwargs["readPreference"] == "primaryPreferred"
+
+    def test_zero_means_driver_default(self):
+        """Test that 0 leaves idle time and wait queue timeout unbounded"""
+        with patch.object(Config, "MONGO_MAX_IDLE_TIME_MS", 0), \
+             patch.object(Config, "MONGO_WAIT_QUEUE_TIMEOUT_MS", 0):
+            options = Config.get_mongo_pool_options()
+
+        assert options["maxIdleTimeMS"] is None
+        assert options["waitQueueTimeoutMS"] is None
+        assert "compressors" not in options
+
+
+class TestPoolTelemetry:
+    """Test the pool listener and the health snapshot"""
+
+    def setup_method(self):
+        registry.reset()
+
+    def test_checkout_churn_and_exhaustion(self):
+        """Test gauges, checkout wait, timeouts and connection churn"""
+        listener = pool_timing_listener
+        for _ in range(2):
+            listener.connection_created(_event())
+        for duration in (0.001, 0.002, 0.003):
+            listener.connection_check_out_started(_event())
+            listener.connection_checked_out(_event(duration=duration))
+        listener.connection_checked_in(_event())
+        listener.connection_check_out_started(_event())
+        listener.connection_check_out_failed(_event(reason="timeout", duration=2.0))
+        listener.connection_closed(_event(reason="idle"))
+
+        health = pool_health()
+
+        assert health["connections"] == {"open": 1, "in_use": 2, "waiting": 0}
+        assert health["checkouts"] == 3
+        assert health["checkout_wait_ms"]["avg"] == 2.0
+        assert health["checkout_wait_ms"]["p95_upper_bound"] == 5.0
+        assert health["exhausted"] == 1
+        assert health["checkout_failures"] == {"timeout": 1}
+        assert health["connections_created"] == 2
+        assert health["connections_closed"] == {"idle": 1}
+        assert health["connections_created_per_checkout"] == round(2 / 3, 4)
+        assert health["utilization"] == round(2 / health["settings"]["max_pool_size"], 4)
+
+    def test_pools_are_reported_per_client(self):
+        """Test that the analytics pool is measured against its own size, not mixed into the main pool"""
+        assert get_event_listeners("analytics")[1] is analytics_pool_timing_listener
+        pool_timing_listener.connection_created(_event())
+        for _ in range(3):
+            analytics_pool_timing_listener.connection_created(_event())
+            analytics_pool_timing_listener.connection_check_out_started(_event())
+            analytics_pool_timing_listener.connection_checked_out(_event(duration=0.001))
+
+        with patch.object(Config, "ANALYTICS_MAX_POOL_SIZE", 4), patch.object(Config, "ANALYTICS_CLIENT_ENABLED", True):
+            health = pool_health()
+
+        assert health["connections"] == {"open": 1, "in_use": 0, "waiting": 0}
+        assert (health["utilization"], health["checkouts"]) == (0.0, 0)
+        analytics = health["analytics"]
+        assert analytics["connections"] == {"open": 3, "in_use": 3, "waiting": 0}
+        assert (analytics["settings"]["max_pool_size"], analytics["utilization"]) == (4, 0.75)
+        assert analytics["settings"]["read_preference"] == Config.ANALYTICS_READ_PREFERENCE
+
+    def test_pool_endpoint_and_metrics(self, client, mock_db):
+        """Test the admin pool endpoint and the new series in /metrics"""
+        pool_timing_listener.connection_created(_event())
+        admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                     role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        mock_db["users"].insert_one(admin.to_dict())
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+
+        with patch('app.api.deps.mongo_db') as mock_deps:
+            mock_deps.users_collection = mock_db["users"]
+            response = client.get("/api/v1/admin/diagnostics/pool",
+                                  headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        assert response.json()["connections"]["open"] == 1
+        assert response.json()["settings"]["read_preference"] == "primary"
+
+        text = client.get("/metrics").text
+        assert 'mongodb_pool_connections{client="main",state="open"} 1' in text
+        assert 'mongodb_pool_connections_created_total{client="main"} 1' in text
@@ -0,0 +1,100 @@
+"""
+Tests for the sampling profiler and /admin/diagnostics/profile
+"""
+import threading
+import pytest
+from unittest.mock import patch
+from app.core.profiler import ProfilerBusy, SamplingProfiler, render_collapsed, sampling_profiler
+from app.models.user import User, UserRole, UserStatus
+from app.core.security import get_password_hash, create_access_token
+
+
+def busy_pricing_lookup(stop):
+    """Recognizable CPU-bound function for the profiler to find"""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_pricing_lookup, args=(stop,), name="busy-worker")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+class TestSamplingProfiler:
+    """Test stack sampling"""
+
+    def test_samples_other_threads(self, busy_thread):
+        """Test that a busy thread's function shows up in collapsed stacks"""
+        result = SamplingProfiler().profile(0.3, interval_seconds=0.005)
+
+        assert result["samples"] > 10
+        busy_stacks = [stack for stack in result["stacks"] if "busy_pricing_lookup" in stack]
+        assert busy_stacks
+        assert all(stack.startswith("busy-worker;") for stack in busy_stacks)
+
+        lines = render_collapsed(result["stacks"]).splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) >= 1
+
+    def test_one_profile_at_a_time(self):
+        """Test that concurrent profiles are rejected"""
+        profiler = SamplingProfiler()
+        profiler._lock.acquire()
+        try:
+            with pytest.raises(ProfilerBusy):
+                profiler.profile(0.1)
+        finally:
+            profiler._lock.release()
+
+
+class TestProfileEndpoint:
+    """Test GET /admin/diagnostics/profile"""
+
+    def _admin_headers(self, mock_db):
+        admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                     role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        mock_db["users"].insert_one(admin.to_dict())
+        token = create_access_token({"sub": admin._id, "username": admin.username, "role": admin.role.value})
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_profile_returns_collapsed_stacks(self, client, mock_db, busy_thread):
+        """Test flamegraph output when the profiler is enabled"""
+        headers = self._admin_headers(mock_db)
+        with patch('app.api.deps.mongo_db') as mock_deps, \
+             patch('app.api.v1.endpoints.diagnostics.config.PROFILER_ENABLED', True):
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/admin/diagnostics/profile?seconds=1", headers=headers)
+            assert response.status_code == 200
+            assert "busy_pricing_lookup" in response.text
+
+            response = client.get("/api/v1/admin/diagnostics/profile?seconds=1&format=json", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["samples"] > 0
+
+    def test_profile_disabled_busy_and_limits(self, client, mock_db):
+        """Test opt-in flag, max duration and concurrent-profile rejection"""
+        headers = self._admin_headers(mock_db)
+        with patch('app.api.deps.mongo_db') as mock_deps:
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/admin/diagnostics/profile?seconds=1", headers=headers)
+            assert response.status_code == 404
+
+            with patch('app.api.v1.endpoints.diagnostics.config.PROFILER_ENABLED', True):
+                response = client.get("/api/v1/admin/diagnostics/profile?seconds=9999", headers=headers)
+                assert response.status_code == 400
+
+                sampling_profiler._lock.acquire()
+                try:
+                    response = client.get("/api/v1/admin/diagnostics/profile?seconds=1", headers=headers)
+                    assert response.status_code == 409
+                finally:
+                    sampling_profiler._lock.release()
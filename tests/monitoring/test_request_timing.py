@@ -0,0 +1,118 @@
+"""
+Tests for per-request timing and Mongo command counting
+"""
+import contextvars
+import json
+import logging
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.monitoring import current_request, start_request
+from app.db.monitoring import command_timing_listener
+from app.models.user import User, UserRole, UserStatus
+from app.core.security import get_password_hash, create_access_token
+
+
+def _event(command_name="find", duration_micros=1500):
+    return SimpleNamespace(command_name=command_name, duration_micros=duration_micros)
+
+
+class CountingCollection:
+    """Wrap a mongomock collection and report each call to the command listener"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            command_timing_listener.succeeded(_event(name))
+            return attr(*args, **kwargs)
+        return call
+
+
+def _request_logs(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records if record.name == "app.requests"]
+
+
+@pytest.fixture
+def admin_token(mock_db):
+    admin = User(
+        username="admin",
+        hashed_password=get_password_hash("admin123"),
+        role=UserRole.ADMIN,
+        status=UserStatus.ACTIVE
+    )
+    mock_db["users"].insert_one(admin.to_dict())
+    return create_access_token({
+        "sub": admin._id,
+        "username": admin.username,
+        "role": admin.role.value
+    })
+
+
+class TestCommandTimingListener:
+    """Test attribution of command events to the current request"""
+
+    def test_records_into_current_request(self):
+        """Test that events are counted only while a request is tracked"""
+        # Run in a copied context so the tracked request doesn't leak into other tests
+        contextvars.copy_context().run(self._check_recording)
+
+    def _check_recording(self):
+        command_timing_listener.succeeded(_event())  # no request - ignored
+        assert current_request() is None
+
+        stats = start_request("GET", "/x")
+        command_timing_listener.succeeded(_event("find", 2000))
+        command_timing_listener.failed(_event("aggregate", 1000))
+
+        assert current_request() is stats
+        assert stats.db_count == 2
+        assert stats.commands == {"find": 1, "aggregate": 1}
+        assert stats.db_ms == pytest.approx(3.0)
+        assert 'db;dur=3.0;desc="2 queries"' in stats.server_timing()
+
+
+class TestTimingMiddleware:
+    """Test Server-Timing header and structured request logs"""
+
+    def test_server_timing_header_and_log_line(self, client, mock_db, admin_token, caplog):
+        """Test header, route template and query count for a real endpoint"""
+        caplog.set_level(logging.INFO, logger="app.requests")
+
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = CountingCollection(mock_db["students"])
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/students/", headers={"Authorization": f"Bearer {admin_token}"})
+
+        assert response.status_code == 200
+        assert 'desc="1 queries"' in response.headers["Server-Timing"]
+        log = _request_logs(caplog)[-1]
+        assert log["route"] == "/api/v1/students/"
+        assert log["db_queries"] == 1
+        assert "too_many_queries" not in log
+
+    def test_fan_out_queries_are_counted_and_flagged(self, client, mock_db, admin_token, caplog):
+        """Test that queries run on fan_out threads count, and N+1-sized requests are flagged"""
+        caplog.set_level(logging.INFO, logger="app.requests")
+
+        with patch('app.api.v1.endpoints.dashboard.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps, \
+             patch('app.core.monitoring.config.REQUEST_QUERY_WARN_THRESHOLD', 3):
+            for name in ("users", "students", "lessons", "payments", "pricing"):
+                setattr(mock_mongo, f"{name}_collection", CountingCollection(mock_db[name]))
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+
+        assert response.status_code == 200
+        log = _request_logs(caplog)[-1]
+        assert log["db_queries"] == 5
+        assert log["too_many_queries"] is True
+        assert [r.levelname for r in caplog.records if r.name == "app.requests"][-1] == "WARNING"
@@ -0,0 +1,173 @@
+"""
+Tests for the slow query log and /admin/diagnostics/slow-queries
+"""
+import contextvars
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.monitoring import start_request
+from app.core.slow_queries import SlowQueryLog, command_shape, slow_query_log
+from app.db.monitoring import command_timing_listener
+from app.models.user import User, UserRole, UserStatus
+from app.core.security import get_password_hash, create_access_token
+
+
+COLLSCAN_EXPLAIN = {
+    "queryPlanner": {
+        "winningPlan": {
+            "stage": "COLLSCAN",
+            "filter": {"student_name": {"$regex": "secret"}},
+            "direction": "forward"
+        }
+    },
+    "executionStats": {
+        "nReturned": 3,
+        "totalKeysExamined": 0,
+        "totalDocsExamined": 100000,
+        "executionTimeMillis": 120
+    }
+}
+
+
+class FakeClient:
+    """Stands in for MongoClient: client[db].command(...) returns a canned explain"""
+
+    def __init__(self, explain):
+        self.explain = explain
+        self.commands = []
+
+    def __getitem__(self, database):
+        return SimpleNamespace(command=self._command)
+
+    def _command(self, command):
+        self.commands.append(command)
+        return self.explain
+
+
+def _find(student_name):
+    return {
+        "find": "payments",
+        "filter": {"student_name": {"$regex": student_name, "$options": "i"}, "amount": {"$in": [1, 2]}},
+        "lsid": {"id": "session"},
+        "$db": "institute_db",
+    }
+
+
+class TestShapes:
+    """Test value redaction"""
+
+    def test_command_shape_redacts_values(self):
+        """Test that literals are replaced and structure is kept"""
+        shape = command_shape("find", _find("Mohammed"))
+
+        assert shape == {
+            "filter": {"student_name": {"$regex": "?", "$options": "?"}, "amount": {"$in": ["?"]}},
+            "sort": None
+        }
+        assert "Mohammed" not in str(command_shape("aggregate", {
+            "pipeline": [{"$match": {"student_name": "Mohammed"}}, {"$group": {"_id": "$subject"}}]
+        }))
+        assert command_shape("insert", {"insert": "payments"}) is None
+
+
+class TestSlowQueryLog:
+    """Test thresholds, de-duplication, sampling and explain capture"""
+
+    def test_dedup_by_shape_and_threshold(self):
+        """Test that the same shape with different values is one entry"""
+        log = SlowQueryLog(max_entries=10, threshold_ms=100, sample_rate=0, start_worker=False)
+
+        log.observe("db", "payments", "find", _find("Ali"), 150, "/api/v1/payments/")
+        log.observe("db", "payments", "find", _find("Sara"), 250, "/api/v1/payments/student/{student_name}")
+        log.observe("db", "payments", "find", _find("Omar"), 50)  # fast - ignored
+        log.observe("db", "payments", "insert", {"insert": "payments"}, 500)  # not a query
+
+        entries = log.entries()
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry["count"] == 2
+        assert entry["avg_ms"] == 200
+        assert entry["max_ms"] == 250
+        assert entry["routes"] == ["/api/v1/payments/", "/api/v1/payments/student/{student_name}"]
+        assert entry["explain"] is None
+        assert "Ali" not in str(entries)
+
+    def test_explain_captured_once_per_shape(self):
+        """Test sampled explain capture, value-free summary and no repeat explains"""
+        client = FakeClient(COLLSCAN_EXPLAIN)
+        log = SlowQueryLog(max_entries=10, threshold_ms=100, sample_rate=1, start_worker=False)
+        log.attach(client)
+
+        log.observe("institute_db", "payments", "find", _find("Ali"), 150)
+        log.process_pending()
+        log.observe("institute_db", "payments", "find", _find("Sara"), 150)
+        log.process_pending()
+
+        assert len(client.commands) == 1
+        sent = client.commands[0]
+        assert sent["verbosity"] == "executionStats"
+        assert "lsid" not in sent["explain"] and "$db" not in sent["explain"]
+
+        explain = log.entries()[0]["explain"]
+        assert explain["plan_summary"] == "COLLSCAN"
+        assert explain["collection_scan"] is True
+        assert explain["total_docs_examined"] == 100000
+        assert "secret" not in str(explain)
+
+    def test_buffer_is_bounded(self):
+        """Test that the least recently seen shape is evicted"""
+        log = SlowQueryLog(max_entries=2, threshold_ms=0, sample_rate=0, start_worker=False)
+        for collection in ("a", "b", "c"):
+            log.observe("db", collection, "count", {"count": collection, "query": {}}, 1)
+
+        assert [entry["collection"] for entry in log.entries()] == ["c", "b"]
+
+
+class TestSlowQueryEndpoint:
+    """Test listener integration and GET /admin/diagnostics/slow-queries"""
+
+    @pytest.fixture(autouse=True)
+    def clean_log(self):
+        slow_query_log.clear()
+        yield
+        slow_query_log.clear()
+
+    def _slow_command_in_request(self):
+        start_request("GET", "/api/v1/payments/", {"route": SimpleNamespace(path="/api/v1/payments/")})
+        started = SimpleNamespace(
+            command_name="find", command=_find("Ali"), database_name="institute_db",
+            connection_id=("h", 1), request_id=99
+        )
+        command_timing_listener.started(started)
+        command_timing_listener.succeeded(SimpleNamespace(
+            command_name="find", duration_micros=5_000_000, connection_id=("h", 1), request_id=99
+        ))
+
+    def test_listener_feeds_log_and_endpoint_lists_it(self, client, mock_db):
+        """Test that a slow command shows up with its route for admins only"""
+        with patch.object(slow_query_log, "sample_rate", 0):
+            contextvars.copy_context().run(self._slow_command_in_request)
+
+        admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                     role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+        teacher = User(username="teacher", hashed_password=get_password_hash("teacher123"),
+                       role=UserRole.TEACHER, status=UserStatus.ACTIVE)
+        mock_db["users"].insert_many([admin.to_dict(), teacher.to_dict()])
+
+        def token(user):
+            return create_access_token({"sub": user._id, "username": user.username, "role": user.role.value})
+
+        with patch('app.api.deps.mongo_db') as mock_deps:
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get("/api/v1/admin/diagnostics/slow-queries",
+                                  headers={"Authorization": f"Bearer {token(admin)}"})
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 1
+            assert data["queries"][0]["collection"] == "payments"
+            assert data["queries"][0]["routes"] == ["/api/v1/payments/"]
+
+            response = client.get("/api/v1/admin/diagnostics/slow-queries",
+                                  headers={"Authorization": f"Bearer {token(teacher)}"})
+            assert response.status_code == 403
@@ -892,3 +892,69 @@ class TestPaymentEdgeCases:
             data = response.json()
             assert data["amount"] == 99.99
 
+
+
+class TestGetPaymentsProjection:
+    """Test GET /api/v1/payments/ count_only and fields modes"""
+    
+    def _setup(self, mock_db):
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(admin.to_dict())
+        for name, amount, day in [("Ali Hassan", 100.0, 5), ("Ali Hassan", 50.25, 10), ("Sara Lee", 75.0, 7)]:
+            Payment(
+                student_name=name,
+                amount=amount,
+                payment_date=datetime(2024, 3, day),
+                created_by=admin._id
+            ).save(mock_db["payments"])
+        return create_access_token({
+            "sub": admin._id,
+            "username": admin.username,
+            "role": admin.role.value
+        })
+    
+    def test_count_only_returns_totals_without_payments(self, client, mock_db):
+        """Test that count_only aggregates in the database"""
+        token = self._setup(mock_db)
+        
+        with patch('app.api.v1.endpoints.payments.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.payments_collection = mock_db["payments"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/payments/?count_only=true&student_name=ali",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total_payments"] == 2
+            assert data["total_amount"] == 150.25
+            assert "payments" not in data
+            assert data["filter"]["student_name"] == "ali"
+    
+    def test_fields_projection_keeps_total_amount(self, client, mock_db):
+        """Test that projected responses still compute the total amount"""
+        token = self._setup(mock_db)
+        
+        with patch('app.api.v1.endpoints.payments.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.payments_collection = mock_db["payments"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/payments/?fields=student_name",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total_payments"] == 3
+            assert data["total_amount"] == 225.25
+            assert data["payments"][0] == {"student_name": "Ali Hassan"}
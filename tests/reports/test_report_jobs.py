@@ -0,0 +1,146 @@
+"""
+Tests for background report jobs (Celery in eager mode)
+"""
+import gzip
+import pytest
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core import reports
+from app.core.security import get_password_hash, create_access_token
+from app.models.lesson import Lesson, LessonType, LessonStatus, EducationLevel
+from app.models.user import User, UserRole, UserStatus
+
+
+def _token(user):
+    return create_access_token({"sub": user._id, "username": user.username, "role": user.role.value})
+
+
+@pytest.fixture
+def report_env(mock_db):
+    """Admin, one teacher with two completed lessons, and every mongo_db patched"""
+    admin = User(username="admin", hashed_password=get_password_hash("admin123"),
+                 role=UserRole.ADMIN, status=UserStatus.ACTIVE)
+    teacher = User(username="teacher", hashed_password=get_password_hash("teacher123"),
+                   role=UserRole.TEACHER, status=UserStatus.ACTIVE)
+    mock_db["users"].insert_many([admin.to_dict(), teacher.to_dict()])
+    for day in (5, 6):
+        mock_db["lessons"].insert_one(Lesson(
+            teacher_id=teacher._id, teacher_name="Teacher", subject="Math",
+            education_level=EducationLevel.MIDDLE, lesson_type=LessonType.INDIVIDUAL,
+            scheduled_date=datetime(2025, 3, day), duration_minutes=90, status=LessonStatus.COMPLETED
+        ).to_dict())
+
+    with ExitStack() as stack:
+        for target in ('app.api.v1.endpoints.dashboard.mongo_db', 'app.core.reports.mongo_db',
+                       'app.core.pricing.mongo_db', 'app.api.deps.mongo_db'):
+            mocked = stack.enter_context(patch(target))
+            for name in ("users", "students", "lessons", "payments", "pricing", "report_jobs"):
+                setattr(mocked, f"{name}_collection", mock_db["db"][name])
+        yield {
+            "db": mock_db,
+            "admin_headers": {"Authorization": f"Bearer {_token(admin)}"},
+            "teacher_headers": {"Authorization": f"Bearer {_token(teacher)}"},
+        }
+
+
+class TestReportJobs:
+    """Test POST /reports/{kind}, GET /reports/{job_id} and the result download"""
+
+    def test_job_runs_and_result_is_compressed(self, client, report_env):
+        """Test the enqueue -> poll -> download flow"""
+        headers = report_env["admin_headers"]
+
+        response = client.post("/api/v1/reports/teacher-earnings?month=3&year=2025", headers=headers)
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "succeeded"
+        assert job["params"] == {"month": 3, "year": 2025}
+
+        polled = client.get(f"/api/v1/reports/{job['job_id']}", headers=headers).json()
+        assert polled["status"] == "succeeded"
+        assert polled["compressed_bytes"] > 0
+        assert "result" not in polled
+
+        result = client.get(polled["result_url"], headers=headers)
+        assert result.status_code == 200
+        assert result.headers["content-encoding"] == "gzip"
+        report = result.json()
+        assert report["total_teachers"] == 1
+        assert report["teachers"][0]["total_hours"] == 3.0
+
+        stored = report_env["db"]["db"]["report_jobs"].find_one({"_id": job["job_id"]})
+        assert gzip.decompress(stored["result"]) == result.content
+        assert stored["expires_at"] > datetime.utcnow()
+
+    def test_plain_client_gets_decompressed_json(self, client, report_env):
+        """Test that clients without gzip support get plain JSON"""
+        headers = report_env["admin_headers"]
+        job = client.post("/api/v1/reports/students-payment-status", headers=headers).json()
+
+        response = client.get(job["result_url"], headers={**headers, "Accept-Encoding": "identity"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert "students" in response.json()
+
+    def test_failed_builder_marks_job_failed(self, client, report_env):
+        """Test that errors are stored on the job instead of breaking the request"""
+        def broken(params, admin):
+            raise RuntimeError("boom")
+
+        with patch.dict(reports.REPORT_KINDS, {"teacher-earnings": (broken, {"month", "year"})}):
+            job = client.post("/api/v1/reports/teacher-earnings", headers=report_env["admin_headers"]).json()
+
+        assert job["status"] == "failed"
+        assert job["error"] == "boom"
+        response = client.get(f"/api/v1/reports/{job['job_id']}/result", headers=report_env["admin_headers"])
+        assert response.status_code == 409
+
+    def test_in_flight_job_is_reused(self, client, report_env):
+        """Test that an identical queued/running job is returned instead of a new one"""
+        report_env["db"]["db"]["report_jobs"].insert_one({
+            "_id": "running-job", "kind": "teacher-earnings", "params": {"month": 3, "year": 2025},
+            "status": "running", "created_at": datetime.utcnow(), "requested_by": "someone",
+            "expires_at": datetime.utcnow() + timedelta(days=1),
+        })
+
+        with patch('app.api.v1.endpoints.reports.run_report') as mock_task:
+            response = client.post("/api/v1/reports/teacher-earnings?year=2025&month=3",
+                                   headers=report_env["admin_headers"])
+
+        assert response.json()["job_id"] == "running-job"
+        mock_task.delay.assert_not_called()
+
+    def test_unknown_expired_and_forbidden(self, client, report_env):
+        """Test unknown kinds, expired jobs and non-admin access"""
+        headers = report_env["admin_headers"]
+        assert client.post("/api/v1/reports/nope", headers=headers).status_code == 404
+
+        report_env["db"]["db"]["report_jobs"].insert_one({
+            "_id": "old-job", "kind": "teacher-earnings", "params": {}, "status": "succeeded",
+            "created_at": datetime.utcnow(), "expires_at": datetime.utcnow() - timedelta(seconds=1),
+        })
+        assert client.get("/api/v1/reports/old-job", headers=headers).status_code == 404
+
+        response = client.post("/api/v1/reports/teacher-earnings", headers=report_env["teacher_headers"])
+        assert response.status_code == 403
+
+    def test_redelivered_job_is_reclaimed_once_stale(self, report_env):
+        """Test that a job left running by a lost worker is re-run, and a live one is not"""
+        jobs = report_env["db"]["db"]["report_jobs"]
+        admin = report_env["db"]["users"].find_one({"username": "admin"})
+        for job_id, started in (("lost-job", timedelta(hours=1)), ("live-job", timedelta(seconds=5))):
+            jobs.insert_one({
+                "_id": job_id, "kind": "teacher-earnings", "params": {"month": 3, "year": 2025},
+                "status": "running", "attempts": 1, "started_at": datetime.utcnow() - started,
+                "created_at": datetime.utcnow() - started, "requested_by": admin["_id"],
+                "requested_by_username": "admin", "expires_at": datetime.utcnow() + timedelta(days=1),
+            })
+
+        reports.run_job("lost-job")
+        reports.run_job("live-job")
+
+        lost, live = jobs.find_one({"_id": "lost-job"}), jobs.find_one({"_id": "live-job"})
+        assert (lost["status"], lost["attempts"]) == ("succeeded", 2)
+        assert (live["status"], live["attempts"]) == ("running", 1)
@@ -0,0 +1,108 @@
+"""
+Tests for the in-memory student name autocomplete index
+"""
+import pytest
+from unittest.mock import patch
+from app.core.autocomplete import StudentNameIndex
+from app.core.cache_versions import bump_version, get_version
+from app.models.user import User, UserRole, UserStatus
+from app.models.student import Student
+from app.core.security import get_password_hash, create_access_token
+
+
+def _names(results):
+    return [entry["full_name"] for entry in results]
+
+
+class TestStudentNameIndex:
+    """Test lookups and incremental maintenance"""
+
+    def test_index_matches_any_word_prefix_ranked(self, mock_db):
+        """Test that suggestions match the start of any word, best match first"""
+        for name in ["Mohammed Ali", "Ali Hassan", "Alice Smith", "Omar Said"]:
+            Student(full_name=name).save(mock_db["students"])
+
+        index = StudentNameIndex(refresh_interval_seconds=60)
+        results = index.search("Ali", mock_db["students"])
+
+        assert _names(results) == ["Ali Hassan", "Alice Smith", "Mohammed Ali"]
+
+    def test_index_skips_inactive_students_and_respects_limit(self, mock_db):
+        """Test that only active students are suggested"""
+        Student(full_name="Sara One").save(mock_db["students"])
+        Student(full_name="Sara Two").save(mock_db["students"])
+        Student(full_name="Sara Gone", is_active=False).save(mock_db["students"])
+
+        index = StudentNameIndex(refresh_interval_seconds=60)
+
+        assert _names(index.search("sara", mock_db["students"], limit=1)) == ["Sara One"]
+        assert "Sara Gone" not in _names(index.search("sara", mock_db["students"]))
+
+    def test_incremental_updates_without_rebuild(self, mock_db):
+        """Test add/update/remove keep the index current without reading Mongo"""
+        index = StudentNameIndex(refresh_interval_seconds=60)
+        assert index.search("x", mock_db["students"]) == []
+
+        student = Student(full_name="New Student")
+        student.save(mock_db["students"])
+        index.add(student, mock_db["students"])
+        assert _names(index.search("new", mock_db["students"])) == ["New Student"]
+
+        student.full_name = "Renamed Student"
+        index.update(student, mock_db["students"])
+        assert index.search("new", mock_db["students"]) == []
+        assert _names(index.search("ren", mock_db["students"])) == ["Renamed Student"]
+
+        index.remove(student._id, mock_db["students"])
+        assert index.search("ren", mock_db["students"]) == []
+
+    def test_rebuilds_when_another_worker_bumps_version(self, mock_db):
+        """Test version-poll coherence across workers"""
+        index = StudentNameIndex(refresh_interval_seconds=0)
+        assert index.search("late", mock_db["students"]) == []
+
+        # Another worker writes a student and bumps the shared version
+        Student(full_name="Late Arrival").save(mock_db["students"])
+        version_before = get_version(mock_db["students"])
+        bump_version(mock_db["students"])
+
+        assert get_version(mock_db["students"]) == version_before + 1
+        assert _names(index.search("late", mock_db["students"])) == ["Late Arrival"]
+
+
+class TestAutocompleteEndpoint:
+    """Test GET /students/autocomplete"""
+
+    def test_autocomplete_reflects_created_student(self, client, mock_db):
+        """Test that a student created through the API is suggested"""
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(admin.to_dict())
+        Student(full_name="Existing Student").save(mock_db["students"])
+
+        token = create_access_token({
+            "sub": admin._id,
+            "username": admin.username,
+            "role": admin.role.value
+        })
+
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = mock_db["students"]
+            mock_deps.users_collection = mock_db["users"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            response = client.get("/api/v1/students/autocomplete?q=exi", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["total"] == 1
+
+            client.post("/api/v1/students/", json={"full_name": "Exited Student"}, headers=headers)
+
+            response = client.get("/api/v1/students/autocomplete?q=exi", headers=headers)
+            data = response.json()
+            assert data["total"] == 2
+            assert {s["full_name"] for s in data["students"]} == {"Existing Student", "Exited Student"}
@@ -511,3 +511,103 @@ class TestStudentEdgeCases:
             
             assert response.status_code == 200
             assert response.json()["total"] >= 1
+
+
+class TestStudentListProjection:
+    """Test GET /students/ count_only and fields modes"""
+    
+    def _admin_token(self, mock_db):
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(admin.to_dict())
+        return create_access_token({
+            "sub": admin._id,
+            "username": admin.username,
+            "role": admin.role.value
+        })
+    
+    def test_get_students_count_only(self, client, mock_db):
+        """Test that count_only returns only the total"""
+        token = self._admin_token(mock_db)
+        Student(full_name="Active One").save(mock_db["students"])
+        Student(full_name="Inactive One", is_active=False).save(mock_db["students"])
+        
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = mock_db["students"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/students/?count_only=true",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            assert response.json() == {"total": 1}
+    
+    def test_get_students_with_fields_projection(self, client, mock_db):
+        """Test that fields returns only id and name pairs"""
+        token = self._admin_token(mock_db)
+        student = Student(full_name="Dropdown Student", phone="+123")
+        student.save(mock_db["students"])
+        
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = mock_db["students"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/students/?fields=id,full_name",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 1
+            assert data["students"] == [{"id": student._id, "full_name": "Dropdown Student"}]
+    
+    def test_get_students_with_unknown_field_fails(self, client, mock_db):
+        """Test that unknown fields are rejected"""
+        token = self._admin_token(mock_db)
+        
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = mock_db["students"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/students/?fields=id,password",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 400
+    
+    def test_sparse_fields_are_not_padded_by_the_list_model(self, client, mock_db):
+        """Test that requesting every required field still returns only those fields"""
+        token = self._admin_token(mock_db)
+        student = Student(full_name="Sparse Student", phone="+123")
+        student.save(mock_db["students"])
+        
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = mock_db["students"]
+            mock_deps.users_collection = mock_db["users"]
+            
+            response = client.get(
+                "/api/v1/students/?fields=id,full_name,is_active,created_at",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            assert response.status_code == 200
+            assert set(response.json()["students"][0]) == {"id", "full_name", "is_active", "created_at"}
+    
+    def test_list_response_model_is_documented(self, client):
+        """Test that the default list shape stays in the OpenAPI schema"""
+        schema = client.get("/openapi.json").json()
+        
+        response_schema = schema["paths"]["/api/v1/students/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert {"$ref": "#/components/schemas/StudentListResponse"} in response_schema["anyOf"]
@@ -0,0 +1,148 @@
+"""
+Tests for the prefix search subsystem (search_keys) and ranked student search
+"""
+import pytest
+from unittest.mock import patch
+from app.core.search import (
+    normalize_text,
+    build_search_keys,
+    build_search_filter,
+    backfill_search_keys,
+    search_documents,
+)
+from app.models.user import User, UserRole, UserStatus
+from app.models.student import Student
+from app.models.payment import Payment
+from app.core.security import get_password_hash, create_access_token
+from datetime import datetime
+
+
+class TestSearchKeys:
+    """Test normalization and key generation"""
+
+    def test_normalize_text_casefolds_and_strips_diacritics(self):
+        """Test that case and diacritics don't affect matching"""
+        assert normalize_text("  José  ÁLVAREZ ") == "jose alvarez"
+        assert normalize_text("أحمد") == normalize_text("احمد")
+        assert normalize_text(None) == ""
+
+    def test_build_search_keys_contains_token_prefixes(self):
+        """Test that every prefix of every token is indexed"""
+        keys = build_search_keys("Sara Lee", None)
+
+        assert {"s", "sa", "sar", "sara", "l", "le", "lee"} == set(keys)
+
+    def test_build_search_filter_for_empty_query_matches_nothing(self, mock_db):
+        """Test that a query without tokens returns no documents"""
+        mock_db["students"].insert_one(Student(full_name="Sara Lee").to_dict())
+
+        assert mock_db["students"].count_documents(build_search_filter("!!", ("full_name",))) == 0
+
+    def test_model_documents_carry_search_keys(self):
+        """Test that models write search keys on insert"""
+        student = Student(full_name="Sara Lee").to_dict()
+        user = User(username="jdoe", hashed_password="x", first_name="John", last_name="Doe").to_dict()
+        payment = Payment(student_name="Sara Lee", amount=10, payment_date=datetime.utcnow(), created_by="a").to_dict()
+
+        assert "sar" in student["search_keys"]
+        assert {"jd", "jo", "do"} <= set(user["search_keys"])
+        assert "lee" in payment["search_keys"]
+
+
+class TestSearchDocuments:
+    """Test ranked prefix search against a collection"""
+
+    def test_search_ranks_exact_and_prefix_matches_first(self, mock_db):
+        """Test ranking: exact name, then names starting with the query, then word matches"""
+        for name in ["Ali Hassan", "Mohammed Ali", "Ali", "Alina Omar"]:
+            Student(full_name=name).save(mock_db["students"])
+
+        results = search_documents(mock_db["students"], "ali", Student.SEARCH_FIELDS)
+
+        assert [doc["full_name"] for doc in results] == ["Ali", "Ali Hassan", "Alina Omar", "Mohammed Ali"]
+
+    def test_search_requires_every_query_token(self, mock_db):
+        """Test that multi-word queries match all words"""
+        for name in ["Sara Lee", "Sara Cohen"]:
+            Student(full_name=name).save(mock_db["students"])
+
+        results = search_documents(mock_db["students"], "sa le", Student.SEARCH_FIELDS)
+
+        assert [doc["full_name"] for doc in results] == ["Sara Lee"]
+
+    def test_search_respects_limit(self, mock_db):
+        """Test that the limit is applied after ranking"""
+        for i in range(5):
+            Student(full_name=f"Student {i}").save(mock_db["students"])
+
+        results = search_documents(mock_db["students"], "student", Student.SEARCH_FIELDS, limit=2)
+
+        assert len(results) == 2
+
+    def test_exact_match_survives_candidate_limit(self, mock_db):
+        """Test that an exact name beyond the first SEARCH_CANDIDATE_LIMIT prefix matches still ranks first"""
+        mock_db["students"].insert_many([Student(full_name=f"Alice {i}").to_dict() for i in range(600)])
+        mock_db["students"].insert_one(Student(full_name="Ali").to_dict())
+
+        results = search_documents(mock_db["students"], "ali", Student.SEARCH_FIELDS, limit=5)
+
+        assert results[0]["full_name"] == "Ali"
+        assert results == search_documents(mock_db["students"], "ali", Student.SEARCH_FIELDS, limit=5)
+
+    def test_search_matches_documents_without_keys_and_backfill_adds_them(self, mock_db):
+        """Test regex fallback for legacy documents and the backfill"""
+        mock_db["students"].insert_one({"_id": "legacy", "full_name": "Legacy Student", "is_active": True})
+
+        assert len(search_documents(mock_db["students"], "legacy", Student.SEARCH_FIELDS)) == 1
+
+        assert backfill_search_keys(mock_db["students"], Student.SEARCH_FIELDS) == 1
+        assert "leg" in mock_db["students"].find_one({"_id": "legacy"})["search_keys"]
+        assert backfill_search_keys(mock_db["students"], Student.SEARCH_FIELDS) == 0
+
+    def test_update_in_db_refreshes_search_keys(self, mock_db):
+        """Test that renaming a student refreshes its search keys"""
+        student = Student(full_name="Old Name")
+        student.save(mock_db["students"])
+
+        student.update_in_db(mock_db["students"], {"full_name": "New Name"})
+
+        keys = mock_db["students"].find_one({"_id": student._id})["search_keys"]
+        assert "new" in keys
+        assert "old" not in keys
+
+
+class TestStudentSearchEndpoint:
+    """Test GET /students/search ranking and limit"""
+
+    def test_search_endpoint_returns_ranked_limited_results(self, client, mock_db):
+        """Test that the search endpoint returns the best matches first"""
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            role=UserRole.ADMIN,
+            status=UserStatus.ACTIVE
+        )
+        mock_db["users"].insert_one(admin.to_dict())
+        for name in ["Mohammed Ali", "Ali", "Ali Hassan"]:
+            Student(full_name=name).save(mock_db["students"])
+
+        token = create_access_token({
+            "sub": admin._id,
+            "username": admin.username,
+            "role": admin.role.value
+        })
+
+        with patch('app.api.v1.endpoints.students.mongo_db') as mock_mongo, \
+             patch('app.api.deps.mongo_db') as mock_deps:
+            mock_mongo.students_collection = mock_db["students"]
+            mock_deps.users_collection = mock_db["users"]
+
+            response = client.get(
+                "/api/v1/students/search?name=ALI&limit=2",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 2
+            assert [s["full_name"] for s in data["students"]] == ["Ali", "Ali Hassan"]